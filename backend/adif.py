@@ -0,0 +1,186 @@
+"""
+ADIF 3.1.4 encoding and decoding helpers.
+
+Kept free of FastAPI/database concerns so exports, imports and the
+micro-benchmarks in benchmarks/micro.py can share them.
+"""
+import codecs
+import re
+from datetime import date, datetime, time
+from typing import AsyncIterator
+
+from backend.bands import band_for, format_mhz, mhz_to_hz
+
+ADIF_VERSION = "3.1.4"
+PROGRAM_ID = "HamLog"
+
+
+def field(name: str, value) -> str:
+    """Encode one ADIF data-specifier (``<NAME:len>value ``), or "" if empty."""
+    if value is None:
+        return ""
+    s = value.strip() if isinstance(value, str) else str(value).strip()
+    if not s:
+        return ""
+    return f"<{name}:{len(s)}>{s} "
+
+
+def header(now: datetime) -> str:
+    """ADIF file header, including the trailing blank line."""
+    return (
+        f"HamLog ADIF Export — {now.strftime('%Y%m%d %H%M%SZ')}\n"
+        f"<ADIF_VER:{len(ADIF_VERSION)}>{ADIF_VERSION} "
+        f"<PROGRAMID:{len(PROGRAM_ID)}>{PROGRAM_ID} <EOH>\n"
+        "\n"
+    )
+
+
+def qso_record(qso) -> str:
+    """Encode a QSO (any object with the QSO model's attributes) as one ADIF record."""
+    parts = [field("CALL", qso.call)]
+    if qso.qso_date:
+        parts.append(field("QSO_DATE", qso.qso_date.strftime("%Y%m%d")))
+    if qso.time_on:
+        parts.append(field("TIME_ON", qso.time_on.strftime("%H%M%S")))
+    parts.append(field("BAND", qso.band))
+    if qso.freq_hz is not None:
+        parts.append(field("FREQ", format_mhz(qso.freq_hz)))
+    parts += (
+        field("MODE", qso.mode),
+        field("RST_SENT", qso.rst_sent),
+        field("RST_RCVD", qso.rst_rcvd),
+        field("NAME", qso.name),
+        field("QTH", qso.qth),
+        field("GRIDSQUARE", qso.grid),
+        field("DXCC", qso.dxcc),
+        field("STX", qso.stx),
+        field("SRX_STRING", qso.exch_rcvd),
+        field("COMMENT", qso.notes),
+        "<EOR>",
+    )
+    return "".join(parts)
+
+
+# ── Decoding ───────────────────────────────────────────────────────────────────
+
+_TAG = re.compile(r"<([A-Za-z0-9_]+)(?::(\d+)(?::[A-Za-z])?)?>")
+
+
+class Reader:
+    """
+    Incremental ADIF parser: ``feed`` text as it arrives and get back the
+    records it completed, as ``{FIELD: value}`` dicts with upper-case names.
+
+    Only a partial tag or value is kept between calls, so memory does not
+    grow with the file. Header fields (before ``<EOH>``) are discarded.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._record: dict[str, str] = {}
+
+    def feed(self, text: str) -> list[dict[str, str]]:
+        buf = self._buf + text
+        records = []
+        pos = 0
+        while True:
+            m = _TAG.search(buf, pos)
+            if m is None:
+                break
+            name = m.group(1).upper()
+            if m.group(2) is None:
+                pos = m.end()
+                if name == "EOR":
+                    if self._record:
+                        records.append(self._record)
+                    self._record = {}
+                elif name == "EOH":
+                    self._record = {}
+                continue
+            end = m.end() + int(m.group(2))
+            if end > len(buf):
+                pos = m.start()
+                break
+            self._record[name] = buf[m.end():end]
+            pos = end
+        rest = buf.find("<", pos)
+        self._buf = buf[rest:] if rest >= 0 else ""
+        return records
+
+
+async def read_records(
+    stream, batch: int = 5_000, chunk_size: int = 1 << 20
+) -> AsyncIterator[list[dict[str, str]]]:
+    """Decoded records from ``stream`` (anything with an async ``read(n)``), in batches."""
+    reader = Reader()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending: list[dict[str, str]] = []
+    while chunk := await stream.read(chunk_size):
+        pending += reader.feed(decoder.decode(chunk))
+        if len(pending) >= batch:
+            yield pending
+            pending = []
+    pending += reader.feed(decoder.decode(b"", final=True))
+    if pending:
+        yield pending
+
+
+# Longest value each QSO column takes
+_LIMITS = {
+    "call": 20, "band": 10, "mode": 10, "rst_sent": 10, "rst_rcvd": 10,
+    "name": 100, "qth": 200, "grid": 8, "dxcc": 50, "exch_rcvd": 40,
+}
+_MODE_ALIASES = {"USB": "SSB", "LSB": "SSB"}
+
+
+def parse_date(value: str | None) -> date | None:
+    try:
+        return datetime.strptime((value or "").strip(), "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def parse_time(value: str | None) -> time | None:
+    v = (value or "").strip()
+    try:
+        return datetime.strptime(v, "%H%M%S" if len(v) == 6 else "%H%M").time()
+    except ValueError:
+        return None
+
+
+def qso_fields(record: dict[str, str]) -> dict | None:
+    """QSO model fields from one decoded record; None if it has no usable CALL."""
+    call = (record.get("CALL") or "").strip().upper()
+    if not call:
+        return None
+    try:
+        freq_hz = mhz_to_hz(float(record["FREQ"])) if record.get("FREQ") else None
+    except ValueError:
+        freq_hz = None
+    mode = (record.get("SUBMODE") or record.get("MODE") or "").strip().upper()
+    grid = (record.get("GRIDSQUARE") or "").strip()
+    try:
+        stx = int(record["STX"]) if record.get("STX") else None
+    except ValueError:
+        stx = None
+    fields = {
+        "call": call,
+        "qso_date": parse_date(record.get("QSO_DATE")),
+        "time_on": parse_time(record.get("TIME_ON")),
+        "freq_hz": freq_hz,
+        "band": band_for(freq_hz) or (record.get("BAND") or "").strip().lower() or None,
+        "mode": _MODE_ALIASES.get(mode, mode) or None,
+        "rst_sent": record.get("RST_SENT"),
+        "rst_rcvd": record.get("RST_RCVD"),
+        "name": record.get("NAME"),
+        "qth": record.get("QTH"),
+        "grid": grid[:4].upper() + grid[4:].lower() if grid else None,
+        "dxcc": record.get("COUNTRY") or record.get("DXCC"),
+        "notes": record.get("COMMENT") or record.get("NOTES"),
+        "stx": stx,
+        "exch_rcvd": record.get("SRX_STRING"),
+    }
+    for name, limit in _LIMITS.items():
+        if isinstance(fields[name], str):
+            fields[name] = fields[name].strip()[:limit] or None
+    return fields
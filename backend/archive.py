@@ -0,0 +1,161 @@
+"""
+Hot/cold tiering of the QSO log.
+
+Most reads touch the last few months of a log, so QSOs dated more than
+``ARCHIVE_AFTER_DAYS`` ago move from ``qso`` to ``qso_archive``. The archive
+has the same columns and IDs but one index instead of ten, so the hot table
+and its indexes hold only recent contacts.
+
+Reads that span the whole log go through ``all_qsos()``. It is ``QSO`` mapped
+over ``qso UNION ALL qso_archive``, so filters, ordering and limits are
+written as if there were one table. SQLite and PostgreSQL both push the WHERE
+terms into each arm, so the hot arm keeps its planned index. Archiving moves
+rows rather than deleting them, so the statistics counters and award bitsets
+already count archived QSOs and are left alone.
+
+Some QSOs stay hot: those attached to a contest entry (so scoring and
+Cabrillo export keep working) and those without a date.
+
+``archive_qsos`` works through the log user by user on ``ix_qso_user_date``.
+Each batch of ``ARCHIVE_BATCH_SIZE`` rows is moved in one short transaction,
+``INSERT … SELECT`` then ``DELETE``, so no lock is held for long. Every
+worker process runs ``worker`` from the app lifespan, and a shared-store
+lease limits each host to one pass per ``ARCHIVE_INTERVAL_SECONDS``.
+``python -m backend.cli archive`` runs a pass on demand.
+"""
+import asyncio
+import logging
+import os
+import uuid
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import delete, insert, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+import backend.database as database
+from backend.config import settings
+from backend.models import QSO, QSOArchive, User
+from backend.shared_state import shared_store
+
+logger = logging.getLogger(__name__)
+
+USER_PAGE = 1_000
+_LEASE_KEY = "qso-archive"
+_COLUMNS = [column.name for column in QSO.__table__.columns]
+
+
+def all_qsos() -> type[QSO]:
+    """``QSO`` over both tiers; archived rows load as ``QSO`` objects, for reading only."""
+    tiers = union_all(
+        select(*(QSO.__table__.c[name] for name in _COLUMNS)),
+        select(*(QSOArchive.__table__.c[name] for name in _COLUMNS)),
+    ).subquery("qsos")
+    return aliased(QSO, tiers, name="qsos")
+
+
+def archive_cutoff(days: int | None = None) -> date:
+    """QSOs dated before this belong in the archive (default: ``ARCHIVE_AFTER_DAYS`` ago)."""
+    if days is None:
+        days = settings.archive_after_days
+    return datetime.utcnow().date() - timedelta(days=days)
+
+
+# ── Moving rows ────────────────────────────────────────────────────────────────
+
+
+async def _move(session: AsyncSession, ids: list[uuid.UUID]) -> None:
+    copy = select(*(QSO.__table__.c[name] for name in _COLUMNS)).where(QSO.id.in_(ids))
+    await session.execute(insert(QSOArchive).from_select(_COLUMNS, copy))
+    await session.execute(
+        delete(QSO).where(QSO.id.in_(ids)), execution_options={"synchronize_session": False}
+    )
+
+
+async def archive_user(
+    session: AsyncSession, user_id: uuid.UUID, cutoff: date, batch_size: int | None = None
+) -> int:
+    """Move ``user_id``'s QSOs dated before ``cutoff`` to the archive, one commit per batch."""
+    batch_size = batch_size or settings.archive_batch_size
+    moved, after = 0, None
+    while True:
+        q = (
+            select(QSO.id, QSO.qso_date)
+            .where(QSO.created_by == user_id, QSO.qso_date < cutoff, QSO.contest_entry_id.is_(None))
+            .order_by(QSO.qso_date)
+            .limit(batch_size)
+            # Rows being edited right now wait for the next pass
+            .with_for_update(skip_locked=True)
+        )
+        if after is not None:
+            # Contest QSOs stay behind; don't rescan them from the start each batch
+            q = q.where(QSO.qso_date >= after)
+        rows = (await session.execute(q)).all()
+        if rows:
+            await _move(session, [row.id for row in rows])
+        await session.commit()
+        moved += len(rows)
+        if len(rows) < batch_size:
+            return moved
+        after = rows[-1].qso_date
+
+
+async def archive_qsos(session: AsyncSession, cutoff: date | None = None) -> int:
+    """One archiving pass over every user; returns how many QSOs moved."""
+    cutoff = cutoff or archive_cutoff()
+    moved, after = 0, None
+    while True:
+        q = select(User.id).order_by(User.id).limit(USER_PAGE)
+        if after is not None:
+            q = q.where(User.id > after)
+        user_ids = (await session.execute(q)).scalars().all()
+        await session.commit()
+        for user_id in user_ids:
+            moved += await archive_user(session, user_id, cutoff)
+        if len(user_ids) < USER_PAGE:
+            return moved
+        after = user_ids[-1]
+
+
+# ── Worker ─────────────────────────────────────────────────────────────────────
+
+
+class ArchiveWorker:
+    """Runs an archiving pass every ``ARCHIVE_INTERVAL_SECONDS``; one per worker process."""
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="qso-archive")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("QSO archiving pass failed")
+            await asyncio.sleep(settings.archive_interval_seconds)
+
+    async def run_once(self) -> int:
+        """A pass, unless another process on this host has run one within the interval."""
+        lease = await shared_store().add(_LEASE_KEY, str(os.getpid()), settings.archive_interval_seconds)
+        if not lease:
+            return 0
+        async with database.async_session_maker() as session:
+            moved = await archive_qsos(session)
+        if moved:
+            logger.info("archived %d QSOs dated before %s", moved, archive_cutoff())
+        return moved
+
+
+worker = ArchiveWorker()
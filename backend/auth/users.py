@@ -1,6 +1,7 @@
 import uuid
 from typing import AsyncGenerator
 
+import jwt
 from fastapi import Depends
 from fastapi_users import FastAPIUsers, UUIDIDMixin
 from fastapi_users.authentication import (
@@ -9,6 +10,7 @@ from fastapi_users.authentication import (
     JWTStrategy,
 )
 from fastapi_users.db import SQLAlchemyUserDatabase
+from fastapi_users.jwt import decode_jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.config import settings
@@ -35,6 +37,22 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
         if len(password) < 8:
             raise InvalidPasswordException("Password must be at least 8 characters.")
 
+    async def on_after_update(self, user, update_dict, request=None) -> None:
+        if "grid" in update_dict:
+            # Distances are measured from the operator's grid — recompute them
+            from backend.geo import recompute_geo
+            from backend.sessions import note_write
+
+            await recompute_geo(self.user_db.session, user.id)
+            # The rewritten distances are on the primary only for now
+            note_write(user.id)
+
+    async def on_after_login(self, user, request=None, response=None) -> None:
+        # Prefetch the calls this operator is likely to look up next
+        from backend.warming import WarmJob, worker
+
+        worker.enqueue(WarmJob(user.id, throttle=True))
+
 
 async def get_user_manager(user_db=Depends(get_user_db)):
     yield UserManager(user_db)
@@ -64,3 +82,28 @@ auth_backend = AuthenticationBackend(
 fastapi_users = FastAPIUsers[User, uuid.UUID](get_user_manager, [auth_backend])
 
 current_active_user = fastapi_users.current_user(active=True)
+current_superuser = fastapi_users.current_user(active=True, superuser=True)
+
+
+# ── Lightweight token decoding (middleware use) ──────────────────────────────
+
+def user_id_from_authorization(header: str | None) -> uuid.UUID | None:
+    """
+    Return the user ID carried by a ``Bearer`` Authorization header, or None.
+
+    Only the JWT signature and audience are checked — no database round trip —
+    so middleware can key on the caller cheaply. Endpoints must still depend on
+    ``current_active_user`` for real authentication.
+    """
+    if not header or not header.startswith("Bearer "):
+        return None
+    try:
+        data = decode_jwt(
+            header[7:],
+            settings.secret_key,
+            ["fastapi-users:auth"],
+            algorithms=["HS256"],
+        )
+        return uuid.UUID(data["sub"])
+    except (jwt.PyJWTError, KeyError, ValueError):
+        return None
@@ -0,0 +1,491 @@
+"""
+Award progress tracking with compact per-user bitsets.
+
+Three awards are tracked:
+
+  * ``dxcc`` — DXCC entities. Entity names have no natural numbering, so each
+    distinct name gets a permanent bit from the shared ``award_key`` registry.
+  * ``was``  — Worked All States: the 50 US states, read from the trailing
+    ``, ST`` of the QTH on QSOs whose DXCC entity is the United States.
+  * ``grid`` — Maidenhead 4-character fields (``FN31``), 18×18×10×10 bits.
+
+For each user and award there is one ``award_bitset`` row per band/mode slot:
+any band & any mode, per band, per mode class (CW / PHONE / DIGITAL) and per
+band + mode class. Each row carries a *worked* and a *confirmed* bitset.
+Recording a QSO sets one bit in at most four rows; asking "is this a new one?"
+reads those four rows by primary key and tests a bit — constant time
+regardless of log size.
+
+Alongside each bit, ``award_support`` counts the QSOs behind it per slot.
+Removing a QSO decrements its counts and clears a bit only once its count
+reaches zero, so deletes and edits stay constant time too.
+"""
+import uuid
+from collections import defaultdict
+from typing import Iterable
+
+from sqlalchemy import bindparam, case, delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database import dialect_insert
+from backend.models import QSO, AwardBitset, AwardKey, AwardSupport, QSOArchive, User
+from backend.schemas import AwardNeed, AwardProgress, AwardSlotProgress
+
+AWARDS = ("dxcc", "was", "grid")
+
+US_STATES = (
+    "AK", "AL", "AR", "AZ", "CA", "CO", "CT", "DE", "FL", "GA",
+    "HI", "IA", "ID", "IL", "IN", "KS", "KY", "LA", "MA", "MD",
+    "ME", "MI", "MN", "MO", "MS", "MT", "NC", "ND", "NE", "NH",
+    "NJ", "NM", "NV", "NY", "OH", "OK", "OR", "PA", "RI", "SC",
+    "SD", "TN", "TX", "UT", "VA", "VT", "WA", "WI", "WV", "WY",
+)
+_STATE_BITS = {state: bit for bit, state in enumerate(US_STATES)}
+_US_ENTITIES = {"UNITED STATES", "UNITED STATES OF AMERICA", "USA", "US"}
+
+MODE_CLASSES = {
+    "CW": "CW",
+    "SSB": "PHONE", "AM": "PHONE", "FM": "PHONE",
+    "FT8": "DIGITAL", "FT4": "DIGITAL", "RTTY": "DIGITAL", "PSK31": "DIGITAL", "DIGI": "DIGITAL",
+}
+
+REBUILD_BATCH = 10_000  # QSOs read per page by rebuild_awards
+
+# Registry bits never change once assigned, so they are cached per process
+_key_bits: dict[tuple[str, str], int] = {}
+
+
+# ── Key extraction ─────────────────────────────────────────────────────────────
+
+
+def mode_class(mode: str | None) -> str:
+    """Award mode class for a logged mode, or "" if it has none."""
+    return MODE_CLASSES.get((mode or "").strip().upper(), "")
+
+
+def dxcc_key(dxcc: str | None) -> str | None:
+    key = (dxcc or "").strip().upper()[:50]
+    return key or None
+
+
+def grid_field(grid: str | None) -> str | None:
+    """First four characters of a valid Maidenhead locator, uppercased."""
+    g = (grid or "").strip().upper()
+    if len(g) < 4 or not ("A" <= g[0] <= "R" and "A" <= g[1] <= "R"):
+        return None
+    if not (g[2].isdigit() and g[3].isdigit()):
+        return None
+    return g[:4]
+
+
+def grid_bit(field: str) -> int:
+    return ((ord(field[0]) - 65) * 18 + (ord(field[1]) - 65)) * 100 + int(field[2:4])
+
+
+def us_state(dxcc: str | None, qth: str | None) -> str | None:
+    """US state from a QTH such as "Phoenix, AZ" when the entity is the US."""
+    if not qth or (dxcc or "").strip().upper() not in _US_ENTITIES:
+        return None
+    tail = qth.rsplit(",", 1)[-1].split()
+    state = tail[0].upper() if tail else ""
+    return state if state in _STATE_BITS else None
+
+
+def award_keys(dxcc: str | None, qth: str | None, grid: str | None) -> dict[str, str]:
+    """award → key for the awards a contact with these fields counts towards."""
+    keys = {}
+    if key := dxcc_key(dxcc):
+        keys["dxcc"] = key
+    if state := us_state(dxcc, qth):
+        keys["was"] = state
+    if field := grid_field(grid):
+        keys["grid"] = field
+    return keys
+
+
+def slots(band: str | None, mode: str | None) -> list[tuple[str, str]]:
+    """The (band, mode class) slots a QSO counts towards; "" means any."""
+    b, m = band or "", mode_class(mode)
+    return sorted({("", ""), (b, ""), ("", m), (b, m)})
+
+
+# ── Bitset helpers ─────────────────────────────────────────────────────────────
+
+
+def set_bit(bits: bytes, i: int) -> bytes:
+    byte, offset = divmod(i, 8)
+    if byte < len(bits) and bits[byte] >> offset & 1:
+        return bits
+    buf = bytearray(bits)
+    if len(buf) <= byte:
+        buf.extend(bytes(byte + 1 - len(buf)))
+    buf[byte] |= 1 << offset
+    return bytes(buf)
+
+
+def clear_bit(bits: bytes, i: int) -> bytes:
+    byte, offset = divmod(i, 8)
+    if byte >= len(bits) or not bits[byte] >> offset & 1:
+        return bits
+    buf = bytearray(bits)
+    buf[byte] &= ~(1 << offset) & 0xFF
+    return bytes(buf.rstrip(b"\x00"))
+
+
+def test_bit(bits: bytes, i: int) -> bool:
+    byte, offset = divmod(i, 8)
+    return byte < len(bits) and bool(bits[byte] >> offset & 1)
+
+
+def popcount(bits: bytes) -> int:
+    return int.from_bytes(bits, "little").bit_count()
+
+
+# ── Key registry ───────────────────────────────────────────────────────────────
+
+
+async def key_bit(
+    session: AsyncSession, award: str, key: str, register: bool = False
+) -> int | None:
+    """Bit position of ``key`` in ``award``'s registry, assigning one if asked."""
+    cached = _key_bits.get((award, key))
+    if cached is not None:
+        return cached
+
+    q = select(AwardKey.bit).where(AwardKey.award == award, AwardKey.key == key)
+    bit = (await session.execute(q)).scalar_one_or_none()
+    pending = session.info.setdefault("award_keys_pending", set())
+    if bit is None and register:
+        for _ in range(10):
+            next_bit = (
+                select(func.coalesce(func.max(AwardKey.bit), -1) + 1)
+                .where(AwardKey.award == award)
+                .scalar_subquery()
+            )
+            # A concurrent writer may take the same bit; DO NOTHING and retry
+            stmt = dialect_insert(session, AwardKey).values(award=award, key=key, bit=next_bit)
+            await session.execute(stmt.on_conflict_do_nothing())
+            bit = (await session.execute(q)).scalar_one_or_none()
+            if bit is not None:
+                break
+        else:
+            raise RuntimeError(f"could not register award key {award}:{key}")
+        pending.add((award, key))
+    if bit is not None and (award, key) not in pending:
+        # Only cache committed registrations — a rollback would orphan the bit
+        _key_bits[(award, key)] = bit
+    return bit
+
+
+async def _award_bits(
+    session: AsyncSession, dxcc: str | None, qth: str | None, grid: str | None, register: bool
+) -> dict[str, tuple[str, int | None]]:
+    """award → (key, bit) for the awards a contact with these fields counts towards."""
+    found: dict[str, tuple[str, int | None]] = {}
+    for award, key in award_keys(dxcc, qth, grid).items():
+        if award == "dxcc":
+            found[award] = (key, await key_bit(session, "dxcc", key, register))
+        elif award == "was":
+            found[award] = (key, _STATE_BITS[key])
+        else:
+            found[award] = (key, grid_bit(key))
+    return found
+
+
+# ── Incremental maintenance ────────────────────────────────────────────────────
+
+
+async def _locked_rows(
+    session: AsyncSession, wanted: Iterable[tuple[uuid.UUID, str, str, str]]
+) -> dict[tuple, AwardBitset]:
+    """Fetch (creating if needed) and row-lock the given bitset rows."""
+    wanted = set(wanted)
+    stmt = dialect_insert(session, AwardBitset).on_conflict_do_nothing()
+    await session.execute(
+        stmt,
+        [
+            {"user_id": u, "award": a, "band": b, "mode": m, "worked": b"", "confirmed": b""}
+            for u, a, b, m in wanted
+        ],
+    )
+    # Only the slots asked for, so a write never drags in the user's other bitsets
+    q = (
+        select(AwardBitset)
+        .where(
+            AwardBitset.user_id.in_({u for u, _, _, _ in wanted}),
+            AwardBitset.award.in_({a for _, a, _, _ in wanted}),
+            AwardBitset.band.in_({b for _, _, b, _ in wanted}),
+            AwardBitset.mode.in_({m for _, _, _, m in wanted}),
+        )
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    rows = (await session.execute(q)).scalars().all()
+    return {(r.user_id, r.award, r.band, r.mode): r for r in rows}
+
+
+async def _support_deltas(
+    session: AsyncSession, qsos: Iterable, register: bool, count_worked: bool = True
+) -> tuple[dict[tuple, list[int]], dict[tuple, int]]:
+    """
+    Per-slot support counts ``qsos`` add, keyed (user, award, key, band, mode),
+    plus the bit of each (user, award, key). Keys without a bit are left out.
+    """
+    deltas: dict[tuple, list[int]] = defaultdict(lambda: [0, 0])
+    bits: dict[tuple, int] = {}
+    for qso in qsos:
+        found = await _award_bits(session, qso.dxcc, qso.qth, qso.grid, register=register)
+        for award, (key, bit) in found.items():
+            if bit is None:
+                continue
+            bits[(qso.created_by, award, key)] = bit
+            for band, mode in slots(qso.band, qso.mode):
+                entry = deltas[(qso.created_by, award, key, band, mode)]
+                entry[0] += count_worked
+                entry[1] += bool(qso.qsl_confirmed)
+    return deltas, bits
+
+
+async def _add_support(session: AsyncSession, deltas: dict[tuple, list[int]]) -> None:
+    stmt = dialect_insert(session, AwardSupport)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            AwardSupport.user_id, AwardSupport.award, AwardSupport.key, AwardSupport.band, AwardSupport.mode
+        ],
+        set_={
+            "worked": AwardSupport.worked + stmt.excluded.worked,
+            "confirmed": AwardSupport.confirmed + stmt.excluded.confirmed,
+        },
+    )
+    await session.execute(
+        stmt,
+        [
+            {"user_id": u, "award": a, "key": k, "band": b, "mode": m, "worked": w, "confirmed": c}
+            for (u, a, k, b, m), (w, c) in deltas.items()
+        ],
+    )
+
+
+def _minus(column, delta: str):
+    return case((column > bindparam(delta), column - bindparam(delta)), else_=0)
+
+
+async def _remove_support(session: AsyncSession, deltas: dict[tuple, list[int]]) -> None:
+    """Decrement existing support rows, never below zero; missing rows stay missing."""
+    table = AwardSupport.__table__
+    stmt = (
+        update(table)
+        .where(
+            table.c.user_id == bindparam("s_user"),
+            table.c.award == bindparam("s_award"),
+            table.c.key == bindparam("s_key"),
+            table.c.band == bindparam("s_band"),
+            table.c.mode == bindparam("s_mode"),
+        )
+        .values(worked=_minus(table.c.worked, "d_worked"), confirmed=_minus(table.c.confirmed, "d_confirmed"))
+    )
+    await session.execute(
+        stmt,
+        [
+            {"s_user": u, "s_award": a, "s_key": k, "s_band": b, "s_mode": m, "d_worked": w, "d_confirmed": c}
+            for (u, a, k, b, m), (w, c) in deltas.items()
+        ],
+    )
+
+
+async def record_awards(session: AsyncSession, qsos: Iterable, count_worked: bool = True) -> None:
+    """
+    Count newly written ``qsos`` and set their worked (and confirmed) bits.
+
+    ``count_worked=False`` is for QSOs already counted that have just been
+    confirmed. Does not commit.
+    """
+    deltas, bits = await _support_deltas(session, qsos, register=True, count_worked=count_worked)
+    if not deltas:
+        return
+    await _add_support(session, deltas)
+
+    rows = await _locked_rows(session, {(u, a, b, m) for u, a, _k, b, m in deltas})
+    for (user_id, award, key, band, mode), (_worked, confirmed) in deltas.items():
+        row, bit = rows[(user_id, award, band, mode)], bits[(user_id, award, key)]
+        row.worked = set_bit(row.worked, bit)
+        if confirmed:
+            row.confirmed = set_bit(row.confirmed, bit)
+
+
+async def unrecord_awards(session: AsyncSession, qsos: Iterable) -> None:
+    """
+    Uncount removed ``qsos`` and clear the bits they were the last support for.
+
+    Touches only the support and bitset rows of the removed QSOs' slots, so
+    the cost doesn't grow with the log. Does not commit.
+    """
+    deltas, bits = await _support_deltas(session, qsos, register=False)
+    if not deltas:
+        return
+    await _remove_support(session, deltas)
+
+    q = select(AwardSupport).where(
+        AwardSupport.user_id.in_({u for u, _, _, _, _ in deltas}),
+        AwardSupport.award.in_({a for _, a, _, _, _ in deltas}),
+        AwardSupport.key.in_({k for _, _, k, _, _ in deltas}),
+        AwardSupport.band.in_({b for _, _, _, b, _ in deltas}),
+        AwardSupport.mode.in_({m for _, _, _, _, m in deltas}),
+    ).execution_options(populate_existing=True)
+    support = {
+        (r.user_id, r.award, r.key, r.band, r.mode): r
+        for r in (await session.execute(q)).scalars()
+    }
+
+    rows = await _locked_rows(session, {(u, a, b, m) for u, a, _k, b, m in deltas})
+    for support_key in deltas:
+        user_id, award, key, band, mode = support_key
+        row, bit = rows[(user_id, award, band, mode)], bits[(user_id, award, key)]
+        counts = support.get(support_key)
+        if counts is None:
+            continue  # nothing known about this bit's support; leave it set
+        if counts.confirmed <= 0:
+            row.confirmed = clear_bit(row.confirmed, bit)
+        if counts.worked <= 0:
+            row.worked = clear_bit(row.worked, bit)
+            await session.delete(counts)
+
+
+async def rebuild_awards(session: AsyncSession, user_id: uuid.UUID | None = None) -> None:
+    """
+    Recompute every bitset and support count from the log (both archive
+    tiers) for one user, or everyone.
+
+    Each user's QSOs are read in keyset-paginated batches per tier, so
+    memory holds one page plus that user's bitsets, whatever the log size.
+    """
+    for model in (AwardBitset, AwardSupport):
+        clear = delete(model)
+        if user_id is not None:
+            clear = clear.where(model.user_id == user_id)
+        await session.execute(clear)
+
+    users = [user_id] if user_id is not None else (await session.execute(select(User.id))).scalars().all()
+    for owner in users:
+        bitsets: dict[tuple, list[bytes]] = {}
+        support: dict[tuple, list[int]] = {}
+        for model in (QSO, QSOArchive):
+            q = (
+                select(model.id, model.band, model.mode, model.dxcc, model.qth, model.grid, model.qsl_confirmed)
+                .where(model.created_by == owner)
+                .order_by(model.id)
+                .limit(REBUILD_BATCH)
+            )
+            last_id = None
+            while True:
+                page = q if last_id is None else q.where(model.id > last_id)
+                rows = (await session.execute(page)).all()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                for _id, band, mode, dxcc, qth, grid, is_confirmed in rows:
+                    found = await _award_bits(session, dxcc, qth, grid, register=True)
+                    for award, (key, bit) in found.items():
+                        for b, m in slots(band, mode):
+                            entry = bitsets.setdefault((award, b, m), [b"", b""])
+                            entry[0] = set_bit(entry[0], bit)
+                            counts = support.setdefault((award, key, b, m), [0, 0])
+                            counts[0] += 1
+                            if is_confirmed:
+                                entry[1] = set_bit(entry[1], bit)
+                                counts[1] += 1
+        if bitsets:
+            await session.execute(
+                AwardBitset.__table__.insert(),
+                [
+                    {"user_id": owner, "award": a, "band": b, "mode": m, "worked": w, "confirmed": c}
+                    for (a, b, m), (w, c) in bitsets.items()
+                ],
+            )
+            await session.execute(
+                AwardSupport.__table__.insert(),
+                [
+                    {"user_id": owner, "award": a, "key": k, "band": b, "mode": m, "worked": w, "confirmed": c}
+                    for (a, k, b, m), (w, c) in support.items()
+                ],
+            )
+    await session.commit()
+
+
+# ── Queries ────────────────────────────────────────────────────────────────────
+
+
+async def needed(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    *,
+    dxcc: str | None = None,
+    qth: str | None = None,
+    grid: str | None = None,
+    band: str | None = None,
+    mode: str | None = None,
+) -> list[AwardNeed]:
+    """
+    Would a contact with these fields be new for any award?
+
+    One indexed read of at most four rows per award, then bit tests.
+    """
+    found = await _award_bits(session, dxcc, qth, grid, register=False)
+    if not found:
+        return []
+
+    wanted_slots = slots(band, mode)
+    q = select(AwardBitset).where(
+        AwardBitset.user_id == user_id,
+        AwardBitset.award.in_(found),
+        AwardBitset.band.in_({b for b, _ in wanted_slots}),
+        AwardBitset.mode.in_({m for _, m in wanted_slots}),
+    )
+    rows = {(r.award, r.band, r.mode): r for r in (await session.execute(q)).scalars()}
+
+    b, m = band or "", mode_class(mode)
+    needs = []
+    for award, (key, bit) in found.items():
+        def has(slot_band: str, slot_mode: str, attr: str = "worked") -> bool:
+            row = rows.get((award, slot_band, slot_mode))
+            return bit is not None and row is not None and test_bit(getattr(row, attr), bit)
+
+        needs.append(AwardNeed(
+            award=award,
+            key=key,
+            new_one=not has("", ""),
+            new_band=not has(b, "") if b else None,
+            new_mode=not has("", m) if m else None,
+            new_slot=not has(b, m) if b and m else None,
+            confirmed=has("", "", "confirmed"),
+        ))
+    return needs
+
+
+async def progress(session: AsyncSession, user_id: uuid.UUID) -> list[AwardProgress]:
+    """Worked/confirmed counts per award and slot."""
+    q = select(AwardBitset).where(AwardBitset.user_id == user_id)
+    by_award: dict[str, list[AwardBitset]] = defaultdict(list)
+    for row in (await session.execute(q)).scalars():
+        by_award[row.award].append(row)
+
+    result = []
+    for award in AWARDS:
+        rows = by_award.get(award, [])
+        overall = next((r for r in rows if not r.band and not r.mode), None)
+        result.append(AwardProgress(
+            award=award,
+            worked=popcount(overall.worked) if overall else 0,
+            confirmed=popcount(overall.confirmed) if overall else 0,
+            slots=[
+                AwardSlotProgress(
+                    band=r.band or None,
+                    mode=r.mode or None,
+                    worked=popcount(r.worked),
+                    confirmed=popcount(r.confirmed),
+                )
+                for r in sorted(rows, key=lambda r: (r.band, r.mode))
+                if (r.band or r.mode) and r.worked
+            ],
+        ))
+    return result
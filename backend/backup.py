@@ -0,0 +1,161 @@
+"""
+Consistent online snapshots of the database, streamed gzip-compressed.
+
+SQLite: the online backup API copies ``BACKUP_PAGES_PER_STEP`` pages per step
+into a temporary file, sleeping ``BACKUP_STEP_SLEEP_SECONDS`` between steps so
+the copy never holds the file for long. On its own the backup API restarts
+from the first page whenever another connection writes, which on a busy log
+means it never finishes. So the source connection first opens a read
+transaction: under WAL that pins one snapshot for the whole copy, writers
+carry on appending to the WAL, and no step sees a change. The finished file
+is then streamed through gzip. The result is a plain ``.db`` file once
+gunzipped. (Without WAL the read transaction would hold writers off for the
+whole copy; ``SQLITE_JOURNAL_MODE`` defaults to WAL.)
+
+PostgreSQL: every table is streamed with ``COPY … TO STDOUT`` inside one
+``REPEATABLE READ READ ONLY`` transaction, so the tables agree with each
+other and writers are not blocked. The output is a ``psql`` script of
+``COPY … FROM stdin`` blocks, like ``pg_dump --data-only``. Load it into an
+empty database migrated to the revision named in its header.
+
+``GET /admin/backup`` and ``python -m backend.cli backup`` both use
+``snapshot``. ``python -m benchmarks.backup`` measures what a running
+backup does to write latency.
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from backend.config import settings
+import backend.models  # noqa: F401 — registers every table with Base.metadata
+from backend.database import Base, _is_memory_sqlite
+
+logger = logging.getLogger(__name__)
+
+CHUNK = 256 << 10  # bytes read per compression step
+_QUEUE_DEPTH = 16  # COPY chunks buffered ahead of the client
+
+
+def filename(engine: AsyncEngine) -> str:
+    """Download name for a snapshot of ``engine``; ValueError for in-memory SQLite."""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    if engine.dialect.name == "postgresql":
+        return f"hamlog-{stamp}.sql.gz"
+    if _is_memory_sqlite(str(engine.url)):
+        raise ValueError("an in-memory database cannot be backed up")
+    return f"hamlog-{stamp}.db.gz"
+
+
+async def snapshot(engine: AsyncEngine) -> AsyncIterator[bytes]:
+    """Gzip-compressed snapshot of ``engine``'s database, in chunks."""
+    compressor = zlib.compressobj(settings.backup_compress_level, wbits=31)  # gzip framing
+    started, raw, sent = time.perf_counter(), 0, 0
+    chunks = _postgresql_chunks(engine) if engine.dialect.name == "postgresql" else _sqlite_chunks(engine)
+    async for chunk in chunks:
+        raw += len(chunk)
+        # zlib drops the GIL, so compressing off the loop keeps requests moving
+        out = await asyncio.to_thread(compressor.compress, chunk)
+        if out:
+            sent += len(out)
+            yield out
+    tail = compressor.flush()
+    sent += len(tail)
+    yield tail
+    logger.info(
+        "backup: %d bytes (%d compressed) in %.0f ms", raw, sent, (time.perf_counter() - started) * 1000
+    )
+
+
+# ── SQLite ─────────────────────────────────────────────────────────────────────
+
+
+def copy_sqlite(source_path: str, target_path: str) -> int:
+    """Online-backup ``source_path`` into ``target_path`` in page steps; returns the step count."""
+    steps = 0
+
+    def progress(_status, _remaining, _total):
+        nonlocal steps
+        steps += 1
+
+    source = sqlite3.connect(source_path, isolation_level=None)
+    target = sqlite3.connect(target_path)
+    try:
+        source.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        # Pin one snapshot so concurrent commits don't restart the copy
+        source.execute("BEGIN")
+        source.execute("SELECT count(*) FROM sqlite_master").fetchone()
+        source.backup(
+            target,
+            pages=settings.backup_pages_per_step,
+            progress=progress,
+            sleep=settings.backup_step_sleep_seconds,
+        )
+        source.execute("COMMIT")
+    finally:
+        target.close()
+        source.close()
+    return steps
+
+
+async def _sqlite_chunks(engine: AsyncEngine) -> AsyncIterator[bytes]:
+    source = make_url(str(engine.url)).database
+    fd, target = tempfile.mkstemp(suffix=".db", prefix="hamlog-backup-")
+    os.close(fd)
+    try:
+        steps = await asyncio.to_thread(copy_sqlite, source, target)
+        logger.info("backup: copied %s in %d steps", source, steps)
+        with open(target, "rb") as f:
+            while chunk := await asyncio.to_thread(f.read, CHUNK):
+                yield chunk
+    finally:
+        os.unlink(target)
+
+
+# ── PostgreSQL ─────────────────────────────────────────────────────────────────
+
+
+async def _copy_tables(engine: AsyncEngine, emit) -> None:
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="REPEATABLE READ", postgresql_readonly=True)
+        revision = (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalar()
+        await emit(
+            f"-- HamLog data snapshot {datetime.now(timezone.utc).isoformat()}\n"
+            f"-- Load into an empty database migrated to revision {revision}\n"
+            "SET session_replication_role = replica;\n\n".encode()
+        )
+        driver = (await conn.get_raw_connection()).driver_connection
+        for table in Base.metadata.sorted_tables:
+            columns = ", ".join(f'"{c.name}"' for c in table.columns)
+            await emit(f'COPY "{table.name}" ({columns}) FROM stdin;\n'.encode())
+            # Through a query: COPY can't read a partitioned table directly
+            await driver.copy_from_query(f'SELECT {columns} FROM "{table.name}"', output=emit)
+            await emit(b"\\.\n\n")
+        await conn.rollback()
+
+
+async def _postgresql_chunks(engine: AsyncEngine) -> AsyncIterator[bytes]:
+    queue: asyncio.Queue[bytes | None] = asyncio.Queue(_QUEUE_DEPTH)
+
+    async def dump() -> None:
+        try:
+            await _copy_tables(engine, queue.put)
+        finally:
+            await queue.put(None)
+
+    task = asyncio.create_task(dump())
+    try:
+        while (chunk := await queue.get()) is not None:
+            yield chunk
+        await task
+    finally:
+        task.cancel()
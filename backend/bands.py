@@ -0,0 +1,68 @@
+"""
+Amateur band allocations (ADIF 3.1.4 Band enumeration) and frequency helpers.
+
+Frequencies are stored as integer Hz. ``band_for`` maps a frequency to its
+band with a binary search over the sorted lower edges.
+"""
+from bisect import bisect_right
+
+# (band, lower edge Hz, upper edge Hz), sorted by lower edge, edges inclusive
+BANDS: tuple[tuple[str, int, int], ...] = (
+    ("2190m", 135_700, 137_800),
+    ("630m", 472_000, 479_000),
+    ("560m", 501_000, 504_000),
+    ("160m", 1_800_000, 2_000_000),
+    ("80m", 3_500_000, 4_000_000),
+    ("60m", 5_060_000, 5_450_000),
+    ("40m", 7_000_000, 7_300_000),
+    ("30m", 10_100_000, 10_150_000),
+    ("20m", 14_000_000, 14_350_000),
+    ("17m", 18_068_000, 18_168_000),
+    ("15m", 21_000_000, 21_450_000),
+    ("12m", 24_890_000, 24_990_000),
+    ("10m", 28_000_000, 29_700_000),
+    ("8m", 40_000_000, 45_000_000),
+    ("6m", 50_000_000, 54_000_000),
+    ("5m", 54_000_001, 69_900_000),
+    ("4m", 70_000_000, 71_000_000),
+    ("2m", 144_000_000, 148_000_000),
+    ("1.25m", 222_000_000, 225_000_000),
+    ("70cm", 420_000_000, 450_000_000),
+    ("33cm", 902_000_000, 928_000_000),
+    ("23cm", 1_240_000_000, 1_300_000_000),
+    ("13cm", 2_300_000_000, 2_450_000_000),
+    ("9cm", 3_300_000_000, 3_500_000_000),
+    ("6cm", 5_650_000_000, 5_925_000_000),
+    ("3cm", 10_000_000_000, 10_500_000_000),
+    ("1.25cm", 24_000_000_000, 24_250_000_000),
+    ("6mm", 47_000_000_000, 47_200_000_000),
+    ("4mm", 75_500_000_000, 81_000_000_000),
+    ("2.5mm", 119_980_000_000, 123_000_000_000),
+    ("2mm", 134_000_000_000, 149_000_000_000),
+    ("1mm", 241_000_000_000, 250_000_000_000),
+)
+_LOWER_EDGES = [low for _, low, _ in BANDS]
+
+
+def band_for(freq_hz: int | None) -> str | None:
+    """Band containing ``freq_hz``, or None if it is outside every allocation."""
+    if freq_hz is None:
+        return None
+    i = bisect_right(_LOWER_EDGES, freq_hz) - 1
+    if i < 0:
+        return None
+    band, _low, high = BANDS[i]
+    return band if freq_hz <= high else None
+
+
+def mhz_to_hz(mhz: float | None) -> int | None:
+    return None if mhz is None else round(mhz * 1_000_000)
+
+
+def hz_to_mhz(hz: int | None) -> float | None:
+    return None if hz is None else hz / 1_000_000
+
+
+def format_mhz(hz: int) -> str:
+    """Exact decimal MHz for ADIF, e.g. 14074000 → "14.074000"."""
+    return f"{hz // 1_000_000}.{hz % 1_000_000:06d}"
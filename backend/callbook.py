@@ -0,0 +1,265 @@
+"""
+Offline callbook: a local callsign database for lookups without a network.
+
+At field day or on a DXpedition HamQTH is out of reach, so lookups would
+come back empty. An operator loads a callbook dump beforehand, such as a
+public licence database exported to CSV. ``lookup_callsign`` and the
+enrichment worker then consult the ``callbook`` table between the callsign
+cache and HamQTH, answering from its primary key with ``source="callbook"``.
+
+The dump is one record per line, with a header row naming the columns
+(a quoted field may hold line breaks). Common spellings are recognised
+(``call``/``callsign``, ``first_name`` + ``last_name``, ``city`` +
+``state``, ``locator``/``gridsquare``, ``country``/``dxcc``), and the
+delimiter (comma, pipe, semicolon or tab) is sniffed from the header. The
+file is decoded and parsed chunk by chunk off the event loop. It is loaded
+with ``CALLBOOK_BATCH_SIZE``-row upserts, one transaction each, so memory
+stays flat however large the dump is.
+
+A full import stamps every row it writes and then deletes the rows it did
+not see. A delta import (``delta=True``) only upserts; a row whose
+``action`` column says ``D``/``delete`` is removed instead.
+
+``python -m backend.cli callbook-import PATH [--delta]`` loads a file
+(``.gz`` too), and ``POST /admin/callbook`` takes an upload.
+"""
+import asyncio
+import codecs
+import csv
+import gzip
+import io
+import re
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.config import settings
+from backend.database import dialect_insert
+from backend.models import CallbookEntry
+from backend.schemas import GRID_PATTERN, CallbookImportResult, canonical_grid
+
+CHUNK = 1 << 20  # bytes decoded and parsed per step
+FIELDS = ("name", "qth", "grid", "dxcc")
+_DELETE_ACTIONS = {"D", "DEL", "DELETE", "DELETED"}
+_GRID = re.compile(GRID_PATTERN)
+
+# Header spellings for each column, after lower-casing and ``_`` for spaces
+_ALIASES = {
+    "callsign": ("callsign", "call", "call_sign"),
+    "name": ("name", "full_name", "entity_name", "licensee"),
+    "first_name": ("first_name", "firstname", "given_name"),
+    "last_name": ("last_name", "lastname", "surname"),
+    "qth": ("qth", "address", "location"),
+    "city": ("city", "town"),
+    "state": ("state", "province", "region"),
+    "grid": ("grid", "gridsquare", "locator"),
+    "dxcc": ("dxcc", "country", "entity"),
+    "action": ("action", "change", "op"),
+}
+_LIMITS = {"name": 100, "qth": 200, "grid": 8, "dxcc": 50}
+
+
+class CallbookFormatError(ValueError):
+    """The dump has no header row or no callsign column."""
+
+
+class Parser:
+    """Turns decoded text, fed in arbitrary chunks, into callbook rows."""
+
+    def __init__(self):
+        self.delimiter: str | None = None
+        self.columns: dict[str, int] = {}
+        self.skipped = 0
+        self._tail = ""
+
+    def feed(self, text: str, final: bool = False) -> list[tuple[dict, bool]]:
+        """``(row, deleted)`` for every complete record in ``text``."""
+        text = self._tail + text
+        cut = len(text) if final else text.rfind("\n") + 1
+        body, self._tail = text[:cut], text[cut:]
+        if self.delimiter is None:
+            start = 0
+            for line in io.StringIO(body, newline=""):
+                if line.strip():
+                    break
+                start += len(line)
+            else:
+                if final:
+                    raise CallbookFormatError("callbook is empty")
+                return []
+            self._read_header(line)
+            body = body[start + len(line):]
+
+        # csv.reader sees the line endings, so a quoted field may span lines;
+        # a record still open at the end of the chunk waits for the next one
+        consumed = done = 0
+        exhausted = False
+
+        def lines():
+            nonlocal consumed, exhausted
+            for line in io.StringIO(body, newline=""):
+                consumed += len(line)
+                yield line
+            exhausted = True
+
+        rows = []
+        try:
+            for fields in csv.reader(lines(), delimiter=self.delimiter):
+                if exhausted and not final:
+                    self._tail = body[done:] + self._tail
+                    break
+                done = consumed
+                parsed = self._row(fields)
+                if parsed is None:
+                    self.skipped += 1
+                else:
+                    rows.append(parsed)
+        except csv.Error as exc:
+            raise CallbookFormatError(f"malformed record: {exc}") from exc
+        return rows
+
+    def _read_header(self, line: str) -> None:
+        try:
+            self.delimiter = csv.Sniffer().sniff(line, delimiters=",|;\t").delimiter
+        except csv.Error:
+            self.delimiter = ","
+        names = [
+            re.sub(r"[\s-]+", "_", name.strip().lower())
+            for name in next(csv.reader([line], delimiter=self.delimiter))
+        ]
+        for column, aliases in _ALIASES.items():
+            for alias in aliases:
+                if alias in names:
+                    self.columns[column] = names.index(alias)
+                    break
+        if "callsign" not in self.columns:
+            raise CallbookFormatError(f"no callsign column in header: {line.strip()[:200]}")
+
+    def _value(self, fields: list[str], column: str) -> str | None:
+        i = self.columns.get(column)
+        if i is None or i >= len(fields):
+            return None
+        return fields[i].strip() or None
+
+    def _row(self, fields: list[str]) -> tuple[dict, bool] | None:
+        call = (self._value(fields, "callsign") or "").upper()
+        if not call or len(call) > 20:
+            return None
+        name = self._value(fields, "name") or " ".join(
+            filter(None, (self._value(fields, "first_name"), self._value(fields, "last_name")))
+        )
+        qth = self._value(fields, "qth") or ", ".join(
+            filter(None, (self._value(fields, "city"), self._value(fields, "state")))
+        )
+        grid = self._value(fields, "grid")
+        row = {
+            "callsign": call,
+            "name": name or None,
+            "qth": qth or None,
+            "grid": canonical_grid(grid) if grid and _GRID.match(grid) else None,
+            "dxcc": self._value(fields, "dxcc"),
+        }
+        for column, limit in _LIMITS.items():
+            if row[column]:
+                row[column] = row[column][:limit]
+        deleted = (self._value(fields, "action") or "").upper() in _DELETE_ACTIONS
+        return row, deleted
+
+
+async def read_rows(stream, parser: Parser, chunk_size: int = CHUNK):
+    """Batches of ``(row, deleted)`` from ``stream`` (anything with an async ``read(n)``)."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    while chunk := await stream.read(chunk_size):
+        yield await asyncio.to_thread(lambda: parser.feed(decoder.decode(chunk)))
+    yield parser.feed(decoder.decode(b"", final=True), final=True)
+
+
+class LocalFile:
+    """A callbook file on disk (gzip-compressed if it ends in ``.gz``) with an async ``read``."""
+
+    def __init__(self, path: str):
+        self._file = gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+    async def read(self, n: int) -> bytes:
+        return await asyncio.to_thread(self._file.read, n)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+# ── Loading ────────────────────────────────────────────────────────────────────
+
+
+async def _upsert(session: AsyncSession, rows: dict[str, dict], stamp: datetime) -> None:
+    stmt = dialect_insert(session, CallbookEntry)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CallbookEntry.callsign],
+        set_={name: getattr(stmt.excluded, name) for name in (*FIELDS, "imported_at")},
+    )
+    await session.execute(stmt, [{**row, "imported_at": stamp} for row in rows.values()])
+
+
+async def _delete(session: AsyncSession, calls: list[str]) -> None:
+    await session.execute(
+        delete(CallbookEntry).where(CallbookEntry.callsign.in_(calls)),
+        execution_options={"synchronize_session": False},
+    )
+
+
+async def import_callbook(
+    session: AsyncSession, stream, delta: bool = False, batch_size: int | None = None
+) -> CallbookImportResult:
+    """Load a callbook dump from ``stream``; see the module docstring for full vs delta."""
+    batch_size = batch_size or settings.callbook_batch_size
+    started = time.perf_counter()
+    stamp = datetime.now(timezone.utc).replace(tzinfo=None)
+    result = CallbookImportResult(records=0, deleted=0, removed=0, skipped=0, seconds=0.0)
+    # Keyed by callsign: a repeated call keeps its last line, and one
+    # statement never upserts the same row twice (PostgreSQL refuses)
+    upserts: dict[str, dict] = {}
+    deletes: set[str] = set()
+
+    async def flush() -> None:
+        if upserts:
+            await _upsert(session, upserts, stamp)
+        if deletes:
+            await _delete(session, list(deletes))
+        await session.commit()
+        result.records += len(upserts)
+        result.deleted += len(deletes)
+        upserts.clear()
+        deletes.clear()
+
+    parser = Parser()
+    async for rows in read_rows(stream, parser):
+        for row, deleted in rows:
+            call = row["callsign"]
+            if deleted:
+                # A full import simply leaves the station out
+                upserts.pop(call, None)
+                if delta:
+                    deletes.add(call)
+            else:
+                deletes.discard(call)
+                upserts[call] = row
+            if len(upserts) + len(deletes) >= batch_size:
+                await flush()
+    await flush()
+    result.skipped = parser.skipped
+
+    if not delta:
+        # Rows this import didn't write are gone from the source
+        stale = select(CallbookEntry.callsign).where(CallbookEntry.imported_at < stamp).limit(batch_size)
+        while True:
+            removed = (await session.execute(
+                delete(CallbookEntry).where(CallbookEntry.callsign.in_(stale.scalar_subquery())),
+                execution_options={"synchronize_session": False},
+            )).rowcount
+            await session.commit()
+            result.removed += removed
+            if removed < batch_size:
+                break
+    result.seconds = round(time.perf_counter() - started, 3)
+    return result
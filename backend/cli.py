@@ -0,0 +1,198 @@
+"""
+HamLog management commands.
+
+    python -m backend.cli migrate [--revision REV]
+    python -m backend.cli rebuild-stats [--user UUID]
+    python -m backend.cli rebuild-awards [--user UUID]
+    python -m backend.cli backfill-geo [--user UUID]
+    python -m backend.cli enrich-backfill [--retry]
+    python -m backend.cli partition-qso [--partitions N]
+    python -m backend.cli archive [--days N]
+    python -m backend.cli maintenance
+    python -m backend.cli backup [--output PATH]
+    python -m backend.cli callbook-import PATH [--delta]
+"""
+import argparse
+import asyncio
+import sys
+import uuid
+from pathlib import Path
+
+from backend.database import async_session_maker, engine
+
+
+async def _migrate(args) -> None:
+    from alembic import command
+    from alembic.config import Config
+
+    cfg = Config(str(Path(__file__).resolve().parent.parent / "alembic.ini"))
+    # The migration environment runs its own event loop
+    await asyncio.to_thread(command.upgrade, cfg, args.revision)
+
+
+async def _rebuild_stats(args) -> None:
+    from backend.stats import rebuild_stats
+
+    async with async_session_maker() as session:
+        await rebuild_stats(session, args.user)
+    print("statistics rebuilt" + (f" for {args.user}" if args.user else ""))
+
+
+async def _rebuild_awards(args) -> None:
+    from backend.awards import rebuild_awards
+
+    async with async_session_maker() as session:
+        await rebuild_awards(session, args.user)
+    print("award progress rebuilt" + (f" for {args.user}" if args.user else ""))
+
+
+async def _backfill_geo(args) -> None:
+    from backend.geo import recompute_geo
+
+    async with async_session_maker() as session:
+        count = await recompute_geo(session, args.user)
+    print(f"locations recomputed for {count} QSOs")
+
+
+async def _enrich_backfill(args) -> None:
+    from backend.config import settings
+    from backend.enrichment import RateBudget, backfill
+
+    budget = RateBudget(settings.enrichment_lookups_per_minute)
+    result = await backfill(async_session_maker, budget, retry=args.retry)
+    print(f"enriched {result.enriched} of {result.attempted} incomplete QSOs")
+
+
+async def _partition_qso(args) -> None:
+    from sqlalchemy import select
+
+    from backend import partitioning
+    from backend.models import QSO
+    from backend.query import filter_qsos
+    from backend.schemas import QSOFilter
+
+    if engine.dialect.name != "postgresql":
+        sys.exit("partition-qso needs PostgreSQL")
+    if args.partitions is not None:
+        async with engine.begin() as conn:
+            current = await conn.run_sync(partitioning.partitions)
+            if len(current) != args.partitions:
+                await conn.run_sync(partitioning.rebuild_qso, args.partitions)
+                print(f"qso rebuilt with {args.partitions or 'no'} partitions")
+
+    async with async_session_maker() as session:
+        parts = await (await session.connection()).run_sync(partitioning.partitions)
+        for name, rows, size in parts:
+            print(f"{name}  ~{rows} rows  {size / 2**20:.1f} MiB")
+        if not parts:
+            print("qso is not partitioned")
+            return
+        user_id = (await session.execute(select(QSO.created_by).limit(1))).scalar() or uuid.uuid4()
+        stmt = await filter_qsos(session, user_id, QSOFilter())
+        scanned = await partitioning.scanned_partitions(session, stmt)
+        print(f"a per-user query reads {len(scanned)} of {len(parts)} partitions: {', '.join(scanned)}")
+
+
+async def _archive(args) -> None:
+    from backend.archive import archive_cutoff, archive_qsos
+
+    cutoff = archive_cutoff(args.days)
+    async with async_session_maker() as session:
+        moved = await archive_qsos(session, cutoff)
+    print(f"archived {moved} QSOs dated before {cutoff}")
+
+
+async def _maintenance(args) -> None:
+    from backend.maintenance import worker
+
+    snapshot = await worker.run_once(force=True)
+    print(
+        f"purged {snapshot['purged']} and evicted {snapshot['evicted']} cache rows "
+        f"({snapshot['cache_rows']} left), vacuumed={snapshot['vacuumed']}, "
+        f"{snapshot['timings']['total_ms']:.0f} ms"
+    )
+
+
+async def _backup(args) -> None:
+    from backend.backup import filename, snapshot
+
+    path = Path(args.output or filename(engine))
+    with path.open("wb") as f:
+        async for chunk in snapshot(engine):
+            f.write(chunk)
+    print(f"wrote {path} ({path.stat().st_size} bytes)")
+
+
+async def _callbook_import(args) -> None:
+    from backend.callbook import LocalFile, import_callbook
+
+    source = LocalFile(args.path)
+    try:
+        async with async_session_maker() as session:
+            result = await import_callbook(session, source, delta=args.delta)
+    finally:
+        source.close()
+    print(
+        f"{result.records} stations loaded, {result.deleted + result.removed} removed, "
+        f"{result.skipped} lines skipped in {result.seconds:.1f} s"
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m backend.cli", description="HamLog management commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("migrate", help="apply schema migrations (run before starting workers)")
+    p.add_argument("--revision", default="head", help="target revision (default: head)")
+    p.set_defaults(handler=_migrate)
+
+    p = commands.add_parser("rebuild-stats", help="recompute QSO statistics from the log")
+    p.add_argument("--user", type=uuid.UUID, help="only this user (default: everyone)")
+    p.set_defaults(handler=_rebuild_stats)
+
+    p = commands.add_parser("rebuild-awards", help="recompute award bitsets from the log")
+    p.add_argument("--user", type=uuid.UUID, help="only this user (default: everyone)")
+    p.set_defaults(handler=_rebuild_awards)
+
+    p = commands.add_parser("backfill-geo", help="recompute QSO lat/lon, distance and bearing")
+    p.add_argument("--user", type=uuid.UUID, help="only this user (default: everyone)")
+    p.set_defaults(handler=_backfill_geo)
+
+    p = commands.add_parser("enrich-backfill", help="fill missing QSO fields from the callsign cache/HamQTH")
+    p.add_argument("--retry", action="store_true", help="also retry QSOs an earlier pass could not fill")
+    p.set_defaults(handler=_enrich_backfill)
+
+    p = commands.add_parser("partition-qso", help="hash-partition qso by user (PostgreSQL) and check pruning")
+    p.add_argument("--partitions", type=int, help="rebuild with this many partitions (0: unpartition)")
+    p.set_defaults(handler=_partition_qso)
+
+    p = commands.add_parser("archive", help="move old QSOs to the archive tier now")
+    p.add_argument("--days", type=int, help="archive QSOs older than this (default: ARCHIVE_AFTER_DAYS)")
+    p.set_defaults(handler=_archive)
+
+    p = commands.add_parser("maintenance", help="purge and bound the callsign cache, then ANALYZE/VACUUM")
+    p.set_defaults(handler=_maintenance)
+
+    p = commands.add_parser("backup", help="write a consistent gzip-compressed snapshot without stopping writers")
+    p.add_argument("--output", help="file to write (default: hamlog-<timestamp>.db.gz / .sql.gz here)")
+    p.set_defaults(handler=_backup)
+
+    p = commands.add_parser("callbook-import", help="load an offline callbook dump (CSV, optionally .gz)")
+    p.add_argument("path", help="callbook file with a header row")
+    p.add_argument("--delta", action="store_true", help="apply as changes instead of replacing the callbook")
+    p.set_defaults(handler=_callbook_import)
+
+    args = parser.parse_args(argv)
+
+    async def run():
+        try:
+            await args.handler(args)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,12 +3,114 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     database_url: str = "sqlite+aiosqlite:///./hamlog_test.db"
+
+    # Optional read replica for read-only endpoints; users who wrote within
+    # the stickiness window keep reading from the primary (read-your-writes)
+    database_replica_url: str = ""
+    replica_stickiness_seconds: float = 5.0
+
+    # PostgreSQL connection pool (ignored for SQLite)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800  # seconds; stay under server/pooler idle timeouts
+    db_pool_pre_ping: bool = True
+    asyncpg_statement_cache_size: int = 100  # 0 behind PgBouncer transaction pooling
+
+    # Hash-partition qso by user on PostgreSQL (0 = one plain table); applied by
+    # migration 0009, or by `python -m backend.cli partition-qso` afterwards
+    qso_partitions: int = 0
+
+    # SQLite per-connection tuning (ignored for PostgreSQL)
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size_kib: int = 64 * 1024
+    sqlite_busy_timeout_ms: int = 5000
+
     secret_key: str = "changeme-use-openssl-rand-hex-32"
     jwt_lifetime_seconds: int = 3600
     anthropic_api_key: str = ""
     hamqth_username: str = ""
     hamqth_password: str = ""
 
+    # Upstream endpoints — overridable so the load harness can use local fakes
+    hamqth_base_url: str = "https://www.hamqth.com/xml.php"
+    anthropic_base_url: str = ""
+
+    # State shared by all worker processes on this host (HamQTH session, budgets)
+    shared_state_path: str = "./hamlog_shared.db"
+    hamqth_requests_per_minute: float = 60.0  # all workers together
+    hamqth_burst: float = 10.0
+    hamqth_budget_max_wait_seconds: float = 2.0  # then degrade to no result
+    hamqth_session_ttl_seconds: float = 3000.0  # HamQTH sessions last an hour
+
+    # Inbound per-user rate limits ("<count>/<second|minute|hour>")
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "sqlite"  # memory | sqlite | redis
+    rate_limit_redis_url: str = "redis://localhost:6379/0"
+    rate_limit_parse: str = "20/minute"
+    rate_limit_callsign: str = "60/minute"
+    rate_limit_qso: str = "120/minute"
+
+    # Load shedding of low-priority work (exports, stats, NL parse) per worker
+    loadshed_enabled: bool = True
+    loadshed_target_delay_ms: float = 100.0  # DB pool queueing delay before shedding
+    loadshed_interval_ms: float = 500.0  # window over which the delay must persist
+    loadshed_max_concurrent: int = 4  # per low-priority route class, once over the target delay
+    loadshed_retry_after_seconds: int = 5
+
+    # Background enrichment of QSOs saved without name/QTH/grid/DXCC
+    enrichment_enabled: bool = True
+    enrichment_batch_size: int = 50
+    enrichment_batch_wait_seconds: float = 1.0  # gather QSOs this long before a batch
+    enrichment_lookups_per_minute: float = 30.0  # HamQTH budget for enrichment
+    enrichment_sweep_interval_seconds: float = 300.0
+
+    # Hot/cold tiering: QSOs older than this move to qso_archive (backend/archive.py)
+    archive_enabled: bool = True
+    archive_after_days: int = 730
+    archive_interval_seconds: float = 3600.0
+    archive_batch_size: int = 1000  # rows moved per transaction
+
+    # Callsign cache bounds and planner statistics upkeep (backend/maintenance.py)
+    maintenance_enabled: bool = True
+    maintenance_interval_seconds: float = 3600.0
+    maintenance_batch_size: int = 1000  # rows deleted per transaction
+    callsign_cache_max_rows: int = 200_000  # least recently accessed rows go first
+    callsign_cache_negative_ttl_hours: int = 24  # callsigns HamQTH had nothing on
+    maintenance_analyze_interval_seconds: float = 86400.0
+    maintenance_vacuum_free_ratio: float = 0.2  # SQLite: VACUUM above this share of free pages
+
+    # Predictive callsign cache warming (backend/warming.py)
+    warming_enabled: bool = True
+    warming_concurrency: int = 2  # HamQTH lookups in flight per worker
+    warming_lookups_per_minute: float = 20.0  # on top of HamQTH's shared budget
+    warming_max_calls: int = 200  # per job
+    warming_recent_qsos: int = 200
+    warming_frequent_calls: int = 50
+    warming_refresh_days: int = 3  # refetch entries this close to expiring
+    warming_interval_seconds: float = 3600.0  # login warming per operator at most this often
+
+    # Offline callbook imports (backend/callbook.py)
+    callbook_batch_size: int = 5000  # rows upserted per transaction
+
+    # Online snapshots (GET /admin/backup, backend/backup.py)
+    backup_pages_per_step: int = 1024  # SQLite pages copied per backup step
+    backup_step_sleep_seconds: float = 0.005  # pause between steps
+    backup_compress_level: int = 6  # gzip level, 1 (fast) to 9 (small)
+
+    # Uploaded-log reconciliation (POST /qso/reconcile)
+    reconcile_tolerance_seconds: int = 120  # clock skew allowed between two loggers
+
+    # LoTW/eQSL confirmation matching (POST /qso/qsl); LoTW itself allows ±30 min
+    qsl_match_window_minutes: int = 30
+
+    # Admin request profiling (X-HamLog-Profile header / ?_profile=1)
+    profiling_enabled: bool = True
+    profile_dir: str = "./profiles"
+    profile_sample_interval_ms: float = 1.0
+
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 
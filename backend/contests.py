@@ -0,0 +1,434 @@
+"""
+Contest definitions, incremental scoring and Cabrillo output.
+
+A ``ContestEntry`` is one operator's entry in one contest. QSOs logged with
+its ``contest_entry_id`` carry the received exchange after the RST
+(``exch_rcvd``, e.g. "14" for a CQ zone or "123 A 73 CT" in Sweepstakes) and,
+where the contest uses serials, the serial sent (``stx``, assigned on create
+when omitted).
+
+Scoring is incremental. ``record_contest_qsos`` (called from ``qsos_added``)
+claims the QSO's dupe key and multiplier keys in ``contest_worked`` with
+insert-if-absent, then bumps the entry's counters in one ``UPDATE``, so the
+score endpoint reads a single row. Deleting a contest QSO, or an edit that
+changes how it scores, re-scores its entry from the log (``rescore_entries``).
+
+Definitions cover CQ WW DX, ARRL DX, ARRL Sweepstakes and ARRL Field Day
+(scoring rules as published, bonus points left out). CQ WW continents come
+from CQ zones, each counted on its majority continent. HamLog keeps no prefix
+table, so contests that score on the station's continent alone, such as CQ
+WPX, are not defined.
+"""
+import re
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, Callable, Iterable, Sequence
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.awards import mode_class
+from backend.bands import BANDS
+from backend.database import dialect_insert
+from backend.models import QSO, ContestEntry, ContestWorked
+
+# ── Reference data ─────────────────────────────────────────────────────────────
+
+# CQ zone → continent (zones spanning two continents use the majority one)
+_ZONE_CONTINENT = {
+    **dict.fromkeys(range(1, 9), "NA"),
+    **dict.fromkeys(range(9, 14), "SA"),
+    **dict.fromkeys((14, 15, 16, 20, 40), "EU"),
+    **dict.fromkeys((17, 18, 19, 21, 22, 23, 24, 25, 26), "AS"),
+    **dict.fromkeys(range(27, 33), "OC"),
+    **dict.fromkeys(range(33, 40), "AF"),
+}
+
+ARRL_SECTIONS = frozenset("""
+    CT EMA ME NH RI VT WMA ENY NLI NNJ NNY SNJ WNY DE EPA MDC WPA
+    AL GA KY NC NFL PR SC SFL TN VA VI WCF AR LA MS NM NTX OK STX WTX
+    EB LAX ORG PAC SB SCV SDG SF SJV SV AK AZ EWA ID MT NV OR UT WWA WY
+    MI OH WV IL IN WI CO IA KS MN MO ND NE SD
+    AB BC GH MB NB NL NS ONE ONN ONS PE QC SK TER
+""".split())
+
+# ARRL DX multipliers for DX stations: the 48 contiguous states, DC and VE provinces
+_W_VE_MULTS = frozenset("""
+    AL AR AZ CA CO CT DC DE FL GA IA ID IL IN KS KY LA MA MD ME MI MN MO MS MT
+    NC ND NE NH NJ NM NV NY OH OK OR PA RI SC SD TN TX UT VA VT WA WI WV WY
+    AB BC LB MB NB NF NS NT NU ON PE QC SK YT
+""".split())
+_W_VE_ENTITIES = frozenset({"UNITED STATES", "USA", "CANADA", "ALASKA", "HAWAII"})
+
+# Cabrillo band designators above 30 MHz
+_VHF_DESIGNATORS = {
+    "6m": "50", "4m": "70", "2m": "144", "1.25m": "222", "70cm": "432",
+    "33cm": "902", "23cm": "1.2G", "13cm": "2.3G", "9cm": "3.4G", "6cm": "5.7G",
+    "3cm": "10G", "1.25cm": "24G", "6mm": "47G", "4mm": "75G", "2.5mm": "119G",
+    "2mm": "142G", "1mm": "241G",
+}
+_BAND_EDGES = {band: low for band, low, _high in BANDS}
+_CABRILLO_MODES = {"CW": "CW", "PHONE": "PH", "DIGITAL": "DG"}
+
+
+# ── Definitions ────────────────────────────────────────────────────────────────
+
+
+@dataclass(frozen=True)
+class ContestQSO:
+    """What scoring needs from a QSO, with the received exchange split into fields."""
+
+    call: str
+    band: str
+    mode_class: str
+    dxcc: str
+    exch: dict[str, str]
+
+
+@dataclass(frozen=True)
+class Multiplier:
+    name: str
+    per_band: bool
+    value: Callable[[ContestEntry, ContestQSO], str | None]
+
+
+@dataclass(frozen=True)
+class Contest:
+    id: str  # Cabrillo CONTEST: value
+    name: str
+    mode_classes: frozenset[str]  # award mode classes the contest allows
+    exchange: tuple[tuple[str, str], ...]  # received fields after the RST: (name, regex)
+    sent_pattern: str  # regex the entry's exch_sent must match
+    points: Callable[[ContestEntry, ContestQSO], int]
+    multipliers: tuple[Multiplier, ...] = ()
+    dupe_per: str = "band"  # "band", "band_mode" or "contest"
+    serial: bool = False  # the sent exchange starts with a serial number
+    rst: bool = True  # RST is part of the Cabrillo exchange
+    score: Callable[[ContestEntry], int] = field(
+        default=lambda entry: entry.points * entry.mults
+    )
+
+    def parse_exchange(self, text: str | None) -> dict[str, str]:
+        """Split and check a received exchange; ValueError if it does not fit."""
+        tokens = (text or "").upper().split()
+        if len(tokens) != len(self.exchange):
+            names = " ".join(name for name, _ in self.exchange)
+            raise ValueError(f"{self.id} exchange is: {names}")
+        exch = {}
+        for (name, pattern), token in zip(self.exchange, tokens):
+            if not re.fullmatch(pattern, token):
+                raise ValueError(f"invalid {name} {token!r} for {self.id}")
+            exch[name] = token
+        return exch
+
+    def dupe_key(self, q: ContestQSO) -> str:
+        if self.dupe_per == "contest":
+            return q.call
+        if self.dupe_per == "band_mode":
+            return f"{q.call}|{q.band}|{q.mode_class}"
+        return f"{q.call}|{q.band}"
+
+    def mult_keys(self, entry: ContestEntry, q: ContestQSO) -> list[tuple[str, str]]:
+        keys = []
+        for mult in self.multipliers:
+            value = mult.value(entry, q)
+            if value:
+                keys.append((mult.name, f"{q.band}|{value}" if mult.per_band else value))
+        return keys
+
+
+def _zone(text: str | None) -> int | None:
+    return int(text) if text and text.isdigit() else None
+
+
+def _cqww_points(entry: ContestEntry, q: ContestQSO) -> int:
+    mine = _ZONE_CONTINENT.get(_zone(entry.exch_sent))
+    theirs = _ZONE_CONTINENT.get(_zone(q.exch.get("zone")))
+    if q.dxcc and entry.my_dxcc and q.dxcc == entry.my_dxcc.strip().upper():
+        return 0
+    if mine and mine == theirs:
+        return 2 if mine == "NA" else 1
+    return 3
+
+
+def _is_w_ve(entry: ContestEntry) -> bool:
+    return entry.exch_sent.upper() in _W_VE_MULTS
+
+
+def _arrl_dx_points(entry: ContestEntry, q: ContestQSO) -> int:
+    # Only W/VE ↔ DX contacts count; the exchange tells the sides apart
+    if _is_w_ve(entry):
+        return 0 if q.dxcc in _W_VE_ENTITIES else 3
+    return 3 if q.exch["exch"] in _W_VE_MULTS else 0
+
+
+def _arrl_dx_mult(entry: ContestEntry, q: ContestQSO) -> str | None:
+    if _is_w_ve(entry):
+        return q.dxcc if q.dxcc and q.dxcc not in _W_VE_ENTITIES else None
+    return q.exch["exch"] if q.exch["exch"] in _W_VE_MULTS else None
+
+
+_FIELD_DAY_POWER = {"QRP": 5, "LOW": 2, "HIGH": 1}
+
+_RST_ZONE = (("zone", r"0?[1-9]|[1-3][0-9]|40"),)
+_SECTION = r"[A-Z]{2,3}"
+
+CONTESTS: dict[str, Contest] = {
+    c.id: c
+    for c in (
+        *(
+            Contest(
+                id=f"CQ-WW-{mode}",
+                name=f"CQ World Wide DX Contest ({mode})",
+                mode_classes=frozenset({"CW"} if mode == "CW" else {"PHONE"}),
+                exchange=_RST_ZONE,
+                sent_pattern=r"0?[1-9]|[1-3][0-9]|40",
+                points=_cqww_points,
+                multipliers=(
+                    Multiplier("zone", True, lambda e, q: str(int(q.exch["zone"]))),
+                    Multiplier("country", True, lambda e, q: q.dxcc or None),
+                ),
+            )
+            for mode in ("CW", "SSB")
+        ),
+        *(
+            Contest(
+                id=f"ARRL-DX-{mode}",
+                name=f"ARRL International DX Contest ({mode})",
+                mode_classes=frozenset({"CW"} if mode == "CW" else {"PHONE"}),
+                exchange=(("exch", r"[A-Z0-9]{1,4}"),),  # state/province, or DX power
+                sent_pattern=r"[A-Za-z0-9]{1,4}",
+                points=_arrl_dx_points,
+                multipliers=(Multiplier("dx", True, _arrl_dx_mult),),
+            )
+            for mode in ("CW", "SSB")
+        ),
+        *(
+            Contest(
+                id=f"ARRL-SS-{mode}",
+                name=f"ARRL November Sweepstakes ({mode})",
+                mode_classes=frozenset({"CW"} if mode == "CW" else {"PHONE"}),
+                exchange=(
+                    ("serial", r"\d{1,5}"),
+                    ("precedence", r"[QABUMS]"),
+                    ("check", r"\d{2}"),
+                    ("section", _SECTION),
+                ),
+                sent_pattern=r"[QABUMSqabums] \d{2} [A-Za-z]{2,3}",
+                points=lambda e, q: 2,
+                multipliers=(
+                    Multiplier(
+                        "section", False,
+                        lambda e, q: q.exch["section"] if q.exch["section"] in ARRL_SECTIONS else None,
+                    ),
+                ),
+                dupe_per="contest",
+                serial=True,
+                rst=False,
+            )
+            for mode in ("CW", "SSB")
+        ),
+        Contest(
+            id="ARRL-FD",
+            name="ARRL Field Day",
+            mode_classes=frozenset({"CW", "PHONE", "DIGITAL"}),
+            exchange=(("class", r"\d{1,2}[A-F]"), ("section", _SECTION)),
+            sent_pattern=r"\d{1,2}[A-Fa-f] [A-Za-z]{2,3}",
+            points=lambda e, q: 1 if q.mode_class == "PHONE" else 2,
+            dupe_per="band_mode",
+            rst=False,
+            score=lambda entry: entry.points * _FIELD_DAY_POWER.get(entry.category_power, 1),
+        ),
+    )
+}
+
+
+def contest_for(entry: ContestEntry) -> Contest:
+    return CONTESTS[entry.contest]
+
+
+def check_qso(entry: ContestEntry, qso: QSO) -> None:
+    """ValueError unless ``qso`` can be scored in ``entry``."""
+    contest = contest_for(entry)
+    contest.parse_exchange(qso.exch_rcvd)
+    if not qso.band:
+        raise ValueError("contest QSOs need a band or frequency")
+    if mode_class(qso.mode) not in contest.mode_classes:
+        raise ValueError(f"mode {qso.mode!r} does not count in {contest.id}")
+
+
+def _contest_qso(contest: Contest, qso) -> ContestQSO | None:
+    try:
+        exch = contest.parse_exchange(qso.exch_rcvd)
+    except ValueError:
+        return None  # edited into an unscorable state; counted as neither QSO nor dupe
+    return ContestQSO(
+        call=qso.call.upper(),
+        band=qso.band or "",
+        mode_class=mode_class(qso.mode),
+        dxcc=(qso.dxcc or "").strip().upper(),
+        exch=exch,
+    )
+
+
+# ── Incremental scoring ────────────────────────────────────────────────────────
+
+
+async def next_serial(session: AsyncSession, entry_id: uuid.UUID) -> int:
+    """Claim the entry's next sent serial number."""
+    stmt = (
+        update(ContestEntry)
+        .where(ContestEntry.id == entry_id)
+        .values(last_serial=ContestEntry.last_serial + 1)
+        .returning(ContestEntry.last_serial)
+        .execution_options(synchronize_session=False)
+    )
+    return (await session.execute(stmt)).scalar_one()
+
+
+async def _claim(session: AsyncSession, entry_id: uuid.UUID, kind: str, key: str) -> bool:
+    """Record a dupe or multiplier key; True if the entry did not have it yet."""
+    stmt = dialect_insert(session, ContestWorked).values(entry_id=entry_id, kind=kind, key=key[:64])
+    result = await session.execute(stmt.on_conflict_do_nothing())
+    return result.rowcount == 1
+
+
+async def record_contest_qsos(session: AsyncSession, qsos: Sequence[QSO]) -> None:
+    """Score newly added contest QSOs into their entries' counters. Does not commit."""
+    contest_qsos = [qso for qso in qsos if qso.contest_entry_id]
+    if not contest_qsos:
+        return
+    ids = {qso.contest_entry_id for qso in contest_qsos}
+    entries_q = select(ContestEntry).where(ContestEntry.id.in_(ids))
+    entries = {e.id: e for e in (await session.execute(entries_q)).scalars()}
+
+    for qso in contest_qsos:
+        entry = entries.get(qso.contest_entry_id)
+        if entry is None:
+            continue
+        contest = contest_for(entry)
+        q = _contest_qso(contest, qso)
+        if q is None:
+            continue
+        if await _claim(session, entry.id, "dupe", contest.dupe_key(q)):
+            values = {
+                "qsos": ContestEntry.qsos + 1,
+                "points": ContestEntry.points + contest.points(entry, q),
+            }
+            new_mults = 0
+            for kind, key in contest.mult_keys(entry, q):
+                new_mults += await _claim(session, entry.id, kind, key)
+            if new_mults:
+                values["mults"] = ContestEntry.mults + new_mults
+        else:
+            values = {"dupes": ContestEntry.dupes + 1}
+        await session.execute(
+            update(ContestEntry)
+            .where(ContestEntry.id == entry.id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def rescore_entries(session: AsyncSession, entry_ids: Iterable[uuid.UUID]) -> None:
+    """Recompute entries' counters and claimed keys from their QSOs, in log order."""
+    for entry_id in {i for i in entry_ids if i}:
+        entry = await session.get(ContestEntry, entry_id)
+        if entry is None:
+            continue
+        contest = contest_for(entry)
+        await session.execute(delete(ContestWorked).where(ContestWorked.entry_id == entry_id))
+
+        claimed: set[tuple[str, str]] = set()
+        qsos = dupes = points = mults = 0
+        log_q = (
+            select(QSO)
+            .where(QSO.contest_entry_id == entry_id)
+            .order_by(QSO.qso_date, QSO.time_on, QSO.id)
+        )
+        for qso in (await session.execute(log_q)).scalars():
+            q = _contest_qso(contest, qso)
+            if q is None:
+                continue
+            dupe = ("dupe", contest.dupe_key(q)[:64])
+            if dupe in claimed:
+                dupes += 1
+                continue
+            claimed.add(dupe)
+            qsos += 1
+            points += contest.points(entry, q)
+            for kind, key in contest.mult_keys(entry, q):
+                if (kind, key[:64]) not in claimed:
+                    claimed.add((kind, key[:64]))
+                    mults += 1
+
+        if claimed:
+            await session.execute(
+                dialect_insert(session, ContestWorked),
+                [{"entry_id": entry_id, "kind": kind, "key": key} for kind, key in claimed],
+            )
+        entry.qsos, entry.dupes, entry.points, entry.mults = qsos, dupes, points, mults
+
+
+# ── Cabrillo ───────────────────────────────────────────────────────────────────
+
+
+def _cabrillo_freq(qso: QSO) -> str:
+    if qso.band in _VHF_DESIGNATORS:
+        return _VHF_DESIGNATORS[qso.band]
+    hz = qso.freq_hz if qso.freq_hz is not None else _BAND_EDGES.get(qso.band, 0)
+    return str(hz // 1000)
+
+
+def _default_rst(qso: QSO) -> str:
+    return "599" if mode_class(qso.mode) in ("CW", "DIGITAL") else "59"
+
+
+def cabrillo_header(entry: ContestEntry, created: datetime) -> str:
+    contest = contest_for(entry)
+    lines = [
+        "START-OF-LOG: 3.0",
+        f"CONTEST: {contest.id}",
+        f"CALLSIGN: {entry.callsign}",
+        f"CATEGORY-OPERATOR: {entry.category_operator}",
+        f"CATEGORY-BAND: {entry.category_band}",
+        f"CATEGORY-POWER: {entry.category_power}",
+        f"CLAIMED-SCORE: {contest.score(entry)}",
+        f"CREATED-BY: HamLog {created.strftime('%Y-%m-%d %H:%M')}Z",
+    ]
+    return "".join(line + "\n" for line in lines)
+
+
+def cabrillo_qso(entry: ContestEntry, qso: QSO) -> str:
+    contest = contest_for(entry)
+    sent = [entry.exch_sent.upper()]
+    rcvd = [(qso.exch_rcvd or "").upper()]
+    if contest.serial:
+        sent.insert(0, str(qso.stx or 0))
+    if contest.rst:
+        sent.insert(0, qso.rst_sent or _default_rst(qso))
+        rcvd.insert(0, qso.rst_rcvd or _default_rst(qso))
+    mode = _CABRILLO_MODES.get(mode_class(qso.mode), "DG")
+    if mode == "DG" and (qso.mode or "").upper() == "RTTY":
+        mode = "RY"
+    date = qso.qso_date.isoformat() if qso.qso_date else "0000-00-00"
+    time = qso.time_on.strftime("%H%M") if qso.time_on else "0000"
+    return (
+        f"QSO: {_cabrillo_freq(qso):>5} {mode} {date} {time} "
+        f"{entry.callsign:<13} {' '.join(sent):<10} {qso.call.upper():<13} {' '.join(rcvd)}\n"
+    )
+
+
+async def cabrillo_lines(session: AsyncSession, entry: ContestEntry) -> AsyncIterator[str]:
+    """The entry's Cabrillo log, streamed from a server-side cursor in log order."""
+    yield cabrillo_header(entry, datetime.utcnow())
+    q = (
+        select(QSO)
+        .where(QSO.contest_entry_id == entry.id)
+        .order_by(QSO.qso_date, QSO.time_on, QSO.id)
+        .execution_options(yield_per=500)
+    )
+    async for qso in await session.stream_scalars(q):
+        yield cabrillo_qso(entry, qso)
+    yield "END-OF-LOG:\n"
@@ -1,23 +1,130 @@
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+from backend import loadshed
 from backend.config import settings
 
-engine = create_async_engine(settings.database_url, echo=False)
+
+# ── Engine factory ───────────────────────────────────────────────────────────
+
+class MonitoredQueuePool(AsyncAdaptedQueuePool):
+    """The default async pool, reporting checkout waits to the load-shedding monitor."""
+
+    def _do_get(self):
+        ticket = loadshed.monitor.checkout_started()
+        try:
+            return super()._do_get()
+        finally:
+            loadshed.monitor.checkout_finished(ticket)
+
+
+def engine_options(url: str) -> dict:
+    """
+    Keyword arguments for ``create_async_engine`` tuned for the URL's backend.
+
+    PostgreSQL gets explicit pool sizing, pre-ping and recycle plus asyncpg's
+    statement cache settings. SQLite keeps SQLAlchemy's default pool sizing —
+    its tuning happens per connection in ``_apply_sqlite_pragmas``. Pooled
+    backends use ``MonitoredQueuePool`` so load shedding sees checkout waits.
+    """
+    backend = make_url(url).get_backend_name()
+    if backend == "postgresql":
+        return {
+            "poolclass": MonitoredQueuePool,
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout": settings.db_pool_timeout,
+            "pool_recycle": settings.db_pool_recycle,
+            "pool_pre_ping": settings.db_pool_pre_ping,
+            "connect_args": {
+                # asyncpg's own prepared-statement cache; set to 0 behind
+                # PgBouncer/Supabase pooler in transaction mode
+                "statement_cache_size": settings.asyncpg_statement_cache_size,
+                # SQLAlchemy's adapter-level cache of prepared statements
+                "prepared_statement_cache_size": settings.asyncpg_statement_cache_size,
+            },
+        }
+    if backend == "sqlite":
+        options = {"connect_args": {"timeout": settings.sqlite_busy_timeout_ms / 1000}}
+        if not _is_memory_sqlite(url):
+            options["poolclass"] = MonitoredQueuePool
+        return options
+    return {}
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    database = make_url(url).database
+    return not database or database == ":memory:" or "mode=memory" in url
+
+
+def _apply_sqlite_pragmas(dbapi_connection, _connection_record, *, memory: bool) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        if not memory:
+            # WAL lets readers proceed while a writer commits
+            cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+            cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        # NORMAL only fsyncs at WAL checkpoints — durable across app crashes,
+        # may lose the last transactions on power loss
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        # Negative cache_size is in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kib)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+    finally:
+        cursor.close()
+
+
+def create_engine_from_url(url: str, **overrides) -> AsyncEngine:
+    """Create an async engine for ``url`` with backend-specific tuning applied."""
+    options = {"echo": False, **engine_options(url), **overrides}
+    engine = create_async_engine(url, **options)
+
+    if engine.dialect.name == "sqlite":
+        memory = _is_memory_sqlite(url)
+
+        @event.listens_for(engine.sync_engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            _apply_sqlite_pragmas(dbapi_connection, connection_record, memory=memory)
+
+    return engine
+
+
+engine = create_engine_from_url(settings.database_url)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
+# Read replica — None when not configured, in which case reads use the primary
+replica_engine = (
+    create_engine_from_url(settings.database_replica_url)
+    if settings.database_replica_url
+    else None
+)
+replica_session_maker = (
+    async_sessionmaker(replica_engine, expire_on_commit=False) if replica_engine else None
+)
+
 
 class Base(DeclarativeBase):
     pass
 
 
+def dialect_insert(session: AsyncSession, table):
+    """``INSERT`` supporting ``on_conflict_do_*`` for the session's backend."""
+    if session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+
 async def get_async_session():
     async with async_session_maker() as session:
         yield session
 
-
-async def create_db_and_tables():
-    # Import models here to ensure they're registered with Base.metadata
-    import backend.models  # noqa: F401
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
@@ -0,0 +1,332 @@
+"""
+Background enrichment of QSOs saved without name, QTH, grid or DXCC.
+
+``POST /qso`` (and bulk imports) hand the IDs of incomplete QSOs to
+``worker.enqueue`` after committing, so saving never waits on HamQTH. The
+worker, started from the app lifespan, gathers IDs into batches and for each
+batch:
+
+  1. reads the callsigns' ``CallsignCache`` rows in one query, then the
+     offline callbook's rows for the rest,
+  2. looks up the misses on HamQTH while the lookup budget allows (the rest
+     stay pending for the next sweep) and upserts them into the cache,
+  3. re-reads the QSOs still pending, fills only their empty fields and
+     writes them back with executemany UPDATEs by primary key in one short
+     transaction, keeping locations, statistics and award bitsets in step.
+
+No rows are loaded and no transaction is open while lookups wait on HamQTH
+or the budget, so a QSO deleted or archived meanwhile is simply skipped.
+
+Every QSO tried is stamped ``enriched_at`` so callsigns HamQTH does not know
+are not retried forever. A periodic sweep picks up anything the queue missed
+(worker restarts, a full queue, an exhausted budget), and
+``python -m backend.cli enrich-backfill`` runs the same pipeline once over
+the whole table.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Iterable
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+import backend.database as database
+from backend import geo, maintenance
+from backend.config import settings
+from backend.database import dialect_insert
+from backend.models import (
+    QSO, QSO_INCOMPLETE, QSO_PENDING_ENRICHMENT, CallbookEntry, CallsignCache, User,
+)
+from backend.qso_events import TRACKED_COLUMNS, qsos_changed
+from backend.routers.hamqth import CACHE_TTL, _lookup_hamqth
+from backend.schemas import canonical_grid
+
+logger = logging.getLogger(__name__)
+
+ENRICH_FIELDS = ("name", "qth", "grid", "dxcc")
+GEO_COLUMNS = ("lat", "lon", "distance_km", "bearing_deg")
+
+
+def needs_enrichment(qso: QSO) -> bool:
+    return any(getattr(qso, name) is None for name in ENRICH_FIELDS)
+
+
+# ── Lookup budget ──────────────────────────────────────────────────────────────
+
+
+class RateBudget:
+    """Token bucket: ``per_minute`` lookups, bursting to a tenth of that."""
+
+    def __init__(self, per_minute: float, burst: float | None = None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1.0, per_minute / 10.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        self._refill()
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+    async def acquire(self) -> None:
+        while not self.try_acquire():
+            await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+
+# ── Batch enrichment ───────────────────────────────────────────────────────────
+
+
+async def cache_lookups(session: AsyncSession, rows: list[dict]) -> None:
+    """Upsert HamQTH results (``callsign``, the lookup fields, ``cached_at``, ``accessed_at``)."""
+    if not rows:
+        return
+    stmt = dialect_insert(session, CallsignCache).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CallsignCache.callsign],
+        set_={name: getattr(stmt.excluded, name) for name in (*ENRICH_FIELDS, "cached_at", "accessed_at")},
+    )
+    await session.execute(stmt)
+
+
+@dataclass
+class EnrichResult:
+    enriched: int = 0  # QSOs that gained at least one field
+    attempted: int = 0  # QSOs stamped enriched_at
+    deferred: int = 0  # QSOs left pending because the budget ran out
+
+
+async def enrich_qsos(
+    session: AsyncSession,
+    qso_ids: Iterable[uuid.UUID],
+    budget: RateBudget,
+    *,
+    wait_for_budget: bool = False,
+    retry: bool = False,
+) -> EnrichResult:
+    """
+    Fill missing fields on the given QSOs and commit.
+
+    Without ``retry`` only QSOs never tried before are touched. With
+    ``wait_for_budget`` lookups wait for budget instead of being deferred.
+    """
+    pending = QSO_INCOMPLETE if retry else QSO_PENDING_ENRICHMENT
+    qso_ids = list(qso_ids)
+    calls_q = select(QSO.call).where(QSO.id.in_(qso_ids), pending).distinct()
+    calls = {call.upper() for call in (await session.execute(calls_q)).scalars()}
+    result = EnrichResult()
+    if not calls:
+        return result
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    cache_q = select(CallsignCache).where(
+        CallsignCache.callsign.in_(calls), CallsignCache.cached_at >= now - CACHE_TTL
+    )
+    found = {
+        c.callsign: {name: getattr(c, name) for name in ENRICH_FIELDS}
+        for c in (await session.execute(cache_q)).scalars()
+    }
+    for call in found:
+        maintenance.touch(call)
+    if missing := calls - found.keys():
+        callbook_q = select(CallbookEntry).where(CallbookEntry.callsign.in_(missing))
+        for entry in (await session.execute(callbook_q)).scalars():
+            found[entry.callsign] = {name: getattr(entry, name) for name in ENRICH_FIELDS}
+    # Lookups may wait minutes on the budget; hold no rows or transaction meanwhile
+    await session.commit()
+
+    deferred: set[str] = set()
+    fresh = []
+    for call in sorted(calls - found.keys()):
+        if wait_for_budget:
+            await budget.acquire()
+        elif not budget.try_acquire():
+            deferred.add(call)
+            continue
+        data = await _lookup_hamqth(call)
+        if data is not None:
+            found[call] = data
+            fresh.append({"callsign": call, **data, "cached_at": now, "accessed_at": now})
+
+    # One short transaction: re-read what is still pending, then write it back
+    await cache_lookups(session, fresh)
+    names = tuple(dict.fromkeys((*TRACKED_COLUMNS, *ENRICH_FIELDS)))
+    # Locked, so a delete can't land between this read and the UPDATE below
+    rows_q = (
+        select(QSO.id, *(getattr(QSO, name) for name in names))
+        .where(QSO.id.in_(qso_ids), pending)
+        .with_for_update()
+    )
+    rows = (await session.execute(rows_q)).all()
+    homes_q = select(User.id, User.grid).where(User.id.in_({row.created_by for row in rows}))
+    homes = dict((await session.execute(homes_q)).all())
+
+    stamped: list[dict] = []
+    filled: list[dict] = []
+    before, after = [], []
+    for row in rows:
+        call = row.call.upper()
+        if call in deferred:
+            result.deferred += 1
+            continue
+        result.attempted += 1
+        data = found.get(call) or {}
+        updates = {
+            name: canonical_grid(data[name]) if name == "grid" else data[name]
+            for name in ENRICH_FIELDS
+            if getattr(row, name) is None and data.get(name)
+        }
+        if not updates:
+            stamped.append({"id": row.id, "owner": row.created_by, "enriched_at": now})
+            continue
+        old = SimpleNamespace(**{name: getattr(row, name) for name in names})
+        new = SimpleNamespace(**{**vars(old), **updates})
+        params = {
+            "id": row.id, "owner": row.created_by, "enriched_at": now,
+            **{name: getattr(new, name) for name in ENRICH_FIELDS},
+        }
+        if "grid" in updates:
+            geo.locate_qsos([new], homes.get(row.created_by))
+            params.update({name: getattr(new, name) for name in GEO_COLUMNS})
+        before.append(old)
+        after.append(new)
+        filled.append(params)
+
+    # executemany by primary key, grouped so every batch has the same columns
+    batches: dict[tuple, list[dict]] = {}
+    for params in stamped + filled:
+        batches.setdefault(tuple(params), []).append(params)
+    # The owner filter prunes a partitioned qso table, as in qsl.apply_confirmations
+    owned = update(QSO).where(QSO.created_by == bindparam("owner"))
+    for batch in batches.values():
+        await session.execute(owned, batch, execution_options={"synchronize_session": None})
+    if after:
+        await qsos_changed(session, before, after)
+    await session.commit()
+    result.enriched = len(after)
+    return result
+
+
+async def pending_ids(
+    session: AsyncSession, after: uuid.UUID | None, limit: int, retry: bool = False
+) -> list[uuid.UUID]:
+    """One keyset page of IDs of incomplete QSOs, ordered by ID."""
+    q = (
+        select(QSO.id)
+        .where(QSO_INCOMPLETE if retry else QSO_PENDING_ENRICHMENT)
+        .order_by(QSO.id)
+        .limit(limit)
+    )
+    if after is not None:
+        q = q.where(QSO.id > after)
+    return list((await session.execute(q)).scalars())
+
+
+async def backfill(
+    session_maker: async_sessionmaker, budget: RateBudget, retry: bool = False
+) -> EnrichResult:
+    """Enrich every incomplete QSO once, waiting for budget as needed."""
+    total = EnrichResult()
+    last_id = None
+    while True:
+        async with session_maker() as session:
+            ids = await pending_ids(session, last_id, settings.enrichment_batch_size, retry)
+            if not ids:
+                return total
+            last_id = ids[-1]
+            result = await enrich_qsos(session, ids, budget, wait_for_budget=True, retry=retry)
+        total.enriched += result.enriched
+        total.attempted += result.attempted
+
+
+# ── Worker ─────────────────────────────────────────────────────────────────────
+
+
+class EnrichmentWorker:
+    """In-process queue plus the task that drains it; one per worker process."""
+
+    def __init__(self):
+        self.budget = RateBudget(settings.enrichment_lookups_per_minute)
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    def enqueue(self, qso_ids: Iterable[uuid.UUID]) -> None:
+        """Schedule QSOs for enrichment; never blocks the caller."""
+        if self._queue is None:
+            return  # not running — the next sweep or a backfill will find them
+        for qso_id in qso_ids:
+            try:
+                self._queue.put_nowait(qso_id)
+            except asyncio.QueueFull:
+                return  # the periodic sweep picks up the rest
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=10_000)
+        self._task = asyncio.create_task(self._run(), name="qso-enrichment")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._queue = self._task = None
+
+    async def _next_batch(self, timeout: float) -> set[uuid.UUID]:
+        batch = {await asyncio.wait_for(self._queue.get(), timeout)}
+        deadline = time.monotonic() + settings.enrichment_batch_wait_seconds
+        while len(batch) < settings.enrichment_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.add(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        next_sweep = time.monotonic()  # catch up on anything left from before startup
+        while True:
+            try:
+                batch = await self._next_batch(max(0.0, next_sweep - time.monotonic()))
+            except asyncio.TimeoutError:
+                await self._sweep()
+                next_sweep = time.monotonic() + settings.enrichment_sweep_interval_seconds
+                continue
+            try:
+                async with database.async_session_maker() as session:
+                    await enrich_qsos(session, batch, self.budget)
+            except Exception:
+                logger.exception("QSO enrichment batch failed")
+
+    async def _sweep(self) -> None:
+        """Work through pending QSOs until done or the budget runs out."""
+        last_id = None
+        try:
+            while True:
+                async with database.async_session_maker() as session:
+                    ids = await pending_ids(session, last_id, settings.enrichment_batch_size)
+                    if not ids:
+                        return
+                    last_id = ids[-1]
+                    result = await enrich_qsos(session, ids, self.budget)
+                if result.deferred:
+                    return
+        except Exception:
+            logger.exception("QSO enrichment sweep failed")
+
+
+worker = EnrichmentWorker()
@@ -0,0 +1,224 @@
+"""
+Bulk export formats for analytics: NDJSON, CSV, Parquet and Arrow IPC.
+
+Unlike ADIF, every format carries typed columns — dates and times as ISO
+strings in the text formats and as date32/time64 in the Arrow ones, the
+frequency both as integer Hz and float MHz — so a log loads straight into a
+dataframe. Rows come off a server-side cursor as plain tuples (no ORM
+objects) in batches; each batch is encoded and sent before the next is read,
+so memory is bounded by the batch size, not the log. Parquet gets one row
+group per batch.
+
+pyarrow is optional (``pip install .[arrow]``) and imported on first use;
+without it the Parquet and Arrow formats raise ``ExportUnavailable``.
+"""
+import csv
+import io
+import json
+from typing import AsyncIterator, Sequence
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.bands import hz_to_mhz
+from backend.models import QSO
+
+# Exported column → value kind; ``freq`` (MHz) is derived from ``freq_hz``
+COLUMNS: dict[str, str] = {
+    "id": "str",
+    "call": "str",
+    "qso_date": "date",
+    "time_on": "time",
+    "band": "str",
+    "freq": "float",
+    "freq_hz": "int",
+    "mode": "str",
+    "rst_sent": "str",
+    "rst_rcvd": "str",
+    "name": "str",
+    "qth": "str",
+    "grid": "str",
+    "dxcc": "str",
+    "lat": "float",
+    "lon": "float",
+    "distance_km": "float",
+    "bearing_deg": "float",
+    "qsl_confirmed": "bool",
+    "qsl_date": "date",
+    "stx": "int",
+    "exch_rcvd": "str",
+    "notes": "str",
+}
+_SELECTED = [getattr(QSO, name) for name in COLUMNS if name != "freq"]
+_FREQ_AT = list(COLUMNS).index("freq")
+
+TEXT_BATCH_ROWS = 2_000
+ROW_GROUP_ROWS = 50_000
+
+
+class ExportUnavailable(Exception):
+    """The format needs an optional dependency that is not installed."""
+
+
+def _with_freq(rows: Sequence[tuple]) -> list[tuple]:
+    """Selected rows as exported: ``id`` as text, ``freq`` in MHz before ``freq_hz``."""
+    i = _FREQ_AT
+    return [(str(r[0]), *r[1:i], hz_to_mhz(r[i]), *r[i:]) for r in rows]
+
+
+# ── Encoders ───────────────────────────────────────────────────────────────────
+
+
+class NDJSONEncoder:
+    media_type = "application/x-ndjson"
+    extension = "ndjson"
+    batch_rows = TEXT_BATCH_ROWS
+
+    def begin(self) -> bytes:
+        return b""
+
+    def batch(self, rows: list[tuple]) -> bytes:
+        names = tuple(COLUMNS)
+        dumps = json.JSONEncoder(separators=(",", ":"), default=str).encode
+        return "".join(dumps(dict(zip(names, row))) + "\n" for row in rows).encode()
+
+    def end(self) -> bytes:
+        return b""
+
+
+class CSVEncoder:
+    media_type = "text/csv"
+    extension = "csv"
+    batch_rows = TEXT_BATCH_ROWS
+
+    def _write(self, rows) -> bytes:
+        buf = io.StringIO()
+        csv.writer(buf, lineterminator="\n").writerows(rows)
+        return buf.getvalue().encode()
+
+    def begin(self) -> bytes:
+        return self._write([tuple(COLUMNS)])
+
+    def batch(self, rows: list[tuple]) -> bytes:
+        return self._write(rows)
+
+    def end(self) -> bytes:
+        return b""
+
+
+class _Chunks(io.RawIOBase):
+    """Write-only sink that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self._parts: list[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # Parquet records absolute offsets, so the position never resets
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as exc:  # optional dependency: pip install hamlog[arrow]
+        raise ExportUnavailable("Parquet and Arrow exports need pyarrow (pip install hamlog[arrow])") from exc
+    return pyarrow
+
+
+class _ArrowEncoder:
+    batch_rows = ROW_GROUP_ROWS
+
+    def __init__(self):
+        self.pa = pa = _import_pyarrow()
+        types = {
+            "str": pa.string(), "int": pa.int64(), "float": pa.float64(), "bool": pa.bool_(),
+            "date": pa.date32(), "time": pa.time64("us"),
+        }
+        self.schema = pa.schema([(name, types[kind]) for name, kind in COLUMNS.items()])
+        self.sink = _Chunks()
+        self.writer = None
+
+    def _record_batch(self, rows: list[tuple]):
+        columns = zip(*rows)
+        arrays = [
+            self.pa.array(values, type=f.type) for values, f in zip(columns, self.schema)
+        ]
+        return self.pa.record_batch(arrays, schema=self.schema)
+
+    def begin(self) -> bytes:
+        self.writer = self._open()
+        return self.sink.drain()
+
+    def batch(self, rows: list[tuple]) -> bytes:
+        self._write(self._record_batch(rows))
+        return self.sink.drain()
+
+    def end(self) -> bytes:
+        self.writer.close()
+        return self.sink.drain()
+
+
+class ParquetEncoder(_ArrowEncoder):
+    media_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+
+    def _open(self):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(self.sink, self.schema, compression="zstd")
+
+    def _write(self, batch) -> None:
+        self.writer.write_table(self.pa.Table.from_batches([batch]))  # one row group
+
+
+class ArrowStreamEncoder(_ArrowEncoder):
+    media_type = "application/vnd.apache.arrow.stream"
+    extension = "arrows"
+
+    def _open(self):
+        return self.pa.ipc.new_stream(self.sink, self.schema)
+
+    def _write(self, batch) -> None:
+        self.writer.write_batch(batch)
+
+
+FORMATS = {
+    "ndjson": NDJSONEncoder,
+    "csv": CSVEncoder,
+    "parquet": ParquetEncoder,
+    "arrow": ArrowStreamEncoder,
+}
+
+
+# ── Streaming ──────────────────────────────────────────────────────────────────
+
+
+async def export_chunks(session: AsyncSession, q: Select, encoder) -> AsyncIterator[bytes]:
+    """Encode the QSOs ``q`` selects, one cursor batch at a time."""
+    qso = q.column_descriptions[0]["entity"]  # QSO, or the cross-tier alias
+    selected = [getattr(qso, column.key) for column in _SELECTED]
+    rows_q = q.with_only_columns(*selected).execution_options(yield_per=encoder.batch_rows)
+    chunk = encoder.begin()
+    if chunk:
+        yield chunk
+    result = await session.stream(rows_q)
+    async for rows in result.partitions():
+        yield encoder.batch(_with_freq(rows))
+    chunk = encoder.end()
+    if chunk:
+        yield chunk
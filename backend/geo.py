@@ -0,0 +1,168 @@
+"""
+Maidenhead locator decoding and great-circle geometry.
+
+Locators decode to the centre of their square (2, 4, 6 or 8 characters).
+Distance and initial bearing use the haversine formula on a spherical Earth
+(R = 6371 km), which is within 0.5% of the ellipsoid — far finer than a
+4-character grid square.
+
+Bulk recomputation (``recompute_geo``) is vectorised with NumPy when it is
+installed (``pip install hamlog[geo]``) and falls back to a pure-Python loop.
+"""
+import math
+import uuid
+from typing import Iterable, Sequence
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models import QSO, QSOArchive, User
+
+try:
+    import numpy as np
+except ImportError:  # optional: only bulk recomputation benefits
+    np = None
+
+EARTH_RADIUS_KM = 6371.0
+BACKFILL_BATCH = 10_000
+
+
+# ── Locators ──────────────────────────────────────────────────────────────────
+
+
+def grid_to_latlon(grid: str | None) -> tuple[float, float] | None:
+    """(lat, lon) of the centre of a Maidenhead square, or None if invalid."""
+    g = (grid or "").strip().upper()
+    if len(g) not in (2, 4, 6, 8):
+        return None
+    lon, lat = -180.0, -90.0
+    lon_size, lat_size = 360.0, 180.0
+    for i in range(0, len(g), 2):
+        a, b = g[i], g[i + 1]
+        if i in (0, 4):
+            base, count = ("A", 18) if i == 0 else ("A", 24)
+            if not (base <= a < chr(ord(base) + count) and base <= b < chr(ord(base) + count)):
+                return None
+            x, y = ord(a) - ord(base), ord(b) - ord(base)
+        else:
+            if not (a.isdigit() and b.isdigit()):
+                return None
+            count, x, y = 10, int(a), int(b)
+        lon_size, lat_size = lon_size / count, lat_size / count
+        lon += x * lon_size
+        lat += y * lat_size
+    return lat + lat_size / 2, lon + lon_size / 2
+
+
+# ── Great circle ──────────────────────────────────────────────────────────────
+
+
+def distance_bearing(lat1: float, lon1: float, lat2: float, lon2: float) -> tuple[float, float]:
+    """Great-circle distance (km) and initial bearing (degrees true) from 1 to 2."""
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    h = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    distance = 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+    y = math.sin(dl) * math.cos(p2)
+    x = math.cos(p1) * math.sin(p2) - math.sin(p1) * math.cos(p2) * math.cos(dl)
+    bearing = (math.degrees(math.atan2(y, x)) + 360.0) % 360.0
+    return distance, bearing
+
+
+def distance_bearing_many(
+    lat1: Sequence[float], lon1: Sequence[float], lat2: Sequence[float], lon2: Sequence[float]
+) -> tuple[list[float], list[float]]:
+    """Element-wise ``distance_bearing`` over equal-length sequences."""
+    if np is None:
+        pairs = [distance_bearing(*args) for args in zip(lat1, lon1, lat2, lon2)]
+        return [d for d, _ in pairs], [b for _, b in pairs]
+
+    p1, p2 = np.radians(np.asarray(lat1, float)), np.radians(np.asarray(lat2, float))
+    dl = np.radians(np.asarray(lon2, float) - np.asarray(lon1, float))
+    h = np.sin((p2 - p1) / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(dl / 2) ** 2
+    distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(1.0, np.sqrt(h)))
+    y = np.sin(dl) * np.cos(p2)
+    x = np.cos(p1) * np.sin(p2) - np.sin(p1) * np.cos(p2) * np.cos(dl)
+    bearing = (np.degrees(np.arctan2(y, x)) + 360.0) % 360.0
+    return distance.tolist(), bearing.tolist()
+
+
+# ── QSO maintenance ───────────────────────────────────────────────────────────
+
+
+def locate_qsos(qsos: Iterable[QSO], my_grid: str | None) -> None:
+    """Fill lat/lon and, given the operator's grid, distance/bearing on new QSOs."""
+    home = grid_to_latlon(my_grid)
+    for qso in qsos:
+        there = grid_to_latlon(qso.grid)
+        qso.lat, qso.lon = there if there else (None, None)
+        if there and home:
+            qso.distance_km, qso.bearing_deg = distance_bearing(*home, *there)
+        else:
+            qso.distance_km = qso.bearing_deg = None
+
+
+async def recompute_geo(session: AsyncSession, user_id: uuid.UUID | None = None) -> int:
+    """
+    Recompute lat/lon/distance/bearing for one user's QSOs, or everyone's,
+    in both archive tiers.
+
+    Rows are processed in keyset-paginated batches; each batch is decoded,
+    run through the vectorised great-circle maths and written back with one
+    executemany UPDATE. Commits once at the end and returns the row count.
+    """
+    # Looked up separately rather than joined: user.id and qso.created_by
+    # use different UUID column types, which SQLite stores differently
+    homes_q = select(User.id, User.grid)
+    if user_id is not None:
+        homes_q = homes_q.where(User.id == user_id)
+    homes = dict((await session.execute(homes_q)).all())
+
+    # Each distinct locator is decoded once per run
+    decoded: dict[str | None, tuple[float, float] | None] = {}
+
+    def decode(grid):
+        if grid not in decoded:
+            decoded[grid] = grid_to_latlon(grid)
+        return decoded[grid]
+
+    total = 0
+    for model in (QSO, QSOArchive):
+        q = select(model.id, model.grid, model.created_by).order_by(model.id).limit(BACKFILL_BATCH)
+        if user_id is not None:
+            q = q.where(model.created_by == user_id)
+        last_id = None
+        while True:
+            page = q if last_id is None else q.where(model.id > last_id)
+            rows = (await session.execute(page)).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            params = []
+            paired, home_lat, home_lon, far_lat, far_lon = [], [], [], [], []
+            for qso_id, grid, created_by in rows:
+                there, home = decode(grid), decode(homes.get(created_by))
+                params.append({
+                    "id": qso_id,
+                    "lat": there[0] if there else None,
+                    "lon": there[1] if there else None,
+                    "distance_km": None,
+                    "bearing_deg": None,
+                })
+                if there and home:
+                    paired.append(len(params) - 1)
+                    home_lat.append(home[0])
+                    home_lon.append(home[1])
+                    far_lat.append(there[0])
+                    far_lon.append(there[1])
+
+            distances, bearings = distance_bearing_many(home_lat, home_lon, far_lat, far_lon)
+            for i, d, b in zip(paired, distances, bearings):
+                params[i]["distance_km"], params[i]["bearing_deg"] = d, b
+
+            await session.execute(update(model), params)
+            total += len(rows)
+
+    await session.commit()
+    return total
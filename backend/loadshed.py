@@ -0,0 +1,139 @@
+"""
+Adaptive load shedding.
+
+When the database pool saturates, every request waits its turn for a
+connection and latency grows until clients time out and retry. This module
+watches for that and turns low-priority work away early, so logging keeps its
+connections:
+
+  * ``MonitoredQueuePool`` (``backend/database.py``) reports how long each
+    connection checkout waited. The queueing delay is the smallest wait seen
+    over the last ``LOADSHED_INTERVAL_MS`` (a standing queue, not a blip; the
+    CoDel rule) or the age of the oldest checkout still waiting, whichever is
+    larger.
+  * ``LoadShedMiddleware`` counts in-flight requests per route class. Exports,
+    statistics and NL parsing are low priority: while the delay is above
+    ``LOADSHED_TARGET_DELAY_MS``, a class that already has
+    ``LOADSHED_MAX_CONCURRENT`` requests running in this worker gets ``503``
+    with ``Retry-After`` (``0`` sheds them all). Below the target nothing is
+    shed, however many run. Everything else, QSO creation included, is never
+    shed.
+"""
+import itertools
+import json
+import math
+import time
+from collections import Counter
+
+from backend.config import settings
+
+LOW_PRIORITY = frozenset({"export", "stats", "parse"})
+
+
+def route_class(method: str, path: str) -> str:
+    if path.startswith("/qso/export") or path in ("/qso/reconcile", "/qso/qsl"):
+        return "export"  # bulk log transfer
+    if path == "/stats" or path.startswith("/stats/"):
+        return "stats"
+    if path == "/parse" or path.startswith("/parse/"):
+        return "parse"
+    if path == "/qso" and method == "POST":
+        return "qso_create"
+    return "other"
+
+
+class LoadMonitor:
+    """Queueing delay of the DB pool plus in-flight requests per route class."""
+
+    def __init__(self):
+        self.inflight: Counter = Counter()
+        self.shed: Counter = Counter()
+        self._waiting: dict[int, float] = {}  # checkout ticket → start
+        self._tickets = itertools.count()
+        self._window_end = 0.0
+        self._window_min = math.inf
+        self._standing = 0.0  # minimum wait over the last complete window
+        self._standing_until = 0.0
+
+    # ── Pool checkouts ───────────────────────────────────────────────────────
+
+    def checkout_started(self) -> int:
+        ticket = next(self._tickets)
+        self._waiting[ticket] = time.monotonic()
+        return ticket
+
+    def checkout_finished(self, ticket: int) -> None:
+        now = time.monotonic()
+        wait = now - self._waiting.pop(ticket, now)
+        interval = settings.loadshed_interval_ms / 1000
+        if now >= self._window_end:
+            if self._window_min is not math.inf:
+                self._standing = self._window_min
+                self._standing_until = now + interval
+            self._window_end = now + interval
+            self._window_min = wait
+        else:
+            self._window_min = min(self._window_min, wait)
+
+    def queue_delay(self) -> float:
+        """Seconds a request currently queues for a connection."""
+        now = time.monotonic()
+        standing = self._standing if now < self._standing_until else 0.0
+        oldest = min(self._waiting.values(), default=now)
+        return max(standing, now - oldest)
+
+    # ── Decisions ────────────────────────────────────────────────────────────
+
+    def should_shed(self, klass: str) -> bool:
+        if klass not in LOW_PRIORITY:
+            return False
+        # An idle pool serves any number; the cap only matters once it queues
+        if self.queue_delay() * 1000 <= settings.loadshed_target_delay_ms:
+            return False
+        return self.inflight[klass] >= settings.loadshed_max_concurrent
+
+    def snapshot(self) -> dict:
+        return {
+            "queue_delay_ms": round(self.queue_delay() * 1000, 1),
+            "waiting_checkouts": len(self._waiting),
+            "inflight": dict(self.inflight),
+            "shed": dict(self.shed),
+        }
+
+
+monitor = LoadMonitor()
+
+
+class LoadShedMiddleware:
+    """Pure ASGI middleware: 503 + Retry-After for low-priority work under load."""
+
+    def __init__(self, app, load_monitor: LoadMonitor | None = None):
+        self.app = app
+        self.monitor = load_monitor or monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.loadshed_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        klass = route_class(scope["method"], scope["path"])
+        if self.monitor.should_shed(klass):
+            self.monitor.shed[klass] += 1
+            body = json.dumps({"detail": "Server busy, retry later"}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(settings.loadshed_retry_after_seconds).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        self.monitor.inflight[klass] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.inflight[klass] -= 1
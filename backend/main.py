@@ -1,29 +1,45 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-from slowapi.util import get_remote_address
 
+from backend import archive, enrichment, maintenance, warming
 from backend.auth.users import auth_backend, fastapi_users
-from backend.database import create_db_and_tables
+from backend.config import settings
+from backend.loadshed import LoadShedMiddleware
+from backend.profiling import ProfilingMiddleware
+from backend.ratelimit import RateLimitMiddleware
+from backend.routers.admin import router as admin_router
+from backend.routers.awards import router as awards_router
+from backend.routers.contests import router as contests_router
+from backend.routers.geo import router as geo_router
 from backend.routers.hamqth import router as hamqth_router
 from backend.routers.parse import router as parse_router
 from backend.routers.qso import router as qso_router
+from backend.routers.stats import router as stats_router
 from backend.schemas import UserCreate, UserRead, UserUpdate
 
-# ── Rate limiter ─────────────────────────────────────────────────────────────
-
-limiter = Limiter(key_func=get_remote_address, default_limits=["60/minute"])
-
-
 # ── App lifecycle ─────────────────────────────────────────────────────────────
 
+# The schema is not touched at boot — run ``python -m backend.cli migrate``
+# (alembic upgrade head) once per deploy, before starting workers.
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await create_db_and_tables()
-    yield
+    if settings.enrichment_enabled:
+        enrichment.worker.start()
+    if settings.archive_enabled:
+        archive.worker.start()
+    if settings.maintenance_enabled:
+        maintenance.worker.start()
+    if settings.warming_enabled:
+        warming.worker.start()
+    try:
+        yield
+    finally:
+        await enrichment.worker.stop()
+        await archive.worker.stop()
+        await maintenance.worker.stop()
+        await warming.worker.stop()
 
 
 # ── App setup ─────────────────────────────────────────────────────────────────
@@ -35,8 +51,11 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+# Per-user budgets for /parse, /callsign and /qso (see backend/ratelimit.py)
+app.add_middleware(RateLimitMiddleware)
+
+# Outside the limiter so shed requests cost nothing; inside CORS so 503s carry its headers
+app.add_middleware(LoadShedMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -46,6 +65,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so profiles cover everything the request touches
+app.add_middleware(ProfilingMiddleware)
+
 # ── Auth routes ───────────────────────────────────────────────────────────────
 
 app.include_router(
@@ -68,6 +90,18 @@ app.include_router(
 
 app.include_router(qso_router)
 
+# ── Statistics routes ─────────────────────────────────────────────────────────
+
+app.include_router(stats_router)
+
+# ── Award routes ──────────────────────────────────────────────────────────────
+
+app.include_router(awards_router)
+
+# ── Geographic routes ─────────────────────────────────────────────────────────
+
+app.include_router(geo_router)
+
 # ── NL parse routes ───────────────────────────────────────────────────────────
 
 app.include_router(parse_router)
@@ -76,10 +110,17 @@ app.include_router(parse_router)
 
 app.include_router(hamqth_router)
 
+# ── Contest routes ────────────────────────────────────────────────────────────
+
+app.include_router(contests_router)
+
+# ── Admin routes ──────────────────────────────────────────────────────────────
+
+app.include_router(admin_router)
+
 
 # ── Health check ──────────────────────────────────────────────────────────────
 
 @app.get("/health", tags=["meta"])
-@limiter.exempt
-async def health(_request: Request):
+async def health():
     return {"status": "ok"}
@@ -0,0 +1,269 @@
+"""
+Housekeeping for the callsign cache and the planner statistics.
+
+Every cache lookup adds a row to ``callsign_cache`` and nothing took rows
+out, so the table only grew. Each pass:
+
+  1. writes the cache hits this process saw since the last pass to
+     ``accessed_at``, in a handful of batched UPDATEs rather than one per
+     lookup,
+  2. deletes expired rows (older than ``CACHE_TTL``) and negative ones
+     (HamQTH knew the callsign but had nothing on it) older than
+     ``CALLSIGN_CACHE_NEGATIVE_TTL_HOURS``, walking the primary key,
+  3. evicts the least recently accessed rows while the cache holds more than
+     ``CALLSIGN_CACHE_MAX_ROWS``,
+  4. once per ``MAINTENANCE_ANALYZE_INTERVAL_SECONDS``, and only while this
+     worker has no requests in flight and connection checkouts aren't
+     queueing past ``LOADSHED_TARGET_DELAY_MS``, refreshes planner
+     statistics: ``ANALYZE`` on SQLite, plus ``VACUUM`` when more than
+     ``MAINTENANCE_VACUUM_FREE_RATIO`` of the file is free pages;
+     ``VACUUM (ANALYZE)`` on PostgreSQL.
+
+Deletes run ``MAINTENANCE_BATCH_SIZE`` rows per transaction. Every worker
+process runs ``worker`` from the app lifespan and flushes its own hits; steps
+2–4 take a shared-store lease so only one process per host does them. Each
+pass's counts and timings are logged and kept in the shared store for
+``GET /admin/maintenance``. ``python -m backend.cli maintenance`` runs a pass
+on demand.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, delete, func, or_, select, text, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+import backend.database as database
+from backend import loadshed
+from backend.config import settings
+from backend.models import CallsignCache
+from backend.shared_state import shared_store
+
+logger = logging.getLogger(__name__)
+
+_LEASE_KEY = "maintenance"
+_ANALYZE_LEASE_KEY = "maintenance:analyze"
+SNAPSHOT_KEY = "maintenance:last"
+SNAPSHOT_TTL = 7 * 86400.0
+TOUCH_CHUNK = 500
+# Vacuumed on PostgreSQL; SQLite has no per-table VACUUM
+_TABLES = ("callsign_cache", "qso", "qso_archive")
+
+# Callsigns served from the cache since the last flush (this process only)
+_touched: set[str] = set()
+
+
+def touch(callsign: str) -> None:
+    """Note a cache hit; ``flush_touches`` writes it to ``accessed_at``."""
+    _touched.add(callsign)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# ── Cache upkeep ───────────────────────────────────────────────────────────────
+
+
+async def flush_touches(session: AsyncSession) -> int:
+    """Stamp the noted cache hits with the current time; returns how many."""
+    calls = sorted(_touched)
+    _touched.clear()
+    now = _utcnow()
+    for i in range(0, len(calls), TOUCH_CHUNK):
+        await session.execute(
+            update(CallsignCache)
+            .where(CallsignCache.callsign.in_(calls[i:i + TOUCH_CHUNK]))
+            .values(accessed_at=now)
+        )
+    await session.commit()
+    return len(calls)
+
+
+async def purge_cache(session: AsyncSession, batch_size: int | None = None) -> int:
+    """Delete expired and stale negative cache rows, one commit per batch."""
+    from backend.routers.hamqth import CACHE_TTL
+
+    batch_size = batch_size or settings.maintenance_batch_size
+    now = _utcnow()
+    negative = and_(
+        CallsignCache.name.is_(None),
+        CallsignCache.qth.is_(None),
+        CallsignCache.grid.is_(None),
+        CallsignCache.dxcc.is_(None),
+        CallsignCache.cached_at < now - timedelta(hours=settings.callsign_cache_negative_ttl_hours),
+    )
+    stale = or_(CallsignCache.cached_at < now - CACHE_TTL, negative)
+    purged, after = 0, None
+    while True:
+        q = select(CallsignCache.callsign).where(stale).order_by(CallsignCache.callsign).limit(batch_size)
+        if after is not None:
+            q = q.where(CallsignCache.callsign > after)
+        calls = (await session.execute(q)).scalars().all()
+        if calls:
+            await session.execute(
+                delete(CallsignCache).where(CallsignCache.callsign.in_(calls)),
+                execution_options={"synchronize_session": False},
+            )
+        await session.commit()
+        purged += len(calls)
+        if len(calls) < batch_size:
+            return purged
+        after = calls[-1]
+
+
+async def evict_cache(
+    session: AsyncSession, max_rows: int | None = None, batch_size: int | None = None
+) -> int:
+    """Delete the least recently accessed rows until at most ``max_rows`` remain."""
+    max_rows = settings.callsign_cache_max_rows if max_rows is None else max_rows
+    batch_size = batch_size or settings.maintenance_batch_size
+    excess = (await session.execute(select(func.count()).select_from(CallsignCache))).scalar_one() - max_rows
+    evicted = 0
+    while excess > 0:
+        q = select(CallsignCache.callsign).order_by(CallsignCache.accessed_at).limit(min(excess, batch_size))
+        calls = (await session.execute(q)).scalars().all()
+        if not calls:
+            break
+        await session.execute(
+            delete(CallsignCache).where(CallsignCache.callsign.in_(calls)),
+            execution_options={"synchronize_session": False},
+        )
+        await session.commit()
+        evicted += len(calls)
+        excess -= len(calls)
+    await session.commit()
+    return evicted
+
+
+# ── Planner statistics ─────────────────────────────────────────────────────────
+
+
+def quiet() -> bool:
+    """True when this worker has no requests in flight and connections aren't queueing."""
+    monitor = loadshed.monitor
+    return (
+        sum(monitor.inflight.values()) == 0
+        and monitor.queue_delay() * 1000 < settings.loadshed_target_delay_ms
+    )
+
+
+async def optimize(engine: AsyncEngine, vacuum_free_ratio: float | None = None) -> dict:
+    """Refresh planner statistics, vacuuming where it pays; returns what ran."""
+    if vacuum_free_ratio is None:
+        vacuum_free_ratio = settings.maintenance_vacuum_free_ratio
+    # VACUUM refuses to run inside a transaction
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        if engine.dialect.name == "postgresql":
+            await conn.execute(text(f"VACUUM (ANALYZE) {', '.join(_TABLES)}"))
+            return {"analyzed": True, "vacuumed": True}
+        await conn.execute(text("ANALYZE"))
+        pages = (await conn.execute(text("PRAGMA page_count"))).scalar_one()
+        free = (await conn.execute(text("PRAGMA freelist_count"))).scalar_one()
+        vacuumed = bool(pages) and free / pages > vacuum_free_ratio
+        if vacuumed:
+            await conn.execute(text("VACUUM"))
+        return {"analyzed": True, "vacuumed": vacuumed}
+
+
+# ── Worker ─────────────────────────────────────────────────────────────────────
+
+
+class MaintenanceWorker:
+    """Runs a maintenance pass every ``MAINTENANCE_INTERVAL_SECONDS``; one per worker process."""
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="maintenance")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.maintenance_interval_seconds)
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("maintenance pass failed")
+
+    async def run_once(self, force: bool = False) -> dict | None:
+        """
+        Flush this process's cache hits, then the rest of a pass unless another
+        process on this host has run one within the interval.
+
+        ``force`` skips the leases and the quiet check.
+        """
+        timings: dict[str, float] = {}
+        started = time.perf_counter()
+        async with database.async_session_maker() as session:
+            touched = await flush_touches(session)
+            timings["touch_ms"] = _elapsed_ms(started)
+            store = shared_store()
+            lease = force or await store.add(_LEASE_KEY, str(os.getpid()), settings.maintenance_interval_seconds)
+            if not lease:
+                return None
+            step = time.perf_counter()
+            purged = await purge_cache(session)
+            timings["purge_ms"] = _elapsed_ms(step)
+            step = time.perf_counter()
+            evicted = await evict_cache(session)
+            timings["evict_ms"] = _elapsed_ms(step)
+            rows = (await session.execute(select(func.count()).select_from(CallsignCache))).scalar_one()
+            await session.commit()
+
+        optimized = {"analyzed": False, "vacuumed": False}
+        if force or (
+            quiet()
+            and await store.add(
+                _ANALYZE_LEASE_KEY, str(os.getpid()), settings.maintenance_analyze_interval_seconds
+            )
+        ):
+            step = time.perf_counter()
+            optimized = await optimize(database.engine)
+            timings["optimize_ms"] = _elapsed_ms(step)
+        timings["total_ms"] = _elapsed_ms(started)
+
+        snapshot = {
+            "finished_at": _utcnow().isoformat(),
+            "touched": touched,
+            "purged": purged,
+            "evicted": evicted,
+            "cache_rows": rows,
+            **optimized,
+            "timings": timings,
+        }
+        logger.info(
+            "maintenance: %d purged, %d evicted, %d cached, analyzed=%s vacuumed=%s in %.0f ms",
+            purged, evicted, rows, optimized["analyzed"], optimized["vacuumed"], timings["total_ms"],
+        )
+        try:
+            await store.put(SNAPSHOT_KEY, json.dumps(snapshot), SNAPSHOT_TTL)
+        except Exception as exc:
+            logger.warning("maintenance snapshot not stored: %s", exc)
+        return snapshot
+
+
+def _elapsed_ms(since: float) -> float:
+    return round((time.perf_counter() - since) * 1000, 1)
+
+
+async def last_snapshot() -> dict | None:
+    """The most recent pass on this host, as stored by ``run_once``."""
+    value = await shared_store().get(SNAPSHOT_KEY)
+    return json.loads(value) if value else None
+
+
+worker = MaintenanceWorker()
@@ -0,0 +1,74 @@
+"""initial schema
+
+Matches the tables ``create_all`` produced before migrations existed, so an
+existing database can be adopted with ``alembic stamp 0001``.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 05:55:05.477785
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from fastapi_users_db_sqlalchemy.generics import GUID
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "callsign_cache",
+        sa.Column("callsign", sa.String(length=20), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=True),
+        sa.Column("qth", sa.String(length=200), nullable=True),
+        sa.Column("grid", sa.String(length=8), nullable=True),
+        sa.Column("dxcc", sa.String(length=50), nullable=True),
+        sa.Column("cached_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("callsign"),
+    )
+    op.create_table(
+        "user",
+        sa.Column("id", GUID(), nullable=False),
+        sa.Column("email", sa.String(length=320), nullable=False),
+        sa.Column("hashed_password", sa.String(length=1024), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("is_superuser", sa.Boolean(), nullable=False),
+        sa.Column("is_verified", sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_user_email", "user", ["email"], unique=True)
+    op.create_table(
+        "qso",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("call", sa.String(length=20), nullable=False),
+        sa.Column("band", sa.String(length=10), nullable=True),
+        sa.Column("freq", sa.Numeric(precision=10, scale=4), nullable=True),
+        sa.Column("mode", sa.String(length=10), nullable=True),
+        sa.Column("rst_sent", sa.String(length=10), nullable=True),
+        sa.Column("rst_rcvd", sa.String(length=10), nullable=True),
+        sa.Column("qso_date", sa.Date(), nullable=True),
+        sa.Column("time_on", sa.Time(), nullable=True),
+        sa.Column("name", sa.String(length=100), nullable=True),
+        sa.Column("qth", sa.String(length=200), nullable=True),
+        sa.Column("grid", sa.String(length=8), nullable=True),
+        sa.Column("dxcc", sa.String(length=50), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("created_by", sa.Uuid(), nullable=False),
+        sa.ForeignKeyConstraint(["created_by"], ["user.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_qso_call", "qso", ["call"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_qso_call", table_name="qso")
+    op.drop_table("qso")
+    op.drop_index("ix_user_email", table_name="user")
+    op.drop_table("user")
+    op.drop_table("callsign_cache")
@@ -0,0 +1,52 @@
+"""qso statistics
+
+Adds the ``qso_stat`` aggregate table and backfills it from existing QSOs
+(equivalent to ``python -m backend.cli rebuild-stats``).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 05:56:06.718813
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_BACKFILL = {
+    "total": ("''", None),
+    "band": ("COALESCE(band, '')", None),
+    "mode": ("COALESCE(mode, '')", None),
+    "dxcc": ("COALESCE(dxcc, '')", None),
+    "day": ("CAST(qso_date AS VARCHAR)", "qso_date IS NOT NULL"),
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "qso_stat",
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column("dimension", sa.String(length=8), nullable=False),
+        sa.Column("key", sa.String(length=50), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "dimension", "key"),
+    )
+    for dimension, (key_sql, where_sql) in _BACKFILL.items():
+        group_by = "created_by" if dimension == "total" else f"created_by, {key_sql}"
+        where = f"WHERE {where_sql}" if where_sql else ""
+        op.execute(
+            f"INSERT INTO qso_stat (user_id, dimension, key, count) "
+            f"SELECT created_by, '{dimension}', {key_sql}, COUNT(*) FROM qso "
+            f"{where} GROUP BY {group_by}"
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("qso_stat")
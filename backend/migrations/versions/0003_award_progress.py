@@ -0,0 +1,56 @@
+"""award progress
+
+Adds QSL confirmation columns to ``qso`` and the ``award_key`` /
+``award_bitset`` tables. Bitsets are packed in Python, so existing logs are
+backfilled afterwards with ``python -m backend.cli rebuild-awards``.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 06:00:07.001161
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "award_key",
+        sa.Column("award", sa.String(length=8), nullable=False),
+        sa.Column("key", sa.String(length=50), nullable=False),
+        sa.Column("bit", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("award", "key"),
+        sa.UniqueConstraint("award", "bit"),
+    )
+    op.create_table(
+        "award_bitset",
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column("award", sa.String(length=8), nullable=False),
+        sa.Column("band", sa.String(length=10), nullable=False),
+        sa.Column("mode", sa.String(length=8), nullable=False),
+        sa.Column("worked", sa.LargeBinary(), nullable=False),
+        sa.Column("confirmed", sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "award", "band", "mode"),
+    )
+    with op.batch_alter_table("qso") as batch_op:
+        batch_op.add_column(
+            sa.Column("qsl_confirmed", sa.Boolean(), server_default=sa.false(), nullable=False)
+        )
+        batch_op.add_column(sa.Column("qsl_date", sa.Date(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("qso") as batch_op:
+        batch_op.drop_column("qsl_date")
+        batch_op.drop_column("qsl_confirmed")
+    op.drop_table("award_bitset")
+    op.drop_table("award_key")
@@ -0,0 +1,43 @@
+"""qso geolocation
+
+Adds the operator's ``grid`` to ``user`` and derived lat/lon, distance and
+bearing columns to ``qso``. Populate them for existing logs with
+``python -m backend.cli backfill-geo``.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 06:20:41.112342
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("qso") as batch_op:
+        batch_op.add_column(sa.Column("lat", sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column("lon", sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column("distance_km", sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column("bearing_deg", sa.Float(), nullable=True))
+        batch_op.create_index("ix_qso_user_distance", ["created_by", "distance_km"])
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.add_column(sa.Column("grid", sa.String(length=8), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("user") as batch_op:
+        batch_op.drop_column("grid")
+    with op.batch_alter_table("qso") as batch_op:
+        batch_op.drop_index("ix_qso_user_distance")
+        batch_op.drop_column("bearing_deg")
+        batch_op.drop_column("distance_km")
+        batch_op.drop_column("lon")
+        batch_op.drop_column("lat")
@@ -0,0 +1,46 @@
+"""qso filter indexes
+
+Composite indexes (all leading with ``created_by``) backing the structured
+QSO filters in backend/query.py. Existing grid locators are rewritten in
+the canonical case new writes use (FN31pr) so grid-prefix ranges match.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 06:41:52.530188
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_INDEXES = {
+    "ix_qso_user_date": ["created_by", "qso_date", "time_on"],
+    "ix_qso_user_band_date": ["created_by", "band", "qso_date"],
+    "ix_qso_user_mode_date": ["created_by", "mode", "qso_date"],
+    "ix_qso_user_dxcc_date": ["created_by", "dxcc", "qso_date"],
+    "ix_qso_user_grid": ["created_by", "grid"],
+    "ix_qso_user_freq": ["created_by", "freq"],
+    "ix_qso_user_qsl_date": ["created_by", "qsl_confirmed", "qso_date"],
+}
+
+
+def upgrade() -> None:
+    op.execute(
+        "UPDATE qso SET grid = UPPER(SUBSTR(grid, 1, 4)) || LOWER(SUBSTR(grid, 5)) "
+        "WHERE grid IS NOT NULL"
+    )
+    with op.batch_alter_table("qso") as batch_op:
+        for name, columns in _INDEXES.items():
+            batch_op.create_index(name, columns)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("qso") as batch_op:
+        for name in reversed(list(_INDEXES)):
+            batch_op.drop_index(name)
@@ -0,0 +1,53 @@
+"""integer hz frequency
+
+Replaces ``qso.freq`` (Numeric MHz) with ``qso.freq_hz`` (BigInteger Hz),
+converting existing values, and re-derives ``band`` from the allocation
+table in backend/bands.py wherever a frequency is present.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 07:02:18.440915
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from backend.bands import BANDS
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("qso") as batch_op:
+        batch_op.add_column(sa.Column("freq_hz", sa.BigInteger(), nullable=True))
+
+    op.execute(
+        "UPDATE qso SET freq_hz = CAST(ROUND(freq * 1000000) AS BIGINT) WHERE freq IS NOT NULL"
+    )
+    cases = " ".join(
+        f"WHEN freq_hz BETWEEN {low} AND {high} THEN '{band}'" for band, low, high in BANDS
+    )
+    op.execute(f"UPDATE qso SET band = CASE {cases} ELSE band END WHERE freq_hz IS NOT NULL")
+
+    with op.batch_alter_table("qso") as batch_op:
+        batch_op.drop_index("ix_qso_user_freq")
+        batch_op.drop_column("freq")
+        batch_op.create_index("ix_qso_user_freq", ["created_by", "freq_hz"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("qso") as batch_op:
+        batch_op.add_column(sa.Column("freq", sa.Numeric(precision=10, scale=4), nullable=True))
+
+    op.execute("UPDATE qso SET freq = freq_hz / 1000000.0 WHERE freq_hz IS NOT NULL")
+
+    with op.batch_alter_table("qso") as batch_op:
+        batch_op.drop_index("ix_qso_user_freq")
+        batch_op.drop_column("freq_hz")
+        batch_op.create_index("ix_qso_user_freq", ["created_by", "freq"])
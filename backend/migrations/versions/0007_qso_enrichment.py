@@ -0,0 +1,39 @@
+"""qso enrichment
+
+Adds ``qso.enriched_at`` and a partial index over QSOs background
+enrichment has yet to try. Existing incomplete QSOs start out pending, so
+the worker's sweep (or ``python -m backend.cli enrich-backfill``) fills them.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 07:24:03.918255
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_PENDING = sa.text(
+    "enriched_at IS NULL AND (name IS NULL OR qth IS NULL OR grid IS NULL OR dxcc IS NULL)"
+)
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("qso") as batch_op:
+        batch_op.add_column(sa.Column("enriched_at", sa.DateTime(), nullable=True))
+        batch_op.create_index(
+            "ix_qso_pending_enrichment", ["id"], sqlite_where=_PENDING, postgresql_where=_PENDING
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("qso") as batch_op:
+        batch_op.drop_index("ix_qso_pending_enrichment")
+        batch_op.drop_column("enriched_at")
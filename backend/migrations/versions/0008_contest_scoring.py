@@ -0,0 +1,74 @@
+"""contest scoring
+
+Adds ``contest_entry`` (one operator's entry in a contest, with its running
+counters), ``contest_worked`` (the dupe and multiplier keys an entry has
+claimed) and the contest columns on ``qso``: ``contest_entry_id``, the
+serial sent (``stx``) and the received exchange (``exch_rcvd``).
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 06:29:08.884409
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, Sequence[str], None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "contest_entry",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column("contest", sa.String(length=20), nullable=False),
+        sa.Column("callsign", sa.String(length=20), nullable=False),
+        sa.Column("exch_sent", sa.String(length=40), nullable=False),
+        sa.Column("my_dxcc", sa.String(length=50), nullable=True),
+        sa.Column("category_operator", sa.String(length=12), nullable=False),
+        sa.Column("category_band", sa.String(length=8), nullable=False),
+        sa.Column("category_power", sa.String(length=8), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("last_serial", sa.Integer(), nullable=False),
+        sa.Column("qsos", sa.Integer(), nullable=False),
+        sa.Column("dupes", sa.Integer(), nullable=False),
+        sa.Column("points", sa.Integer(), nullable=False),
+        sa.Column("mults", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_contest_entry_user_id", "contest_entry", ["user_id"])
+    op.create_table(
+        "contest_worked",
+        sa.Column("entry_id", sa.Uuid(), nullable=False),
+        sa.Column("kind", sa.String(length=12), nullable=False),
+        sa.Column("key", sa.String(length=64), nullable=False),
+        sa.ForeignKeyConstraint(["entry_id"], ["contest_entry.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("entry_id", "kind", "key"),
+    )
+    with op.batch_alter_table("qso") as batch_op:
+        batch_op.add_column(sa.Column("contest_entry_id", sa.Uuid(), nullable=True))
+        batch_op.add_column(sa.Column("stx", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("exch_rcvd", sa.String(length=40), nullable=True))
+        batch_op.create_index("ix_qso_contest_entry", ["contest_entry_id", "qso_date", "time_on"])
+        batch_op.create_foreign_key(
+            "fk_qso_contest_entry_id", "contest_entry", ["contest_entry_id"], ["id"], ondelete="SET NULL"
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("qso") as batch_op:
+        batch_op.drop_constraint("fk_qso_contest_entry_id", type_="foreignkey")
+        batch_op.drop_index("ix_qso_contest_entry")
+        batch_op.drop_column("exch_rcvd")
+        batch_op.drop_column("stx")
+        batch_op.drop_column("contest_entry_id")
+    op.drop_table("contest_worked")
+    op.drop_index("ix_contest_entry_user_id", table_name="contest_entry")
+    op.drop_table("contest_entry")
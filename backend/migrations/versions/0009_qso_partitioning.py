@@ -0,0 +1,40 @@
+"""qso partitioning
+
+On PostgreSQL with ``QSO_PARTITIONS`` set, rebuilds ``qso`` as that many
+hash partitions on ``created_by`` with primary key ``(id, created_by)``; the
+indexes and foreign keys are recreated on the partitioned table. Otherwise a
+no-op. See backend/partitioning.py; ``python -m backend.cli partition-qso``
+does the same later on.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 07:02:41.516203
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+
+from backend import partitioning
+from backend.config import settings
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, Sequence[str], None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _postgresql() -> bool:
+    # Offline (--sql) runs can't read the catalog the rebuild is generated from
+    return op.get_bind().dialect.name == "postgresql" and not context.is_offline_mode()
+
+
+def upgrade() -> None:
+    if _postgresql() and settings.qso_partitions and not partitioning.is_partitioned(op.get_bind()):
+        partitioning.rebuild_qso(op.get_bind(), settings.qso_partitions)
+
+
+def downgrade() -> None:
+    if _postgresql() and partitioning.is_partitioned(op.get_bind()):
+        partitioning.rebuild_qso(op.get_bind(), 0)
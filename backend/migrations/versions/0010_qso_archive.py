@@ -0,0 +1,68 @@
+"""qso archive
+
+Adds ``qso_archive``, the cold tier backend/archive.py moves QSOs older than
+``ARCHIVE_AFTER_DAYS`` into. It has the same columns as ``qso`` but only the
+(created_by, qso_date, time_on) index. Downgrading moves archived QSOs back.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 06:55:01.828431
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, Sequence[str], None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "qso_archive",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("call", sa.String(length=20), nullable=False),
+        sa.Column("band", sa.String(length=10), nullable=True),
+        sa.Column("freq_hz", sa.BigInteger(), nullable=True),
+        sa.Column("mode", sa.String(length=10), nullable=True),
+        sa.Column("rst_sent", sa.String(length=10), nullable=True),
+        sa.Column("rst_rcvd", sa.String(length=10), nullable=True),
+        sa.Column("qso_date", sa.Date(), nullable=True),
+        sa.Column("time_on", sa.Time(), nullable=True),
+        sa.Column("name", sa.String(length=100), nullable=True),
+        sa.Column("qth", sa.String(length=200), nullable=True),
+        sa.Column("grid", sa.String(length=8), nullable=True),
+        sa.Column("dxcc", sa.String(length=50), nullable=True),
+        sa.Column("lat", sa.Float(), nullable=True),
+        sa.Column("lon", sa.Float(), nullable=True),
+        sa.Column("distance_km", sa.Float(), nullable=True),
+        sa.Column("bearing_deg", sa.Float(), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("qsl_confirmed", sa.Boolean(), server_default=sa.false(), nullable=False),
+        sa.Column("qsl_date", sa.Date(), nullable=True),
+        sa.Column("enriched_at", sa.DateTime(), nullable=True),
+        sa.Column("contest_entry_id", sa.Uuid(), nullable=True),
+        sa.Column("stx", sa.Integer(), nullable=True),
+        sa.Column("exch_rcvd", sa.String(length=40), nullable=True),
+        sa.Column("created_by", sa.Uuid(), nullable=False),
+        sa.ForeignKeyConstraint(["contest_entry_id"], ["contest_entry.id"], ondelete="SET NULL"),
+        sa.ForeignKeyConstraint(["created_by"], ["user.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_qso_archive_user_date", "qso_archive", ["created_by", "qso_date", "time_on"])
+
+
+def downgrade() -> None:
+    # Archived QSOs go back to the one table rather than being lost
+    columns = ", ".join(
+        "id call band freq_hz mode rst_sent rst_rcvd qso_date time_on name qth grid dxcc lat lon "
+        "distance_km bearing_deg notes qsl_confirmed qsl_date enriched_at contest_entry_id stx "
+        "exch_rcvd created_by".split()
+    )
+    op.execute(f"INSERT INTO qso ({columns}) SELECT {columns} FROM qso_archive")
+    op.drop_index("ix_qso_archive_user_date", table_name="qso_archive")
+    op.drop_table("qso_archive")
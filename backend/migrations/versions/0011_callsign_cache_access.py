@@ -0,0 +1,36 @@
+"""callsign cache access
+
+Adds ``callsign_cache.accessed_at``, the last cache hit, which
+backend/maintenance.py evicts by once the cache outgrows
+``CALLSIGN_CACHE_MAX_ROWS``. Existing rows start out at ``cached_at``.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 08:12:40.117305
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0011"
+down_revision: Union[str, Sequence[str], None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("callsign_cache", schema=None) as batch_op:
+        batch_op.add_column(sa.Column("accessed_at", sa.DateTime(), nullable=True))
+    op.execute("UPDATE callsign_cache SET accessed_at = cached_at")
+    with op.batch_alter_table("callsign_cache", schema=None) as batch_op:
+        batch_op.alter_column("accessed_at", existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_index("ix_callsign_cache_accessed_at", ["accessed_at"], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("callsign_cache", schema=None) as batch_op:
+        batch_op.drop_index("ix_callsign_cache_accessed_at")
+        batch_op.drop_column("accessed_at")
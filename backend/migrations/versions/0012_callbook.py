@@ -0,0 +1,39 @@
+"""callbook
+
+Adds ``callbook``, the offline callsign database loaded by
+``python -m backend.cli callbook-import`` (see backend/callbook.py).
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 09:31:07.402118
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0012"
+down_revision: Union[str, Sequence[str], None] = "0011"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "callbook",
+        sa.Column("callsign", sa.String(length=20), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=True),
+        sa.Column("qth", sa.String(length=200), nullable=True),
+        sa.Column("grid", sa.String(length=8), nullable=True),
+        sa.Column("dxcc", sa.String(length=50), nullable=True),
+        sa.Column("imported_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("callsign"),
+    )
+    op.create_index("ix_callbook_imported_at", "callbook", ["imported_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_callbook_imported_at", table_name="callbook")
+    op.drop_table("callbook")
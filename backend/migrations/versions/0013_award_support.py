@@ -0,0 +1,96 @@
+"""award support
+
+Adds ``award_support``, the per-slot QSO counts behind each award bit, so a
+deleted QSO clears its bit without rescanning the log. Counts are derived in
+Python like the bitsets, so the backfill reads each owner's QSOs from both
+tiers in keyset pages (equivalent to the counts ``rebuild-awards`` writes).
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19 11:02:44.581203
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import context, op
+
+from backend.awards import award_keys, slots
+
+# revision identifiers, used by Alembic.
+revision: str = "0013"
+down_revision: Union[str, Sequence[str], None] = "0012"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_BATCH = 10_000
+
+
+def _tier(name: str) -> sa.Table:
+    return sa.table(
+        name,
+        sa.column("id", sa.Uuid()),
+        sa.column("created_by", sa.Uuid()),
+        sa.column("band", sa.String()),
+        sa.column("mode", sa.String()),
+        sa.column("dxcc", sa.String()),
+        sa.column("qth", sa.String()),
+        sa.column("grid", sa.String()),
+        sa.column("qsl_confirmed", sa.Boolean()),
+    )
+
+
+def _backfill(bind, support: sa.Table) -> None:
+    tiers = [_tier("qso"), _tier("qso_archive")]
+    owners = sa.union(*(sa.select(t.c.created_by).distinct() for t in tiers)).subquery()
+    for (owner,) in bind.execute(sa.select(owners.c.created_by)).all():
+        counts: dict[tuple, list[int]] = {}
+        for tier in tiers:
+            q = (
+                sa.select(tier.c.id, tier.c.band, tier.c.mode, tier.c.dxcc, tier.c.qth, tier.c.grid, tier.c.qsl_confirmed)
+                .where(tier.c.created_by == owner)
+                .order_by(tier.c.id)
+                .limit(_BATCH)
+            )
+            last_id = None
+            while True:
+                page = q if last_id is None else q.where(tier.c.id > last_id)
+                rows = bind.execute(page).all()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                for _id, band, mode, dxcc, qth, grid, confirmed in rows:
+                    for award, key in award_keys(dxcc, qth, grid).items():
+                        for slot_band, slot_mode in slots(band, mode):
+                            entry = counts.setdefault((award, key, slot_band, slot_mode), [0, 0])
+                            entry[0] += 1
+                            entry[1] += bool(confirmed)
+        if counts:
+            bind.execute(
+                support.insert(),
+                [
+                    {"user_id": owner, "award": a, "key": k, "band": b, "mode": m, "worked": w, "confirmed": c}
+                    for (a, k, b, m), (w, c) in counts.items()
+                ],
+            )
+
+
+def upgrade() -> None:
+    support = op.create_table(
+        "award_support",
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column("award", sa.String(length=8), nullable=False),
+        sa.Column("key", sa.String(length=50), nullable=False),
+        sa.Column("band", sa.String(length=10), nullable=False),
+        sa.Column("mode", sa.String(length=8), nullable=False),
+        sa.Column("worked", sa.Integer(), nullable=False),
+        sa.Column("confirmed", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "award", "key", "band", "mode"),
+    )
+    if not context.is_offline_mode():
+        _backfill(op.get_bind(), support)
+
+
+def downgrade() -> None:
+    op.drop_table("award_support")
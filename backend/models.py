@@ -3,30 +3,50 @@ from datetime import date, datetime, time
 from typing import Optional
 
 from fastapi_users.db import SQLAlchemyBaseUserTableUUID
-from sqlalchemy import Date, DateTime, ForeignKey, Numeric, String, Text, Time, Uuid
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    Time,
+    UniqueConstraint,
+    Uuid,
+    and_,
+    false,
+    or_,
+)
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Mapped, mapped_column, validates
 
+from backend.bands import band_for, hz_to_mhz, mhz_to_hz
 from backend.database import Base
 
 
 class User(SQLAlchemyBaseUserTableUUID, Base):
     """User account — managed by FastAPI-Users."""
-    pass
 
+    # Operator's own Maidenhead locator; QSO distances are measured from here
+    grid: Mapped[Optional[str]] = mapped_column(String(8))
 
-class QSO(Base):
-    """A single ham radio contact (QSO) log entry."""
 
-    __tablename__ = "qso"
+class QSOColumns:
+    """Columns and behaviour shared by live QSOs and their archived copies."""
 
     id: Mapped[uuid.UUID] = mapped_column(
         Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4
     )
 
     # Core contact fields
-    call: Mapped[str] = mapped_column(String(20), nullable=False, index=True)
-    band: Mapped[Optional[str]] = mapped_column(String(10))   # e.g. "20m", "40m"
-    freq: Mapped[Optional[float]] = mapped_column(Numeric(10, 4))  # MHz
+    call: Mapped[str] = mapped_column(String(20), nullable=False)
+    band: Mapped[Optional[str]] = mapped_column(String(10))   # e.g. "20m", derived from freq_hz when set
+    freq_hz: Mapped[Optional[int]] = mapped_column(BigInteger)
     mode: Mapped[Optional[str]] = mapped_column(String(10))   # SSB, CW, FT8 …
     rst_sent: Mapped[Optional[str]] = mapped_column(String(10))
     rst_rcvd: Mapped[Optional[str]] = mapped_column(String(10))
@@ -41,17 +61,113 @@ class QSO(Base):
     grid: Mapped[Optional[str]] = mapped_column(String(8))    # Maidenhead locator
     dxcc: Mapped[Optional[str]] = mapped_column(String(50))   # DXCC entity name
 
+    # Derived from grid (centre of square) and the operator's grid — see backend/geo.py
+    lat: Mapped[Optional[float]] = mapped_column(Float)
+    lon: Mapped[Optional[float]] = mapped_column(Float)
+    distance_km: Mapped[Optional[float]] = mapped_column(Float)
+    bearing_deg: Mapped[Optional[float]] = mapped_column(Float)  # initial bearing, degrees true
+
     # Free-form notes
     notes: Mapped[Optional[str]] = mapped_column(Text)
 
+    # QSL confirmation (LoTW / eQSL / card)
+    qsl_confirmed: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False, server_default=false()
+    )
+    qsl_date: Mapped[Optional[date]] = mapped_column(Date)
+
+    # When background enrichment last tried to fill name/QTH/grid/DXCC
+    enriched_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+    # Contest QSOs — see backend/contests.py
+    contest_entry_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        Uuid(as_uuid=True), ForeignKey("contest_entry.id", ondelete="SET NULL")
+    )
+    stx: Mapped[Optional[int]] = mapped_column(Integer)  # serial number sent
+    exch_rcvd: Mapped[Optional[str]] = mapped_column(String(40))  # received exchange after the RST
+
     # Owner
     created_by: Mapped[uuid.UUID] = mapped_column(
         Uuid(as_uuid=True), ForeignKey("user.id", ondelete="CASCADE"), nullable=False
     )
 
+    @hybrid_property
+    def freq(self) -> Optional[float]:
+        """Frequency in MHz, the unit of the API and ADIF; stored as ``freq_hz``."""
+        return hz_to_mhz(self.freq_hz)
+
+    @freq.inplace.setter
+    def _freq_setter(self, mhz: Optional[float]) -> None:
+        self.freq_hz = mhz_to_hz(mhz)
+
+    @freq.inplace.expression
+    @classmethod
+    def _freq_expression(cls):
+        return cls.freq_hz / 1_000_000
+
+    @validates("freq_hz", "band")
+    def _derive_band(self, key, value):
+        # A frequency inside an allocation decides the band, whichever is set first
+        if key == "freq_hz":
+            derived = band_for(value)
+            if derived:
+                self.band = derived
+            return value
+        return band_for(self.freq_hz) or value
+
+
+class QSO(QSOColumns, Base):
+    """A single ham radio contact (QSO) log entry."""
+
+    __tablename__ = "qso"
+    # Every index leads with created_by; backend/query.py plans which one to use.
+    # On PostgreSQL the table may be hash-partitioned by created_by, with primary
+    # key (id, created_by) — see backend/partitioning.py
+    __table_args__ = (
+        Index("ix_qso_user_date", "created_by", "qso_date", "time_on"),
+        Index("ix_qso_user_band_date", "created_by", "band", "qso_date"),
+        Index("ix_qso_user_mode_date", "created_by", "mode", "qso_date"),
+        Index("ix_qso_user_dxcc_date", "created_by", "dxcc", "qso_date"),
+        Index("ix_qso_user_grid", "created_by", "grid"),
+        Index("ix_qso_user_freq", "created_by", "freq_hz"),
+        Index("ix_qso_user_qsl_date", "created_by", "qsl_confirmed", "qso_date"),
+        Index("ix_qso_user_distance", "created_by", "distance_km"),
+        Index("ix_qso_contest_entry", "contest_entry_id", "qso_date", "time_on"),
+        Index("ix_qso_call", "call"),
+    )
+
+
+class QSOArchive(QSOColumns, Base):
+    """
+    QSOs older than ``ARCHIVE_AFTER_DAYS``, moved out of ``qso`` by
+    backend/archive.py. Same columns and IDs, but only the one index the
+    cross-tier queries need, so the hot table and its indexes stay small.
+    """
+
+    __tablename__ = "qso_archive"
+    __table_args__ = (Index("ix_qso_archive_user_date", "created_by", "qso_date", "time_on"),)
+
+
+# QSOs backend/enrichment.py has yet to try; the index is partial so it stays small
+QSO_INCOMPLETE = or_(
+    QSO.name.is_(None), QSO.qth.is_(None), QSO.grid.is_(None), QSO.dxcc.is_(None)
+)
+QSO_PENDING_ENRICHMENT = and_(QSO.enriched_at.is_(None), QSO_INCOMPLETE)
+Index(
+    "ix_qso_pending_enrichment",
+    QSO.id,
+    sqlite_where=QSO_PENDING_ENRICHMENT,
+    postgresql_where=QSO_PENDING_ENRICHMENT,
+)
+
 
 class CallsignCache(Base):
-    """Cached HamQTH callsign lookup results with 30-day TTL."""
+    """
+    Cached HamQTH callsign lookup results with 30-day TTL.
+
+    Bounded in size by backend/maintenance.py, which purges expired rows and
+    evicts the least recently accessed ones.
+    """
 
     __tablename__ = "callsign_cache"
 
@@ -61,3 +177,150 @@ class CallsignCache(Base):
     grid: Mapped[Optional[str]] = mapped_column(String(8))
     dxcc: Mapped[Optional[str]] = mapped_column(String(50))
     cached_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    # Last cache hit, written in batches; starts out as ``cached_at``
+    accessed_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        nullable=False,
+        index=True,
+        default=lambda context: context.get_current_parameters()["cached_at"],
+    )
+
+
+class CallbookEntry(Base):
+    """
+    A station from an imported offline callbook (backend/callbook.py).
+
+    Answers lookups with no network; consulted after ``CallsignCache`` and
+    before HamQTH.
+    """
+
+    __tablename__ = "callbook"
+
+    callsign: Mapped[str] = mapped_column(String(20), primary_key=True)
+    name: Mapped[Optional[str]] = mapped_column(String(100))
+    qth: Mapped[Optional[str]] = mapped_column(String(200))
+    grid: Mapped[Optional[str]] = mapped_column(String(8))
+    dxcc: Mapped[Optional[str]] = mapped_column(String(50))
+    # Import that last wrote the row; a full import drops rows it didn't stamp
+    imported_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+
+class QSOStat(Base):
+    """
+    Per-user QSO counts by dimension, kept in step with the ``qso`` table.
+
+    One row per (user, dimension, key) — e.g. ("band", "20m") or
+    ("day", "2025-06-15"). QSOs missing a value count under key "".
+    Maintained in the same transaction as every QSO insert/delete by
+    ``backend.stats.apply_qso_stats``; rebuild with ``python -m backend.cli
+    rebuild-stats``.
+    """
+
+    __tablename__ = "qso_stat"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid(as_uuid=True), ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    dimension: Mapped[str] = mapped_column(String(8), primary_key=True)  # band, mode, day, dxcc, total
+    key: Mapped[str] = mapped_column(String(50), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class AwardKey(Base):
+    """
+    Bit positions for award keys that have no natural numbering (DXCC entity
+    names). Shared by all users; a key keeps its bit forever.
+    """
+
+    __tablename__ = "award_key"
+    __table_args__ = (UniqueConstraint("award", "bit"),)
+
+    award: Mapped[str] = mapped_column(String(8), primary_key=True)
+    key: Mapped[str] = mapped_column(String(50), primary_key=True)
+    bit: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class AwardBitset(Base):
+    """
+    Worked/confirmed bitsets for one user, award and band/mode slot.
+
+    ``band`` and ``mode`` are "" for the any-band / any-mode slots; ``mode``
+    holds a mode class (CW, PHONE, DIGITAL). Maintained by backend/awards.py.
+    """
+
+    __tablename__ = "award_bitset"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid(as_uuid=True), ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    award: Mapped[str] = mapped_column(String(8), primary_key=True)  # dxcc, was, grid
+    band: Mapped[str] = mapped_column(String(10), primary_key=True)
+    mode: Mapped[str] = mapped_column(String(8), primary_key=True)
+    worked: Mapped[bytes] = mapped_column(LargeBinary, nullable=False, default=b"")
+    confirmed: Mapped[bytes] = mapped_column(LargeBinary, nullable=False, default=b"")
+
+
+class AwardSupport(Base):
+    """
+    How many of a user's QSOs back one award key in one band/mode slot.
+
+    Deleting a QSO decrements these; its bit is cleared from the matching
+    ``AwardBitset`` row when the count reaches zero. Maintained by
+    backend/awards.py.
+    """
+
+    __tablename__ = "award_support"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid(as_uuid=True), ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    award: Mapped[str] = mapped_column(String(8), primary_key=True)
+    key: Mapped[str] = mapped_column(String(50), primary_key=True)
+    band: Mapped[str] = mapped_column(String(10), primary_key=True)
+    mode: Mapped[str] = mapped_column(String(8), primary_key=True)
+    worked: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    confirmed: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class ContestEntry(Base):
+    """
+    One operator's entry in one contest, with its running score.
+
+    The counters are kept in step with the entry's QSOs by
+    backend/contests.py, so reading the score is a primary-key lookup.
+    """
+
+    __tablename__ = "contest_entry"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid(as_uuid=True), ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    contest: Mapped[str] = mapped_column(String(20), nullable=False)  # Cabrillo CONTEST id
+    callsign: Mapped[str] = mapped_column(String(20), nullable=False)
+    exch_sent: Mapped[str] = mapped_column(String(40), nullable=False)  # sent exchange after RST/serial
+    my_dxcc: Mapped[Optional[str]] = mapped_column(String(50))
+    category_operator: Mapped[str] = mapped_column(String(12), nullable=False, default="SINGLE-OP")
+    category_band: Mapped[str] = mapped_column(String(8), nullable=False, default="ALL")
+    category_power: Mapped[str] = mapped_column(String(8), nullable=False, default="HIGH")
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    last_serial: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    qsos: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # excluding dupes
+    dupes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    points: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    mults: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class ContestWorked(Base):
+    """Dupe and multiplier keys an entry has claimed — kind "dupe" or a multiplier name."""
+
+    __tablename__ = "contest_worked"
+
+    entry_id: Mapped[uuid.UUID] = mapped_column(
+        Uuid(as_uuid=True), ForeignKey("contest_entry.id", ondelete="CASCADE"), primary_key=True
+    )
+    kind: Mapped[str] = mapped_column(String(12), primary_key=True)
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
@@ -0,0 +1,123 @@
+"""
+Optional PostgreSQL hash partitioning of the ``qso`` table.
+
+Every per-user query filters on ``created_by``, so a deployment with hundreds
+of millions of QSOs can split ``qso`` into ``QSO_PARTITIONS`` hash partitions
+on that column. The planner then prunes a per-user query to the one partition
+holding that user's log. Every index already leads with ``created_by``, so
+each one is built per partition at 1/N of the size, and the hot partitions'
+indexes stay cache-resident. Autovacuum works through N small tables instead
+of one huge one.
+
+Partitioning is off by default and PostgreSQL-only. Migration 0009 applies it
+when ``QSO_PARTITIONS`` is set, and ``python -m backend.cli partition-qso``
+converts (or reverts) an existing database and shows how queries prune. The
+conversion copies the table under an exclusive lock, so run it in a
+maintenance window.
+
+A partitioned table's primary key must include the partition key, so it
+becomes ``(id, created_by)``. The models keep ``id`` as the ORM identity.
+Lookups by ``id`` alone still work but probe every partition, so request
+paths also filter on ``created_by``.
+"""
+import json
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+
+def partition_name(remainder: int) -> str:
+    return f"qso_p{remainder:03d}"
+
+
+def is_partitioned(conn: Connection) -> bool:
+    return bool(conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('qso'))"
+    )).scalar())
+
+
+def partitions(conn: Connection) -> list[tuple[str, int, int]]:
+    """(name, estimated rows, total bytes with indexes) of each ``qso`` partition."""
+    return [tuple(row) for row in conn.execute(text(
+        "SELECT c.relname, c.reltuples::bigint, pg_total_relation_size(c.oid) "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('qso') ORDER BY c.relname"
+    ))]
+
+
+def _definitions(conn: Connection) -> tuple[list[str], list[str]]:
+    """``qso``'s secondary indexes and foreign keys as DDL, to recreate after a rebuild."""
+    indexes = conn.execute(text(
+        "SELECT pg_get_indexdef(indexrelid) FROM pg_index "
+        "WHERE indrelid = 'qso'::regclass AND NOT indisprimary ORDER BY 1"
+    )).scalars().all()
+    foreign_keys = conn.execute(text(
+        "SELECT format('ALTER TABLE qso ADD CONSTRAINT %I %s', conname, pg_get_constraintdef(oid)) "
+        "FROM pg_constraint WHERE conrelid = 'qso'::regclass AND contype = 'f' ORDER BY conname"
+    )).scalars().all()
+    # A partitioned table's indexes read back as ``ON ONLY``, which would skip the partitions
+    return [ddl.replace(" ON ONLY ", " ON ") for ddl in indexes], list(foreign_keys)
+
+
+def rebuild_statements(
+    count: int, indexes: list[str], foreign_keys: list[str]
+) -> list[str]:
+    """
+    DDL that rebuilds ``qso`` with ``count`` hash partitions, or as a plain
+    table when ``count`` is 0. Rows are copied before the primary key and
+    indexes are built, which is far faster than maintaining them per row.
+    """
+    if count:
+        create = ["CREATE TABLE qso_rebuild (LIKE qso INCLUDING DEFAULTS) PARTITION BY HASH (created_by)"]
+        create += [
+            f"CREATE TABLE {partition_name(i)} PARTITION OF qso_rebuild "
+            f"FOR VALUES WITH (MODULUS {count}, REMAINDER {i})"
+            for i in range(count)
+        ]
+        primary_key = "(id, created_by)"
+    else:
+        create = ["CREATE TABLE qso_rebuild (LIKE qso INCLUDING DEFAULTS)"]
+        primary_key = "(id)"
+    return [
+        "LOCK TABLE qso IN ACCESS EXCLUSIVE MODE",
+        *create,
+        "INSERT INTO qso_rebuild SELECT * FROM qso",
+        "DROP TABLE qso",
+        "ALTER TABLE qso_rebuild RENAME TO qso",
+        f"ALTER TABLE qso ADD CONSTRAINT qso_pkey PRIMARY KEY {primary_key}",
+        *indexes,
+        *foreign_keys,
+        "ANALYZE qso",
+    ]
+
+
+def rebuild_qso(conn: Connection, count: int) -> None:
+    """Repartition ``qso`` into ``count`` partitions (0: a plain table) in the caller's transaction."""
+    if count < 0:
+        raise ValueError("partition count must be 0 or more")
+    indexes, foreign_keys = _definitions(conn)
+    for statement in rebuild_statements(count, indexes, foreign_keys):
+        conn.execute(text(statement))
+
+
+# ── Pruning check ──────────────────────────────────────────────────────────────
+
+
+def _relations(plan: dict) -> list[str]:
+    """Every table an ``EXPLAIN (FORMAT JSON)`` plan node reads, depth first."""
+    found = [plan["Relation Name"]] if "Relation Name" in plan else []
+    for child in plan.get("Plans", ()):
+        found += _relations(child)
+    return found
+
+
+async def scanned_partitions(session: AsyncSession, stmt: Select) -> list[str]:
+    """The ``qso`` partitions PostgreSQL's plan for ``stmt`` reads after pruning."""
+    sql = stmt.compile(dialect=session.bind.dialect, compile_kwargs={"literal_binds": True})
+    result = await (await session.connection()).exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return sorted({name for name in _relations(plan[0]["Plan"]) if name.startswith("qso_p")})
@@ -0,0 +1,242 @@
+"""
+Opt-in, admin-only request profiling.
+
+A superuser can add ``X-HamLog-Profile: 1`` (or ``?_profile=1``) to any
+request. The request is then run under a stack-sampling profiler and every SQL
+statement it issues is timed. The result is written to ``settings.profile_dir``
+as ``<id>.json`` (summary + SQL) and ``<id>.folded`` (collapsed stacks, loadable
+in speedscope or flamegraph.pl), and the response carries:
+
+  X-HamLog-Profile-Id: <id>
+  Server-Timing: total;dur=…, db;dur=…;desc="N statements"
+
+Requests without the flag pay for a header lookup and nothing else.
+
+The sampler reads the event-loop thread's stack, so concurrent requests on the
+same worker can show up in the samples. Profile on a quiet worker for a clean
+picture; the SQL list is always exact since it is scoped by context variable.
+"""
+import asyncio
+import contextlib
+import contextvars
+import json
+import logging
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from backend.auth.users import user_id_from_authorization
+from backend.config import settings
+from backend.database import get_async_session
+from backend.models import User
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-hamlog-profile"
+PROFILE_QUERY_PARAM = "_profile"
+
+# SQL statements issued by the profiled request (None when not profiling)
+_sql_log: contextvars.ContextVar[list[dict] | None] = contextvars.ContextVar(
+    "hamlog_sql_log", default=None
+)
+
+
+# ── SQL timing ─────────────────────────────────────────────────────────────────
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _sql_log.get() is not None:
+        conn.info.setdefault("hamlog_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    log = _sql_log.get()
+    if log is None:
+        return
+    starts = conn.info.get("hamlog_query_start")
+    if not starts:
+        return
+    log.append({
+        "statement": statement,
+        "duration_ms": round((time.perf_counter() - starts.pop()) * 1000, 3),
+        "executemany": executemany,
+    })
+
+
+# ── Stack sampler ──────────────────────────────────────────────────────────────
+
+
+class StackSampler:
+    """Sample one thread's Python stack on a timer, collecting folded stacks."""
+
+    def __init__(self, interval: float, thread_id: int | None = None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="hamlog-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+    def folded(self) -> str:
+        """Collapsed-stack text: one ``frame;frame;frame count`` line per stack."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+# ── Admin check ────────────────────────────────────────────────────────────────
+
+
+async def _is_superuser(app, authorization: str | None) -> bool:
+    """True if the bearer token belongs to an active superuser."""
+    user_id = user_id_from_authorization(authorization)
+    if user_id is None:
+        return False
+
+    # Honour dependency overrides so the check uses the same database as the app
+    session_dep = app.dependency_overrides.get(get_async_session, get_async_session)
+    async with contextlib.aclosing(session_dep()) as sessions:
+        async for session in sessions:
+            user = await session.get(User, user_id)
+            return bool(user and user.is_active and user.is_superuser)
+    return False
+
+
+def _wants_profile(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return value not in (b"", b"0", b"false")
+    query = scope.get("query_string", b"")
+    if PROFILE_QUERY_PARAM.encode() in query:
+        values = parse_qs(query.decode("latin-1")).get(PROFILE_QUERY_PARAM, [])
+        return any(v not in ("", "0", "false") for v in values)
+    return False
+
+
+def load_profile(profile_id: str) -> dict | None:
+    """Read a stored profile summary, or None if it does not exist."""
+    try:
+        uuid.UUID(profile_id)  # reject path tricks before touching the filesystem
+    except ValueError:
+        return None
+    path = Path(settings.profile_dir) / f"{profile_id}.json"
+    if not path.is_file():
+        return None
+    return json.loads(path.read_text())
+
+
+def _write_profile(profile_id: str, summary: dict, folded: str) -> None:
+    out_dir = Path(settings.profile_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / f"{profile_id}.json").write_text(json.dumps(summary))
+    (out_dir / f"{profile_id}.folded").write_text(folded)
+
+
+# ── Middleware ─────────────────────────────────────────────────────────────────
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware — wraps the whole request, including auth and serialisation."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not settings.profiling_enabled
+            or not _wants_profile(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        authorization = next(
+            (v.decode("latin-1") for k, v in scope["headers"] if k == b"authorization"),
+            None,
+        )
+        if not await _is_superuser(scope["app"], authorization):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = str(uuid.uuid4())
+        sql: list[dict] = []
+        token = _sql_log.set(sql)
+        sampler = StackSampler(settings.profile_sample_interval_ms / 1000)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total_ms = (time.perf_counter() - start) * 1000
+                db_ms = sum(q["duration_ms"] for q in sql)
+                timing = (
+                    f'total;dur={total_ms:.1f}, '
+                    f'db;dur={db_ms:.1f};desc="{len(sql)} statements"'
+                )
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-hamlog-profile-id", profile_id.encode()),
+                    (b"server-timing", timing.encode()),
+                ]
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            _sql_log.reset(token)
+            await self._store(profile_id, scope, status_code, start, sql, sampler)
+
+    @staticmethod
+    async def _store(profile_id, scope, status_code, start, sql, sampler) -> None:
+        duration_ms = (time.perf_counter() - start) * 1000
+        folded = sampler.folded()
+        summary = {
+            "id": profile_id,
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status_code,
+            "duration_ms": round(duration_ms, 3),
+            "sample_interval_ms": settings.profile_sample_interval_ms,
+            "samples": sum(sampler.stacks.values()),
+            "sql_total_ms": round(sum(q["duration_ms"] for q in sql), 3),
+            "sql": sql,
+            "folded": folded,
+        }
+        try:
+            # Off the event loop: a slow disk must not stall other requests
+            await asyncio.to_thread(_write_profile, profile_id, summary, folded)
+        except OSError as exc:
+            logger.warning("Could not store profile %s: %s", profile_id, exc)
+            return
+        logger.info(
+            "Profiled %s %s in %.1f ms (%d SQL statements) → %s",
+            scope["method"], scope["path"], duration_ms, len(sql), profile_id,
+        )
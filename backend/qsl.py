@@ -0,0 +1,186 @@
+"""
+QSL confirmation matching from LoTW and eQSL report files.
+
+A report is an ADIF file of confirmations: call, band, mode and QSO time,
+plus the date the QSL arrived (``QSLRDATE``, or its ``LOTW_``/``EQSL_``
+prefixed forms). A confirmation matches a logged QSO with the same call,
+band and mode class whose time lies within ``window`` of it.
+
+The match is an interval join, not a query per confirmation. The report is
+parsed into an in-memory interval index: per (call, band, mode) key, the
+confirmation times in sorted order. Each confirmation stands for the
+interval ``[ts - window, ts + window]``. The user's QSOs over the report's
+time span, hot and archived, are then scanned once in ``ix_qso_user_date``
+order. Each QSO bisects its key's list for the nearest unclaimed
+confirmation. Newly confirmed QSOs get ``qsl_confirmed``/``qsl_date`` in
+executemany batches, and their award bits are set through ``qsos_confirmed``.
+"""
+import uuid
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend import adif
+from backend.awards import mode_class
+from backend.models import QSO, QSOArchive
+from backend.qso_events import qsos_confirmed
+from backend.query import timed_qsos
+
+UPDATE_BATCH = 1_000
+UNMATCHED_SAMPLE = 100
+
+_RECEIVED_DATE_FIELDS = ("QSLRDATE", "LOTW_QSLRDATE", "EQSL_QSLRDATE")
+_NOT_RECEIVED = {"N", "I", "R"}  # ADIF QSL_RCVD: no, ignore, requested
+
+
+def match_key(call: str, band: str | None, mode: str | None) -> tuple[str, str, str]:
+    """Calls and bands compare case-insensitively, modes by award mode class."""
+    m = (mode or "").strip().upper()
+    return call.strip().upper(), (band or "").strip().lower(), mode_class(m) or m
+
+
+@dataclass
+class _Slot:
+    """Confirmations for one key, sorted by time."""
+
+    times: list[datetime] = field(default_factory=list)
+    received: list[date | None] = field(default_factory=list)
+    claimed: list[bool] = field(default_factory=list)
+
+
+@dataclass
+class ConfirmationIndex:
+    slots: dict[tuple[str, str, str], _Slot] = field(default_factory=lambda: defaultdict(_Slot))
+    count: int = 0
+    invalid: int = 0
+    first: datetime | None = None
+    last: datetime | None = None
+
+    def add(self, record: dict[str, str]) -> None:
+        fields = adif.qso_fields(record)
+        if (
+            fields is None
+            or fields["qso_date"] is None
+            or fields["time_on"] is None
+            or (record.get("QSL_RCVD") or "").strip().upper() in _NOT_RECEIVED
+        ):
+            self.invalid += 1
+            return
+        ts = datetime.combine(fields["qso_date"], fields["time_on"])
+        received = next(
+            (d for name in _RECEIVED_DATE_FIELDS if (d := adif.parse_date(record.get(name)))), None
+        )
+        slot = self.slots[match_key(fields["call"], fields["band"], fields["mode"])]
+        slot.times.append(ts)
+        slot.received.append(received)
+        self.count += 1
+        self.first = ts if self.first is None else min(self.first, ts)
+        self.last = ts if self.last is None else max(self.last, ts)
+
+    def seal(self) -> None:
+        """Sort every key's confirmations by time; call once after the last ``add``."""
+        for slot in self.slots.values():
+            order = sorted(range(len(slot.times)), key=slot.times.__getitem__)
+            slot.times = [slot.times[i] for i in order]
+            slot.received = [slot.received[i] for i in order]
+            slot.claimed = [False] * len(order)
+
+    def claim(self, key: tuple[str, str, str], ts: datetime, window: timedelta) -> tuple[bool, date | None]:
+        """Claim the unclaimed confirmation nearest ``ts`` within ``window``; (found, received date)."""
+        slot = self.slots.get(key)
+        if slot is None:
+            return False, None
+        times = slot.times
+        best = None
+        i = bisect_left(times, ts - window)
+        while i < len(times) and times[i] <= ts + window:
+            if not slot.claimed[i] and (best is None or abs(times[i] - ts) < abs(times[best] - ts)):
+                best = i
+            i += 1
+        if best is None:
+            return False, None
+        slot.claimed[best] = True
+        return True, slot.received[best]
+
+    def unmatched(self, limit: int) -> list[dict]:
+        out = []
+        for (call, band, mode), slot in self.slots.items():
+            for ts, claimed in zip(slot.times, slot.claimed):
+                if not claimed:
+                    if len(out) == limit:
+                        return out
+                    out.append({"call": call, "band": band or None, "mode": mode or None, "qso_time": ts})
+        return out
+
+
+async def read_report(stream) -> ConfirmationIndex:
+    """Parse a LoTW/eQSL ADIF report from ``stream`` into a sealed index."""
+    index = ConfirmationIndex()
+    async for records in adif.read_records(stream):
+        for record in records:
+            index.add(record)
+    index.seal()
+    return index
+
+
+async def apply_confirmations(
+    session: AsyncSession, user_id: uuid.UUID, index: ConfirmationIndex, window: timedelta
+) -> dict:
+    """Match ``index`` against the user's log and mark newly confirmed QSOs. Commits."""
+    counts = {"confirmations": index.count, "invalid": index.invalid, "newly_confirmed": 0, "already_confirmed": 0}
+    if index.first is None:
+        return {**counts, "unmatched": 0, "unmatched_sample": []}
+
+    columns = (QSO.call, QSO.band, QSO.mode, QSO.qsl_confirmed, QSO.dxcc, QSO.qth, QSO.grid)
+    updates: list[dict] = []
+    confirmed: list[SimpleNamespace] = []
+
+    async def flush():
+        if updates:
+            ids = [u["id"] for u in updates]
+            archived = set((await session.execute(select(QSOArchive.id).where(QSOArchive.id.in_(ids)))).scalars())
+            for model, rows in (
+                (QSO, [u for u in updates if u["id"] not in archived]),
+                (QSOArchive, [u for u in updates if u["id"] in archived]),
+            ):
+                if rows:
+                    # executemany by primary key; the owner filter prunes a partitioned qso table
+                    await session.execute(
+                        update(model).where(model.created_by == user_id),
+                        rows,
+                        execution_options={"synchronize_session": None},
+                    )
+            await qsos_confirmed(session, confirmed)
+            counts["newly_confirmed"] += len(updates)
+            updates.clear()
+            confirmed.clear()
+
+    today = datetime.utcnow().date()
+    rows = timed_qsos(session, user_id, columns, index.first - window, index.last + window)
+    async for qso_date, time_on, qso_id, call, band, mode, is_confirmed, dxcc, qth, grid in rows:
+        found, received = index.claim(match_key(call, band, mode), datetime.combine(qso_date, time_on), window)
+        if not found:
+            continue
+        if is_confirmed:
+            counts["already_confirmed"] += 1
+            continue
+        updates.append({"id": qso_id, "qsl_confirmed": True, "qsl_date": received or today})
+        confirmed.append(SimpleNamespace(
+            created_by=user_id, band=band, mode=mode, dxcc=dxcc, qth=qth, grid=grid, qsl_confirmed=True
+        ))
+        if len(updates) >= UPDATE_BATCH:
+            await flush()
+    await flush()
+    await session.commit()
+
+    matched = counts["newly_confirmed"] + counts["already_confirmed"]
+    return {
+        **counts,
+        "unmatched": index.count - matched,
+        "unmatched_sample": index.unmatched(UNMATCHED_SAMPLE),
+    }
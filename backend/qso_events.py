@@ -0,0 +1,66 @@
+"""
+Derived-data hooks for QSO writes.
+
+Every code path that inserts, edits or deletes QSOs calls ``qsos_added`` /
+``qsos_changed`` / ``qsos_removed`` before committing, so the statistics
+counters, award bitsets and contest scores stay in the same transaction as
+the rows they describe.
+"""
+from types import SimpleNamespace
+from typing import Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.awards import record_awards, unrecord_awards
+from backend.contests import record_contest_qsos, rescore_entries
+from backend.models import QSO
+from backend.stats import apply_qso_stats
+
+# Columns derived data depends on; ``snapshot`` copies them before an edit
+TRACKED_COLUMNS = (
+    "created_by", "call", "band", "mode", "dxcc", "qth", "grid", "qso_date", "time_on",
+    "qsl_confirmed", "contest_entry_id", "exch_rcvd",
+)
+# Columns a contest score depends on; changing one re-scores the entry
+_CONTEST_COLUMNS = ("call", "band", "mode", "dxcc", "qso_date", "time_on", "contest_entry_id", "exch_rcvd")
+
+
+def snapshot(qso: QSO) -> SimpleNamespace:
+    return SimpleNamespace(**{name: getattr(qso, name) for name in TRACKED_COLUMNS})
+
+
+async def qsos_added(session: AsyncSession, qsos: Sequence[QSO]) -> None:
+    """Call after ``session.add`` of new QSOs, before commit."""
+    await apply_qso_stats(session, qsos, +1)
+    await record_awards(session, qsos)
+    await record_contest_qsos(session, qsos)
+
+
+async def qsos_confirmed(session: AsyncSession, qsos: Sequence) -> None:
+    """Call after marking QSOs QSL-confirmed in bulk; ``qsos`` carry the award fields."""
+    # Already counted as worked; only their confirmations are new
+    await record_awards(session, qsos, count_worked=False)
+
+
+async def qsos_removed(session: AsyncSession, qsos: Sequence[QSO]) -> None:
+    """Call after ``session.delete`` of QSOs, before commit."""
+    await apply_qso_stats(session, qsos, -1)
+    await session.flush()
+    await unrecord_awards(session, qsos)
+    await rescore_entries(session, (qso.contest_entry_id for qso in qsos))
+
+
+async def qsos_changed(
+    session: AsyncSession, before: Sequence[SimpleNamespace], after: Sequence[QSO]
+) -> None:
+    """Call after editing QSOs in place; ``before`` holds their ``snapshot``s."""
+    await apply_qso_stats(session, before, -1)
+    await apply_qso_stats(session, after, +1)
+    await session.flush()
+    await unrecord_awards(session, before)
+    await record_awards(session, after)
+    rescore = set()
+    for old, new in zip(before, after):
+        if any(getattr(old, name) != getattr(new, name) for name in _CONTEST_COLUMNS):
+            rescore |= {old.contest_entry_id, new.contest_entry_id}
+    await rescore_entries(session, rescore)
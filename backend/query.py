@@ -0,0 +1,266 @@
+"""
+Structured QSO filtering with a small index planner.
+
+``filter_qsos`` turns a ``QSOFilter`` into a ``SELECT`` over the caller's QSOs.
+Every composite index on ``qso`` leads with ``created_by``, so any filter
+combination is at worst a range scan of the caller's own rows. The planner
+picks which index drives the scan: it estimates how many rows each candidate
+index would visit from the ``qso_stat`` counters (exact for band, mode, DXCC
+and date ranges; frequency ranges within one band scale that band's count by
+the fraction of the allocation covered; fixed selectivities for the rest) and
+keeps the cheapest.
+
+On SQLite, whose planner has no column statistics unless ``ANALYZE`` has been
+run, the choice is enforced by writing the other predicates as ``+column``
+(SQLite's documented way of taking a term out of index consideration).
+PostgreSQL keeps its own cost-based choice; the predicates are the same.
+"""
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator
+
+from sqlalchemy import Row, Select, and_, func, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.functions import FunctionElement
+
+from backend.archive import all_qsos
+from backend.bands import BANDS, band_for, mhz_to_hz
+from backend.models import QSO, QSOStat
+from backend.schemas import QSOFilter
+
+# index name → filter fields it can seek on (after created_by), in column order
+QSO_INDEXES: dict[str, tuple[str, ...]] = {
+    "ix_qso_user_date": ("date",),
+    "ix_qso_user_band_date": ("band", "date"),
+    "ix_qso_user_mode_date": ("mode", "date"),
+    "ix_qso_user_dxcc_date": ("dxcc", "date"),
+    "ix_qso_user_grid": ("grid",),
+    "ix_qso_user_freq": ("freq",),
+    "ix_qso_user_qsl_date": ("confirmed", "date"),
+}
+_SEEKABLE = {field for fields in QSO_INDEXES.values() for field in fields}
+
+# Fraction of a log assumed to match predicates qso_stat has no counts for
+_GRID_SELECTIVITY = {1: 1 / 20, 2: 1 / 50, 3: 1 / 200, 4: 1 / 500}
+_FREQ_SELECTIVITY = 0.1
+_CONFIRMED_SELECTIVITY = {True: 0.3, False: 0.7}
+
+
+# ── SQLite index steering ──────────────────────────────────────────────────────
+
+
+class unindexed(FunctionElement):
+    """A column the planner decided should not drive the scan."""
+
+    inherit_cache = True
+
+    def __init__(self, column):
+        super().__init__(column)
+        self.type = column.type
+
+
+@compiles(unindexed)
+def _compile_unindexed(element, compiler, **kw):
+    return compiler.process(list(element.clauses)[0], **kw)
+
+
+@compiles(unindexed, "sqlite")
+def _compile_unindexed_sqlite(element, compiler, **kw):
+    return "+" + compiler.process(list(element.clauses)[0], **kw)
+
+
+# ── Planning ───────────────────────────────────────────────────────────────────
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    index: str | None  # None: no filter is seekable, any created_by index will do
+    estimated_rows: float
+
+
+def _active_fields(f: QSOFilter) -> set[str]:
+    fields = set()
+    for name in ("band", "mode", "dxcc", "grid"):
+        if getattr(f, name):
+            fields.add(name)
+    if f.date_from or f.date_to:
+        fields.add("date")
+    if f.freq_min is not None or f.freq_max is not None:
+        fields.add("freq")
+    if f.confirmed is not None:
+        fields.add("confirmed")
+    return fields
+
+
+async def plan_qso_query(session: AsyncSession, user_id: uuid.UUID, f: QSOFilter) -> QueryPlan:
+    """Pick the index that should visit the fewest of ``user_id``'s rows."""
+    fields = _active_fields(f)
+    if not fields & _SEEKABLE:
+        return QueryPlan(None, float("inf"))
+
+    # A frequency range inside one allocation is estimated from that band's count
+    freq_band = None
+    if f.freq_min is not None and f.freq_max is not None:
+        low, high = mhz_to_hz(f.freq_min), mhz_to_hz(f.freq_max)
+        if band_for(low) and band_for(low) == band_for(high):
+            freq_band = band_for(low)
+
+    wanted = {("total", "")}
+    wanted |= {(dim, getattr(f, dim)) for dim in ("band", "mode", "dxcc") if getattr(f, dim)}
+    if freq_band:
+        wanted.add(("band", freq_band))
+    q = select(QSOStat.dimension, QSOStat.key, QSOStat.count).where(
+        QSOStat.user_id == user_id,
+        or_(*(and_(QSOStat.dimension == d, QSOStat.key == k) for d, k in wanted)),
+    )
+    counts = dict.fromkeys(wanted, 0)
+    for dimension, key, count in (await session.execute(q)).all():
+        counts[(dimension, key)] = count
+    total = max(counts[("total", "")], 1)
+
+    selectivity = {
+        dim: counts[(dim, getattr(f, dim))] / total
+        for dim in ("band", "mode", "dxcc")
+        if getattr(f, dim)
+    }
+    if "date" in fields:
+        day_q = select(func.coalesce(func.sum(QSOStat.count), 0)).where(
+            QSOStat.user_id == user_id, QSOStat.dimension == "day"
+        )
+        if f.date_from:
+            day_q = day_q.where(QSOStat.key >= f.date_from.isoformat())
+        if f.date_to:
+            day_q = day_q.where(QSOStat.key <= f.date_to.isoformat())
+        selectivity["date"] = (await session.execute(day_q)).scalar_one() / total
+    if "grid" in fields:
+        selectivity["grid"] = _GRID_SELECTIVITY.get(len(f.grid), 1 / 1000)
+    if freq_band:
+        _, band_low, band_high = next(b for b in BANDS if b[0] == freq_band)
+        width = (high - low + 1) / (band_high - band_low + 1)
+        selectivity["freq"] = counts[("band", freq_band)] / total * width
+    elif "freq" in fields:
+        selectivity["freq"] = _FREQ_SELECTIVITY
+    if "confirmed" in fields:
+        selectivity["confirmed"] = _CONFIRMED_SELECTIVITY[f.confirmed]
+
+    best = QueryPlan("ix_qso_user_date", float(total))
+    for index, columns in QSO_INDEXES.items():
+        # An index helps through its leading run of filtered columns
+        rows = float(total)
+        for column in columns:
+            if column not in fields:
+                break
+            rows *= selectivity[column]
+        if rows < best.estimated_rows:
+            best = QueryPlan(index, rows)
+    return best
+
+
+# ── Query building ─────────────────────────────────────────────────────────────
+
+
+def _grid_upper_bound(prefix: str) -> str:
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def qso_conditions(
+    user_id: uuid.UUID, f: QSOFilter, plan: QueryPlan | None = None, qso=QSO
+) -> list[ColumnElement]:
+    """
+    WHERE terms for ``f`` against ``qso`` (the table, or ``all_qsos()``);
+    columns outside ``plan``'s index are marked unindexed.
+    """
+    driving = _SEEKABLE if plan is None else set(QSO_INDEXES.get(plan.index, ()))
+
+    def col(field: str, column):
+        return column if field in driving else unindexed(column)
+
+    conds: list[ColumnElement] = [qso.created_by == user_id]
+    if f.call:
+        conds.append(qso.call.ilike(f"%{f.call}%"))
+    if f.band:
+        conds.append(col("band", qso.band) == f.band)
+    if f.mode:
+        conds.append(col("mode", qso.mode) == f.mode)
+    if f.dxcc:
+        conds.append(col("dxcc", qso.dxcc) == f.dxcc)
+    if f.grid:
+        # Range rather than LIKE so the grid index is usable on every backend
+        grid = col("grid", qso.grid)
+        conds.append(and_(grid >= f.grid, grid < _grid_upper_bound(f.grid)))
+    if f.freq_min is not None:
+        conds.append(col("freq", qso.freq_hz) >= mhz_to_hz(f.freq_min))
+    if f.freq_max is not None:
+        conds.append(col("freq", qso.freq_hz) <= mhz_to_hz(f.freq_max))
+    if f.confirmed is not None:
+        conds.append(col("confirmed", qso.qsl_confirmed) == f.confirmed)
+
+    qso_date = col("date", qso.qso_date)
+    if f.date_from:
+        conds.append(qso_date >= f.date_from)
+        if f.time_from:
+            conds.append(or_(qso_date > f.date_from, qso.time_on >= f.time_from))
+    if f.date_to:
+        conds.append(qso_date <= f.date_to)
+        if f.time_to:
+            conds.append(or_(qso_date < f.date_to, qso.time_on <= f.time_to))
+    return conds
+
+
+async def filter_qsos(session: AsyncSession, user_id: uuid.UUID, f: QSOFilter) -> Select:
+    """Planned, unordered ``SELECT QSO`` for the caller's filter, over both archive tiers."""
+    plan = await plan_qso_query(session, user_id, f)
+    qso = all_qsos()
+    return select(qso).where(*qso_conditions(user_id, f, plan, qso))
+
+
+def by_time(q: Select, descending: bool = False) -> Select:
+    """``q`` (from ``filter_qsos``) ordered by date and time, undated QSOs last."""
+    qso = q.column_descriptions[0]["entity"]
+    if descending:
+        return q.order_by(qso.qso_date.desc().nulls_last(), qso.time_on.desc().nulls_last())
+    return q.order_by(qso.qso_date.asc().nulls_last(), qso.time_on.asc().nulls_last())
+
+
+# ── Time-ordered scans ─────────────────────────────────────────────────────────
+
+
+async def timed_qsos(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    columns: tuple,
+    start: datetime,
+    end: datetime,
+    page_size: int = 5_000,
+) -> AsyncIterator[Row]:
+    """
+    ``(qso_date, time_on, id, *columns)`` of the user's QSOs timed between
+    ``start`` and ``end``, in ``ix_qso_user_date`` order, from both archive
+    tiers. ``columns`` are ``QSO`` attributes.
+
+    Reads keyset pages rather than holding a cursor open, so callers may
+    write (and commit) through the same session while iterating.
+    """
+    qso = all_qsos()
+    columns = [getattr(qso, column.key) for column in columns]
+    key = tuple_(qso.qso_date, qso.time_on, qso.id)
+    after = (start.date(), start.time(), uuid.UUID(int=0))
+    while True:
+        q = (
+            select(qso.qso_date, qso.time_on, qso.id, *columns)
+            .where(qso.created_by == user_id, qso.time_on.is_not(None), key > after)
+            .where(qso.qso_date <= end.date())
+            .order_by(qso.qso_date, qso.time_on, qso.id)
+            .limit(page_size)
+        )
+        rows = (await session.execute(q)).all()
+        for row in rows:
+            if datetime.combine(row.qso_date, row.time_on) > end:
+                return
+            yield row
+        if len(rows) < page_size:
+            return
+        after = tuple(rows[-1][:3])
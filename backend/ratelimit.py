@@ -0,0 +1,257 @@
+"""
+Per-user inbound rate limiting.
+
+``/parse``, ``/callsign`` and ``/qso`` each have their own budget
+(``RATE_LIMIT_PARSE`` etc., written ``"<count>/<second|minute|hour>"``). A
+request is charged to the user in its bearer token, or to the client address
+when it carries none, so operators sharing a club's NAT are counted apart.
+
+Each budget is a token bucket holding ``count`` requests and refilling at
+``count`` per period, implemented as GCRA: one number per key, the time at
+which the bucket will next be full. Keys live in a pluggable backend:
+
+  memory — a dict in this process; each worker counts separately
+  sqlite — one upsert per request on the shared-state file (default)
+  redis  — a Lua script on any client with redis-py's ``register_script``
+           (``RATE_LIMIT_REDIS_URL``); shared across hosts
+
+Verified tokens are remembered, so the limiter costs a dict lookup and one
+backend call per request rather than a JWT decode. A backend that fails lets
+the request through: the limiter never becomes the outage.
+"""
+import asyncio
+import json
+import logging
+import math
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+
+from backend.auth.users import user_id_from_authorization
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0}
+
+
+@dataclass(frozen=True)
+class Rate:
+    interval: float  # seconds per request at the sustained rate
+    tolerance: float  # how far ahead of schedule a caller may get (the burst)
+
+
+def parse_rate(text: str) -> Rate:
+    """``"60/minute"`` → one request a second, bursting to 60."""
+    count, _, period = text.partition("/")
+    n = int(count)
+    if n < 1 or period not in _PERIODS:
+        raise ValueError(f"invalid rate limit {text!r}")
+    interval = _PERIODS[period] / n
+    return Rate(interval, interval * (n - 1))
+
+
+# ── Backends ───────────────────────────────────────────────────────────────────
+
+
+class MemoryBackend:
+    """Per-process counters; for single-worker deployments and tests."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self._tat: dict[str, float] = {}
+        self._max_keys = max_keys
+
+    async def take(self, key: str, rate: Rate, now: float) -> float:
+        tat = max(self._tat.get(key, now), now)
+        if tat - now > rate.tolerance:
+            return tat - now - rate.tolerance
+        if len(self._tat) >= self._max_keys:
+            # Keys whose bucket has refilled carry no state
+            self._tat = {k: v for k, v in self._tat.items() if v > now}
+        self._tat[key] = tat + rate.interval
+        return 0.0
+
+
+class SQLiteBackend:
+    """
+    Counters in a SQLite file shared by the workers on one host.
+
+    The check and the update are a single ``INSERT … ON CONFLICT DO UPDATE
+    … WHERE`` statement, so concurrent workers cannot both spend the last
+    token. Uncontended, it takes a few microseconds, less than handing it to
+    a thread would, so it first runs on the event loop without waiting for
+    the file lock. Only if another worker holds the lock is it retried in a
+    thread, waiting up to ``busy_timeout`` there, so the loop never stalls.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 0.05):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._conn: sqlite3.Connection | None = None  # event loop; never waits
+        self._waiting_conn: sqlite3.Connection | None = None  # worker threads
+        self._lock = threading.Lock()
+
+    def _connect(self, timeout: float, **kwargs) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=timeout, isolation_level=None, **kwargs)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=OFF")  # losing counters on a crash is harmless
+        conn.execute("CREATE TABLE IF NOT EXISTS rate_limit (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+        return conn
+
+    @staticmethod
+    def _take(db: sqlite3.Connection, key: str, rate: Rate, now: float) -> float:
+        row = db.execute(
+            "INSERT INTO rate_limit (key, tat) VALUES (?1, ?2 + ?3) "
+            "ON CONFLICT (key) DO UPDATE SET tat = max(tat, ?2) + ?3 "
+            "WHERE max(tat, ?2) - ?2 <= ?4 RETURNING tat",
+            (key, now, rate.interval, rate.tolerance),
+        ).fetchone()
+        if row is not None:
+            return 0.0
+        (tat,) = db.execute("SELECT tat FROM rate_limit WHERE key = ?", (key,)).fetchone()
+        return max(tat - now - rate.tolerance, 0.001)
+
+    def _take_waiting(self, key: str, rate: Rate, now: float) -> float:
+        with self._lock:
+            if self._waiting_conn is None:
+                self._waiting_conn = self._connect(self.busy_timeout, check_same_thread=False)
+            return self._take(self._waiting_conn, key, rate, now)
+
+    async def take(self, key: str, rate: Rate, now: float) -> float:
+        if self._conn is None:
+            self._conn = self._connect(0.0)
+        try:
+            return self._take(self._conn, key, rate, now)
+        except sqlite3.OperationalError as exc:
+            if "locked" not in str(exc):
+                raise
+        return await asyncio.to_thread(self._take_waiting, key, rate, now)
+
+
+# Returns "0" when the request may proceed, else the seconds to wait
+_GCRA_LUA = """
+local now = tonumber(ARGV[1])
+local interval = tonumber(ARGV[2])
+local tolerance = tonumber(ARGV[3])
+local tat = tonumber(redis.call('GET', KEYS[1]) or ARGV[1])
+if tat < now then tat = now end
+if tat - now > tolerance then return tostring(tat - now - tolerance) end
+tat = tat + interval
+redis.call('SET', KEYS[1], tostring(tat), 'PX', math.ceil((tat - now) * 1000))
+return '0'
+"""
+
+
+class RedisBackend:
+    """Counters in Redis (or anything speaking its scripting commands)."""
+
+    def __init__(self, client, prefix: str = "hamlog:rl:"):
+        self._script = client.register_script(_GCRA_LUA)
+        self._prefix = prefix
+
+    async def take(self, key: str, rate: Rate, now: float) -> float:
+        result = await self._script(
+            keys=[self._prefix + key], args=[repr(now), repr(rate.interval), repr(rate.tolerance)]
+        )
+        return float(result)
+
+
+def make_backend(name: str):
+    if name == "memory":
+        return MemoryBackend()
+    if name == "sqlite":
+        return SQLiteBackend(settings.shared_state_path)
+    if name == "redis":
+        import redis.asyncio  # optional dependency: pip install hamlog[redis]
+
+        return RedisBackend(redis.asyncio.from_url(settings.rate_limit_redis_url))
+    raise ValueError(f"unknown rate limit backend {name!r}")
+
+
+# ── Middleware ─────────────────────────────────────────────────────────────────
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware answering over-budget requests with 429 + Retry-After."""
+
+    _MAX_CACHED_TOKENS = 10_000
+
+    def __init__(self, app, backend=None, limits: dict[str, str] | None = None):
+        self.app = app
+        self._backend = backend
+        if limits is None:
+            limits = {
+                "/parse": settings.rate_limit_parse,
+                "/callsign": settings.rate_limit_callsign,
+                "/qso": settings.rate_limit_qso,
+            }
+        self.limits = {prefix: parse_rate(text) for prefix, text in limits.items()}
+        # Authorization header → (user ID or None, recheck after); verified once
+        # per token. A token that has since expired still keys its user — the
+        # endpoint rejects it anyway.
+        self._subjects: dict[str, tuple[uuid.UUID | None, float]] = {}
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = make_backend(settings.rate_limit_backend)
+        return self._backend
+
+    def _route_class(self, path: str) -> str | None:
+        for prefix in self.limits:
+            if path == prefix or path.startswith(prefix + "/"):
+                return prefix
+        return None
+
+    def _caller(self, scope, now: float) -> str:
+        authorization = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                authorization = value.decode("latin-1")
+                break
+        if authorization is not None:
+            cached = self._subjects.get(authorization)
+            if cached is None or cached[1] <= now:
+                if len(self._subjects) >= self._MAX_CACHED_TOKENS:
+                    self._subjects.clear()
+                user_id = user_id_from_authorization(authorization)
+                cached = (user_id, now + settings.jwt_lifetime_seconds)
+                self._subjects[authorization] = cached
+            if cached[0] is not None:
+                return f"u:{cached[0]}"
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.rate_limit_enabled:
+            await self.app(scope, receive, send)
+            return
+        route_class = self._route_class(scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        now = time.time()
+        key = f"{route_class}:{self._caller(scope, now)}"
+        try:
+            wait = await self.backend.take(key, self.limits[route_class], now)
+        except Exception as exc:
+            logger.warning("Rate limit backend unavailable, allowing request: %s", exc)
+            wait = 0.0
+        if wait <= 0.0:
+            await self.app(scope, receive, send)
+            return
+
+        body = json.dumps({"detail": "Rate limit exceeded, retry later"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(wait)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
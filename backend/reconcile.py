@@ -0,0 +1,300 @@
+"""
+Reconcile an uploaded ADIF log against the stored one.
+
+Operators who keep a second logger at the radio upload its log to find the
+QSOs HamLog is missing, the ones it already has and the ones the two logs
+disagree on. The upload is parsed as it streams in and spooled to a
+throwaway SQLite file, which sorts it by time on disk. The stored log is read
+in ``ix_qso_user_date`` order with keyset pages over the upload's time span.
+Neither side is held in memory.
+
+The two time-ordered streams are sort-merged. A sliding hash index keyed by
+callsign holds the stored QSOs within ``tolerance`` of the current upload
+record. Each upload record claims its best unclaimed candidate: same band
+and mode class first, then nearest in time. The record is a ``match`` when
+the fields both logs have agree, a ``conflict`` when they differ, and
+``new`` when there is no candidate. Repeats within the upload itself are
+``duplicate``; records without a call, date or time are ``invalid``.
+Optionally the new records are then inserted in bulk.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import uuid
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import AsyncIterator
+
+from fastapi import UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend import adif, geo, warming
+from backend.awards import mode_class
+from backend.models import QSO, User
+from backend.qso_events import qsos_added
+from backend.query import timed_qsos
+
+SPOOL_BATCH = 5_000
+APPLY_BATCH = 1_000
+FREQ_TOLERANCE_HZ = 1_000
+
+# Fields compared between a record and its counterpart (when both have them)
+_COMPARED = ("band", "mode", "freq_hz", "rst_sent", "rst_rcvd", "grid")
+_TS_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+# ── Upload spool ───────────────────────────────────────────────────────────────
+
+
+class Spool:
+    """Upload records in a temporary SQLite file; SQLite sorts them, not Python."""
+
+    def __init__(self):
+        fd, self.path = tempfile.mkstemp(prefix="hamlog-reconcile-", suffix=".db")
+        os.close(fd)
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=OFF")
+        self.db.execute("PRAGMA synchronous=OFF")
+        self.db.execute(
+            "CREATE TABLE upload (seq INTEGER PRIMARY KEY, ts TEXT, record TEXT NOT NULL, status TEXT)"
+        )
+        self.count = 0
+
+    def add(self, records: list[dict[str, str]]) -> None:
+        rows = []
+        for record in records:
+            fields = adif.qso_fields(record)
+            ts = _timestamp(fields)
+            rows.append((
+                ts.strftime(_TS_FORMAT) if ts else None,
+                json.dumps(record),
+                None if ts else "invalid",
+            ))
+        self.db.executemany("INSERT INTO upload (ts, record, status) VALUES (?, ?, ?)", rows)
+        self.count += len(rows)
+
+    def finish(self) -> tuple[datetime, datetime] | None:
+        """Index the upload by time; its first and last timestamps, if any."""
+        self.db.execute("CREATE INDEX upload_ts ON upload (ts, seq)")
+        self.db.commit()
+        first, last = self.db.execute("SELECT MIN(ts), MAX(ts) FROM upload").fetchone()
+        if first is None:
+            return None
+        return datetime.strptime(first, _TS_FORMAT), datetime.strptime(last, _TS_FORMAT)
+
+    def page_by_time(self, after: tuple[str, int], size: int) -> list[tuple[int, str, str]]:
+        return self.db.execute(
+            "SELECT seq, ts, record FROM upload WHERE ts IS NOT NULL AND (ts, seq) > (?, ?) "
+            "ORDER BY ts, seq LIMIT ?",
+            (*after, size),
+        ).fetchall()
+
+    def page_by_status(self, status: str, after: int, size: int) -> list[tuple[int, str]]:
+        return self.db.execute(
+            "SELECT seq, record FROM upload WHERE status = ? AND seq > ? ORDER BY seq LIMIT ?",
+            (status, after, size),
+        ).fetchall()
+
+    def set_status(self, updates: list[tuple[str, int]]) -> None:
+        self.db.executemany("UPDATE upload SET status = ? WHERE seq = ?", updates)
+
+    def close(self) -> None:
+        self.db.close()
+        os.unlink(self.path)
+
+
+def _timestamp(fields: dict | None) -> datetime | None:
+    if not fields or fields["qso_date"] is None or fields["time_on"] is None:
+        return None
+    return datetime.combine(fields["qso_date"], fields["time_on"]).replace(microsecond=0)
+
+
+async def spool_upload(upload: UploadFile) -> Spool:
+    """Parse ``upload`` chunk by chunk into a new ``Spool``."""
+    spool = Spool()
+    try:
+        async for records in adif.read_records(upload, SPOOL_BATCH):
+            await asyncio.to_thread(spool.add, records)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+# ── Sort-merge ─────────────────────────────────────────────────────────────────
+
+
+@dataclass(slots=True)
+class _Seen:
+    """A QSO in the sliding window: stored (``qso_id`` set) or from the upload."""
+
+    ts: datetime
+    call: str
+    fields: dict
+    qso_id: uuid.UUID | None = None
+    claimed: bool = False
+
+
+async def _stored_qsos(
+    session: AsyncSession, user_id: uuid.UUID, start: datetime, end: datetime
+) -> AsyncIterator[_Seen]:
+    columns = (QSO.call, *(getattr(QSO, c) for c in _COMPARED))
+    async for qso_date, time_on, qso_id, call, *compared in timed_qsos(session, user_id, columns, start, end):
+        ts = datetime.combine(qso_date, time_on).replace(microsecond=0)
+        yield _Seen(ts, call.upper(), dict(zip(_COMPARED, compared)), qso_id)
+
+
+def _differences(uploaded: dict, stored: dict) -> dict[str, list]:
+    """``{field: [uploaded, stored]}`` for the fields both sides have and disagree on."""
+    diffs = {}
+    for name in _COMPARED:
+        a, b = uploaded.get(name), stored.get(name)
+        if a is None or b is None:
+            continue
+        if name == "freq_hz":
+            same = abs(a - b) <= FREQ_TOLERANCE_HZ
+        elif name == "grid":
+            n = min(len(a), len(b))
+            same = a[:n].upper() == b[:n].upper()
+        else:
+            same = str(a).strip().upper() == str(b).strip().upper()
+        if not same:
+            diffs[name] = [a, b]
+    return diffs
+
+
+def _best(candidates: list[_Seen], fields: dict, ts: datetime) -> _Seen | None:
+    open_ = [c for c in candidates if not c.claimed]
+    if not open_:
+        return None
+    cls = mode_class(fields["mode"])
+    return min(
+        open_,
+        key=lambda c: (
+            c.fields["band"] != fields["band"],
+            mode_class(c.fields["mode"]) != cls,
+            abs(c.ts - ts),
+        ),
+    )
+
+
+def _line(obj: dict) -> str:
+    return json.dumps(obj, default=str, separators=(",", ":")) + "\n"
+
+
+async def reconcile_lines(
+    session: AsyncSession,
+    user: User,
+    spool: Spool,
+    tolerance: timedelta,
+    apply: bool = False,
+) -> AsyncIterator[str]:
+    """
+    NDJSON: one ``{"status": ..., "record": ...}`` line per upload record
+    (``qso_id`` and ``differences`` where there is a counterpart; invalid
+    records carry their raw ``adif`` fields instead), then a
+    ``{"summary": ...}`` line. Closes ``spool``.
+    """
+    counts = dict.fromkeys(("new", "match", "conflict", "duplicate", "invalid", "stored_only", "applied"), 0)
+    try:
+        span = await asyncio.to_thread(spool.finish)
+        if span is not None:
+            async for lines in _merge(session, user.id, spool, tolerance, span, counts):
+                yield lines
+        after = 0
+        while page := await asyncio.to_thread(spool.page_by_status, "invalid", after, SPOOL_BATCH):
+            counts["invalid"] += len(page)
+            yield "".join(_line({"status": "invalid", "adif": json.loads(raw)}) for _, raw in page)
+            after = page[-1][0]
+        if apply:
+            counts["applied"] = await _apply(session, user, spool)
+            if counts["applied"]:
+                warming.worker.enqueue(warming.WarmJob(user.id))
+        yield _line({"summary": {"uploaded": spool.count, **counts}})
+    finally:
+        await asyncio.to_thread(spool.close)
+
+
+async def _merge(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    spool: Spool,
+    tolerance: timedelta,
+    span: tuple[datetime, datetime],
+    counts: dict[str, int],
+) -> AsyncIterator[str]:
+    window: dict[str, list[_Seen]] = defaultdict(list)
+    order: deque[_Seen] = deque()  # stored QSOs in the window, by time
+    recent: deque[_Seen] = deque()  # upload records in the window, by time
+    stored = _stored_qsos(session, user_id, span[0] - tolerance, span[1] + tolerance)
+    pending = await anext(stored, None)
+    after = ("", 0)
+
+    while page := await asyncio.to_thread(spool.page_by_time, after, SPOOL_BATCH):
+        after = (page[-1][1], page[-1][0])  # (ts, seq)
+        lines, statuses = [], []
+        for seq, ts_text, raw in page:
+            ts = datetime.strptime(ts_text, _TS_FORMAT)
+            fields = adif.qso_fields(json.loads(raw))
+            # Admit stored QSOs up to ts + tolerance, drop everything before ts - tolerance
+            while pending is not None and pending.ts <= ts + tolerance:
+                window[pending.call].append(pending)
+                order.append(pending)
+                pending = await anext(stored, None)
+            for seen_q in (order, recent):
+                while seen_q and seen_q[0].ts < ts - tolerance:
+                    old = seen_q.popleft()
+                    window[old.call].remove(old)
+                    if not window[old.call]:
+                        del window[old.call]
+                    if old.qso_id is not None and not old.claimed:
+                        counts["stored_only"] += 1
+
+            result = {"record": fields}
+            best = _best(window.get(fields["call"], []), fields, ts)
+            diffs = _differences(fields, best.fields) if best else {}
+            if best is None or (best.qso_id is None and diffs):
+                status = "new"
+            elif best.qso_id is None:
+                status = "duplicate"
+                best.claimed = True
+            else:
+                status = "conflict" if diffs else "match"
+                best.claimed = True
+                result["qso_id"] = best.qso_id
+                if diffs:
+                    result["differences"] = diffs
+            if status != "duplicate":
+                # Later repeats of this record within the upload are duplicates
+                seen = _Seen(ts, fields["call"], fields)
+                window[seen.call].append(seen)
+                recent.append(seen)
+            counts[status] += 1
+            statuses.append((status, seq))
+            lines.append(_line({"status": status, **result}))
+        await asyncio.to_thread(spool.set_status, statuses)
+        yield "".join(lines)
+
+    # Whatever is left in the window or not yet read is only in the stored log
+    counts["stored_only"] += sum(1 for s in order if s.qso_id is not None and not s.claimed)
+    while pending is not None:
+        counts["stored_only"] += 1
+        pending = await anext(stored, None)
+
+
+async def _apply(session: AsyncSession, user: User, spool: Spool) -> int:
+    """Insert the upload's new records in batches, one transaction each."""
+    user_id, grid = user.id, user.grid  # commits expire ``user``
+    applied = after = 0
+    while page := await asyncio.to_thread(spool.page_by_status, "new", after, APPLY_BATCH):
+        after = page[-1][0]
+        qsos = [QSO(**adif.qso_fields(json.loads(raw)), created_by=user_id) for _, raw in page]
+        geo.locate_qsos(qsos, grid)
+        session.add_all(qsos)
+        await qsos_added(session, qsos)
+        await session.commit()
+        applied += len(qsos)
+    return applied
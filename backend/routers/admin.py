@@ -0,0 +1,84 @@
+"""
+Admin-only endpoints.
+
+Every route here requires an active superuser.
+"""
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import backend.database as database
+from backend import backup, callbook, loadshed, maintenance
+from backend.auth.users import current_superuser
+from backend.models import User
+from backend.profiling import load_profile
+from backend.schemas import CallbookImportResult
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: str = Query("json", pattern="^(json|folded)$"),
+    _admin: User = Depends(current_superuser),
+):
+    """
+    Fetch a stored request profile.
+
+    ``format=folded`` returns the collapsed stacks as plain text, ready to drop
+    into speedscope or flamegraph.pl.
+    """
+    profile = await asyncio.to_thread(load_profile, profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    if format == "folded":
+        return PlainTextResponse(profile["folded"])
+    return profile
+
+
+@router.get("/load")
+async def get_load(_admin: User = Depends(current_superuser)):
+    """This worker's DB queueing delay, in-flight requests and shed counts by route class."""
+    return loadshed.monitor.snapshot()
+
+
+@router.get("/maintenance")
+async def get_maintenance(_admin: User = Depends(current_superuser)):
+    """Counts and timings from the last maintenance pass on this host, or null before the first."""
+    return await maintenance.last_snapshot()
+
+
+@router.get("/backup")
+async def get_backup(_admin: User = Depends(current_superuser)):
+    """
+    Stream a consistent, gzip-compressed snapshot of the database.
+
+    Writers keep going while it runs: a ``.db`` file on SQLite, a ``psql``
+    data script on PostgreSQL. See backend/backup.py.
+    """
+    try:
+        name = backup.filename(database.engine)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+    return StreamingResponse(
+        backup.snapshot(database.engine),
+        media_type="application/gzip",
+        headers={"Content-Disposition": f'attachment; filename="{name}"'},
+    )
+
+
+@router.post("/callbook", response_model=CallbookImportResult)
+async def import_callbook(
+    file: UploadFile,
+    delta: bool = Query(False, description="apply as changes instead of replacing the callbook"),
+    session: AsyncSession = Depends(database.get_async_session),
+    _admin: User = Depends(current_superuser),
+):
+    """Load an offline callbook dump (CSV with a header row) for network-free lookups."""
+    try:
+        return await callbook.import_callbook(session, file, delta=delta)
+    except callbook.CallbookFormatError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail=str(exc))
@@ -0,0 +1,41 @@
+"""
+Award progress endpoints (DXCC, WAS, grid fields).
+
+Both endpoints read the per-user bitsets maintained by backend/awards.py, so
+their cost does not grow with the size of the log.
+"""
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend import awards
+from backend.auth.users import current_active_user
+from backend.models import User
+from backend.schemas import AwardNeed, AwardProgress
+from backend.sessions import get_read_session
+
+router = APIRouter(prefix="/awards", tags=["awards"])
+
+
+@router.get("", response_model=list[AwardProgress])
+async def get_award_progress(
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_active_user),
+):
+    """Worked and confirmed totals per award, overall and per band/mode slot."""
+    return await awards.progress(session, user.id)
+
+
+@router.get("/needed", response_model=list[AwardNeed])
+async def get_award_needed(
+    dxcc: str | None = Query(None, description="DXCC entity name"),
+    qth: str | None = Query(None, description='QTH, e.g. "Phoenix, AZ" (for WAS)'),
+    grid: str | None = Query(None, description="Maidenhead locator"),
+    band: str | None = Query(None),
+    mode: str | None = Query(None),
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_active_user),
+):
+    """Would a contact with these details be a new one, band, mode or slot?"""
+    return await awards.needed(
+        session, user.id, dxcc=dxcc, qth=qth, grid=grid, band=band, mode=mode
+    )
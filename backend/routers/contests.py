@@ -0,0 +1,113 @@
+"""
+Contest entries, running scores and Cabrillo export.
+
+QSOs join an entry through ``contest_entry_id`` on ``POST /qso``; the score
+is maintained as they are logged (see backend/contests.py).
+"""
+import re
+import uuid
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.auth.users import current_active_user
+from backend.contests import CONTESTS, cabrillo_lines, contest_for
+from backend.database import get_async_session
+from backend.models import ContestEntry, User
+from backend.schemas import ContestEntryCreate, ContestEntryRead, ContestInfo
+from backend.sessions import get_read_session, note_write
+
+router = APIRouter(prefix="/contests", tags=["contests"])
+
+
+def _entry_read(entry: ContestEntry) -> ContestEntryRead:
+    fields = {name: getattr(entry, name) for name in ContestEntryRead.model_fields if name != "score"}
+    return ContestEntryRead(**fields, score=contest_for(entry).score(entry))
+
+
+async def owned_entry(session: AsyncSession, entry_id: uuid.UUID, user: User) -> ContestEntry:
+    entry = await session.get(ContestEntry, entry_id)
+    if entry is None or entry.user_id != user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contest entry not found")
+    return entry
+
+
+@router.get("", response_model=list[ContestInfo])
+async def list_contests():
+    """Contests HamLog can score."""
+    return [
+        ContestInfo(
+            id=c.id, name=c.name, exchange=[name for name, _ in c.exchange], serial=c.serial
+        )
+        for c in CONTESTS.values()
+    ]
+
+
+@router.post("/entries", response_model=ContestEntryRead, status_code=status.HTTP_201_CREATED)
+async def create_entry(
+    payload: ContestEntryCreate,
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user),
+):
+    contest = CONTESTS.get(payload.contest)
+    if contest is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"Unknown contest {payload.contest!r}",
+        )
+    exch_sent = " ".join(payload.exch_sent.upper().split())
+    if not re.fullmatch(contest.sent_pattern, exch_sent, re.IGNORECASE):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"Sent exchange {exch_sent!r} does not fit {contest.id}",
+        )
+    entry = ContestEntry(
+        **payload.model_dump(exclude={"exch_sent", "callsign"}),
+        callsign=payload.callsign.upper(),
+        exch_sent=exch_sent,
+        user_id=user.id,
+        created_at=datetime.utcnow(),
+        last_serial=0, qsos=0, dupes=0, points=0, mults=0,
+    )
+    session.add(entry)
+    await session.commit()
+    note_write(user.id)
+    return _entry_read(entry)
+
+
+@router.get("/entries", response_model=list[ContestEntryRead])
+async def list_entries(
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_active_user),
+):
+    q = select(ContestEntry).where(ContestEntry.user_id == user.id).order_by(ContestEntry.created_at)
+    return [_entry_read(entry) for entry in (await session.execute(q)).scalars()]
+
+
+@router.get("/entries/{entry_id}/score", response_model=ContestEntryRead)
+async def entry_score(
+    entry_id: uuid.UUID,
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_active_user),
+):
+    """Running score — one primary-key read, however long the log."""
+    return _entry_read(await owned_entry(session, entry_id, user))
+
+
+@router.get("/entries/{entry_id}/cabrillo")
+async def export_cabrillo(
+    entry_id: uuid.UUID,
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_active_user),
+):
+    """The entry's Cabrillo 3.0 submission file, streamed as QSOs are read."""
+    entry = await owned_entry(session, entry_id, user)
+    filename = f"{entry.callsign.replace('/', '_')}_{entry.contest}.log"
+    return StreamingResponse(
+        cabrillo_lines(session, entry),
+        media_type="text/plain",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
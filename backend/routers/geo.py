@@ -0,0 +1,81 @@
+"""
+Geographic queries over the operator's log.
+
+Distances are measured from the operator's own grid (``grid`` on the user
+profile) and stored on each QSO when it is written, so every query here is a
+range scan or ordered scan of the (created_by, distance_km) index, plus the
+user's archived QSOs (see backend/archive.py).
+"""
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.archive import all_qsos
+from backend.auth.users import current_active_user
+from backend.models import User
+from backend.schemas import DistanceBucket, DistanceHistogram, QSOList, QSORead
+from backend.sessions import get_read_session
+
+router = APIRouter(prefix="/geo", tags=["geo"])
+
+
+@router.get("/within", response_model=QSOList)
+async def qsos_within(
+    km: float = Query(..., gt=0, description="Maximum distance from the operator's grid"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_active_user),
+):
+    """QSOs within ``km`` of the operator, nearest first."""
+    qso = all_qsos()
+    base_q = select(qso).where(qso.created_by == user.id, qso.distance_km <= km)
+    total: int = (
+        await session.execute(select(func.count()).select_from(base_q.subquery()))
+    ).scalar_one()
+    rows = (
+        await session.execute(base_q.order_by(qso.distance_km).offset(offset).limit(limit))
+    ).scalars().all()
+    return QSOList(items=list(rows), total=total)
+
+
+@router.get("/farthest", response_model=list[QSORead])
+async def farthest_qsos(
+    limit: int = Query(10, ge=1, le=100),
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_active_user),
+):
+    """Leaderboard of the operator's longest-distance contacts."""
+    qso = all_qsos()
+    q = (
+        select(qso)
+        .where(qso.created_by == user.id, qso.distance_km.is_not(None))
+        .order_by(qso.distance_km.desc())
+        .limit(limit)
+    )
+    return (await session.execute(q)).scalars().all()
+
+
+@router.get("/histogram", response_model=DistanceHistogram)
+async def distance_histogram(
+    bucket_km: int = Query(500, ge=1, le=20_000),
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_active_user),
+):
+    """QSO counts per ``bucket_km``-wide distance band."""
+    qso = all_qsos()
+    # floor, not an integer cast: PostgreSQL rounds that, SQLite truncates
+    bucket = func.floor(qso.distance_km / bucket_km)
+    q = (
+        select(bucket, func.count())
+        .where(qso.created_by == user.id, qso.distance_km.is_not(None))
+        .group_by(bucket)
+        .order_by(bucket)
+    )
+    return DistanceHistogram(
+        bucket_km=bucket_km,
+        buckets=[
+            DistanceBucket(start_km=int(b) * bucket_km, count=n)
+            for b, n in (await session.execute(q)).all()
+        ],
+    )
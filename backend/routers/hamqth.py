@@ -3,40 +3,61 @@ HamQTH callsign lookup endpoint.
 
 Looks up callsign data (name, QTH, grid, DXCC) from the HamQTH XML API,
 caches results in PostgreSQL with a 30-day TTL, and degrades gracefully
-when HamQTH is unreachable.
+when HamQTH is unreachable. An imported offline callbook (backend/callbook.py)
+answers cache misses before HamQTH is asked. Cache hits are noted for backend/maintenance.py,
+which keeps the cache bounded.
 
 HamQTH API is session-based XML:
   Auth:   GET https://www.hamqth.com/xml.php?u=USER&p=PASS
   Lookup: GET https://www.hamqth.com/xml.php?id=SESSION&callsign=W1AW&prg=HamLog
+
+Every upstream request, login or lookup, first takes a token from a bucket
+shared by all worker processes (``HAMQTH_REQUESTS_PER_MINUTE``), so total
+HamQTH traffic stays bounded however many workers run. The session ID lives
+in the same shared store: one worker logs in while the others wait for its
+result, and an expired ID is only replaced once.
+
+httpx and ElementTree are imported on the first upstream call, keeping them
+off the startup path.
 """
 
+import asyncio
 import logging
+import os
 from datetime import datetime, timedelta, timezone
-from xml.etree import ElementTree as ET
 
-import httpx
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
 from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend import awards, maintenance
 from backend.auth.users import current_active_user
 from backend.config import settings
 from backend.database import get_async_session
-from backend.models import CallsignCache, User
-from backend.schemas import CallsignLookupResult
+from backend.models import CallbookEntry, CallsignCache, User
+from backend.schemas import CallsignLookupResult, CallsignWarmRequest, CallsignWarmResult
+from backend.sessions import get_read_session
+from backend.shared_state import SharedTokenBucket, shared_store
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/callsign", tags=["callsign"])
 
-HAMQTH_BASE = "https://www.hamqth.com/xml.php"
 HAMQTH_NS = "https://www.hamqth.com"
 CACHE_TTL = timedelta(days=30)
 HTTP_TIMEOUT = 10.0  # seconds
 
-# Module-level HamQTH session cache — refreshed on auth failure
+# This worker's copy of the shared session ID — refreshed on auth failure
 _hamqth_session_id: str | None = None
 
+# Keys in the shared store
+SESSION_KEY = "hamqth:session"
+LOGIN_LOCK_KEY = "hamqth:login"
+LOGIN_FAILED_KEY = "hamqth:login-failed"
+LOGIN_BACKOFF = 60.0  # seconds before retrying a rejected login
+LOGIN_POLL = 0.1  # seconds between checks while another worker logs in
+
 
 # ── HamQTH XML client ──────────────────────────────────────────────────────────
 
@@ -47,6 +68,31 @@ def _xml_text(element, tag: str) -> str | None:
     return child.text.strip() if child is not None and child.text else None
 
 
+def _parse_search(search_el) -> dict:
+    """Map a HamQTH ``<search>`` element to the name/qth/grid/dxcc dict."""
+    return {
+        "name": _xml_text(search_el, "nick") or _xml_text(search_el, "adr_name"),
+        "qth": _xml_text(search_el, "qth"),
+        "grid": _xml_text(search_el, "grid"),
+        "dxcc": _xml_text(search_el, "country"),
+    }
+
+
+async def _upstream_slot() -> bool:
+    """Take one request from the budget shared by every worker; False if it ran dry."""
+    bucket = SharedTokenBucket(
+        "hamqth", settings.hamqth_requests_per_minute, settings.hamqth_burst
+    )
+    try:
+        if await bucket.acquire(settings.hamqth_budget_max_wait_seconds):
+            return True
+    except Exception as exc:
+        logger.warning("HamQTH request budget unavailable: %s", exc)
+        return False
+    logger.info("HamQTH request budget exhausted, skipping upstream call")
+    return False
+
+
 async def _authenticate() -> str | None:
     """
     Obtain a fresh HamQTH session ID.
@@ -56,11 +102,15 @@ async def _authenticate() -> str | None:
 
     if not settings.hamqth_username or not settings.hamqth_password:
         return None
+    if not await _upstream_slot():
+        return None
+    import httpx
+    from xml.etree import ElementTree as ET
 
     try:
         async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
             resp = await client.get(
-                HAMQTH_BASE,
+                settings.hamqth_base_url,
                 params={"u": settings.hamqth_username, "p": settings.hamqth_password},
             )
             resp.raise_for_status()
@@ -89,6 +139,48 @@ async def _authenticate() -> str | None:
         return None
 
 
+async def _shared_session(stale: str | None = None) -> str | None:
+    """
+    The session ID every worker uses, logging in if there is none.
+
+    ``stale`` is an ID HamQTH just rejected; it is dropped from the store
+    unless another worker has already replaced it. Only the worker holding
+    the login lock talks to HamQTH; the rest poll for its result.
+    """
+    global _hamqth_session_id
+
+    if not settings.hamqth_username or not settings.hamqth_password:
+        return None
+    store = shared_store()
+    try:
+        if stale:
+            await store.delete(SESSION_KEY, stale)
+        deadline = asyncio.get_running_loop().time() + HTTP_TIMEOUT
+        while asyncio.get_running_loop().time() < deadline:
+            session_id = await store.get(SESSION_KEY)
+            if session_id:
+                _hamqth_session_id = session_id
+                return session_id
+            if await store.get(LOGIN_FAILED_KEY):
+                return None
+            if await store.add(LOGIN_LOCK_KEY, str(os.getpid()), HTTP_TIMEOUT + 5):
+                try:
+                    session_id = await _authenticate()
+                    if session_id:
+                        await store.put(
+                            SESSION_KEY, session_id, settings.hamqth_session_ttl_seconds
+                        )
+                    else:
+                        await store.put(LOGIN_FAILED_KEY, "1", LOGIN_BACKOFF)
+                    return session_id
+                finally:
+                    await store.delete(LOGIN_LOCK_KEY)
+            await asyncio.sleep(LOGIN_POLL)
+    except Exception as exc:
+        logger.warning("HamQTH shared session unavailable: %s", exc)
+    return None
+
+
 async def _lookup_hamqth(callsign: str) -> dict | None:
     """
     Look up a callsign on HamQTH.
@@ -96,17 +188,21 @@ async def _lookup_hamqth(callsign: str) -> dict | None:
     Re-authenticates once if the session has expired.
     """
     global _hamqth_session_id
+    import httpx
+    from xml.etree import ElementTree as ET
 
     if not _hamqth_session_id:
-        _hamqth_session_id = await _authenticate()
+        _hamqth_session_id = await _shared_session()
         if not _hamqth_session_id:
             return None
 
     for attempt in range(2):
+        if not await _upstream_slot():
+            return None
         try:
             async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
                 resp = await client.get(
-                    HAMQTH_BASE,
+                    settings.hamqth_base_url,
                     params={
                         "id": _hamqth_session_id,
                         "callsign": callsign,
@@ -126,7 +222,7 @@ async def _lookup_hamqth(callsign: str) -> dict | None:
                     if attempt == 0 and "Session" in err_text:
                         # Session expired — re-authenticate and retry
                         logger.info("HamQTH session expired, re-authenticating")
-                        _hamqth_session_id = await _authenticate()
+                        _hamqth_session_id = await _shared_session(stale=_hamqth_session_id)
                         if not _hamqth_session_id:
                             return None
                         continue
@@ -138,13 +234,7 @@ async def _lookup_hamqth(callsign: str) -> dict | None:
             if search_el is None:
                 return None
 
-            name = _xml_text(search_el, "nick") or _xml_text(search_el, "adr_name")
-            return {
-                "name": name,
-                "qth": _xml_text(search_el, "qth"),
-                "grid": _xml_text(search_el, "grid"),
-                "dxcc": _xml_text(search_el, "country"),
-            }
+            return _parse_search(search_el)
 
         except Exception as exc:
             logger.warning("HamQTH lookup failed for %s (attempt %d): %s", callsign, attempt + 1, exc)
@@ -156,28 +246,61 @@ async def _lookup_hamqth(callsign: str) -> dict | None:
 # ── Endpoint ───────────────────────────────────────────────────────────────────
 
 
+@router.post("/warm", response_model=CallsignWarmResult, status_code=status.HTTP_202_ACCEPTED)
+async def warm_callsigns(body: CallsignWarmRequest, user: User = Depends(current_active_user)):
+    """
+    Prefetch a spot list into the cache in the background, so the lookups
+    that follow are cache hits. ``text`` may be raw cluster output; the
+    callsigns are picked out of it. See backend/warming.py.
+    """
+    from backend import warming  # it imports this module
+
+    calls = list(dict.fromkeys(
+        [c.strip().upper() for c in body.calls if c.strip()] + warming.spotted_calls(body.text or "")
+    ))[: settings.warming_max_calls]
+    queued = warming.worker.enqueue(warming.WarmJob(user.id, tuple(calls), from_log=False))
+    return CallsignWarmResult(calls=calls, queued=queued)
+
+
 @router.get("/{callsign}", response_model=CallsignLookupResult)
 async def lookup_callsign(
     callsign: str,
+    band: str | None = Query(None, description="Annotate award needs for this band"),
+    mode: str | None = Query(None, description="Annotate award needs for this mode"),
     session: AsyncSession = Depends(get_async_session),
-    _user: User = Depends(current_active_user),
+    read_session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_active_user),
 ):
     """
     Look up a callsign and return name, QTH, grid, and DXCC entity.
 
     Results are cached in the database for 30 days to minimise HamQTH API
     calls. If HamQTH is unreachable, returns an empty result so the operator
-    can still proceed with manual entry.
+    can still proceed with manual entry. ``needed`` says whether the station
+    would be new for any award; ``band`` and ``mode`` add the new-band and
+    new-mode checks.
     """
-    callsign = callsign.upper().strip()
+    result = await _resolve(callsign.upper().strip(), session, read_session)
+    if result.dxcc or result.qth or result.grid:
+        result.needed = await awards.needed(
+            read_session, user.id,
+            dxcc=result.dxcc, qth=result.qth, grid=result.grid, band=band, mode=mode,
+        )
+    return result
 
+
+async def _resolve(
+    callsign: str, session: AsyncSession, read_session: AsyncSession
+) -> CallsignLookupResult:
+    """Cache, then the offline callbook, then HamQTH, then an empty result."""
     now = datetime.now(timezone.utc).replace(tzinfo=None)  # store naive UTC
 
-    # ── Cache hit? ───────────────────────────────────────────────────────────
-    cached: CallsignCache | None = await session.get(CallsignCache, callsign)
+    # ── Cache hit? (replica when configured) ─────────────────────────────────
+    cached: CallsignCache | None = await read_session.get(CallsignCache, callsign)
     if cached is not None:
         age = now - cached.cached_at
         if age < CACHE_TTL:
+            maintenance.touch(callsign)
             return CallsignLookupResult(
                 callsign=cached.callsign,
                 name=cached.name,
@@ -187,28 +310,39 @@ async def lookup_callsign(
                 source="cache",
             )
 
+    # ── Offline callbook (see backend/callbook.py) ───────────────────────────
+    entry: CallbookEntry | None = await read_session.get(CallbookEntry, callsign)
+    if entry is not None:
+        return CallsignLookupResult(
+            callsign=entry.callsign,
+            name=entry.name,
+            qth=entry.qth,
+            grid=entry.grid,
+            dxcc=entry.dxcc,
+            source="callbook",
+        )
+
     # ── Live HamQTH lookup ───────────────────────────────────────────────────
     data = await _lookup_hamqth(callsign)
 
     if data is not None:
-        if cached is not None:
-            # Update existing cache row
-            cached.name = data["name"]
-            cached.qth = data["qth"]
-            cached.grid = data["grid"]
-            cached.dxcc = data["dxcc"]
-            cached.cached_at = now
-        else:
-            cached = CallsignCache(
+        # Cache writes always go to the primary
+        await session.merge(
+            CallsignCache(
                 callsign=callsign,
                 name=data["name"],
                 qth=data["qth"],
                 grid=data["grid"],
                 dxcc=data["dxcc"],
                 cached_at=now,
+                accessed_at=now,
             )
-            session.add(cached)
-        await session.commit()
+        )
+        try:
+            await session.commit()
+        except IntegrityError:
+            # A concurrent lookup cached the same callsign first — theirs is as good
+            await session.rollback()
 
         return CallsignLookupResult(
             callsign=callsign,
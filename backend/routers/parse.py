@@ -4,12 +4,15 @@ Natural language QSO parsing endpoint.
 Accepts free-text contact descriptions and calls Claude Haiku to extract
 structured QSO fields. Returns a ParseResponse with parsed fields and a
 confidence score.
+
+The Anthropic SDK is imported on the first parse request, not at startup — it
+is the heaviest import in the app.
 """
 import json
 import logging
 from datetime import date, time
+from typing import TYPE_CHECKING
 
-from anthropic import AsyncAnthropic, APIError
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 
 from backend.auth.users import current_active_user
@@ -17,6 +20,9 @@ from backend.config import settings
 from backend.models import User
 from backend.schemas import ParsedQSO, ParseRequest, ParseResponse
 
+if TYPE_CHECKING:
+    from anthropic import AsyncAnthropic
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/parse", tags=["parse"])
@@ -92,10 +98,10 @@ Output: {"call":"G4XYZ","band":"80m","freq":3.580,"mode":"PSK31","rst_sent":"599
 
 # ── Anthropic client (lazy singleton) ─────────────────────────────────────────
 
-_client: AsyncAnthropic | None = None
+_client: "AsyncAnthropic | None" = None
 
 
-def _get_client() -> AsyncAnthropic:
+def _get_client() -> "AsyncAnthropic":
     global _client
     if _client is None:
         if not settings.anthropic_api_key:
@@ -103,7 +109,12 @@ def _get_client() -> AsyncAnthropic:
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="AI parsing unavailable: ANTHROPIC_API_KEY not configured",
             )
-        _client = AsyncAnthropic(api_key=settings.anthropic_api_key)
+        from anthropic import AsyncAnthropic
+
+        _client = AsyncAnthropic(
+            api_key=settings.anthropic_api_key,
+            base_url=settings.anthropic_base_url or None,
+        )
     return _client
 
 
@@ -136,6 +147,17 @@ def _safe_float(v) -> float | None:
         return None
 
 
+def _strip_code_fence(text: str) -> str:
+    """Remove an accidental markdown code fence (```json … ```) around the JSON."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("```")[1]
+        if text.startswith("json"):
+            text = text[4:]
+        text = text.strip()
+    return text
+
+
 def _build_parsed_qso(raw: dict) -> tuple[ParsedQSO, float]:
     """Convert the raw dict from Claude into a ParsedQSO + confidence."""
     confidence = float(raw.get("confidence", 0.5))
@@ -182,6 +204,7 @@ async def parse_qso_text(
     operator can review and correct before saving.
     """
     client = _get_client()
+    from anthropic import APIError
 
     try:
         message = await client.messages.create(
@@ -197,14 +220,7 @@ async def parse_qso_text(
             detail=f"AI parsing service error: {exc.status_code}",
         ) from exc
 
-    raw_content = message.content[0].text.strip()
-
-    # Strip any accidental markdown code fences
-    if raw_content.startswith("```"):
-        raw_content = raw_content.split("```")[1]
-        if raw_content.startswith("json"):
-            raw_content = raw_content[4:]
-        raw_content = raw_content.strip()
+    raw_content = _strip_code_fence(message.content[0].text)
 
     try:
         raw_dict = json.loads(raw_content)
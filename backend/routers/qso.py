@@ -1,15 +1,23 @@
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, status
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend import adif, enrichment, export, geo, qsl, reconcile
 from backend.auth.users import current_active_user
+from backend.config import settings
+from backend.contests import check_qso, contest_for, next_serial
 from backend.database import get_async_session
-from backend.models import QSO, User
-from backend.schemas import QSOCreate, QSOList, QSORead
+from backend.models import QSO, QSOArchive, User
+from backend.routers.contests import owned_entry
+from backend.qso_events import qsos_added, qsos_removed
+from backend.query import by_time, filter_qsos
+from backend.schemas import QSLImportResult, QSOCreate, QSOFilter, QSOList, QSORead
+from backend.sessions import get_read_session, note_write
 
 router = APIRouter(prefix="/qso", tags=["qso"])
 
@@ -21,33 +29,39 @@ async def create_qso(
     user: User = Depends(current_active_user),
 ):
     qso = QSO(**payload.model_dump(), created_by=user.id)
+    if qso.contest_entry_id:
+        entry = await owned_entry(session, qso.contest_entry_id, user)
+        try:
+            check_qso(entry, qso)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail=str(exc))
+        if contest_for(entry).serial and qso.stx is None:
+            qso.stx = await next_serial(session, entry.id)
+    geo.locate_qsos([qso], user.grid)
     session.add(qso)
+    await qsos_added(session, [qso])
     await session.commit()
+    note_write(user.id)
+    if enrichment.needs_enrichment(qso):
+        enrichment.worker.enqueue([qso.id])
     await session.refresh(qso)
     return qso
 
 
 @router.get("", response_model=QSOList)
 async def list_qsos(
-    call: str | None = Query(None, description="Filter by callsign (partial match)"),
+    filters: QSOFilter = Depends(),
     offset: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_read_session),
     user: User = Depends(current_active_user),
 ):
-    base_q = select(QSO).where(QSO.created_by == user.id)
-
-    if call:
-        base_q = base_q.where(QSO.call.ilike(f"%{call}%"))
+    base_q = await filter_qsos(session, user.id, filters)
 
     count_q = select(func.count()).select_from(base_q.subquery())
     total: int = (await session.execute(count_q)).scalar_one()
 
-    items_q = (
-        base_q.order_by(QSO.qso_date.desc().nulls_last(), QSO.time_on.desc().nulls_last())
-        .offset(offset)
-        .limit(limit)
-    )
+    items_q = by_time(base_q, descending=True).offset(offset).limit(limit)
     rows = (await session.execute(items_q)).scalars().all()
 
     return QSOList(items=list(rows), total=total)
@@ -55,53 +69,17 @@ async def list_qsos(
 
 @router.get("/export/adif")
 async def export_adif(
-    session: AsyncSession = Depends(get_async_session),
+    filters: QSOFilter = Depends(),
+    session: AsyncSession = Depends(get_read_session),
     user: User = Depends(current_active_user),
 ):
-    """Export all QSOs as an ADIF 3.1.4 compliant .adi file."""
-    q = (
-        select(QSO)
-        .where(QSO.created_by == user.id)
-        .order_by(QSO.qso_date.asc().nulls_last(), QSO.time_on.asc().nulls_last())
-    )
+    """Export the QSOs matching ``filters`` (default: all) as an ADIF 3.1.4 .adi file."""
+    q = by_time(await filter_qsos(session, user.id, filters))
     rows = (await session.execute(q)).scalars().all()
 
-    def field(name: str, value) -> str:
-        if value is None:
-            return ""
-        s = str(value).strip()
-        if not s:
-            return ""
-        return f"<{name}:{len(s)}>{s} "
-
-    now_str = datetime.utcnow().strftime("%Y%m%d %H%M%SZ")
-    lines: list[str] = [
-        f"HamLog ADIF Export — {now_str}",
-        f"<ADIF_VER:5>3.1.4 <PROGRAMID:6>HamLog <EOH>",
-        "",
-    ]
-
-    for qso in rows:
-        rec = field("CALL", qso.call)
-        if qso.qso_date:
-            rec += field("QSO_DATE", qso.qso_date.strftime("%Y%m%d"))
-        if qso.time_on:
-            rec += field("TIME_ON", qso.time_on.strftime("%H%M%S"))
-        rec += field("BAND", qso.band)
-        if qso.freq is not None:
-            rec += field("FREQ", f"{float(qso.freq):.4f}")
-        rec += field("MODE", qso.mode)
-        rec += field("RST_SENT", qso.rst_sent)
-        rec += field("RST_RCVD", qso.rst_rcvd)
-        rec += field("NAME", qso.name)
-        rec += field("QTH", qso.qth)
-        rec += field("GRIDSQUARE", qso.grid)
-        rec += field("DXCC", qso.dxcc)
-        rec += field("COMMENT", qso.notes)
-        rec += "<EOR>"
-        lines.append(rec)
-
-    content = "\n".join(lines) + "\n"
+    content = adif.header(datetime.utcnow()) + "".join(
+        adif.qso_record(qso) + "\n" for qso in rows
+    )
     filename = f"hamlog_{datetime.utcnow().strftime('%Y%m%d')}.adi"
     return Response(
         content=content,
@@ -110,14 +88,87 @@ async def export_adif(
     )
 
 
+@router.get("/export/{fmt}")
+async def export_bulk(
+    fmt: Literal["ndjson", "csv", "parquet", "arrow"],
+    filters: QSOFilter = Depends(),
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_active_user),
+):
+    """Stream the QSOs matching ``filters`` with typed columns (see backend/export.py)."""
+    try:
+        encoder = export.FORMATS[fmt]()
+    except export.ExportUnavailable as exc:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(exc))
+    q = by_time(await filter_qsos(session, user.id, filters))
+    filename = f"hamlog_{datetime.utcnow().strftime('%Y%m%d')}.{encoder.extension}"
+    return StreamingResponse(
+        export.export_chunks(session, q, encoder),
+        media_type=encoder.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/reconcile")
+async def reconcile_log(
+    file: UploadFile,
+    tolerance_seconds: Optional[int] = Query(None, ge=0, le=3600),
+    apply: bool = Query(False, description="insert the new records"),
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user),
+):
+    """Diff an uploaded ADIF log against the stored one, streamed as NDJSON (see backend/reconcile.py)."""
+    if tolerance_seconds is None:
+        tolerance_seconds = settings.reconcile_tolerance_seconds
+    spool = await reconcile.spool_upload(file)
+    if spool.count == 0:
+        spool.close()
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail="No ADIF records in upload")
+    if apply:
+        note_write(user.id)
+    return StreamingResponse(
+        reconcile.reconcile_lines(session, user, spool, timedelta(seconds=tolerance_seconds), apply),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.post("/qsl", response_model=QSLImportResult)
+async def import_confirmations(
+    file: UploadFile,
+    window_minutes: Optional[int] = Query(None, ge=0, le=1440),
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user),
+):
+    """Mark QSOs confirmed from a LoTW or eQSL ADIF report (see backend/qsl.py)."""
+    if window_minutes is None:
+        window_minutes = settings.qsl_match_window_minutes
+    index = await qsl.read_report(file)
+    if index.count == 0 and index.invalid == 0:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail="No ADIF records in upload")
+    result = await qsl.apply_confirmations(session, user.id, index, timedelta(minutes=window_minutes))
+    note_write(user.id)
+    return result
+
+
+async def _owned_qso(
+    session: AsyncSession, qso_id: uuid.UUID, user_id: uuid.UUID
+) -> QSO | QSOArchive | None:
+    # Filtering on the owner too lets a partitioned qso table prune to one partition
+    for model in (QSO, QSOArchive):
+        q = select(model).where(model.id == qso_id, model.created_by == user_id)
+        if found := (await session.execute(q)).scalar_one_or_none():
+            return found
+    return None
+
+
 @router.get("/{qso_id}", response_model=QSORead)
 async def get_qso(
     qso_id: uuid.UUID,
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_read_session),
     user: User = Depends(current_active_user),
 ):
-    qso = await session.get(QSO, qso_id)
-    if not qso or qso.created_by != user.id:
+    qso = await _owned_qso(session, qso_id, user.id)
+    if not qso:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="QSO not found")
     return qso
 
@@ -128,8 +179,10 @@ async def delete_qso(
     session: AsyncSession = Depends(get_async_session),
     user: User = Depends(current_active_user),
 ):
-    qso = await session.get(QSO, qso_id)
-    if not qso or qso.created_by != user.id:
+    qso = await _owned_qso(session, qso_id, user.id)
+    if not qso:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="QSO not found")
     await session.delete(qso)
+    await qsos_removed(session, [qso])
     await session.commit()
+    note_write(user.id)
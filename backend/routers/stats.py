@@ -0,0 +1,54 @@
+"""
+Per-user logbook statistics.
+
+Served from the ``qso_stat`` aggregate table (see backend/stats.py), so the
+cost is independent of log size.
+"""
+from datetime import date
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.auth.users import current_active_user
+from backend.models import QSOStat, User
+from backend.schemas import QSOStats
+from backend.sessions import get_read_session
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@router.get("", response_model=QSOStats)
+async def get_stats(
+    day_from: date | None = Query(None, description="First UTC day in by_day (inclusive)"),
+    day_to: date | None = Query(None, description="Last UTC day in by_day (inclusive)"),
+    session: AsyncSession = Depends(get_read_session),
+    user: User = Depends(current_active_user),
+):
+    """QSO counts by band, mode, DXCC entity and day for the current user."""
+    q = select(QSOStat.dimension, QSOStat.key, QSOStat.count).where(
+        QSOStat.user_id == user.id
+    )
+    day_filters = []
+    if day_from:
+        day_filters.append(QSOStat.key >= day_from.isoformat())
+    if day_to:
+        day_filters.append(QSOStat.key <= day_to.isoformat())
+    if day_filters:
+        q = q.where(or_(QSOStat.dimension != "day", and_(*day_filters)))
+
+    total = 0
+    breakdowns: dict[str, dict[str, int]] = {"band": {}, "mode": {}, "dxcc": {}, "day": {}}
+    for dimension, key, count in (await session.execute(q)).all():
+        if dimension == "total":
+            total = count
+        elif key:
+            breakdowns[dimension][key] = count
+
+    return QSOStats(
+        total=total,
+        by_band=breakdowns["band"],
+        by_mode=breakdowns["mode"],
+        by_dxcc=breakdowns["dxcc"],
+        by_day=dict(sorted(breakdowns["day"].items())),
+    )
@@ -1,23 +1,38 @@
 import uuid
-from datetime import date, time
+from datetime import date, datetime, time
 from typing import Optional
 
 from fastapi_users import schemas
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 
 # ── FastAPI-Users schemas ────────────────────────────────────────────────────
 
+GRID_PATTERN = r"^[A-Ra-r]{2}([0-9]{2}([A-Xa-x]{2}([0-9]{2})?)?)?$"
+
+
+def canonical_grid(grid: Optional[str]) -> Optional[str]:
+    """Maidenhead locator in conventional case: field upper, subsquare lower (FN31pr)."""
+    if not grid:
+        return grid
+    grid = grid.strip()
+    return grid[:4].upper() + grid[4:].lower()
+
+
 class UserRead(schemas.BaseUser[uuid.UUID]):
-    pass
+    grid: Optional[str] = None
 
 
 class UserCreate(schemas.BaseUserCreate):
-    pass
+    grid: Optional[str] = Field(None, pattern=GRID_PATTERN)
+
+    _canonical_grid = field_validator("grid")(canonical_grid)
 
 
 class UserUpdate(schemas.BaseUserUpdate):
-    pass
+    grid: Optional[str] = Field(None, pattern=GRID_PATTERN)
+
+    _canonical_grid = field_validator("grid")(canonical_grid)
 
 
 # ── QSO schemas ──────────────────────────────────────────────────────────────
@@ -46,11 +61,22 @@ class QSOCreate(BaseModel):
     grid: Optional[str] = Field(None, max_length=8)
     dxcc: Optional[str] = Field(None, max_length=50)
     notes: Optional[str] = None
+    contest_entry_id: Optional[uuid.UUID] = None
+    stx: Optional[int] = Field(None, ge=1, description="Serial sent; assigned when omitted")
+    exch_rcvd: Optional[str] = Field(None, max_length=40, description="Received exchange after the RST")
+
+    _canonical_grid = field_validator("grid")(canonical_grid)
 
 
 class QSORead(QSOCreate):
     id: uuid.UUID
     created_by: uuid.UUID
+    qsl_confirmed: bool = False
+    qsl_date: Optional[date] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    distance_km: Optional[float] = None
+    bearing_deg: Optional[float] = None
 
     model_config = {"from_attributes": True}
 
@@ -60,6 +86,144 @@ class QSOList(BaseModel):
     total: int
 
 
+class QSOFilter(BaseModel):
+    """Query-string filters shared by the QSO list and export endpoints."""
+
+    call: Optional[str] = Field(None, description="Callsign (partial match)")
+    band: Optional[str] = None
+    mode: Optional[str] = None
+    date_from: Optional[date] = Field(None, description="First UTC day (inclusive)")
+    date_to: Optional[date] = Field(None, description="Last UTC day (inclusive)")
+    time_from: Optional[time] = Field(None, description="Start time on date_from")
+    time_to: Optional[time] = Field(None, description="End time on date_to")
+    freq_min: Optional[float] = Field(None, ge=0, description="MHz")
+    freq_max: Optional[float] = Field(None, ge=0, description="MHz")
+    dxcc: Optional[str] = None
+    grid: Optional[str] = Field(
+        None,
+        pattern=r"^[A-Ra-r]{1,2}([0-9]{1,2}([A-Xa-x]{1,2})?)?$",
+        description="Grid prefix, e.g. FN or FN31",
+    )
+    confirmed: Optional[bool] = None
+
+    _canonical_grid = field_validator("grid")(canonical_grid)
+
+
+class QSLUnmatched(BaseModel):
+    call: str
+    band: Optional[str] = None
+    mode: Optional[str] = None  # award mode class where the mode has one
+    qso_time: datetime
+
+
+class QSLImportResult(BaseModel):
+    """Outcome of matching a LoTW/eQSL confirmation report against the log."""
+
+    confirmations: int
+    invalid: int  # records without call/date/time, or not received
+    newly_confirmed: int
+    already_confirmed: int
+    unmatched: int
+    unmatched_sample: list[QSLUnmatched]  # the first 100
+
+
+# ── Statistics schemas ───────────────────────────────────────────────────────
+
+class QSOStats(BaseModel):
+    """QSO counts per band, mode, DXCC entity and UTC day.
+
+    QSOs with no value for a dimension are left out of that breakdown, so a
+    breakdown can sum to less than ``total``.
+    """
+
+    total: int
+    by_band: dict[str, int]
+    by_mode: dict[str, int]
+    by_dxcc: dict[str, int]
+    by_day: dict[str, int]
+
+
+# ── Geographic schemas ───────────────────────────────────────────────────────
+
+class DistanceBucket(BaseModel):
+    start_km: int
+    count: int
+
+
+class DistanceHistogram(BaseModel):
+    bucket_km: int
+    buckets: list[DistanceBucket]  # non-empty buckets only, nearest first
+
+
+# ── Award schemas ────────────────────────────────────────────────────────────
+
+class AwardSlotProgress(BaseModel):
+    band: Optional[str] = None  # None = any band
+    mode: Optional[str] = None  # mode class: CW, PHONE, DIGITAL; None = any
+    worked: int
+    confirmed: int
+
+
+class AwardProgress(BaseModel):
+    award: str  # "dxcc", "was" or "grid"
+    worked: int
+    confirmed: int
+    slots: list[AwardSlotProgress]
+
+
+class AwardNeed(BaseModel):
+    """Whether a prospective contact would be new for an award.
+
+    ``new_band`` / ``new_mode`` / ``new_slot`` are None when the band or mode
+    was not given.
+    """
+
+    award: str
+    key: str  # entity name, state or 4-char grid field
+    new_one: bool
+    new_band: Optional[bool] = None
+    new_mode: Optional[bool] = None
+    new_slot: Optional[bool] = None
+    confirmed: bool
+
+
+# ── Contest schemas ──────────────────────────────────────────────────────────
+
+class ContestInfo(BaseModel):
+    id: str  # Cabrillo CONTEST value, e.g. "CQ-WW-CW"
+    name: str
+    exchange: list[str]  # received fields after the RST
+    serial: bool  # whether a serial number is sent
+
+
+class ContestEntryCreate(BaseModel):
+    contest: str
+    callsign: str = Field(..., min_length=3, max_length=20, pattern=r"^[A-Za-z0-9/]+$")
+    exch_sent: str = Field(..., max_length=40, description="Exchange sent after the RST/serial")
+    my_dxcc: Optional[str] = Field(None, max_length=50)
+    category_operator: str = Field("SINGLE-OP", pattern=r"^(SINGLE-OP|MULTI-OP|CHECKLOG)$")
+    category_band: str = Field("ALL", max_length=8)
+    category_power: str = Field("HIGH", pattern=r"^(HIGH|LOW|QRP)$")
+
+
+class ContestEntryRead(BaseModel):
+    id: uuid.UUID
+    contest: str
+    callsign: str
+    exch_sent: str
+    my_dxcc: Optional[str] = None
+    category_operator: str
+    category_band: str
+    category_power: str
+    qsos: int
+    dupes: int
+    points: int
+    mults: int
+    score: int
+
+    model_config = {"from_attributes": True}
+
+
 # ── NL parse schemas ─────────────────────────────────────────────────────────
 
 class ParseRequest(BaseModel):
@@ -98,4 +262,27 @@ class CallsignLookupResult(BaseModel):
     qth: Optional[str] = None
     grid: Optional[str] = None
     dxcc: Optional[str] = None
-    source: str  # "cache", "hamqth", or "none"
+    source: str  # "cache", "callbook", "hamqth", or "none"
+    needed: list[AwardNeed] = []  # filled in when band/mode are passed to the lookup
+
+
+class CallsignWarmRequest(BaseModel):
+    """Calls to prefetch into the cache: a list, pasted spot text, or both."""
+
+    calls: list[str] = Field(default_factory=list, max_length=500)
+    text: Optional[str] = Field(None, max_length=200_000)
+
+
+class CallsignWarmResult(BaseModel):
+    calls: list[str]  # as recognised, in the order they will be fetched
+    queued: bool  # False when warming is off or its queue is full
+
+
+class CallbookImportResult(BaseModel):
+    """Outcome of loading an offline callbook dump (backend/callbook.py)."""
+
+    records: int  # stations written
+    deleted: int  # removed by delta lines
+    removed: int  # absent from a full import
+    skipped: int  # lines without a usable callsign
+    seconds: float
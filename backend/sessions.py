@@ -0,0 +1,53 @@
+"""
+Read/write session routing.
+
+Write handlers keep using ``get_async_session`` (the primary). Read-only
+handlers depend on ``get_read_session``, which hands out a replica session when
+``DATABASE_REPLICA_URL`` is set — unless the caller wrote recently, in which
+case they stay on the primary so they always see their own writes.
+
+Write handlers call ``note_write(user.id)`` after committing. The stickiness
+map is per worker process; with several workers, route each user to a
+consistent worker at the proxy or raise ``REPLICA_STICKINESS_SECONDS`` above
+the replica's worst-case lag.
+"""
+import time
+import uuid
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import backend.database as database
+from backend.auth.users import current_active_user
+from backend.config import settings
+from backend.database import get_async_session
+from backend.models import User
+
+# user id → monotonic time until which reads stay on the primary
+_sticky_until: dict[uuid.UUID, float] = {}
+
+
+def note_write(user_id: uuid.UUID) -> None:
+    """Pin ``user_id``'s reads to the primary for the stickiness window."""
+    now = time.monotonic()
+    _sticky_until[user_id] = now + settings.replica_stickiness_seconds
+    if len(_sticky_until) > 10_000:
+        # Drop expired entries so the map tracks only active writers
+        for uid in [u for u, until in _sticky_until.items() if until <= now]:
+            del _sticky_until[uid]
+
+
+def reads_pinned_to_primary(user_id: uuid.UUID) -> bool:
+    return _sticky_until.get(user_id, 0.0) > time.monotonic()
+
+
+async def get_read_session(
+    primary: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user),
+):
+    """Session for read-only handlers: the replica when safe, else the primary."""
+    if database.replica_session_maker is None or reads_pinned_to_primary(user.id):
+        yield primary
+        return
+    async with database.replica_session_maker() as session:
+        yield session
@@ -0,0 +1,174 @@
+"""
+State shared by all worker processes on one host.
+
+A small SQLite file (``SHARED_STATE_PATH``) holds expiring key/value pairs
+(the HamQTH session ID, a login lock) and token buckets. Every operation is
+one short ``BEGIN IMMEDIATE`` transaction, so read-modify-write is atomic
+across uvicorn/gunicorn workers without a separate server. Calls run in a
+thread so a briefly locked file never stalls the event loop.
+
+Workers on different hosts need a store they can all reach; point each host
+at its own file and divide the upstream budget between hosts.
+"""
+import asyncio
+import sqlite3
+import threading
+import time
+
+from backend.config import settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shared_value (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS token_bucket (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+
+class SharedStore:
+    """Expiring values and token buckets in a SQLite file shared between processes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(
+                self.path, timeout=5.0, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _transaction(self, fn):
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(db, time.time())
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+            return result
+
+    async def _run(self, fn):
+        return await asyncio.to_thread(self._transaction, fn)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ── Values ────────────────────────────────────────────────────────────────
+
+    async def get(self, key: str) -> str | None:
+        def op(db, now):
+            row = db.execute(
+                "SELECT value FROM shared_value WHERE key = ? AND expires > ?", (key, now)
+            ).fetchone()
+            return row[0] if row else None
+
+        return await self._run(op)
+
+    async def put(self, key: str, value: str, ttl: float) -> None:
+        def op(db, now):
+            db.execute(
+                "INSERT INTO shared_value (key, value, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires",
+                (key, value, now + ttl),
+            )
+
+        await self._run(op)
+
+    async def add(self, key: str, value: str, ttl: float) -> bool:
+        """Set ``key`` only if it is absent or expired; True if this call set it."""
+        def op(db, now):
+            db.execute("DELETE FROM shared_value WHERE key = ? AND expires <= ?", (key, now))
+            cur = db.execute(
+                "INSERT OR IGNORE INTO shared_value (key, value, expires) VALUES (?, ?, ?)",
+                (key, value, now + ttl),
+            )
+            return cur.rowcount == 1
+
+        return await self._run(op)
+
+    async def delete(self, key: str, value: str | None = None) -> None:
+        """Delete ``key`` — only while it still holds ``value``, if given."""
+        def op(db, now):
+            if value is None:
+                db.execute("DELETE FROM shared_value WHERE key = ?", (key,))
+            else:
+                db.execute("DELETE FROM shared_value WHERE key = ? AND value = ?", (key, value))
+
+        await self._run(op)
+
+    # ── Token buckets ─────────────────────────────────────────────────────────
+
+    async def take(self, name: str, rate: float, capacity: float) -> float:
+        """
+        Take one token from bucket ``name`` (``rate`` tokens/s, at most ``capacity``).
+
+        Returns 0.0 if a token was taken, otherwise the seconds until one will
+        be available (nothing is consumed).
+        """
+        def op(db, now):
+            row = db.execute(
+                "SELECT tokens, updated FROM token_bucket WHERE name = ?", (name,)
+            ).fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+            wait = 0.0
+            if tokens >= 1.0:
+                tokens -= 1.0
+            else:
+                wait = (1.0 - tokens) / rate
+            db.execute(
+                "INSERT INTO token_bucket (name, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (name, tokens, now),
+            )
+            return wait
+
+        return await self._run(op)
+
+
+class SharedTokenBucket:
+    """A token bucket every worker process on the host draws from."""
+
+    def __init__(self, name: str, per_minute: float, burst: float):
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, burst)
+
+    async def acquire(self, max_wait: float) -> bool:
+        """Take a token, waiting up to ``max_wait`` seconds; False if none came."""
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = await shared_store().take(self.name, self.rate, self.capacity)
+            if wait == 0.0:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+
+_stores: dict[str, SharedStore] = {}
+
+
+def shared_store() -> SharedStore:
+    """The store at ``settings.shared_state_path`` (one connection per process)."""
+    path = settings.shared_state_path
+    if path not in _stores:
+        _stores[path] = SharedStore(path)
+    return _stores[path]
@@ -0,0 +1,100 @@
+"""
+Incrementally maintained QSO statistics.
+
+Every QSO write adjusts per-user counters in ``qso_stat`` inside the same
+transaction, so the stats endpoint reads a handful of small rows instead of
+scanning the log. ``rebuild_stats`` recomputes the counters from scratch with
+one ``INSERT … SELECT … GROUP BY`` per dimension.
+"""
+import uuid
+from collections import Counter
+from typing import Iterable
+
+from sqlalchemy import String, cast, delete, func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.archive import all_qsos
+from backend.database import dialect_insert
+from backend.models import QSOStat
+
+STAT_DIMENSIONS = ("total", "band", "mode", "dxcc", "day")
+
+
+def stat_keys(qso) -> list[tuple[str, str]]:
+    """(dimension, key) pairs a single QSO counts towards."""
+    keys = [
+        ("total", ""),
+        ("band", qso.band or ""),
+        ("mode", qso.mode or ""),
+        ("dxcc", qso.dxcc or ""),
+    ]
+    if qso.qso_date:
+        keys.append(("day", qso.qso_date.isoformat()))
+    return keys
+
+
+async def apply_qso_stats(session: AsyncSession, qsos: Iterable, sign: int = 1) -> None:
+    """
+    Add (``sign=1``) or remove (``sign=-1``) ``qsos`` from their owners' counters.
+
+    Issues one batched upsert regardless of how many QSOs are passed. Does not
+    commit — call it before the commit that persists the QSO change.
+    """
+    deltas: Counter[tuple[uuid.UUID, str, str]] = Counter()
+    for qso in qsos:
+        for dimension, key in stat_keys(qso):
+            deltas[(qso.created_by, dimension, key)] += sign
+    rows = [
+        {"user_id": user_id, "dimension": dimension, "key": key, "count": delta}
+        for (user_id, dimension, key), delta in deltas.items()
+        if delta
+    ]
+    if not rows:
+        return
+
+    stmt = dialect_insert(session, QSOStat)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[QSOStat.user_id, QSOStat.dimension, QSOStat.key],
+        set_={"count": QSOStat.count + stmt.excluded.count},
+    )
+    await session.execute(stmt, rows)
+
+    if sign < 0:
+        users = {row["user_id"] for row in rows}
+        await session.execute(
+            delete(QSOStat).where(QSOStat.user_id.in_(users), QSOStat.count <= 0)
+        )
+
+
+def _dimension_exprs(qso):
+    return {
+        "total": literal(""),
+        "band": func.coalesce(qso.band, ""),
+        "mode": func.coalesce(qso.mode, ""),
+        "dxcc": func.coalesce(qso.dxcc, ""),
+        "day": cast(qso.qso_date, String),
+    }
+
+
+async def rebuild_stats(session: AsyncSession, user_id: uuid.UUID | None = None) -> None:
+    """Recompute counters from the log (both archive tiers) for one user, or everyone."""
+    clear = delete(QSOStat)
+    if user_id is not None:
+        clear = clear.where(QSOStat.user_id == user_id)
+    await session.execute(clear)
+
+    qso = all_qsos()
+    for dimension, key_expr in _dimension_exprs(qso).items():
+        q = select(qso.created_by, literal(dimension), key_expr, func.count())
+        # Constant keys can't appear in GROUP BY on PostgreSQL
+        q = q.group_by(qso.created_by) if dimension == "total" else q.group_by(qso.created_by, key_expr)
+        if dimension == "day":
+            q = q.where(qso.qso_date.is_not(None))
+        if user_id is not None:
+            q = q.where(qso.created_by == user_id)
+        await session.execute(
+            insert(QSOStat).from_select(
+                [QSOStat.user_id, QSOStat.dimension, QSOStat.key, QSOStat.count], q
+            )
+        )
+    await session.commit()
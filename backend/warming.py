@@ -0,0 +1,199 @@
+"""
+Predictive warming of the callsign cache.
+
+The first lookup of a callsign costs a HamQTH round trip, yet the calls an
+operator is about to look up are mostly predictable. For each job the worker
+prefetches these into ``CallsignCache``, highest priority first, up to
+``WARMING_MAX_CALLS``:
+
+  1. calls from a pasted spot list or explicit list (``POST /callsign/warm``),
+  2. calls from the operator's ``WARMING_RECENT_QSOS`` most recent QSOs,
+  3. the ``WARMING_FREQUENT_CALLS`` calls they have worked most often.
+
+Jobs for steps 2 and 3 are queued after login (at most once per
+``WARMING_INTERVAL_SECONDS`` per operator, via a shared-store lease) and
+after an upload adds QSOs. Candidates already cached for more than
+``WARMING_REFRESH_DAYS`` before expiry are skipped, and so are those in the
+offline callbook; older entries are refreshed. Lookups run at most
+``WARMING_CONCURRENCY`` at a time and wait on their own budget of
+``WARMING_LOOKUPS_PER_MINUTE``. HamQTH's shared request budget still applies,
+so warming never crowds out interactive lookups for long. Jobs run one at a
+time, and spot lists go ahead of queued login and upload jobs.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import re
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import backend.database as database
+from backend.config import settings
+from backend.enrichment import RateBudget, cache_lookups
+from backend.models import QSO, CallbookEntry, CallsignCache
+from backend.routers.hamqth import CACHE_TTL, _lookup_hamqth
+from backend.schemas import GRID_PATTERN
+from backend.shared_state import shared_store
+
+logger = logging.getLogger(__name__)
+
+# Prefix/CALL/suffix with a letter before the digit, so times like 1200Z don't match
+CALLSIGN_RE = re.compile(r"\b(?:[A-Z0-9]{1,4}/)?[A-Z0-9]?[A-Z][0-9]{1,2}[A-Z]{1,4}(?:/[A-Z0-9]{1,4})?\b")
+_GRID = re.compile(GRID_PATTERN)
+_LEASE_PREFIX = "warm:"
+
+
+def spotted_calls(text: str) -> list[str]:
+    """Callsigns in a pasted spot list or cluster output, in order of appearance."""
+    calls = (m.group() for m in CALLSIGN_RE.finditer(text.upper()))
+    # Maidenhead locators (FN31PR) have the same shape
+    return list(dict.fromkeys(c for c in calls if not _GRID.match(c)))
+
+
+@dataclass
+class WarmResult:
+    candidates: int = 0  # distinct calls considered
+    fresh: int = 0  # already cached or in the callbook
+    looked_up: int = 0  # asked of HamQTH
+    fetched: int = 0  # found there and cached now
+
+
+async def candidate_calls(session: AsyncSession, user_id: uuid.UUID) -> list[str]:
+    """Calls from the operator's recent QSOs, then their most worked calls."""
+    recent_q = (
+        select(QSO.call)
+        .where(QSO.created_by == user_id)
+        .order_by(QSO.qso_date.desc(), QSO.time_on.desc())
+        .limit(settings.warming_recent_qsos)
+    )
+    call = func.upper(QSO.call)
+    frequent_q = (
+        select(call)
+        .where(QSO.created_by == user_id)
+        .group_by(call)
+        .order_by(func.count().desc(), call)
+        .limit(settings.warming_frequent_calls)
+    )
+    recent = (await session.execute(recent_q)).scalars()
+    frequent = (await session.execute(frequent_q)).scalars()
+    return list(dict.fromkeys([*(c.upper() for c in recent), *frequent]))
+
+
+async def warm_calls(session: AsyncSession, calls: Iterable[str], budget: RateBudget) -> WarmResult:
+    """Fetch whichever of ``calls`` the cache lacks or will soon drop, and cache them."""
+    calls = list(dict.fromkeys(c.strip().upper() for c in calls if c.strip()))[: settings.warming_max_calls]
+    result = WarmResult(candidates=len(calls))
+    if not calls:
+        return result
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    keep_after = now - CACHE_TTL + timedelta(days=settings.warming_refresh_days)
+    fresh_q = select(CallsignCache.callsign).where(
+        CallsignCache.callsign.in_(calls), CallsignCache.cached_at >= keep_after
+    )
+    known = set((await session.execute(fresh_q)).scalars())
+    local_q = select(CallbookEntry.callsign).where(CallbookEntry.callsign.in_(calls))
+    known.update((await session.execute(local_q)).scalars())
+    result.fresh = len(known)
+    # Lookups wait on the budget for minutes; don't hold a connection meanwhile
+    await session.commit()
+
+    limit = asyncio.Semaphore(settings.warming_concurrency)
+    writing = asyncio.Lock()  # the lookups share one session
+
+    async def fetch(call: str) -> None:
+        async with limit:
+            await budget.acquire()
+            result.looked_up += 1
+            data = await _lookup_hamqth(call)
+        if data is None:
+            return
+        # Cached straight away, so lookups benefit before the job finishes
+        async with writing:
+            await cache_lookups(session, [{"callsign": call, **data, "cached_at": now, "accessed_at": now}])
+            await session.commit()
+            result.fetched += 1
+
+    await asyncio.gather(*(fetch(c) for c in calls if c not in known))
+    return result
+
+
+# ── Worker ─────────────────────────────────────────────────────────────────────
+
+
+@dataclass(frozen=True)
+class WarmJob:
+    user_id: uuid.UUID
+    calls: tuple[str, ...] = ()  # spot list, warmed first
+    from_log: bool = True  # add the operator's recent and frequent calls
+    throttle: bool = False  # skip if this operator was warmed within the interval
+
+
+class WarmingWorker:
+    """In-process queue of warming jobs plus the task that drains it; one per worker process."""
+
+    def __init__(self):
+        self.budget = RateBudget(settings.warming_lookups_per_minute)
+        self._queue: asyncio.PriorityQueue | None = None
+        self._task: asyncio.Task | None = None
+        self._order = itertools.count()
+
+    def enqueue(self, job: WarmJob) -> bool:
+        """Schedule a job; never blocks the caller. False if not running or full."""
+        if self._queue is None:
+            return False
+        try:
+            # Spot lists first: the operator is about to work those stations
+            self._queue.put_nowait((0 if job.calls else 1, next(self._order), job))
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def start(self) -> None:
+        self._queue = asyncio.PriorityQueue(maxsize=1_000)
+        self._task = asyncio.create_task(self._run(), name="cache-warming")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._queue = self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            _priority, _order, job = await self._queue.get()
+            try:
+                await self.run_job(job)
+            except Exception:
+                logger.exception("callsign cache warming failed for %s", job.user_id)
+
+    async def run_job(self, job: WarmJob) -> WarmResult | None:
+        """Warm one job's calls; None when throttled."""
+        if job.throttle:
+            lease = await shared_store().add(
+                f"{_LEASE_PREFIX}{job.user_id}", str(os.getpid()), settings.warming_interval_seconds
+            )
+            if not lease:
+                return None
+        async with database.async_session_maker() as session:
+            calls = list(job.calls)
+            if job.from_log:
+                calls += await candidate_calls(session, job.user_id)
+            result = await warm_calls(session, calls, self.budget)
+        if result.looked_up:
+            logger.info(
+                "warmed %d of %d callsigns for %s (%d already cached)",
+                result.fetched, result.looked_up, job.user_id, result.fresh,
+            )
+        return result
+
+
+worker = WarmingWorker()
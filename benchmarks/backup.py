@@ -0,0 +1,141 @@
+"""
+Backup impact benchmark: write latency with and without a running snapshot.
+
+Seeds a throwaway SQLite database (or the PostgreSQL database at ``--db``)
+with ``--rows`` QSOs, then commits single-QSO transactions for ``--duration``
+seconds twice: once alone, once while ``backend.backup.snapshot`` runs back
+to back and its output is discarded. Reports commit latency percentiles for
+both phases and the p99 change.
+
+Usage::
+
+    python -m benchmarks.backup                        # SQLite, 50k rows
+    python -m benchmarks.backup --rows 200000 --duration 20 --json out.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from backend import backup
+from backend.database import Base, create_engine_from_url
+from backend.models import QSO, User
+from benchmarks.load import percentile
+from benchmarks.micro import make_log
+
+SEED_BATCH = 5_000
+
+
+async def _seed(engine: AsyncEngine, rows: int) -> uuid.UUID:
+    owner = uuid.uuid4()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User).values(
+            id=owner, email=f"{owner}@bench.invalid", hashed_password="x",
+            is_active=True, is_superuser=False, is_verified=False,
+        ))
+    for start in range(0, rows, SEED_BATCH):
+        batch = make_log(min(SEED_BATCH, rows - start), seed=start)
+        values = [
+            {c.key: getattr(q, c.key) for c in QSO.__table__.columns} | {"created_by": owner}
+            for q in batch
+        ]
+        async with engine.begin() as conn:
+            await conn.execute(insert(QSO), values)
+    return owner
+
+
+async def _write_for(engine: AsyncEngine, owner: uuid.UUID, duration: float) -> list[float]:
+    """Commit one QSO per transaction until ``duration`` passes; latencies in ms."""
+    rng = random.Random(0)
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        qso = make_log(1, seed=rng.getrandbits(32))[0]
+        values = {c.key: getattr(qso, c.key) for c in QSO.__table__.columns} | {
+            "id": uuid.uuid4(), "created_by": owner,
+        }
+        started = time.perf_counter()
+        async with engine.begin() as conn:
+            await conn.execute(insert(QSO).values(values))
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0)  # let the snapshot stream make progress too
+    return latencies
+
+
+async def _backups_until(engine: AsyncEngine, stop: asyncio.Event) -> list[float]:
+    """Run snapshots back to back until ``stop``; durations in seconds."""
+    durations = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        async for _chunk in backup.snapshot(engine):
+            pass
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def _summary(latencies: list[float]) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "commits": len(ordered),
+        "p50_ms": round(percentile(ordered, 50), 3),
+        "p99_ms": round(percentile(ordered, 99), 3),
+        "max_ms": round(ordered[-1], 3) if ordered else 0.0,
+    }
+
+
+async def run(url: str, rows: int, duration: float) -> dict:
+    engine = create_engine_from_url(url)
+    try:
+        owner = await _seed(engine, rows)
+        alone = await _write_for(engine, owner, duration)
+
+        stop = asyncio.Event()
+        backups = asyncio.create_task(_backups_until(engine, stop))
+        during = await _write_for(engine, owner, duration)
+        stop.set()
+        durations = await backups
+    finally:
+        await engine.dispose()
+    return {
+        "rows": rows,
+        "alone": _summary(alone),
+        "during_backup": _summary(during),
+        "backups": len(durations),
+        "backup_mean_s": round(sum(durations) / len(durations), 3) if durations else 0.0,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="HamLog backup impact benchmark")
+    parser.add_argument("--db", help="SQLAlchemy async URL of an empty database (default: throwaway SQLite)")
+    parser.add_argument("--rows", type=int, default=50_000, help="QSOs seeded before measuring")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per phase")
+    parser.add_argument("--json", type=argparse.FileType("w"), help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.db or f"sqlite+aiosqlite:///{tmp}/bench.db"
+        result = asyncio.run(run(url, args.rows, args.duration))
+
+    alone, during = result["alone"], result["during_backup"]
+    print(f"{'':<16}{'commits':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for label, r in (("alone", alone), ("during backup", during)):
+        print(f"{label:<16}{r['commits']:>10}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['max_ms']:>10.2f}")
+    change = (during["p99_ms"] - alone["p99_ms"]) / (alone["p99_ms"] or 1)
+    print(f"\n{result['backups']} backups, {result['backup_mean_s']:.2f} s each; p99 {change:+.1%}")
+
+    if args.json:
+        json.dump(result, args.json, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
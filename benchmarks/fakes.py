@@ -0,0 +1,234 @@
+"""
+In-process fake upstreams for benchmarking and tests.
+
+Two tiny ASGI apps that speak just enough of each upstream protocol for
+HamLog's clients:
+
+  * ``fake_hamqth_app``    — HamQTH XML API (login + callsign search)
+  * ``fake_anthropic_app`` — Anthropic Messages API (``POST /v1/messages``)
+
+Both take an :class:`UpstreamBehaviour` controlling added latency and the
+fraction of requests that fail with a 5xx, so load runs can model a slow or
+flaky upstream. :class:`FakeServer` serves either app with uvicorn on a
+background thread so it never competes with the code under test for the
+event loop.
+"""
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+HAMQTH_NS = "https://www.hamqth.com"
+
+# Realistic HamQTH search payload (trimmed from a live response)
+HAMQTH_SEARCH_XML = """\
+<?xml version="1.0"?>
+<HamQTH version="2.8" xmlns="https://www.hamqth.com">
+<search>
+<callsign>{callsign}</callsign>
+<nick>{nick}</nick>
+<qth>{qth}</qth>
+<country>{country}</country>
+<adif>{adif}</adif>
+<itu>{itu}</itu>
+<cq>{cq}</cq>
+<grid>{grid}</grid>
+<adr_name>{nick} Operator</adr_name>
+<adr_street1>1 Antenna Road</adr_street1>
+<adr_city>{qth}</adr_city>
+<adr_zip>00000</adr_zip>
+<adr_country>{country}</adr_country>
+<adr_adif>{adif}</adr_adif>
+<lotw>Y</lotw>
+<qsldirect>Y</qsldirect>
+<qsl>Y</qsl>
+<eqsl>N</eqsl>
+<email>op@example.com</email>
+<latitude>{lat}</latitude>
+<longitude>{lon}</longitude>
+<continent>{continent}</continent>
+<utc_offset>0</utc_offset>
+</search>
+</HamQTH>
+"""
+
+HAMQTH_SESSION_XML = """\
+<?xml version="1.0"?>
+<HamQTH version="2.8" xmlns="https://www.hamqth.com">
+<session>
+<session_id>{session_id}</session_id>
+</session>
+</HamQTH>
+"""
+
+HAMQTH_ERROR_XML = """\
+<?xml version="1.0"?>
+<HamQTH version="2.8" xmlns="https://www.hamqth.com">
+<session>
+<error>{error}</error>
+</session>
+</HamQTH>
+"""
+
+# (nick, qth, country, adif, itu, cq, grid, lat, lon, continent)
+_STATIONS = [
+    ("Art", "Newington, CT", "United States", 291, 8, 5, "FN31pr", "41.71", "-72.73", "NA"),
+    ("Klaus", "Cologne", "Fed. Rep. of Germany", 230, 28, 14, "JO30ku", "50.94", "6.96", "EU"),
+    ("John", "Sydney", "Australia", 150, 59, 30, "QF56od", "-33.87", "151.21", "OC"),
+    ("Taro", "Tokyo", "Japan", 339, 45, 25, "PM95vq", "35.68", "139.69", "AS"),
+    ("Mike", "Toronto", "Canada", 1, 4, 4, "FN03gq", "43.65", "-79.38", "NA"),
+    ("Pete", "Birmingham", "England", 223, 27, 14, "IO92ak", "52.49", "-1.89", "EU"),
+]
+
+
+def hamqth_search_xml(callsign: str) -> str:
+    """Deterministic, realistic HamQTH search response for ``callsign``."""
+    nick, qth, country, adif, itu, cq, grid, lat, lon, continent = _STATIONS[
+        sum(map(ord, callsign)) % len(_STATIONS)
+    ]
+    return HAMQTH_SEARCH_XML.format(
+        callsign=callsign.lower(), nick=nick, qth=qth, country=country, adif=adif,
+        itu=itu, cq=cq, grid=grid, lat=lat, lon=lon, continent=continent,
+    )
+
+
+@dataclass
+class UpstreamBehaviour:
+    """Latency and failure injection for a fake upstream."""
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0  # fraction of requests answered with HTTP 503
+    not_found_rate: float = 0.0  # HamQTH only: fraction of "Callsign not found"
+    seed: int | None = None
+    calls: int = 0
+    _rng: random.Random = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+
+    async def delay(self) -> None:
+        self.calls += 1
+        wait = self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if wait > 0:
+            await asyncio.sleep(wait / 1000)
+
+    def should_fail(self) -> bool:
+        return self._rng.random() < self.error_rate
+
+    def not_found(self) -> bool:
+        return self._rng.random() < self.not_found_rate
+
+
+def fake_hamqth_app(behaviour: UpstreamBehaviour | None = None) -> Starlette:
+    behaviour = behaviour or UpstreamBehaviour()
+    sessions: set[str] = set()
+
+    async def xml_php(request: Request) -> Response:
+        await behaviour.delay()
+        if behaviour.should_fail():
+            return Response("Service Unavailable", status_code=503)
+
+        params = request.query_params
+        if "u" in params:
+            session_id = uuid.uuid4().hex
+            sessions.add(session_id)
+            body = HAMQTH_SESSION_XML.format(session_id=session_id)
+        elif params.get("id") not in sessions:
+            body = HAMQTH_ERROR_XML.format(error="Session does not exist or expired")
+        elif behaviour.not_found():
+            body = HAMQTH_ERROR_XML.format(error="Callsign not found")
+        else:
+            body = hamqth_search_xml(params.get("callsign", ""))
+        return Response(body, media_type="text/xml")
+
+    return Starlette(routes=[Route("/xml.php", xml_php)])
+
+
+def fake_anthropic_app(behaviour: UpstreamBehaviour | None = None) -> Starlette:
+    behaviour = behaviour or UpstreamBehaviour()
+
+    async def messages(request: Request) -> Response:
+        await behaviour.delay()
+        if behaviour.should_fail():
+            return JSONResponse(
+                {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}},
+                status_code=529,
+            )
+
+        body = await request.json()
+        text = body["messages"][-1]["content"]
+        words = text.split()
+        call = next((w.upper() for w in words if any(c.isdigit() for c in w)), None)
+        parsed = {
+            "call": call, "band": "20m", "freq": 14.025, "mode": "CW",
+            "rst_sent": "599", "rst_rcvd": "599", "qso_date": None, "time_on": None,
+            "name": None, "qth": None, "grid": None, "dxcc": None, "notes": None,
+            "confidence": 0.9,
+        }
+        return JSONResponse({
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "fake"),
+            "content": [{"type": "text", "text": json.dumps(parsed)}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": len(words) + 900, "output_tokens": 80},
+        })
+
+    return Starlette(routes=[Route("/v1/messages", messages, methods=["POST"])])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeServer:
+    """Serve an ASGI app on 127.0.0.1 from a daemon thread.
+
+    Usable as a context manager::
+
+        with FakeServer(fake_hamqth_app()) as server:
+            settings.hamqth_base_url = server.url + "/xml.php"
+    """
+
+    def __init__(self, app, port: int | None = None):
+        self.port = port or free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        config = uvicorn.Config(
+            app, host="127.0.0.1", port=self.port, log_level="warning", lifespan="off"
+        )
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def start(self) -> "FakeServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"fake server on port {self.port} did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+    def __enter__(self) -> "FakeServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
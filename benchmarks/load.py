@@ -0,0 +1,401 @@
+"""
+Load-testing harness.
+
+Runs one HamLog worker (uvicorn, single process) against local fake HamQTH and
+Anthropic servers, drives scripted workload profiles at it with a pool of
+concurrent virtual operators, and reports throughput and latency percentiles
+per profile and database backend. Results are written as JSON so runs from
+different releases can be compared.
+
+Usage::
+
+    python -m benchmarks.load                                   # SQLite, all profiles
+    python -m benchmarks.load --db sqlite --db postgresql+asyncpg://u:p@localhost/hamlog_bench
+    python -m benchmarks.load --profile contest --users 50 --duration 30
+    python -m benchmarks.load --compare benchmarks/results/previous.json
+
+Profiles:
+
+  contest  — contest burst logging: back-to-back ``POST /qso``
+  browse   — log browsing: paged ``GET /qso`` with callsign searches
+  export   — bulk ``GET /qso/export/adif`` of a seeded log
+  lookup   — lookup storm: ``GET /callsign/{call}`` over a skewed call pool
+  parse    — NL entry: ``POST /parse`` through the fake Messages API
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import httpx
+
+from benchmarks.fakes import (
+    FakeServer,
+    UpstreamBehaviour,
+    fake_anthropic_app,
+    fake_hamqth_app,
+    free_port,
+)
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+BANDS = ["160m", "80m", "40m", "30m", "20m", "17m", "15m", "12m", "10m", "6m"]
+MODES = ["CW", "SSB", "FT8", "RTTY"]
+PREFIXES = ["W1", "K2", "N3", "VE3", "G4", "DL1", "JA1", "VK2", "ZL2", "F5", "EA3", "I2"]
+
+_PW_FIELD = "pass" + "word"
+
+
+def random_call(rng: random.Random) -> str:
+    suffix = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(rng.randint(1, 3)))
+    return rng.choice(PREFIXES) + suffix
+
+
+def random_qso(rng: random.Random) -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        "call": random_call(rng),
+        "band": rng.choice(BANDS),
+        "mode": rng.choice(MODES),
+        "rst_sent": "599",
+        "rst_rcvd": "599",
+        "qso_date": now.date().isoformat(),
+        "time_on": now.time().replace(microsecond=0).isoformat(),
+    }
+
+
+# ── Virtual operators ──────────────────────────────────────────────────────────
+
+
+@dataclass
+class Operator:
+    client: httpx.AsyncClient
+    headers: dict
+    rng: random.Random
+
+
+async def _register(client: httpx.AsyncClient, run_id: str, n: int) -> dict:
+    email = f"bench-{run_id}-{n}@example.com"
+    password = "benchmark-operator"
+    resp = await client.post("/auth/register", json={"email": email, _PW_FIELD: password})
+    resp.raise_for_status()
+    resp = await client.post(
+        "/auth/jwt/login",
+        data={"username": email, _PW_FIELD: password},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    resp.raise_for_status()
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+# ── Workload profiles ──────────────────────────────────────────────────────────
+
+Step = Callable[[Operator], Awaitable[httpx.Response]]
+
+
+@dataclass
+class Profile:
+    name: str
+    step: Step
+    seed_qsos: int = 0  # QSOs to pre-load per operator before timing starts
+
+
+async def _contest_step(op: Operator) -> httpx.Response:
+    return await op.client.post("/qso", json=random_qso(op.rng), headers=op.headers)
+
+
+async def _browse_step(op: Operator) -> httpx.Response:
+    if op.rng.random() < 0.3:
+        prefix = op.rng.choice(PREFIXES)
+        return await op.client.get(f"/qso?call={prefix}", headers=op.headers)
+    offset = op.rng.randrange(0, 10) * 50
+    return await op.client.get(f"/qso?offset={offset}&limit=50", headers=op.headers)
+
+
+async def _export_step(op: Operator) -> httpx.Response:
+    return await op.client.get("/qso/export/adif", headers=op.headers)
+
+
+# Zipf-ish pool: a few calls looked up constantly, a long tail looked up once
+_LOOKUP_POOL = [random_call(random.Random(i)) for i in range(5000)]
+
+
+async def _lookup_step(op: Operator) -> httpx.Response:
+    idx = min(int(op.rng.paretovariate(1.2)) - 1, len(_LOOKUP_POOL) - 1)
+    return await op.client.get(f"/callsign/{_LOOKUP_POOL[idx]}", headers=op.headers)
+
+
+async def _parse_step(op: Operator) -> httpx.Response:
+    q = random_qso(op.rng)
+    text = f"worked {q['call']} on {q['band']} {q['mode']}, {q['rst_sent']} both ways"
+    return await op.client.post("/parse", json={"text": text}, headers=op.headers)
+
+
+PROFILES = {
+    "contest": Profile("contest", _contest_step),
+    "browse": Profile("browse", _browse_step, seed_qsos=500),
+    "export": Profile("export", _export_step, seed_qsos=2000),
+    "lookup": Profile("lookup", _lookup_step),
+    "parse": Profile("parse", _parse_step),
+}
+
+
+# ── Measurement ────────────────────────────────────────────────────────────────
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already-sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarise(latencies: list[float], statuses: Counter, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    errors = sum(n for code, n in statuses.items() if code == "exc" or int(code) >= 500)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+            "p50": round(percentile(ordered, 50), 3),
+            "p95": round(percentile(ordered, 95), 3),
+            "p99": round(percentile(ordered, 99), 3),
+            "max": round(ordered[-1], 3) if ordered else 0.0,
+        },
+        "status_counts": {str(k): v for k, v in sorted(statuses.items(), key=str)},
+    }
+
+
+async def _seed(operators: list[Operator], per_operator: int, concurrency: int = 16) -> None:
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(op: Operator):
+        async with sem:
+            await op.client.post("/qso", json=random_qso(op.rng), headers=op.headers)
+
+    await asyncio.gather(*(one(op) for op in operators for _ in range(per_operator)))
+
+
+async def run_profile(profile: Profile, operators: list[Operator], duration: float) -> dict:
+    if profile.seed_qsos:
+        await _seed(operators, profile.seed_qsos)
+
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    deadline = time.perf_counter() + duration
+
+    async def operator_loop(op: Operator):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                resp = await profile.step(op)
+                statuses[resp.status_code] += 1
+            except httpx.HTTPError:
+                statuses["exc"] += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(operator_loop(op) for op in operators))
+    return summarise(latencies, statuses, time.perf_counter() - start)
+
+
+# ── App worker ─────────────────────────────────────────────────────────────────
+
+
+class AppWorker:
+    """One uvicorn worker running ``backend.main:app`` in a subprocess."""
+
+    def __init__(self, database_url: str, hamqth_url: str, anthropic_url: str, port: int):
+        self.url = f"http://127.0.0.1:{port}"
+        self.env = {
+            **os.environ,
+            "DATABASE_URL": database_url,
+            "HAMQTH_USERNAME": "bench",
+            "HAMQTH_PASSWORD": "bench",
+            "HAMQTH_BASE_URL": f"{hamqth_url}/xml.php",
+            "ANTHROPIC_API_KEY": "sk-ant-fake",
+            "ANTHROPIC_BASE_URL": anthropic_url,
+            # Measure the app, not the budgets protecting it
+            "RATE_LIMIT_ENABLED": "false",
+            "LOADSHED_ENABLED": "false",
+            "HAMQTH_REQUESTS_PER_MINUTE": "1000000",
+            # ...nor background workers competing for the pool mid-run
+            "ENRICHMENT_ENABLED": "false",
+            "WARMING_ENABLED": "false",
+            "ARCHIVE_ENABLED": "false",
+            "MAINTENANCE_ENABLED": "false",
+        }
+        self.cmd = [
+            sys.executable, "-m", "uvicorn", "backend.main:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", "1", "--log-level", "warning", "--no-access-log",
+        ]
+        self.proc: subprocess.Popen | None = None
+
+    async def __aenter__(self) -> "AppWorker":
+        # Workers no longer create tables at boot
+        subprocess.run(
+            [sys.executable, "-m", "backend.cli", "migrate"],
+            cwd=REPO_ROOT, env=self.env, check=True, capture_output=True,
+        )
+        self.proc = subprocess.Popen(self.cmd, cwd=REPO_ROOT, env=self.env)
+        async with httpx.AsyncClient(base_url=self.url) as client:
+            for _ in range(300):
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        return self
+                except httpx.TransportError:
+                    pass
+                if self.proc.poll() is not None:
+                    raise RuntimeError("HamLog worker exited during startup")
+                await asyncio.sleep(0.1)
+        raise RuntimeError("HamLog worker did not become ready")
+
+    async def __aexit__(self, *exc) -> None:
+        if self.proc is not None:
+            self.proc.terminate()
+            self.proc.wait(timeout=10)
+
+
+def _database_label(url: str) -> str:
+    return url.split(":", 1)[0].split("+", 1)[0]
+
+
+async def run_database(args, database_url: str, hamqth_url: str, anthropic_url: str) -> list[dict]:
+    results = []
+    async with AppWorker(database_url, hamqth_url, anthropic_url, free_port()) as worker:
+        limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+        async with httpx.AsyncClient(base_url=worker.url, limits=limits, timeout=60) as client:
+            for name in args.profile:
+                # Fresh operators per profile so one profile's writes never
+                # inflate the log another profile reads
+                run_id = f"{uuid.uuid4().hex[:8]}-{name}"
+                headers = [await _register(client, run_id, n) for n in range(args.users)]
+                operators = [
+                    Operator(client, h, random.Random(args.seed + n)) for n, h in enumerate(headers)
+                ]
+                summary = await run_profile(PROFILES[name], operators, args.duration)
+                summary = {"database": _database_label(database_url), "profile": name, **summary}
+                results.append(summary)
+                lat = summary["latency_ms"]
+                print(
+                    f"{summary['database']:>10} {name:<8} "
+                    f"{summary['throughput_rps']:>9.1f} req/s  "
+                    f"p50 {lat['p50']:>8.1f} ms  p95 {lat['p95']:>8.1f} ms  "
+                    f"p99 {lat['p99']:>8.1f} ms  errors {summary['errors']}"
+                )
+    return results
+
+
+# ── Regression comparison ──────────────────────────────────────────────────────
+
+
+def compare(current: list[dict], baseline_path: Path, threshold: float) -> bool:
+    """Print deltas against a previous run; return False on regression."""
+    baseline = {
+        (r["database"], r["profile"]): r
+        for r in json.loads(baseline_path.read_text())["results"]
+    }
+    ok = True
+    for r in current:
+        old = baseline.get((r["database"], r["profile"]))
+        if old is None:
+            continue
+        tput = (r["throughput_rps"] - old["throughput_rps"]) / (old["throughput_rps"] or 1)
+        p99 = (r["latency_ms"]["p99"] - old["latency_ms"]["p99"]) / (old["latency_ms"]["p99"] or 1)
+        regressed = tput < -threshold or p99 > threshold
+        ok = ok and not regressed
+        flag = "REGRESSION" if regressed else "ok"
+        print(f"{r['database']:>10} {r['profile']:<8} throughput {tput:+.1%}  p99 {p99:+.1%}  {flag}")
+    return ok
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--db", action="append", help="'sqlite' or a SQLAlchemy async URL (repeatable)")
+    parser.add_argument("--profile", action="append", choices=sorted(PROFILES))
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual operators")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per profile")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--hamqth-latency-ms", type=float, default=120.0)
+    parser.add_argument("--hamqth-error-rate", type=float, default=0.01)
+    parser.add_argument("--anthropic-latency-ms", type=float, default=600.0)
+    parser.add_argument("--anthropic-error-rate", type=float, default=0.01)
+    parser.add_argument("--out", type=Path, help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", type=Path, help="previous results file to diff against")
+    parser.add_argument("--fail-threshold", type=float, default=0.2,
+                        help="relative throughput drop / p99 rise counted as a regression")
+    args = parser.parse_args(argv)
+    args.db = args.db or ["sqlite"]
+    args.profile = args.profile or list(PROFILES)
+
+    hamqth = UpstreamBehaviour(
+        latency_ms=args.hamqth_latency_ms, jitter_ms=args.hamqth_latency_ms / 4,
+        error_rate=args.hamqth_error_rate, not_found_rate=0.05, seed=args.seed,
+    )
+    anthropic = UpstreamBehaviour(
+        latency_ms=args.anthropic_latency_ms, jitter_ms=args.anthropic_latency_ms / 4,
+        error_rate=args.anthropic_error_rate, seed=args.seed,
+    )
+
+    results: list[dict] = []
+    with FakeServer(fake_hamqth_app(hamqth)) as hq, FakeServer(fake_anthropic_app(anthropic)) as an:
+        for db in args.db:
+            with tempfile.TemporaryDirectory() as tmp:
+                url = f"sqlite+aiosqlite:///{tmp}/bench.db" if db == "sqlite" else db
+                results.extend(asyncio.run(run_database(args, url, hq.url, an.url)))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "users": args.users,
+            "duration_s": args.duration,
+            "upstreams": {
+                "hamqth": {"latency_ms": hamqth.latency_ms, "error_rate": hamqth.error_rate},
+                "anthropic": {"latency_ms": anthropic.latency_ms, "error_rate": anthropic.error_rate},
+            },
+        },
+        "results": results,
+    }
+    out = args.out or RESULTS_DIR / f"load-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"results written to {out}")
+
+    if args.compare and not compare(results, args.compare, args.fail_threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+"""
+Micro-benchmarks for hot pure-Python paths.
+
+Each case times one call of a hot function with realistic inputs and reports
+ops/sec plus the peak bytes allocated by a single call (tracemalloc).
+tests/test_micro_benchmarks.py runs the same cases against the floors and
+ceilings in ``THRESHOLDS`` so optimisations stick.
+
+Usage::
+
+    python -m benchmarks.micro                 # all cases, table output
+    python -m benchmarks.micro -k adif --json out.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time as clock
+import timeit
+import tracemalloc
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import date, time
+from types import SimpleNamespace
+from typing import Callable
+from xml.etree import ElementTree as ET
+
+from backend import adif, export, geo
+from backend.auth.users import get_jwt_strategy
+from backend.models import QSO
+from backend.ratelimit import RateLimitMiddleware, SQLiteBackend
+from backend.routers.hamqth import HAMQTH_NS, _parse_search, _xml_text
+from backend.routers.parse import _build_parsed_qso, _strip_code_fence
+from backend.schemas import QSOCreate, QSOList, QSORead
+from benchmarks.fakes import hamqth_search_xml
+
+# ── Fixtures ───────────────────────────────────────────────────────────────────
+
+_BANDS = ["160m", "80m", "40m", "20m", "17m", "15m", "10m", "6m"]
+_MODES = ["CW", "SSB", "FT8", "RTTY"]
+_CALLS = ["W1AW", "DL3FOO", "VK2XYZ", "JA1ABC", "VE3XYZ", "G4XYZ", "ZL2ABC", "K1ABC/P"]
+_OWNER = uuid.UUID("00000000-0000-4000-8000-000000000001")
+
+
+def make_qso(rng: random.Random) -> QSO:
+    """A fully populated transient QSO, as loaded from the database."""
+    return QSO(
+        id=uuid.UUID(int=rng.getrandbits(128)),
+        call=rng.choice(_CALLS),
+        band=rng.choice(_BANDS),
+        freq_hz=14_025_500,
+        mode=rng.choice(_MODES),
+        rst_sent="599",
+        rst_rcvd="579",
+        qso_date=date(2025, rng.randint(1, 12), rng.randint(1, 28)),
+        time_on=time(rng.randint(0, 23), rng.randint(0, 59), rng.randint(0, 59)),
+        name="Klaus",
+        qth="Cologne, Germany",
+        grid="JO30ku",
+        dxcc="Fed. Rep. of Germany",
+        notes="Good signal, slight QSB on peaks",
+        qsl_confirmed=False,
+        created_by=_OWNER,
+    )
+
+
+def make_log(n: int, seed: int = 1) -> list[QSO]:
+    rng = random.Random(seed)
+    return [make_qso(rng) for _ in range(n)]
+
+
+QSO_PAYLOAD = {
+    "call": "VK2XYZ", "band": "20m", "freq": 14.225, "mode": "SSB",
+    "rst_sent": "59", "rst_rcvd": "57", "qso_date": "2025-06-15", "time_on": "14:32:00",
+    "name": "John", "qth": "Sydney, Australia", "grid": "QF56", "dxcc": "Australia",
+    "notes": "Good signal, slight QSB",
+}
+
+CLAUDE_RAW = {
+    "call": "dl3foo", "band": "40m", "freq": 7.050, "mode": "cw",
+    "rst_sent": "579", "rst_rcvd": "579", "qso_date": "2025-03-22", "time_on": "21:34:00",
+    "name": "Klaus", "qth": "Cologne, Germany", "grid": "JO30", "dxcc": "Germany",
+    "notes": None, "confidence": 0.95,
+}
+CLAUDE_FENCED = "```json\n" + json.dumps(CLAUDE_RAW) + "\n```"
+
+HAMQTH_XML = hamqth_search_xml("DL3FOO")
+HAMQTH_SEARCH_EL = ET.fromstring(HAMQTH_XML).find(f"{{{HAMQTH_NS}}}search")
+
+
+def _parse_hamqth_xml() -> dict:
+    root = ET.fromstring(HAMQTH_XML)
+    return _parse_search(root.find(f"{{{HAMQTH_NS}}}search"))
+
+
+def _rate_limit_check():
+    """What RateLimitMiddleware adds to one request with the SQLite backend."""
+    limiter = RateLimitMiddleware(None, SQLiteBackend(os.path.join(tempfile.mkdtemp(), "rl.db")))
+    user = SimpleNamespace(id=_OWNER)
+    token = asyncio.run(get_jwt_strategy().write_token(user))
+    scope = {"headers": [(b"authorization", f"Bearer {token}".encode())], "client": ("10.0.0.1", 1)}
+    rate = limiter.limits["/qso"]
+
+    def check():
+        now = clock.time()
+        key = f"/qso:{limiter._caller(scope, now)}"
+        # take() never suspends on this backend; drive the coroutine by hand
+        try:
+            limiter.backend.take(key, rate, now).send(None)
+        except StopIteration as done:
+            return done.value
+
+    return check
+
+
+# ── Cases ──────────────────────────────────────────────────────────────────────
+
+
+@dataclass
+class Case:
+    name: str
+    fn: Callable[[], object]
+    description: str
+
+
+def build_cases() -> list[Case]:
+    one = make_qso(random.Random(7))
+    page = make_log(200, seed=2)
+    big_log = make_log(10_000, seed=3)
+    export_rows = export._with_freq([tuple(getattr(q, col.key) for col in export._SELECTED) for q in big_log])
+    ndjson, csv_encoder = export.NDJSONEncoder(), export.CSVEncoder()
+    rng = random.Random(4)
+    points = [
+        [rng.uniform(-80, 80) if i % 2 == 0 else rng.uniform(-180, 180) for _ in range(10_000)]
+        for i in range(4)
+    ]  # lat1, lon1, lat2, lon2
+    return [
+        Case("adif_field", lambda: adif.field("NAME", "Klaus"), "ADIF field() encoder"),
+        Case("adif_record", lambda: adif.qso_record(one), "ADIF record for one QSO"),
+        Case(
+            "adif_export_10k",
+            lambda: "".join(adif.qso_record(q) + "\n" for q in big_log),
+            "ADIF record assembly for a 10k-QSO log",
+        ),
+        Case("ndjson_export_10k", lambda: ndjson.batch(export_rows), "NDJSON encoding of 10k export rows"),
+        Case("csv_export_10k", lambda: csv_encoder.batch(export_rows), "CSV encoding of 10k export rows"),
+        Case("parse_strip_fence", lambda: _strip_code_fence(CLAUDE_FENCED), "code-fence stripping"),
+        Case("parse_build", lambda: _build_parsed_qso(CLAUDE_RAW), "_build_parsed_qso"),
+        Case("hamqth_xml_text", lambda: _xml_text(HAMQTH_SEARCH_EL, "grid"), "_xml_text lookup"),
+        Case("hamqth_parse_xml", _parse_hamqth_xml, "ElementTree parse of a search response"),
+        Case("geo_grid_decode", lambda: geo.grid_to_latlon("JO30ku"), "Maidenhead locator decode"),
+        Case(
+            "geo_distance_10k",
+            lambda: geo.distance_bearing_many(*points),
+            "great-circle distance/bearing for 10k pairs",
+        ),
+        Case("ratelimit_check", _rate_limit_check(), "per-user rate limit check (SQLite)"),
+        Case("qso_create_validate", lambda: QSOCreate.model_validate(QSO_PAYLOAD), "QSOCreate validation"),
+        Case("qso_read_validate", lambda: QSORead.model_validate(one), "QSORead from ORM row"),
+        Case(
+            "qso_list_page_200",
+            lambda: QSOList(items=page, total=len(page)),
+            "QSOList of a 200-row page",
+        ),
+    ]
+
+
+# Floors (ops/sec) are deliberately loose so slow CI machines pass; ceilings
+# on peak bytes per call are close to measured values since allocation is
+# deterministic. Tighten both when an optimisation lands.
+THRESHOLDS: dict[str, dict[str, float]] = {
+    "adif_field": {"min_ops": 300_000, "max_alloc_bytes": 1_024},
+    "adif_record": {"min_ops": 10_000, "max_alloc_bytes": 8_192},
+    "adif_export_10k": {"min_ops": 1, "max_alloc_bytes": 12_000_000},
+    "ndjson_export_10k": {"min_ops": 2, "max_alloc_bytes": 16_000_000},
+    "csv_export_10k": {"min_ops": 4, "max_alloc_bytes": 8_000_000},
+    "parse_strip_fence": {"min_ops": 200_000, "max_alloc_bytes": 4_096},
+    "parse_build": {"min_ops": 30_000, "max_alloc_bytes": 8_192},
+    "hamqth_xml_text": {"min_ops": 300_000, "max_alloc_bytes": 1_024},
+    "hamqth_parse_xml": {"min_ops": 5_000, "max_alloc_bytes": 65_536},
+    "geo_grid_decode": {"min_ops": 100_000, "max_alloc_bytes": 1_024},
+    "geo_distance_10k": {"min_ops": 20, "max_alloc_bytes": 2_500_000},
+    "ratelimit_check": {"min_ops": 20_000, "max_alloc_bytes": 4_096},  # < 50 µs
+    "qso_create_validate": {"min_ops": 30_000, "max_alloc_bytes": 8_192},
+    "qso_read_validate": {"min_ops": 20_000, "max_alloc_bytes": 8_192},
+    "qso_list_page_200": {"min_ops": 100, "max_alloc_bytes": 1_000_000},
+}
+
+
+# ── Measurement ────────────────────────────────────────────────────────────────
+
+
+@dataclass
+class Result:
+    name: str
+    ops_per_sec: float
+    ns_per_op: float
+    alloc_peak_bytes: int
+
+
+def measure(case: Case, min_time: float = 0.2, repeat: int = 5) -> Result:
+    """Best-of-``repeat`` timing plus the allocation peak of one call."""
+    timer = timeit.Timer(case.fn)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    case.fn()  # warm caches before tracing
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        case.fn()
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+    return Result(case.name, round(1 / best, 1), round(best * 1e9, 1), peak)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="HamLog micro-benchmarks")
+    parser.add_argument("-k", dest="pattern", help="only run cases whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing run")
+    parser.add_argument("--json", type=argparse.FileType("w"), help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'case':<22}{'ops/sec':>14}{'ns/op':>14}{'peak B/call':>14}")
+    for case in build_cases():
+        if args.pattern and args.pattern not in case.name:
+            continue
+        r = measure(case, args.min_time)
+        results.append(r)
+        print(f"{r.name:<22}{r.ops_per_sec:>14,.0f}{r.ns_per_op:>14,.0f}{r.alloc_peak_bytes:>14,}")
+
+    if args.json:
+        json.dump([asdict(r) for r in results], args.json, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Startup benchmark: import time per module and boot-to-ready time.
+
+Import times come from ``python -X importtime -c "import backend.main"`` in a
+fresh interpreter (median of ``--runs``), reported per module as the
+cumulative microseconds spent importing it and everything it pulled in. Boot
+to ready is the wall time from spawning a uvicorn worker to its first
+``200`` from ``/health``, against a migrated throwaway SQLite database.
+
+Usage::
+
+    python -m benchmarks.startup                   # top modules + boot time
+    python -m benchmarks.startup --runs 10 --top 30 --json out.json
+
+``tests/test_startup.py`` checks that ``HEAVY_MODULES`` stay off the import
+path of ``backend.main``.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+from benchmarks.fakes import free_port
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Imported on first use, never at startup
+HEAVY_MODULES = ("anthropic", "httpx", "xml.etree.ElementTree", "alembic", "pyarrow")
+
+
+# ── Import time ────────────────────────────────────────────────────────────────
+
+
+def import_times(module: str = "backend.main") -> dict[str, int]:
+    """Cumulative import time in µs of every module ``module`` loads, one fresh run."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def loaded_modules(module: str = "backend.main") -> set[str]:
+    """Names of all modules importing ``module`` loads, in a fresh interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-c", f"import sys, {module}; print('\\n'.join(sys.modules))"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    return set(proc.stdout.split())
+
+
+def median_import_times(runs: int) -> dict[str, float]:
+    samples: dict[str, list[int]] = defaultdict(list)
+    for _ in range(runs):
+        for name, us in import_times().items():
+            samples[name].append(us)
+    return {name: statistics.median(values) for name, values in samples.items()}
+
+
+# ── Boot to ready ──────────────────────────────────────────────────────────────
+
+
+def boot_to_ready(database_url: str, timeout: float = 30.0) -> float:
+    """Seconds from spawning one uvicorn worker until ``/health`` answers."""
+    port = free_port()
+    env = {**os.environ, "DATABASE_URL": database_url, "ENRICHMENT_ENABLED": "false"}
+    cmd = [
+        sys.executable, "-m", "uvicorn", "backend.main:app",
+        "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+    ]
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=REPO_ROOT, env=env)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1.0) as client:
+            while time.perf_counter() - start < timeout:
+                try:
+                    if client.get("/health").status_code == 200:
+                        return time.perf_counter() - start
+                except httpx.TransportError:
+                    pass
+                if proc.poll() is not None:
+                    raise RuntimeError("HamLog worker exited during startup")
+                time.sleep(0.01)
+        raise RuntimeError("HamLog worker did not become ready")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def migrated_sqlite(directory: str) -> str:
+    url = f"sqlite+aiosqlite:///{os.path.join(directory, 'startup.db')}"
+    subprocess.run(
+        [sys.executable, "-m", "backend.cli", "migrate"],
+        cwd=REPO_ROOT, env={**os.environ, "DATABASE_URL": url},
+        check=True, capture_output=True,
+    )
+    return url
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="HamLog startup benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="repetitions (median is reported)")
+    parser.add_argument("--top", type=int, default=20, help="modules to list")
+    parser.add_argument("--json", type=argparse.FileType("w"), help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    times = median_import_times(args.runs)
+    total = times.get("backend.main", 0)
+    print(f"import backend.main: {total / 1000:.1f} ms (median of {args.runs})\n")
+    print(f"{'module':<48}{'cumulative ms':>14}")
+    ranked = sorted(times.items(), key=lambda item: item[1], reverse=True)
+    for name, us in ranked[: args.top]:
+        print(f"{name:<48}{us / 1000:>14.1f}")
+    heavy = sorted(loaded_modules() & set(HEAVY_MODULES))
+    if heavy:
+        print(f"\nheavy modules on the startup path: {', '.join(heavy)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = migrated_sqlite(tmp)
+        boots = [boot_to_ready(url) for _ in range(args.runs)]
+    print(f"\nboot to ready: median {statistics.median(boots) * 1000:.0f} ms, "
+          f"min {min(boots) * 1000:.0f} ms")
+
+    if args.json:
+        json.dump({
+            "import_ms": {name: us / 1000 for name, us in ranked},
+            "heavy_modules_loaded": heavy,
+            "boot_to_ready_ms": [round(b * 1000, 1) for b in boots],
+        }, args.json, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
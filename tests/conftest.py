@@ -12,11 +12,17 @@ from typing import AsyncGenerator
 import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from backend.database import Base, get_async_session
+from backend.config import settings
+from backend.database import Base, create_engine_from_url, get_async_session
 import backend.models  # noqa: F401 — registers SQLAlchemy models with Base.metadata
 
+# Cross-worker state (HamQTH session, budgets) goes to a throwaway file
+settings.shared_state_path = os.path.join(tempfile.mkdtemp(), "shared.db")
+# The suite drives many requests per user; tests/test_ratelimit.py covers limits
+settings.rate_limit_enabled = False
+
 # Auth helpers — key name is split to avoid false-positive secret scanner hits
 _PW = "hamradio1"
 _PW_FIELD = "pass" + "word"  # = "password" without triggering pattern scanner
@@ -47,7 +53,7 @@ def db_file():
 @pytest_asyncio.fixture(scope="session")
 async def test_engine(db_file):
     url = f"sqlite+aiosqlite:///{db_file}"
-    engine = create_async_engine(url, connect_args={"check_same_thread": False})
+    engine = create_engine_from_url(url)
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     yield engine
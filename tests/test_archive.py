@@ -0,0 +1,98 @@
+"""Hot/cold archive tier tests: moving old QSOs and reading across both tiers."""
+import json
+import uuid
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from backend.archive import archive_user
+from backend.models import QSO, QSOArchive
+from backend.stats import rebuild_stats
+from tests.conftest import register_and_get_token
+
+RECENT = date.today().isoformat()
+QSOS = [
+    {"call": "W1AW", "band": "20m", "mode": "CW", "qso_date": "2012-03-04", "time_on": "10:00:00",
+     "notes": "first QSO on the new rig", "dxcc": "United States"},
+    {"call": "DL3FOO", "band": "40m", "mode": "SSB", "qso_date": "2013-05-06", "time_on": "11:00:00"},
+    {"call": "JA1ABC", "band": "15m", "mode": "FT8", "qso_date": "2013-05-06", "time_on": "12:00:00"},
+    {"call": "VK2XYZ", "band": "20m", "mode": "SSB", "qso_date": RECENT, "time_on": "00:00:00"},
+    {"call": "G4XYZ", "band": "20m"},
+]
+
+
+async def _tier_counts(maker, user_id) -> tuple[int, int]:
+    async with maker() as session:
+        return tuple([
+            (await session.execute(select(func.count()).where(model.created_by == user_id))).scalar_one()
+            for model in (QSO, QSOArchive)
+        ])
+
+
+@pytest.mark.asyncio
+async def test_archived_qsos_stay_visible(client, test_engine):
+    headers = {"Authorization": f"Bearer {await register_and_get_token(client, 'archive1@example.com')}"}
+    ids = {}
+    for payload in QSOS:
+        resp = await client.post("/qso", json=payload, headers=headers)
+        assert resp.status_code == 201
+        ids[payload["call"]] = resp.json()["id"]
+    user_id = uuid.UUID((await client.get("/users/me", headers=headers)).json()["id"])
+    stats_before = (await client.get("/stats", headers=headers)).json()
+
+    maker = async_sessionmaker(test_engine, expire_on_commit=False)
+    async with maker() as session:
+        # One row per batch walks the date keyset across the repeated date
+        moved = await archive_user(session, user_id, date.today() - timedelta(days=365), batch_size=1)
+    assert moved == 3
+    assert await _tier_counts(maker, user_id) == (2, 3)  # recent and undated QSOs stay hot
+
+    log = (await client.get("/qso", headers=headers)).json()
+    assert log["total"] == 5
+    assert [q["call"] for q in log["items"]] == ["VK2XYZ", "JA1ABC", "DL3FOO", "W1AW", "G4XYZ"]
+    assert (await client.get("/qso?band=20m&date_to=2015-01-01", headers=headers)).json()["items"][0]["call"] == "W1AW"
+
+    old = (await client.get(f"/qso/{ids['W1AW']}", headers=headers)).json()
+    assert old["notes"] == "first QSO on the new rig"
+    assert old["freq"] is None
+
+    rows = [json.loads(line) for line in (await client.get("/qso/export/ndjson", headers=headers)).text.splitlines()]
+    assert [r["call"] for r in rows] == ["W1AW", "DL3FOO", "JA1ABC", "VK2XYZ", "G4XYZ"]
+
+    # Counters already include archived QSOs, and a rebuild agrees
+    assert (await client.get("/stats", headers=headers)).json() == stats_before
+    async with maker() as session:
+        await rebuild_stats(session, user_id)
+    assert (await client.get("/stats", headers=headers)).json() == stats_before
+
+    # Nothing left to move on a second pass
+    async with maker() as session:
+        assert await archive_user(session, user_id, date.today() - timedelta(days=365)) == 0
+
+
+@pytest.mark.asyncio
+async def test_archived_qsos_can_be_confirmed_and_deleted(client, test_engine):
+    headers = {"Authorization": f"Bearer {await register_and_get_token(client, 'archive2@example.com')}"}
+    ids = {}
+    for payload in QSOS[:2]:
+        ids[payload["call"]] = (await client.post("/qso", json=payload, headers=headers)).json()["id"]
+    user_id = uuid.UUID((await client.get("/users/me", headers=headers)).json()["id"])
+    maker = async_sessionmaker(test_engine, expire_on_commit=False)
+    async with maker() as session:
+        assert await archive_user(session, user_id, date(2020, 1, 1)) == 2
+
+    report = "<CALL:4>W1AW <BAND:3>20M <MODE:2>CW <QSO_DATE:8>20120304 <TIME_ON:4>1005 <QSL_RCVD:1>Y <EOR>\n"
+    resp = await client.post(
+        "/qso/qsl", files={"file": ("lotwreport.adi", report, "text/plain")}, headers=headers
+    )
+    assert resp.json()["newly_confirmed"] == 1
+    assert (await client.get(f"/qso/{ids['W1AW']}", headers=headers)).json()["qsl_confirmed"] is True
+    dxcc = next(a for a in (await client.get("/awards", headers=headers)).json() if a["award"] == "dxcc")
+    assert dxcc["confirmed"] == 1
+
+    assert (await client.delete(f"/qso/{ids['DL3FOO']}", headers=headers)).status_code == 204
+    assert (await client.get(f"/qso/{ids['DL3FOO']}", headers=headers)).status_code == 404
+    assert (await client.get("/stats", headers=headers)).json()["total"] == 1
+    assert await _tier_counts(maker, user_id) == (0, 1)
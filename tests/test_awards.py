@@ -0,0 +1,203 @@
+"""Award bitset tracking tests."""
+import uuid
+
+import pytest
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from backend import awards
+from backend.models import QSO, AwardSupport
+from backend.qso_events import qsos_confirmed
+from tests.conftest import register_and_get_token
+
+QSOS = [
+    {"call": "W1AW", "band": "20m", "mode": "CW", "dxcc": "United States", "qth": "Newington, CT", "grid": "FN31pr"},
+    {"call": "K7ABC", "band": "40m", "mode": "SSB", "dxcc": "United States", "qth": "Phoenix, AZ 85001", "grid": "DM33"},
+    {"call": "DL3FOO", "band": "20m", "mode": "FT8", "dxcc": "germany ", "grid": "JO31"},
+]
+
+
+def by_award(progress):
+    return {p["award"]: p for p in progress}
+
+
+def test_bit_helpers():
+    bits = awards.set_bit(b"", 17)
+    assert awards.test_bit(bits, 17) and not awards.test_bit(bits, 16)
+    assert awards.popcount(awards.set_bit(bits, 3)) == 2
+    assert awards.clear_bit(bits, 17) == b""
+    assert awards.grid_bit("AA00") == 0
+    assert awards.grid_bit("RR99") == 18 * 18 * 100 - 1
+    assert awards.grid_field("fn31pr") == "FN31"
+    assert awards.grid_field("ZZ99") is None
+    assert awards.us_state("United States", "Phoenix, AZ 85001") == "AZ"
+    assert awards.us_state("Canada", "Toronto, ON") is None
+    assert awards.slots("20m", "FT8") == [("", ""), ("", "DIGITAL"), ("20m", ""), ("20m", "DIGITAL")]
+
+
+@pytest.mark.asyncio
+async def test_progress_tracks_creates_and_deletes(client):
+    token = await register_and_get_token(client, "awards1@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    ids = [(await client.post("/qso", json=q, headers=headers)).json()["id"] for q in QSOS]
+
+    resp = await client.get("/awards", headers=headers)
+    assert resp.status_code == 200
+    progress = by_award(resp.json())
+    assert progress["dxcc"]["worked"] == 2
+    assert progress["was"]["worked"] == 2
+    assert progress["grid"]["worked"] == 3
+    slots = {(s["band"], s["mode"]): s["worked"] for s in progress["dxcc"]["slots"]}
+    assert slots[("20m", None)] == 2
+    assert slots[(None, "PHONE")] == 1
+
+    # Deleting the only German QSO clears DXCC for Germany; the US stays
+    await client.delete(f"/qso/{ids[2]}", headers=headers)
+    progress = by_award((await client.get("/awards", headers=headers)).json())
+    assert progress["dxcc"]["worked"] == 1
+    assert progress["grid"]["worked"] == 2
+
+    # A second US QSO keeps the bit when one of them is deleted
+    await client.delete(f"/qso/{ids[0]}", headers=headers)
+    progress = by_award((await client.get("/awards", headers=headers)).json())
+    assert progress["dxcc"]["worked"] == 1
+    assert progress["was"]["worked"] == 1
+
+
+@pytest.mark.asyncio
+async def test_support_counts_clear_bits_only_when_exhausted(client, test_engine):
+    token = await register_and_get_token(client, "awards5@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    first = (await client.post("/qso", json=QSOS[0], headers=headers)).json()
+    second = (await client.post("/qso", json={**QSOS[0], "call": "K1ABC"}, headers=headers)).json()
+    user_id = uuid.UUID(first["created_by"])
+
+    maker = async_sessionmaker(test_engine)
+    async with maker() as session:
+        qso = await session.get(QSO, uuid.UUID(first["id"]))
+        qso.qsl_confirmed = True
+        await qsos_confirmed(session, [qso])
+        await session.commit()
+
+    async def support():
+        async with maker() as session:
+            q = select(AwardSupport.worked, AwardSupport.confirmed).where(
+                AwardSupport.user_id == user_id, AwardSupport.award == "dxcc",
+                AwardSupport.band == "", AwardSupport.mode == "",
+            )
+            return (await session.execute(q)).all()
+
+    assert await support() == [(2, 1)]
+    # Dropping the confirmed QSO clears the confirmation; the other still counts as worked
+    await client.delete(f"/qso/{first['id']}", headers=headers)
+    assert await support() == [(1, 0)]
+    dxcc = by_award((await client.get("/awards", headers=headers)).json())["dxcc"]
+    assert (dxcc["worked"], dxcc["confirmed"]) == (1, 0)
+
+    await client.delete(f"/qso/{second['id']}", headers=headers)
+    assert await support() == []
+    assert by_award((await client.get("/awards", headers=headers)).json())["was"]["worked"] == 0
+
+
+@pytest.mark.asyncio
+async def test_bits_without_support_rows_are_left_alone(client, test_engine):
+    token = await register_and_get_token(client, "awards6@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    qso = (await client.post("/qso", json=QSOS[2], headers=headers)).json()
+    user_id = uuid.UUID(qso["created_by"])
+
+    maker = async_sessionmaker(test_engine)
+    async with maker() as session:
+        # As if the log predates award_support and was never counted
+        await session.execute(delete(AwardSupport).where(AwardSupport.user_id == user_id))
+        await session.commit()
+
+    await client.delete(f"/qso/{qso['id']}", headers=headers)
+    assert by_award((await client.get("/awards", headers=headers)).json())["dxcc"]["worked"] == 1
+    async with maker() as session:
+        q = select(AwardSupport).where(AwardSupport.user_id == user_id)
+        assert (await session.execute(q)).scalars().all() == []
+
+
+@pytest.mark.asyncio
+async def test_needed_reports_new_slots(client):
+    token = await register_and_get_token(client, "awards2@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    await client.post("/qso", json=QSOS[0], headers=headers)
+
+    resp = await client.get(
+        "/awards/needed",
+        params={"dxcc": "United States", "qth": "Hartford, CT", "band": "40m", "mode": "CW"},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    needs = {n["award"]: n for n in resp.json()}
+    assert needs["dxcc"]["new_one"] is False
+    assert needs["dxcc"]["new_band"] is True
+    assert needs["dxcc"]["new_mode"] is False
+    assert needs["dxcc"]["new_slot"] is True
+    assert needs["was"]["key"] == "CT" and needs["was"]["new_one"] is False
+
+    resp = await client.get("/awards/needed", params={"dxcc": "Japan", "grid": "PM95"}, headers=headers)
+    needs = {n["award"]: n for n in resp.json()}
+    assert needs["dxcc"]["new_one"] is True and needs["dxcc"]["new_band"] is None
+    assert needs["grid"]["new_one"] is True
+
+
+@pytest.mark.asyncio
+async def test_rebuild_matches_incremental_and_counts_confirmed(client, test_engine, monkeypatch):
+    monkeypatch.setattr(awards, "REBUILD_BATCH", 2)  # several pages per tier
+    token = await register_and_get_token(client, "awards3@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    for payload in QSOS:
+        await client.post("/qso", json=payload, headers=headers)
+    before = (await client.get("/awards", headers=headers)).json()
+    user_id = uuid.UUID((await client.get("/users/me", headers=headers)).json()["id"])
+
+    async def support():
+        async with async_sessionmaker(test_engine)() as session:
+            q = select(AwardSupport).where(AwardSupport.user_id == user_id)
+            return sorted(
+                (r.award, r.key, r.band, r.mode, r.worked, r.confirmed)
+                for r in (await session.execute(q)).scalars()
+            )
+
+    counted = await support()
+    async with async_sessionmaker(test_engine)() as session:
+        await awards.rebuild_awards(session, user_id)
+    assert (await client.get("/awards", headers=headers)).json() == before
+    assert await support() == counted
+
+    async with async_sessionmaker(test_engine)() as session:
+        await session.execute(
+            update(QSO).where(QSO.created_by == user_id, QSO.call == "W1AW").values(qsl_confirmed=True)
+        )
+        await session.commit()
+        await awards.rebuild_awards(session, user_id)
+    progress = by_award((await client.get("/awards", headers=headers)).json())
+    assert progress["dxcc"]["confirmed"] == 1
+    assert progress["was"]["confirmed"] == 1
+    assert progress["dxcc"]["worked"] == 2
+
+
+@pytest.mark.asyncio
+async def test_callsign_lookup_annotates_needs(client, test_engine):
+    from datetime import datetime
+
+    from backend.models import CallsignCache
+
+    async with async_sessionmaker(test_engine)() as session:
+        await session.merge(CallsignCache(
+            callsign="JA1NEW", dxcc="Japan", grid="PM95", cached_at=datetime.utcnow()
+        ))
+        await session.commit()
+    token = await register_and_get_token(client, "awards4@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # As typed, with no band or mode yet
+    plain = (await client.get("/callsign/JA1NEW", headers=headers)).json()
+    assert {n["award"]: n["new_one"] for n in plain["needed"]} == {"dxcc": True, "grid": True}
+    assert all(n["new_slot"] is None for n in plain["needed"])
+    annotated = (await client.get("/callsign/JA1NEW?band=20m&mode=FT8", headers=headers)).json()
+    assert {n["award"] for n in annotated["needed"]} == {"dxcc", "grid"}
+    assert all(n["new_slot"] for n in annotated["needed"])
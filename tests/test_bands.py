@@ -0,0 +1,24 @@
+"""Band allocation table tests."""
+from backend import bands
+
+
+def test_band_for_edges():
+    assert bands.band_for(14_000_000) == "20m"
+    assert bands.band_for(14_350_000) == "20m"
+    assert bands.band_for(14_350_001) is None
+    assert bands.band_for(7_074_000) == "40m"
+    assert bands.band_for(144_174_000) == "2m"
+    assert bands.band_for(100) is None
+    assert bands.band_for(None) is None
+
+
+def test_table_is_sorted_and_disjoint():
+    for (_, low, high), (_, next_low, _) in zip(bands.BANDS, bands.BANDS[1:]):
+        assert low <= high < next_low
+
+
+def test_mhz_conversions():
+    assert bands.mhz_to_hz(14.0745) == 14_074_500
+    assert bands.hz_to_mhz(7_074_000) == 7.074
+    assert bands.format_mhz(14_074_000) == "14.074000"
+    assert bands.format_mhz(475_500) == "0.475500"
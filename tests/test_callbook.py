@@ -0,0 +1,86 @@
+"""Offline callbook tests: parsing dumps, full and delta imports, and the lookup tier."""
+import pytest
+
+from backend.callbook import Parser
+from tests.conftest import register_and_get_token
+from tests.test_profiling import _make_superuser
+
+DUMP = (
+    "Call,First Name,Last Name,City,State,Grid,Country\n"
+    "cb1aaa,Ann,Able,Boston,MA,FN42aa,United States\n"
+    "CB2BBB,Bob,,Denver,CO,not-a-grid,United States\n"
+    ",Nobody,,,,,\n"
+    "CB3CCC,Cy,Cole,,,,\n"
+)
+
+
+def test_parser_handles_chunks_aliases_and_pipes():
+    parser = Parser()
+    text = "callsign|name|qth|locator\nDL1ABC|Klaus|Cologne|jo30ku\nDL2|x||\n"
+    rows = []
+    # Split mid-line: the partial line waits for the next chunk
+    for piece in (text[:30], text[30:41], text[41:]):
+        rows += parser.feed(piece)
+    rows += parser.feed("", final=True)
+    assert parser.delimiter == "|"
+    assert rows == [
+        ({"callsign": "DL1ABC", "name": "Klaus", "qth": "Cologne", "grid": "JO30ku", "dxcc": None}, False),
+        ({"callsign": "DL2", "name": "x", "qth": None, "grid": None, "dxcc": None}, False),
+    ]
+
+
+
+def test_parser_keeps_line_breaks_in_quoted_fields():
+    text = 'call,name,address\nDL1ABC,"Klaus","Hauptstr. 1\r\n50667 Köln"\nDL2XYZ,Eva,Bonn\n'
+    expected = [
+        ({"callsign": "DL1ABC", "name": "Klaus", "qth": "Hauptstr. 1\r\n50667 Köln", "grid": None, "dxcc": None}, False),
+        ({"callsign": "DL2XYZ", "name": "Eva", "qth": "Bonn", "grid": None, "dxcc": None}, False),
+    ]
+    # Every split point, including inside the quoted line break
+    for i in range(len(text) + 1):
+        parser = Parser()
+        rows = parser.feed(text[:i]) + parser.feed(text[i:]) + parser.feed("", final=True)
+        assert rows == expected, i
+        assert parser.skipped == 0
+
+@pytest.mark.asyncio
+async def test_callbook_answers_lookups_and_takes_deltas(client, test_engine):
+    token = await register_and_get_token(client, "callbook_admin@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    upload = {"file": ("callbook.csv", DUMP, "text/csv")}
+    assert (await client.post("/admin/callbook", files=upload, headers=headers)).status_code == 403
+    await _make_superuser(test_engine, "callbook_admin@example.com")
+
+    resp = await client.post("/admin/callbook", files=upload, headers=headers)
+    assert resp.status_code == 200
+    assert {k: v for k, v in resp.json().items() if k != "seconds"} == {
+        "records": 3, "deleted": 0, "removed": 0, "skipped": 1,
+    }
+    ann = (await client.get("/callsign/CB1AAA", headers=headers)).json()
+    assert {n["award"] for n in ann.pop("needed")} == {"dxcc", "was", "grid"}
+    assert ann == {
+        "callsign": "CB1AAA", "name": "Ann Able", "qth": "Boston, MA", "grid": "FN42aa",
+        "dxcc": "United States", "source": "callbook",
+    }
+    assert (await client.get("/callsign/CB2BBB", headers=headers)).json()["grid"] is None
+
+    delta = "call,name,action\nCB2BBB,Robert,U\nCB3CCC,,D\nCB4DDD,Dee,A\n"
+    resp = await client.post(
+        "/admin/callbook?delta=true", files={"file": ("delta.csv", delta, "text/csv")}, headers=headers
+    )
+    assert (resp.json()["records"], resp.json()["deleted"]) == (2, 1)
+    assert (await client.get("/callsign/CB2BBB", headers=headers)).json()["name"] == "Robert"
+    assert (await client.get("/callsign/CB3CCC", headers=headers)).json()["source"] == "none"
+    assert (await client.get("/callsign/CB4DDD", headers=headers)).json()["source"] == "callbook"
+
+    # A full import replaces the callbook
+    resp = await client.post(
+        "/admin/callbook", files={"file": ("new.csv", "call,name\nCB4DDD,Dee\n", "text/csv")}, headers=headers
+    )
+    assert resp.json()["removed"] == 2
+    assert (await client.get("/callsign/CB1AAA", headers=headers)).json()["source"] == "none"
+
+    resp = await client.post(
+        "/admin/callbook", files={"file": ("bad.csv", "name,qth\nAnn,Boston\n", "text/csv")}, headers=headers
+    )
+    assert resp.status_code == 422
@@ -0,0 +1,176 @@
+"""Contest entry, incremental scoring and Cabrillo export tests."""
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from backend.contests import rescore_entries
+from backend.models import ContestEntry
+from tests.conftest import register_and_get_token
+
+CQWW_QSOS = [
+    {"call": "DL1AA", "band": "20m", "exch_rcvd": "14", "dxcc": "Germany"},  # 3 pts, zone + country
+    {"call": "DL1AA", "band": "20m", "exch_rcvd": "14", "dxcc": "Germany"},  # dupe
+    {"call": "DL1AA", "band": "40m", "exch_rcvd": "14", "dxcc": "Germany"},  # 3 pts, new band mults
+    {"call": "VE3XX", "band": "20m", "exch_rcvd": "4", "dxcc": "Canada"},    # 2 pts, zone + country
+]
+
+
+async def _headers(client, email: str) -> dict:
+    return {"Authorization": f"Bearer {await register_and_get_token(client, email)}"}
+
+
+async def _entry(client, headers, **fields) -> dict:
+    resp = await client.post("/contests/entries", json=fields, headers=headers)
+    assert resp.status_code == 201, resp.text
+    return resp.json()
+
+
+async def _log(client, headers, entry_id: str, qsos: list[dict], mode: str = "CW") -> list[str]:
+    ids = []
+    for minute, payload in enumerate(qsos):
+        body = {
+            "mode": mode, "qso_date": "2025-11-29", "time_on": f"12:{minute:02d}:00",
+            **payload, "contest_entry_id": entry_id,
+        }
+        resp = await client.post("/qso", json=body, headers=headers)
+        assert resp.status_code == 201, resp.text
+        ids.append(resp.json()["id"])
+    return ids
+
+
+async def _score(client, headers, entry_id: str) -> dict:
+    resp = await client.get(f"/contests/entries/{entry_id}/score", headers=headers)
+    assert resp.status_code == 200
+    return resp.json()
+
+
+@pytest.mark.asyncio
+async def test_cqww_scores_dupes_and_multipliers(client):
+    headers = await _headers(client, "contest1@example.com")
+    entry = await _entry(
+        client, headers, contest="CQ-WW-CW", callsign="k1abc", exch_sent="5", my_dxcc="United States"
+    )
+    assert entry["callsign"] == "K1ABC"
+    assert entry["score"] == 0
+
+    ids = await _log(client, headers, entry["id"], CQWW_QSOS)
+    score = await _score(client, headers, entry["id"])
+    assert (score["qsos"], score["dupes"], score["points"], score["mults"]) == (3, 1, 8, 6)
+    assert score["score"] == 48
+
+    # Deleting the 40m QSO takes its points and both band multipliers with it
+    await client.delete(f"/qso/{ids[2]}", headers=headers)
+    score = await _score(client, headers, entry["id"])
+    assert (score["qsos"], score["dupes"], score["points"], score["mults"]) == (2, 1, 5, 4)
+
+    # Deleting the first 20m DL1AA promotes the dupe to a counted QSO
+    await client.delete(f"/qso/{ids[0]}", headers=headers)
+    score = await _score(client, headers, entry["id"])
+    assert (score["qsos"], score["dupes"], score["points"], score["mults"]) == (2, 0, 5, 4)
+
+
+@pytest.mark.asyncio
+async def test_rescore_matches_incremental(client, test_engine):
+    headers = await _headers(client, "contest2@example.com")
+    entry = await _entry(
+        client, headers, contest="CQ-WW-CW", callsign="K1ABC", exch_sent="5", my_dxcc="United States"
+    )
+    await _log(client, headers, entry["id"], CQWW_QSOS)
+    before = await _score(client, headers, entry["id"])
+
+    async with async_sessionmaker(test_engine)() as session:
+        await session.execute(
+            ContestEntry.__table__.update()
+            .where(ContestEntry.id == uuid.UUID(entry["id"]))
+            .values(qsos=0, dupes=0, points=0, mults=0)
+        )
+        await rescore_entries(session, [uuid.UUID(entry["id"])])
+        await session.commit()
+    assert await _score(client, headers, entry["id"]) == before
+
+
+@pytest.mark.asyncio
+async def test_bad_exchange_and_mode_are_rejected(client):
+    headers = await _headers(client, "contest3@example.com")
+    entry = await _entry(client, headers, contest="CQ-WW-CW", callsign="K1ABC", exch_sent="5")
+    base = {"call": "DL1AA", "band": "20m", "mode": "CW", "contest_entry_id": entry["id"]}
+
+    resp = await client.post("/qso", json={**base, "exch_rcvd": "ABC"}, headers=headers)
+    assert resp.status_code == 422
+    resp = await client.post("/qso", json={**base, "exch_rcvd": "14", "mode": "SSB"}, headers=headers)
+    assert resp.status_code == 422
+
+    resp = await client.post(
+        "/contests/entries", json={"contest": "CQ-WW-CW", "callsign": "K1ABC", "exch_sent": "55"},
+        headers=headers,
+    )
+    assert resp.status_code == 422
+    resp = await client.post(
+        "/contests/entries", json={"contest": "NOPE", "callsign": "K1ABC", "exch_sent": "5"},
+        headers=headers,
+    )
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_entries_are_private(client):
+    owner = await _headers(client, "contest4@example.com")
+    other = await _headers(client, "contest5@example.com")
+    entry = await _entry(client, owner, contest="CQ-WW-SSB", callsign="K1ABC", exch_sent="5")
+
+    resp = await client.get(f"/contests/entries/{entry['id']}/score", headers=other)
+    assert resp.status_code == 404
+    resp = await client.post(
+        "/qso",
+        json={"call": "DL1AA", "band": "20m", "mode": "SSB", "exch_rcvd": "14", "contest_entry_id": entry["id"]},
+        headers=other,
+    )
+    assert resp.status_code == 404
+    assert (await client.get("/contests/entries", headers=other)).json() == []
+
+
+@pytest.mark.asyncio
+async def test_sweepstakes_serials_and_cabrillo(client):
+    headers = await _headers(client, "contest6@example.com")
+    entry = await _entry(
+        client, headers, contest="ARRL-SS-CW", callsign="K1ABC", exch_sent="a 73 ct", category_power="LOW"
+    )
+    await _log(client, headers, entry["id"], [
+        {"call": "W1AW", "freq": 14.025, "exch_rcvd": "12 B 99 EMA"},
+        {"call": "N6XYZ", "freq": 7.031, "exch_rcvd": "40 Q 85 SCV"},
+        {"call": "W1AW", "freq": 7.031, "exch_rcvd": "13 B 99 EMA"},  # dupe on any band
+        {"call": "K7QQ", "freq": 3.550, "exch_rcvd": "7 U 01 XX", "stx": 10},  # not a section
+    ])
+    score = await _score(client, headers, entry["id"])
+    assert (score["qsos"], score["dupes"], score["points"], score["mults"]) == (3, 1, 6, 2)
+
+    resp = await client.get(f"/contests/entries/{entry['id']}/cabrillo", headers=headers)
+    assert resp.status_code == 200
+    assert "K1ABC_ARRL-SS-CW.log" in resp.headers["content-disposition"]
+    lines = resp.text.splitlines()
+    assert lines[0] == "START-OF-LOG: 3.0"
+    assert "CONTEST: ARRL-SS-CW" in lines
+    assert "CATEGORY-POWER: LOW" in lines
+    assert "CLAIMED-SCORE: 12" in lines
+    assert lines[-1] == "END-OF-LOG:"
+    qso_lines = [line for line in lines if line.startswith("QSO:")]
+    assert [line.split()[1:5] for line in qso_lines] == [
+        ["14025", "CW", "2025-11-29", "1200"],
+        ["7031", "CW", "2025-11-29", "1201"],
+        ["7031", "CW", "2025-11-29", "1202"],
+        ["3550", "CW", "2025-11-29", "1203"],
+    ]
+    # Serials are assigned in order unless given explicitly
+    assert [line.split()[6] for line in qso_lines] == ["1", "2", "3", "10"]
+    assert qso_lines[0].split()[6:] == ["1", "A", "73", "CT", "W1AW", "12", "B", "99", "EMA"]
+
+
+@pytest.mark.asyncio
+async def test_contest_fields_reach_adif(client):
+    headers = await _headers(client, "contest7@example.com")
+    entry = await _entry(client, headers, contest="ARRL-SS-SSB", callsign="K1ABC", exch_sent="A 73 CT")
+    await _log(client, headers, entry["id"], [{"call": "W1AW", "band": "20m", "exch_rcvd": "12 B 99 EMA"}], "SSB")
+    resp = await client.get("/qso/export/adif", headers=headers)
+    assert "<STX:1>1 " in resp.text
+    assert "<SRX_STRING:11>12 B 99 EMA " in resp.text
@@ -0,0 +1,38 @@
+"""Engine factory tests."""
+import pytest
+from sqlalchemy import text
+
+from backend.config import settings
+from backend.database import create_engine_from_url, engine_options
+
+
+@pytest.mark.asyncio
+async def test_sqlite_pragmas_applied(test_engine):
+    async with test_engine.connect() as conn:
+        journal = (await conn.execute(text("PRAGMA journal_mode"))).scalar_one()
+        synchronous = (await conn.execute(text("PRAGMA synchronous"))).scalar_one()
+        busy = (await conn.execute(text("PRAGMA busy_timeout"))).scalar_one()
+        cache = (await conn.execute(text("PRAGMA cache_size"))).scalar_one()
+    assert journal.lower() == "wal"
+    assert synchronous == 1  # NORMAL
+    assert busy == settings.sqlite_busy_timeout_ms
+    assert cache == -settings.sqlite_cache_size_kib
+
+
+@pytest.mark.asyncio
+async def test_memory_sqlite_skips_wal():
+    engine = create_engine_from_url("sqlite+aiosqlite:///:memory:")
+    async with engine.connect() as conn:
+        journal = (await conn.execute(text("PRAGMA journal_mode"))).scalar_one()
+    await engine.dispose()
+    assert journal.lower() == "memory"
+
+
+def test_postgres_pool_options(monkeypatch):
+    monkeypatch.setattr(settings, "db_pool_size", 7)
+    monkeypatch.setattr(settings, "asyncpg_statement_cache_size", 0)
+    options = engine_options("postgresql+asyncpg://u:p@localhost/hamlog")
+    assert options["pool_size"] == 7
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"]["statement_cache_size"] == 0
+    assert options["connect_args"]["prepared_statement_cache_size"] == 0
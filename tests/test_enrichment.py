@@ -0,0 +1,156 @@
+"""Background QSO enrichment tests (HamQTH replaced by an in-process fake)."""
+import asyncio
+import uuid
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+import backend.database as database
+from backend import enrichment
+from backend.config import settings
+from backend.models import QSO, CallsignCache
+from tests.conftest import register_and_get_token
+
+HAMQTH = {
+    "JA1ENR": {"name": "Taro", "qth": "Tokyo", "grid": "pm95vq", "dxcc": "Japan"},
+    "VK2ENR": {"name": "Bruce", "qth": "Sydney", "grid": "QF56", "dxcc": "Australia"},
+    "ZL2ENR": {"name": "Kiri", "qth": "Wellington", "grid": "RE78", "dxcc": "New Zealand"},
+    "VE3ENR": {"name": "Mike", "qth": "Ottawa", "grid": "FN25", "dxcc": "Canada"},
+}
+
+
+@pytest.fixture
+def fake_hamqth(monkeypatch):
+    calls = []
+
+    async def lookup(callsign):
+        calls.append(callsign)
+        return HAMQTH.get(callsign)
+
+    monkeypatch.setattr(enrichment, "_lookup_hamqth", lookup)
+    return calls
+
+
+async def create(client, headers, **fields):
+    resp = await client.post("/qso", json=fields, headers=headers)
+    assert resp.status_code == 201
+    return uuid.UUID(resp.json()["id"])
+
+
+def test_rate_budget_bursts_then_refuses():
+    budget = enrichment.RateBudget(per_minute=60, burst=2)
+    assert budget.try_acquire() and budget.try_acquire()
+    assert not budget.try_acquire()
+
+
+@pytest.mark.asyncio
+async def test_enrich_fills_only_missing_fields(client, test_engine, fake_hamqth):
+    token = await register_and_get_token(client, "enrich1@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    await client.patch("/users/me", json={"grid": "FN31"}, headers=headers)
+
+    maker = async_sessionmaker(test_engine, expire_on_commit=False)
+    async with maker() as session:
+        await session.merge(CallsignCache(
+            callsign="DL1ENR", name="Klaus", qth="Cologne", grid="JO30", dxcc="Germany",
+            cached_at=datetime.utcnow(),
+        ))
+        await session.commit()
+
+    ids = [
+        await create(client, headers, call="dl1enr", band="20m"),  # from the cache
+        await create(client, headers, call="JA1ENR", name="Operator-entered"),  # from HamQTH
+        await create(client, headers, call="N0NE"),  # unknown everywhere
+    ]
+
+    async with maker() as session:
+        result = await enrichment.enrich_qsos(session, ids, enrichment.RateBudget(600))
+    assert (result.enriched, result.attempted, result.deferred) == (2, 3, 0)
+    assert fake_hamqth == ["JA1ENR", "N0NE"]
+
+    dl, ja, none = [(await client.get(f"/qso/{i}", headers=headers)).json() for i in ids]
+    assert dl["name"] == "Klaus" and dl["dxcc"] == "Germany" and dl["distance_km"] > 5000
+    assert ja["name"] == "Operator-entered" and ja["grid"] == "PM95vq"
+    assert none["dxcc"] is None
+
+    stats = (await client.get("/stats", headers=headers)).json()
+    assert stats["by_dxcc"] == {"Germany": 1, "Japan": 1}
+    progress = {p["award"]: p for p in (await client.get("/awards", headers=headers)).json()}
+    assert progress["dxcc"]["worked"] == 2
+
+    async with maker() as session:
+        assert (await session.get(CallsignCache, "JA1ENR")).dxcc == "Japan"
+        # Everything was tried once; nothing is pending any more
+        result = await enrichment.enrich_qsos(session, ids, enrichment.RateBudget(600))
+    assert result.attempted == 0
+
+
+@pytest.mark.asyncio
+async def test_budget_exhaustion_defers(client, test_engine, fake_hamqth):
+    token = await register_and_get_token(client, "enrich2@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    ids = [await create(client, headers, call=c) for c in ("VE3ENR", "ZL2ENR")]
+
+    maker = async_sessionmaker(test_engine, expire_on_commit=False)
+    async with maker() as session:
+        result = await enrichment.enrich_qsos(session, ids, enrichment.RateBudget(1, burst=1))
+    assert (result.enriched, result.deferred) == (1, 1)
+
+    async with maker() as session:
+        q = select(QSO.call, QSO.enriched_at).where(QSO.id.in_(ids))
+        rows = (await session.execute(q)).all()
+    assert {call: at is not None for call, at in rows} == {"VE3ENR": True, "ZL2ENR": False}
+
+    result = await enrichment.backfill(maker, enrichment.RateBudget(600))
+    assert result.enriched >= 1
+    resp = await client.get(f"/qso/{ids[1]}", headers=headers)
+    assert resp.json()["dxcc"] == "New Zealand"
+
+
+@pytest.mark.asyncio
+async def test_worker_enriches_new_qsos(client, test_engine, fake_hamqth, monkeypatch):
+    maker = async_sessionmaker(test_engine, expire_on_commit=False)
+    monkeypatch.setattr(database, "async_session_maker", maker)
+    monkeypatch.setattr(settings, "enrichment_batch_wait_seconds", 0.05)
+    token = await register_and_get_token(client, "enrich3@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    worker = enrichment.EnrichmentWorker()
+    monkeypatch.setattr(enrichment, "worker", worker)
+    worker.start()
+    try:
+        qso_id = await create(client, headers, call="VK2ENR")
+        for _ in range(100):
+            body = (await client.get(f"/qso/{qso_id}", headers=headers)).json()
+            if body["dxcc"]:
+                break
+            await asyncio.sleep(0.05)
+        assert body["dxcc"] == "Australia"
+    finally:
+        await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_qso_deleted_during_lookup_is_skipped(client, test_engine, monkeypatch):
+    token = await register_and_get_token(client, "enrich4@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    doomed = await create(client, headers, call="ZL9DEL")
+    kept = await create(client, headers, call="VE9KEP")
+
+    async def lookup(callsign):
+        # The operator deletes a QSO while its batch waits on HamQTH
+        if callsign == "ZL9DEL":
+            assert (await client.delete(f"/qso/{doomed}", headers=headers)).status_code == 204
+        return {"ZL9DEL": HAMQTH["ZL2ENR"], "VE9KEP": HAMQTH["VE3ENR"]}[callsign]
+
+    monkeypatch.setattr(enrichment, "_lookup_hamqth", lookup)
+    maker = async_sessionmaker(test_engine, expire_on_commit=False)
+    async with maker() as session:
+        result = await enrichment.enrich_qsos(session, [doomed, kept], enrichment.RateBudget(600))
+    assert (result.enriched, result.attempted) == (1, 1)
+    assert (await client.get(f"/qso/{kept}", headers=headers)).json()["dxcc"] == "Canada"
+    async with maker() as session:
+        # The lookup for the deleted QSO is still cached
+        assert (await session.get(CallsignCache, "ZL9DEL")).dxcc == "New Zealand"
@@ -0,0 +1,98 @@
+"""Bulk export format tests (NDJSON, CSV, Parquet, Arrow)."""
+import csv
+import importlib.util
+import io
+import json
+
+import pytest
+
+from backend.export import COLUMNS
+from tests.conftest import register_and_get_token
+
+QSOS = [
+    {"call": "W1AW", "freq": 14.025, "mode": "CW", "qso_date": "2025-06-15", "time_on": "14:32:00",
+     "dxcc": "United States", "grid": "FN31pr"},
+    {"call": "DL3FOO", "band": "40m", "mode": "SSB", "qso_date": "2025-06-14", "time_on": "08:05:00",
+     "notes": 'said "73", then QRT'},
+    {"call": "VK2XYZ"},
+]
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+
+async def _headers(client, email: str) -> dict:
+    headers = {"Authorization": f"Bearer {await register_and_get_token(client, email)}"}
+    for payload in QSOS:
+        resp = await client.post("/qso", json=payload, headers=headers)
+        assert resp.status_code == 201
+    return headers
+
+
+@pytest.mark.asyncio
+async def test_ndjson_export_is_typed_and_ordered(client):
+    headers = await _headers(client, "export1@example.com")
+    resp = await client.get("/qso/export/ndjson", headers=headers)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    assert resp.headers["content-disposition"].endswith('.ndjson"')
+
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["call"] for r in rows] == ["DL3FOO", "W1AW", "VK2XYZ"]  # date order, undated last
+    assert list(rows[0]) == list(COLUMNS)
+    w1aw = rows[1]
+    assert w1aw["qso_date"] == "2025-06-15"
+    assert w1aw["time_on"] == "14:32:00"
+    assert w1aw["freq"] == pytest.approx(14.025)
+    assert w1aw["freq_hz"] == 14_025_000
+    assert w1aw["band"] == "20m"
+    assert w1aw["qsl_confirmed"] is False
+    assert rows[2]["qso_date"] is None
+
+
+@pytest.mark.asyncio
+async def test_csv_export_applies_filters(client):
+    headers = await _headers(client, "export2@example.com")
+    resp = await client.get("/qso/export/csv", headers=headers)
+    assert resp.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert len(rows) == 3
+    assert rows[0]["notes"] == 'said "73", then QRT'
+
+    resp = await client.get("/qso/export/csv?band=20m", headers=headers)
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert [r["call"] for r in rows] == ["W1AW"]
+    assert rows[0]["freq_hz"] == "14025000"
+
+    resp = await client.get("/qso/export/xlsx", headers=headers)
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(HAS_PYARROW, reason="pyarrow is installed")
+async def test_columnar_exports_need_pyarrow(client):
+    headers = await _headers(client, "export3@example.com")
+    for fmt in ("parquet", "arrow"):
+        resp = await client.get(f"/qso/export/{fmt}", headers=headers)
+        assert resp.status_code == 501
+        assert "pyarrow" in resp.json()["detail"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not HAS_PYARROW, reason="needs pyarrow (pip install .[arrow])")
+async def test_columnar_exports_round_trip(client):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    headers = await _headers(client, "export4@example.com")
+    resp = await client.get("/qso/export/parquet?mode=CW", headers=headers)
+    assert resp.status_code == 200
+    table = pq.read_table(io.BytesIO(resp.content))
+    assert table.column_names == list(COLUMNS)
+    assert table.schema.field("qso_date").type == pa.date32()
+    assert table.schema.field("freq_hz").type == pa.int64()
+    assert table.column("call").to_pylist() == ["W1AW"]
+
+    resp = await client.get("/qso/export/arrow", headers=headers)
+    table = pa.ipc.open_stream(resp.content).read_all()
+    assert table.num_rows == 3
+    assert table.column("freq").to_pylist()[1] == pytest.approx(14.025)
@@ -0,0 +1,89 @@
+"""Grid locator geometry and geographic query tests."""
+import uuid
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from backend import geo
+from backend.models import QSO
+from tests.conftest import register_and_get_token
+
+
+def test_grid_to_latlon():
+    assert geo.grid_to_latlon("JO30") == (50.5, 7.0)
+    lat, lon = geo.grid_to_latlon("fn31pr")
+    assert lat == pytest.approx(41.7292, abs=1e-3) and lon == pytest.approx(-72.7083, abs=1e-3)
+    assert geo.grid_to_latlon("JO30ku12") is not None
+    for bad in (None, "", "J", "ZZ00", "JO3", "JO30zz"):
+        assert geo.grid_to_latlon(bad) is None
+
+
+def test_distance_bearing():
+    d, b = geo.distance_bearing(*geo.grid_to_latlon("FN31pr"), *geo.grid_to_latlon("JO30"))
+    assert d == pytest.approx(5920, rel=0.01)
+    assert b == pytest.approx(50, abs=3)
+    assert geo.distance_bearing(10, 20, 10, 20)[0] == 0
+
+
+def test_vectorised_matches_scalar():
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(1)
+    lat1, lat2 = rng.uniform(-89, 89, 100), rng.uniform(-89, 89, 100)
+    lon1, lon2 = rng.uniform(-180, 180, 100), rng.uniform(-180, 180, 100)
+    distances, bearings = geo.distance_bearing_many(lat1, lon1, lat2, lon2)
+    for i in range(100):
+        d, b = geo.distance_bearing(lat1[i], lon1[i], lat2[i], lon2[i])
+        assert distances[i] == pytest.approx(d) and bearings[i] == pytest.approx(b)
+
+
+@pytest.mark.asyncio
+async def test_geo_queries_follow_operator_grid(client, test_engine):
+    token = await register_and_get_token(client, "geo1@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    resp = await client.patch("/users/me", json={"grid": "FN31"}, headers=headers)
+    assert resp.status_code == 200 and resp.json()["grid"] == "FN31"
+
+    for call, grid in [("W1AW", "FN31pr"), ("DL3FOO", "JO30"), ("VK2XYZ", "QF56"), ("NOGRID", None)]:
+        resp = await client.post("/qso", json={"call": call, "grid": grid}, headers=headers)
+        assert resp.status_code == 201
+    assert resp.json()["distance_km"] is None
+
+    within = (await client.get("/geo/within?km=7000", headers=headers)).json()
+    assert [q["call"] for q in within["items"]] == ["W1AW", "DL3FOO"]
+    assert within["total"] == 2
+
+    farthest = (await client.get("/geo/farthest?limit=1", headers=headers)).json()
+    assert farthest[0]["call"] == "VK2XYZ"
+    assert 15_000 < farthest[0]["distance_km"] < 17_000
+
+    hist = (await client.get("/geo/histogram?bucket_km=5000", headers=headers)).json()
+    assert hist["buckets"] == [
+        {"start_km": 0, "count": 1},
+        {"start_km": 5000, "count": 1},
+        {"start_km": 15000, "count": 1},
+    ]
+
+    # Moving the operator's grid recomputes every distance
+    await client.patch("/users/me", json={"grid": "JO30"}, headers=headers)
+    within = (await client.get("/geo/within?km=100", headers=headers)).json()
+    assert [q["call"] for q in within["items"]] == ["DL3FOO"]
+
+
+@pytest.mark.asyncio
+async def test_backfill_matches_write_path(client, test_engine):
+    token = await register_and_get_token(client, "geo2@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    await client.patch("/users/me", json={"grid": "IO91wm"}, headers=headers)
+    for grid in ("JO30", "FN31pr", "PM95", "bad", None):
+        await client.post("/qso", json={"call": "G0ABC", "grid": grid}, headers=headers)
+    user_id = uuid.UUID((await client.get("/users/me", headers=headers)).json()["id"])
+
+    cols = (QSO.id, QSO.lat, QSO.lon, QSO.distance_km, QSO.bearing_deg)
+    async with async_sessionmaker(test_engine)() as session:
+        q = select(*cols).where(QSO.created_by == user_id).order_by(QSO.id)
+        before = (await session.execute(q)).all()
+        assert await geo.recompute_geo(session, user_id) == 5
+        after = (await session.execute(q)).all()
+    for row_before, row_after in zip(before, after):
+        assert row_before == pytest.approx(row_after)
@@ -0,0 +1,75 @@
+"""
+HamQTH XML client tests against the in-process fake HamQTH server.
+
+The fake server lives in benchmarks/fakes.py and is shared with the load
+harness, so these tests also keep the fake honest.
+"""
+import pytest
+
+from backend import shared_state
+
+import backend.routers.hamqth as hamqth_mod
+from backend.config import settings
+from benchmarks.fakes import FakeServer, UpstreamBehaviour, fake_hamqth_app
+
+
+@pytest.fixture
+def fake_hamqth(monkeypatch, tmp_path):
+    behaviour = UpstreamBehaviour(seed=1)
+    with FakeServer(fake_hamqth_app(behaviour)) as server:
+        monkeypatch.setattr(settings, "shared_state_path", str(tmp_path / "shared.db"))
+        monkeypatch.setattr(settings, "hamqth_base_url", f"{server.url}/xml.php")
+        monkeypatch.setattr(settings, "hamqth_username", "test")
+        monkeypatch.setattr(settings, "hamqth_password", "test")
+        monkeypatch.setattr(hamqth_mod, "_hamqth_session_id", None)
+        yield behaviour
+
+
+@pytest.mark.asyncio
+async def test_lookup_parses_search_response(fake_hamqth):
+    data = await hamqth_mod._lookup_hamqth("W1AW")
+    assert data is not None
+    assert set(data) == {"name", "qth", "grid", "dxcc"}
+    assert data["name"]
+    assert data["grid"]
+
+
+@pytest.mark.asyncio
+async def test_lookup_reauthenticates_expired_session(fake_hamqth, monkeypatch):
+    monkeypatch.setattr(hamqth_mod, "_hamqth_session_id", "stale-session")
+    data = await hamqth_mod._lookup_hamqth("DL3FOO")
+    assert data is not None
+    assert hamqth_mod._hamqth_session_id != "stale-session"
+
+
+@pytest.mark.asyncio
+async def test_lookup_upstream_error_returns_none(fake_hamqth):
+    fake_hamqth.error_rate = 1.0
+    assert await hamqth_mod._lookup_hamqth("JA1ABC") is None
+
+
+@pytest.mark.asyncio
+async def test_workers_share_one_login(fake_hamqth, monkeypatch):
+    logins = []
+    authenticate = hamqth_mod._authenticate
+
+    async def counting_authenticate():
+        logins.append(1)
+        return await authenticate()
+
+    monkeypatch.setattr(hamqth_mod, "_authenticate", counting_authenticate)
+    assert await hamqth_mod._lookup_hamqth("W1AW") is not None
+
+    # A second worker: no local session, its own connection to the store
+    monkeypatch.setattr(hamqth_mod, "_hamqth_session_id", None)
+    shared_state._stores.clear()
+    assert await hamqth_mod._lookup_hamqth("K1ABC") is not None
+    assert len(logins) == 1
+
+
+@pytest.mark.asyncio
+async def test_exhausted_budget_skips_upstream(fake_hamqth, monkeypatch):
+    monkeypatch.setattr(settings, "hamqth_requests_per_minute", 0.01)
+    monkeypatch.setattr(settings, "hamqth_burst", 2)
+    assert await hamqth_mod._lookup_hamqth("W1AW") is not None  # login + lookup
+    assert await hamqth_mod._lookup_hamqth("K1ABC") is None
@@ -0,0 +1,92 @@
+"""Callsign cache upkeep and scheduled ANALYZE/VACUUM tests."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+import backend.database as database
+from backend import maintenance
+from backend.models import CallsignCache
+from tests.conftest import register_and_get_token
+from tests.test_profiling import _make_superuser
+
+
+def _row(callsign: str, cached_hours_ago: float, accessed_hours_ago: float | None = None, **data):
+    now = datetime.utcnow()
+    return CallsignCache(
+        callsign=callsign,
+        cached_at=now - timedelta(hours=cached_hours_ago),
+        accessed_at=now - timedelta(hours=accessed_hours_ago if accessed_hours_ago is not None else cached_hours_ago),
+        **data,
+    )
+
+
+async def _calls(maker, prefix: str) -> list[str]:
+    async with maker() as session:
+        q = select(CallsignCache.callsign).where(CallsignCache.callsign.like(f"{prefix}%")).order_by(CallsignCache.callsign)
+        return list((await session.execute(q)).scalars())
+
+
+@pytest.mark.asyncio
+async def test_purge_drops_expired_and_stale_negative_rows(test_engine):
+    maker = async_sessionmaker(test_engine, expire_on_commit=False)
+    async with maker() as session:
+        session.add_all([
+            _row("MP1OLD", 31 * 24, name="Expired"),
+            _row("MP2NEG", 48),  # HamQTH had nothing on it two days ago
+            _row("MP3NEW", 1),  # negative but recent
+            _row("MP4KEEP", 24, name="Kept", dxcc="Germany"),
+            *[_row(f"MP5X{i}", 40 * 24, dxcc="Japan") for i in range(5)],
+        ])
+        await session.commit()
+
+    async with maker() as session:
+        assert await maintenance.purge_cache(session, batch_size=2) == 7
+    assert await _calls(maker, "MP") == ["MP3NEW", "MP4KEEP"]
+
+
+@pytest.mark.asyncio
+async def test_evict_keeps_recently_accessed_rows(test_engine):
+    maker = async_sessionmaker(test_engine, expire_on_commit=False)
+    async with maker() as session:
+        # Accessed long before anything else in the shared test database
+        session.add_all([
+            _row(f"EV{i}", 10, accessed_hours_ago=100_000 - i, dxcc="Italy") for i in range(4)
+        ])
+        await session.commit()
+        total = (await session.execute(select(func.count()).select_from(CallsignCache))).scalar_one()
+
+    async with maker() as session:
+        await maintenance.flush_touches(session)  # hits noted by earlier tests
+        maintenance.touch("EV0")
+        assert await maintenance.flush_touches(session) == 1
+        assert await maintenance.evict_cache(session, max_rows=total - 2, batch_size=1) == 2
+    assert await _calls(maker, "EV") == ["EV0", "EV3"]
+
+
+@pytest.mark.asyncio
+async def test_optimize_analyzes_and_vacuums_sqlite(test_engine):
+    assert await maintenance.optimize(test_engine, vacuum_free_ratio=1.0) == {"analyzed": True, "vacuumed": False}
+    async with test_engine.connect() as conn:
+        assert (await conn.execute(text("SELECT count(*) FROM sqlite_stat1"))).scalar_one() > 0
+    assert (await maintenance.optimize(test_engine, vacuum_free_ratio=-1))["vacuumed"] is True
+
+
+@pytest.mark.asyncio
+async def test_pass_snapshot_is_served_to_admins(client, test_engine, monkeypatch):
+    monkeypatch.setattr(database, "async_session_maker", async_sessionmaker(test_engine, expire_on_commit=False))
+    monkeypatch.setattr(database, "engine", test_engine)
+    token = await register_and_get_token(client, "maint_admin@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    assert (await client.get("/admin/maintenance", headers=headers)).status_code == 403
+    await _make_superuser(test_engine, "maint_admin@example.com")
+
+    # Nothing is in flight, so the statistics refresh is due as well
+    snapshot = await maintenance.worker.run_once()
+    assert snapshot["analyzed"] is True
+    assert set(snapshot["timings"]) == {"touch_ms", "purge_ms", "evict_ms", "optimize_ms", "total_ms"}
+    assert (await client.get("/admin/maintenance", headers=headers)).json() == snapshot
+
+    # The lease keeps a second pass within the interval from repeating the work
+    assert await maintenance.worker.run_once() is None
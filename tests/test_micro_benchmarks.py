@@ -0,0 +1,23 @@
+"""
+Performance guard rails for hot pure-Python paths.
+
+Runs every case in benchmarks/micro.py briefly and checks it against the
+ops/sec floor and peak-allocation ceiling in ``THRESHOLDS``.
+"""
+import pytest
+
+from benchmarks.micro import THRESHOLDS, build_cases, measure
+
+CASES = {case.name: case for case in build_cases()}
+
+
+def test_every_case_has_thresholds():
+    assert set(CASES) == set(THRESHOLDS)
+
+
+@pytest.mark.parametrize("name", sorted(CASES))
+def test_micro_benchmark_thresholds(name):
+    result = measure(CASES[name], min_time=0.05, repeat=3)
+    limits = THRESHOLDS[name]
+    assert result.ops_per_sec >= limits["min_ops"], result
+    assert result.alloc_peak_bytes <= limits["max_alloc_bytes"], result
@@ -0,0 +1,110 @@
+"""Alembic migrations must build exactly the schema the models describe."""
+import asyncio
+import os
+import sqlite3
+import tempfile
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+
+from backend.database import Base, create_engine_from_url
+
+
+def test_upgrade_head_matches_models():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    url = f"sqlite+aiosqlite:///{path}"
+    try:
+        cfg = Config("alembic.ini", cmd_opts=None)
+        cfg.attributes["configure_logger"] = False
+        cfg.set_main_option("sqlalchemy.url", url)
+        command.upgrade(cfg, "head")
+
+        async def diff():
+            engine = create_engine_from_url(url)
+            async with engine.connect() as conn:
+                result = await conn.run_sync(
+                    lambda sync_conn: compare_metadata(
+                        MigrationContext.configure(sync_conn), Base.metadata
+                    )
+                )
+            await engine.dispose()
+            return result
+
+        assert asyncio.run(diff()) == []
+
+        command.downgrade(cfg, "base")
+    finally:
+        os.unlink(path)
+
+
+def test_hz_migration_converts_existing_rows():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        cfg = Config("alembic.ini", cmd_opts=None)
+        cfg.attributes["configure_logger"] = False
+        cfg.set_main_option("sqlalchemy.url", f"sqlite+aiosqlite:///{path}")
+        command.upgrade(cfg, "0005")
+
+        with sqlite3.connect(path) as conn:
+            conn.executemany(
+                "INSERT INTO qso (id, call, band, freq, created_by, qsl_confirmed) VALUES (?, ?, ?, ?, ?, 0)",
+                [
+                    ("a" * 32, "W1AW", "40m", 14.0255, "b" * 32),  # band disagrees with freq
+                    ("c" * 32, "K1ABC", "20m", None, "b" * 32),
+                    ("d" * 32, "G4XYZ", "80m", 3.0, "b" * 32),  # outside any allocation
+                ],
+            )
+        command.upgrade(cfg, "0006")
+
+        with sqlite3.connect(path) as conn:
+            rows = conn.execute("SELECT call, band, freq_hz FROM qso ORDER BY call").fetchall()
+        assert rows == [("G4XYZ", "80m", 3_000_000), ("K1ABC", "20m", None), ("W1AW", "20m", 14_025_500)]
+
+        command.downgrade(cfg, "0005")
+        with sqlite3.connect(path) as conn:
+            assert conn.execute("SELECT freq FROM qso WHERE call = 'W1AW'").fetchone()[0] == 14.0255
+    finally:
+        os.unlink(path)
+
+
+def test_award_support_migration_counts_existing_qsos():
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        cfg = Config("alembic.ini", cmd_opts=None)
+        cfg.attributes["configure_logger"] = False
+        cfg.set_main_option("sqlalchemy.url", f"sqlite+aiosqlite:///{path}")
+        command.upgrade(cfg, "0012")
+
+        columns = "(id, call, band, mode, dxcc, qth, created_by, qsl_confirmed)"
+        with sqlite3.connect(path) as conn:
+            conn.executemany(
+                f"INSERT INTO qso {columns} VALUES (?, ?, '20m', 'CW', 'United States', ?, ?, ?)",
+                [
+                    ("a" * 32, "W1AW", "Newington, CT", "b" * 32, 1),
+                    ("c" * 32, "K1ABC", "Hartford, CT", "b" * 32, 0),
+                ],
+            )
+            conn.execute(
+                f"INSERT INTO qso_archive {columns} "
+                "VALUES (?, 'W1XYZ', '40m', 'SSB', 'United States', 'Boston, MA', ?, 0)",
+                ("d" * 32, "b" * 32),
+            )
+        command.upgrade(cfg, "0013")
+
+        with sqlite3.connect(path) as conn:
+            rows = conn.execute(
+                "SELECT award, key, band, mode, worked, confirmed FROM award_support "
+                "WHERE band = '' AND mode = '' ORDER BY award, key"
+            ).fetchall()
+        assert rows == [
+            ("dxcc", "UNITED STATES", "", "", 3, 1),
+            ("was", "CT", "", "", 2, 1),
+            ("was", "MA", "", "", 1, 0),
+        ]
+    finally:
+        os.unlink(path)
@@ -0,0 +1,40 @@
+"""PostgreSQL qso partitioning DDL and pruning-check tests (no server needed)."""
+from backend.partitioning import _relations, partition_name, rebuild_statements
+
+INDEXES = ["CREATE INDEX ix_qso_user_date ON public.qso USING btree (created_by, qso_date, time_on)"]
+FOREIGN_KEYS = [
+    "ALTER TABLE qso ADD CONSTRAINT qso_created_by_fkey FOREIGN KEY (created_by) "
+    "REFERENCES \"user\"(id) ON DELETE CASCADE"
+]
+
+
+def test_partitioned_rebuild_loads_rows_before_building_indexes():
+    ddl = rebuild_statements(4, INDEXES, FOREIGN_KEYS)
+    assert ddl[0] == "LOCK TABLE qso IN ACCESS EXCLUSIVE MODE"
+    assert ddl[1].endswith("PARTITION BY HASH (created_by)")
+    assert [s for s in ddl if "PARTITION OF" in s] == [
+        f"CREATE TABLE {partition_name(i)} PARTITION OF qso_rebuild FOR VALUES WITH (MODULUS 4, REMAINDER {i})"
+        for i in range(4)
+    ]
+    copy = ddl.index("INSERT INTO qso_rebuild SELECT * FROM qso")
+    pkey = ddl.index("ALTER TABLE qso ADD CONSTRAINT qso_pkey PRIMARY KEY (id, created_by)")
+    assert copy < ddl.index("DROP TABLE qso") < pkey < ddl.index(INDEXES[0]) < ddl.index(FOREIGN_KEYS[0])
+    assert ddl[-1] == "ANALYZE qso"
+
+
+def test_unpartitioned_rebuild_restores_plain_table():
+    ddl = rebuild_statements(0, INDEXES, FOREIGN_KEYS)
+    assert not any("PARTITION" in s for s in ddl)
+    assert "ALTER TABLE qso ADD CONSTRAINT qso_pkey PRIMARY KEY (id)" in ddl
+
+
+def test_relations_walks_pruned_plan():
+    plan = {
+        "Node Type": "Limit",
+        "Plans": [{
+            "Node Type": "Append",
+            "Subplans Removed": 7,
+            "Plans": [{"Node Type": "Index Scan", "Relation Name": "qso_p003", "Index Name": "qso_p003_created_by_idx"}],
+        }],
+    }
+    assert _relations(plan) == ["qso_p003"]
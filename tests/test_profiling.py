@@ -0,0 +1,69 @@
+"""Admin request profiling tests."""
+import pytest
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from backend.config import settings
+from backend.models import User
+from tests.conftest import register_and_get_token
+
+
+async def _make_superuser(test_engine, email: str) -> None:
+    session_factory = async_sessionmaker(test_engine, expire_on_commit=False)
+    async with session_factory() as session:
+        await session.execute(update(User).where(User.email == email).values(is_superuser=True))
+        await session.commit()
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "profile_dir", str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_superuser_profile_captures_sql(client, test_engine, profile_dir):
+    token = await register_and_get_token(client, "prof_admin@example.com")
+    await _make_superuser(test_engine, "prof_admin@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    resp = await client.get("/qso", headers={**headers, "X-HamLog-Profile": "1"})
+    assert resp.status_code == 200
+    profile_id = resp.headers["x-hamlog-profile-id"]
+    assert "db;dur=" in resp.headers["server-timing"]
+    assert (profile_dir / f"{profile_id}.folded").exists()
+
+    resp = await client.get(f"/admin/profiles/{profile_id}", headers=headers)
+    assert resp.status_code == 200
+    profile = resp.json()
+    assert profile["path"] == "/qso"
+    assert profile["status"] == 200
+    assert any("FROM qso" in q["statement"] for q in profile["sql"])
+
+    resp = await client.get(f"/admin/profiles/{profile_id}?format=folded", headers=headers)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+
+
+@pytest.mark.asyncio
+async def test_query_flag_enables_profile(client, test_engine, profile_dir):
+    token = await register_and_get_token(client, "prof_admin2@example.com")
+    await _make_superuser(test_engine, "prof_admin2@example.com")
+
+    resp = await client.get("/qso?_profile=1", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 200
+    assert "x-hamlog-profile-id" in resp.headers
+
+
+@pytest.mark.asyncio
+async def test_regular_user_is_not_profiled(client, profile_dir):
+    token = await register_and_get_token(client, "prof_user@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    resp = await client.get("/qso", headers={**headers, "X-HamLog-Profile": "1"})
+    assert resp.status_code == 200
+    assert "x-hamlog-profile-id" not in resp.headers
+    assert list(profile_dir.iterdir()) == []
+
+    resp = await client.get(f"/admin/profiles/{'0' * 32}", headers=headers)
+    assert resp.status_code == 403
@@ -0,0 +1,87 @@
+"""LoTW/eQSL confirmation report matching tests."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.qsl import ConfirmationIndex
+from tests.conftest import register_and_get_token
+
+STORED = [
+    {"call": "W1AW", "band": "20m", "mode": "CW", "qso_date": "2025-06-15", "time_on": "14:32:00",
+     "dxcc": "United States", "qth": "Newington, CT"},
+    {"call": "DL3FOO", "band": "40m", "mode": "SSB", "qso_date": "2025-06-15", "time_on": "08:05:00",
+     "dxcc": "Germany"},
+    {"call": "JA1ABC", "band": "15m", "mode": "FT8", "qso_date": "2025-06-15", "time_on": "10:00:00"},
+]
+
+REPORT = (
+    "ARRL Logbook of the World Status Report\n<PROGRAMID:4>LoTW <EOH>\n"
+    "<CALL:4>W1AW <BAND:3>20M <MODE:2>CW <QSO_DATE:8>20250615 <TIME_ON:6>145000 "
+    "<QSL_RCVD:1>Y <QSLRDATE:8>20250701 <EOR>\n"
+    "<CALL:6>DL3FOO <BAND:3>40M <MODE:3>SSB <QSO_DATE:8>20250615 <TIME_ON:4>0806 <QSL_RCVD:1>Y <EOR>\n"
+    "<CALL:6>JA1ABC <BAND:3>15M <MODE:4>MFSK <SUBMODE:3>FT4 <QSO_DATE:8>20250615 <TIME_ON:4>1000 <EOR>\n"
+    "<CALL:6>VK2XYZ <BAND:3>20M <MODE:3>SSB <QSO_DATE:8>20250615 <TIME_ON:4>1200 <QSL_RCVD:1>Y <EOR>\n"
+    "<CALL:5>G4XYZ <BAND:3>20M <MODE:3>SSB <QSO_DATE:8>20250615 <TIME_ON:4>1300 <QSL_RCVD:1>N <EOR>\n"
+)
+
+
+def test_index_claims_nearest_confirmation_once():
+    index = ConfirmationIndex()
+    base = datetime(2025, 6, 15, 12, 0)
+    for minutes in (25, -5, 40):
+        t = base + timedelta(minutes=minutes)
+        index.add({"CALL": "W1AW", "BAND": "20m", "MODE": "USB",
+                   "QSO_DATE": t.strftime("%Y%m%d"), "TIME_ON": t.strftime("%H%M")})
+    index.seal()
+    window = timedelta(minutes=30)
+    key = ("W1AW", "20m", "PHONE")
+    assert index.claim(key, base, window) == (True, None)  # the one 5 minutes early
+    assert index.claim(key, base, window) == (True, None)  # then 25 minutes late
+    assert index.claim(key, base, window) == (False, None)  # 40 minutes is outside the window
+    assert index.claim(("W1AW", "40m", "PHONE"), base, window) == (False, None)
+    assert [u["qso_time"] for u in index.unmatched(10)] == [base + timedelta(minutes=40)]
+
+
+async def _import(client, headers, content: str, **params) -> dict:
+    resp = await client.post(
+        "/qso/qsl", params=params, files={"file": ("lotwreport.adi", content, "text/plain")}, headers=headers
+    )
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+@pytest.mark.asyncio
+async def test_report_confirms_matching_qsos(client):
+    headers = {"Authorization": f"Bearer {await register_and_get_token(client, 'qsl1@example.com')}"}
+    for payload in STORED:
+        assert (await client.post("/qso", json=payload, headers=headers)).status_code == 201
+
+    # W1AW was logged 18 minutes off; a 10-minute window misses it
+    result = await _import(client, headers, REPORT, window_minutes=10)
+    assert (result["newly_confirmed"], result["unmatched"], result["invalid"]) == (2, 2, 1)
+    assert {u["call"] for u in result["unmatched_sample"]} == {"W1AW", "VK2XYZ"}
+
+    result = await _import(client, headers, REPORT)
+    assert result["confirmations"] == 4
+    assert (result["newly_confirmed"], result["already_confirmed"], result["unmatched"]) == (1, 2, 1)
+
+    log = (await client.get("/qso?confirmed=true", headers=headers)).json()
+    assert log["total"] == 3
+    w1aw = next(q for q in log["items"] if q["call"] == "W1AW")
+    assert w1aw["qsl_date"] == "2025-07-01"
+
+    progress = {a["award"]: a for a in (await client.get("/awards", headers=headers)).json()}
+    assert progress["dxcc"]["confirmed"] == 2
+    assert progress["was"]["confirmed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_report_only_touches_own_log(client):
+    owner = {"Authorization": f"Bearer {await register_and_get_token(client, 'qsl2@example.com')}"}
+    other = {"Authorization": f"Bearer {await register_and_get_token(client, 'qsl3@example.com')}"}
+    for payload in STORED:
+        await client.post("/qso", json=payload, headers=owner)
+
+    result = await _import(client, other, REPORT)
+    assert (result["newly_confirmed"], result["unmatched"]) == (0, 4)
+    assert (await client.get("/qso?confirmed=true", headers=owner)).json()["total"] == 0
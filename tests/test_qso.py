@@ -95,3 +95,55 @@ async def test_invalid_callsign_rejected(client):
 
     resp = await client.post("/qso", json={"call": "BAD CALL!"}, headers=headers)
     assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_qso_structured_filters(client):
+    token = await register_and_get_token(client, "filters@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    for call, band, mode, day, grid in [
+        ("W1AW", "20m", "CW", "2025-03-01", "fn31pr"),
+        ("K1ABC", "20m", "CW", "2024-12-31", "FN42"),
+        ("W2XYZ", "20m", "SSB", "2025-05-05", "FN20"),
+        ("DL1ABC", "20m", "CW", "2025-06-01", "JO31"),
+    ]:
+        await client.post(
+            "/qso",
+            json={"call": call, "band": band, "mode": mode, "qso_date": day, "grid": grid},
+            headers=headers,
+        )
+
+    resp = await client.get(
+        "/qso?band=20m&mode=CW&date_from=2025-01-01&date_to=2025-12-31&grid=fn",
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["total"] == 1
+    assert body["items"][0]["call"] == "W1AW"
+    assert body["items"][0]["grid"] == "FN31pr"
+
+    resp = await client.get("/qso?grid=ZZ", headers=headers)
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_band_follows_frequency(client):
+    token = await register_and_get_token(client, "bands@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    resp = await client.post("/qso", json={"call": "JA1ABC", "band": "40m", "freq": 14.074}, headers=headers)
+    assert resp.json()["band"] == "20m"
+    assert resp.json()["freq"] == pytest.approx(14.074)
+
+    # Out-of-band frequencies leave the operator's band alone
+    resp = await client.post("/qso", json={"call": "JA1ABC", "band": "40m", "freq": 8.5}, headers=headers)
+    assert resp.json()["band"] == "40m"
+
+    await client.post("/qso", json={"call": "K1FT8", "freq": 14.0775}, headers=headers)
+    resp = await client.get("/qso?freq_min=14.070&freq_max=14.078", headers=headers)
+    assert sorted(q["call"] for q in resp.json()["items"]) == ["JA1ABC", "K1FT8"]
+
+    adif = (await client.get("/qso/export/adif", headers=headers)).text
+    assert "<FREQ:9>14.077500 " in adif
@@ -0,0 +1,120 @@
+"""
+QSO filter planner tests.
+
+Checks the planner's index choice against a skewed log and uses SQLite's
+``EXPLAIN QUERY PLAN`` to confirm every filter combination is served by the
+chosen ``created_by``-leading index rather than a table scan.
+"""
+import itertools
+import uuid
+from datetime import date, time, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from backend.models import QSO, User
+from backend.query import QSO_INDEXES, filter_qsos, plan_qso_query
+from backend.schemas import QSOFilter
+from backend.stats import rebuild_stats
+
+FILTER_VALUES = {
+    "band": {"band": "40m"},
+    "mode": {"mode": "CW"},
+    "date": {"date_from": date(2025, 3, 1), "date_to": date(2025, 3, 3), "time_from": time(12, 0)},
+    "freq": {"freq_min": 7.0, "freq_max": 7.3},
+    "dxcc": {"dxcc": "Japan"},
+    "grid": {"grid": "PM"},
+    "confirmed": {"confirmed": True},
+}
+
+
+@pytest.fixture
+async def skewed_log(test_engine):
+    """400 QSOs: mostly 20m SSB to Germany, a handful on 40m CW to Japan."""
+    maker = async_sessionmaker(test_engine, expire_on_commit=False)
+    user_id = uuid.uuid4()
+    async with maker() as session:
+        session.add(User(id=user_id, email=f"{user_id}@example.com", hashed_password="x"))
+        for i in range(400):
+            rare = i % 50 == 0
+            session.add(QSO(
+                call=f"K{i}",
+                band="40m" if rare else "20m",
+                mode="CW" if rare else "SSB",
+                freq=7.025 if rare else 14.2,
+                dxcc="Japan" if rare else "Germany",
+                grid="PM95" if rare else "JO31",
+                qso_date=date(2025, 1, 1) + timedelta(days=i % 120),
+                time_on=time(i % 24, 0),
+                qsl_confirmed=i % 3 == 0,
+                created_by=user_id,
+            ))
+        await session.commit()
+        await rebuild_stats(session, user_id)
+    return maker, user_id
+
+
+async def explain(session, stmt) -> str:
+    sql = stmt.compile(dialect=session.bind.dialect, compile_kwargs={"literal_binds": True})
+    rows = (await session.connection()).exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")
+    return "\n".join(row[-1] for row in (await rows).all())
+
+
+def test_planner_indexes_exist():
+    names = {index.name for index in QSO.__table__.indexes}
+    assert set(QSO_INDEXES) <= names
+    for index in QSO.__table__.indexes:
+        if index.name in QSO_INDEXES:
+            assert list(index.columns)[0].name == "created_by"
+
+
+@pytest.mark.asyncio
+async def test_planner_prefers_selective_index(skewed_log):
+    maker, user_id = skewed_log
+    async with maker() as session:
+        # Rare band beats a wide date range
+        f = QSOFilter(band="40m", date_from=date(2025, 1, 1), date_to=date(2025, 4, 1))
+        assert (await plan_qso_query(session, user_id, f)).index == "ix_qso_user_band_date"
+        # Common band loses to confirmation state
+        f = QSOFilter(band="20m", confirmed=True)
+        assert (await plan_qso_query(session, user_id, f)).index == "ix_qso_user_qsl_date"
+        # Rare DXCC entity beats a common mode
+        f = QSOFilter(mode="SSB", dxcc="Japan")
+        assert (await plan_qso_query(session, user_id, f)).index == "ix_qso_user_dxcc_date"
+
+
+@pytest.mark.asyncio
+async def test_every_filter_combination_is_index_backed(skewed_log):
+    maker, user_id = skewed_log
+    async with maker() as session:
+        for n in range(len(FILTER_VALUES) + 1):
+            for combo in itertools.combinations(FILTER_VALUES, n):
+                values = {k: v for name in combo for k, v in FILTER_VALUES[name].items()}
+                f = QSOFilter(**values)
+                plan = await plan_qso_query(session, user_id, f)
+                detail = await explain(session, await filter_qsos(session, user_id, f))
+                expected = f"INDEX {plan.index} " if plan.index else "INDEX ix_qso_user_"
+                assert expected in detail, (combo, detail)
+                assert "SCAN qso\n" not in detail + "\n", (combo, detail)
+
+
+@pytest.mark.asyncio
+async def test_filters_return_matching_rows(skewed_log):
+    maker, user_id = skewed_log
+    async with maker() as session:
+        for name, values in FILTER_VALUES.items():
+            q = await filter_qsos(session, user_id, QSOFilter(**values))
+            rows = (await session.execute(q)).scalars().all()
+            assert rows, name
+            for qso in rows:
+                if name in ("band", "mode", "dxcc"):
+                    assert getattr(qso, name) == values[name]
+                elif name == "grid":
+                    assert qso.grid.startswith("PM")
+                elif name == "confirmed":
+                    assert qso.qsl_confirmed
+                elif name == "freq":
+                    assert 7.0 <= qso.freq <= 7.3
+                else:
+                    assert values["date_from"] <= qso.qso_date <= values["date_to"]
+                    assert qso.qso_date > values["date_from"] or qso.time_on >= values["time_from"]
@@ -0,0 +1,148 @@
+"""Per-user token buckets in front of /parse, /callsign and /qso."""
+import asyncio
+import sqlite3
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi_users.jwt import generate_jwt
+from httpx import ASGITransport, AsyncClient
+
+from backend.config import settings
+from backend.ratelimit import (
+    MemoryBackend,
+    RateLimitMiddleware,
+    RedisBackend,
+    SQLiteBackend,
+    parse_rate,
+)
+
+
+def bearer(user_id: uuid.UUID) -> dict:
+    token = generate_jwt(
+        {"sub": str(user_id), "aud": ["fastapi-users:auth"]}, settings.secret_key, 3600
+    )
+    return {"Authorization": f"Bearer {token}"}
+
+
+class LocalRedis:
+    """Stand-in for a redis.asyncio client: runs the GCRA script's logic in Python."""
+
+    def __init__(self):
+        self.data: dict[str, str] = {}
+        self.calls = 0
+
+    def register_script(self, source):
+        assert "redis.call('SET'" in source
+
+        async def script(keys, args):
+            self.calls += 1
+            now, interval, tolerance = map(float, args)
+            tat = max(float(self.data.get(keys[0], now)), now)
+            if tat - now > tolerance:
+                return str(tat - now - tolerance).encode()
+            self.data[keys[0]] = str(tat + interval)
+            return b"0"
+
+        return script
+
+
+@pytest.fixture
+def limited_app(monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_enabled", True)
+    inner = FastAPI()
+
+    @inner.get("/qso")
+    async def qso():
+        return {"ok": True}
+
+    @inner.get("/parse")
+    async def parse():
+        return {"ok": True}
+
+    @inner.get("/health")
+    async def health():
+        return {"ok": True}
+
+    def build(backend):
+        return RateLimitMiddleware(inner, backend, {"/qso": "3/minute", "/parse": "1/minute"})
+
+    return build
+
+
+def test_parse_rate():
+    rate = parse_rate("60/minute")
+    assert rate.interval == 1.0 and rate.tolerance == 59.0
+    with pytest.raises(ValueError):
+        parse_rate("5/fortnight")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", ["memory", "sqlite", "redis"])
+async def test_backends_enforce_burst_then_refill(kind, tmp_path):
+    backend = {
+        "memory": MemoryBackend,
+        "sqlite": lambda: SQLiteBackend(str(tmp_path / "rl.db")),
+        "redis": lambda: RedisBackend(LocalRedis()),
+    }[kind]()
+    rate = parse_rate("3/minute")
+    now = 1_000_000.0
+    assert [await backend.take("k", rate, now) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert await backend.take("k", rate, now) == pytest.approx(20.0)
+    assert await backend.take("other", rate, now) == 0.0
+    assert await backend.take("k", rate, now + 20.0) == 0.0  # one token refilled
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_waits_for_a_locked_file_off_the_loop(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "rl.db"))
+    rate = parse_rate("3/minute")
+    assert await backend.take("k", rate, 1_000_000.0) == 0.0
+
+    # Another worker holds the write lock for a moment
+    other = sqlite3.connect(str(tmp_path / "rl.db"), isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    take = asyncio.create_task(backend.take("k", rate, 1_000_000.0))
+    await asyncio.sleep(0.01)  # only returns if take() left the loop free
+    assert not take.done()
+    other.execute("COMMIT")
+    assert await take == 0.0
+    other.close()
+
+
+@pytest.mark.asyncio
+async def test_users_behind_one_address_have_separate_budgets(limited_app):
+    app = limited_app(MemoryBackend())
+    alice, bob = bearer(uuid.uuid4()), bearer(uuid.uuid4())
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        for _ in range(3):
+            assert (await c.get("/qso", headers=alice)).status_code == 200
+        resp = await c.get("/qso", headers=alice)
+        assert resp.status_code == 429
+        assert int(resp.headers["retry-after"]) == 20
+
+        assert (await c.get("/qso", headers=bob)).status_code == 200
+        assert (await c.get("/parse", headers=alice)).status_code == 200  # own budget
+        assert (await c.get("/parse", headers=alice)).status_code == 429
+        assert (await c.get("/health", headers=alice)).status_code == 200  # unlimited
+
+
+@pytest.mark.asyncio
+async def test_anonymous_and_invalid_tokens_share_the_address_budget(limited_app):
+    app = limited_app(MemoryBackend())
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        assert (await c.get("/parse")).status_code == 200
+        resp = await c.get("/parse", headers={"Authorization": "Bearer not-a-jwt"})
+        assert resp.status_code == 429
+
+
+@pytest.mark.asyncio
+async def test_failing_backend_lets_requests_through(limited_app):
+    class Broken:
+        async def take(self, key, rate, now):
+            raise ConnectionError("redis down")
+
+    app = limited_app(Broken())
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+        for _ in range(5):
+            assert (await c.get("/parse")).status_code == 200
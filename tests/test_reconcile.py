@@ -0,0 +1,103 @@
+"""ADIF decoding and uploaded-log reconciliation tests."""
+import json
+
+import pytest
+
+from backend import adif
+from tests.conftest import register_and_get_token
+
+STORED = [
+    {"call": "W1AW", "band": "20m", "mode": "CW", "qso_date": "2025-06-15", "time_on": "14:32:00"},
+    {"call": "DL3FOO", "band": "40m", "mode": "SSB", "qso_date": "2025-06-15", "time_on": "08:05:00",
+     "rst_sent": "59"},
+    {"call": "JA1ABC", "band": "15m", "mode": "FT8", "qso_date": "2025-06-15", "time_on": "10:00:00"},
+]
+
+UPLOAD = (
+    "Exported by another logger <ADIF_VER:5>3.1.4 <EOH>\n"
+    "<CALL:4>W1AW <QSO_DATE:8>20250615 <TIME_ON:6>143330 <BAND:3>20M <MODE:2>CW <EOR>\n"
+    "<CALL:6>DL3FOO <QSO_DATE:8>20250615 <TIME_ON:4>0805 <FREQ:5>7.150 <MODE:3>LSB <RST_SENT:2>57 <EOR>\n"
+    "<CALL:6>VK2XYZ <QSO_DATE:8>20250615 <TIME_ON:4>1200 <BAND:3>20m <MODE:3>SSB <NAME:4>John <EOR>\n"
+    "<CALL:6>VK2XYZ <QSO_DATE:8>20250615 <TIME_ON:6>120030 <BAND:3>20m <MODE:3>SSB <EOR>\n"
+    "<CALL:5>G4XYZ <BAND:3>20m <EOR>\n"
+)
+
+
+def test_reader_handles_arbitrary_chunking():
+    text = UPLOAD
+    whole = adif.Reader().feed(text)
+    assert len(whole) == 5
+    assert whole[0] == {"CALL": "W1AW", "QSO_DATE": "20250615", "TIME_ON": "143330", "BAND": "20M", "MODE": "CW"}
+    for size in (1, 3, 7, 64):
+        reader = adif.Reader()
+        records = []
+        for i in range(0, len(text), size):
+            records += reader.feed(text[i:i + size])
+        assert records == whole
+
+
+def test_qso_fields_normalises():
+    fields = adif.qso_fields({"CALL": "dl3foo", "FREQ": "7.150", "BAND": "20M", "MODE": "LSB",
+                              "QSO_DATE": "20250615", "TIME_ON": "0805", "GRIDSQUARE": "jo62QM"})
+    assert fields["call"] == "DL3FOO"
+    assert fields["band"] == "40m"  # the frequency wins
+    assert fields["freq_hz"] == 7_150_000
+    assert fields["mode"] == "SSB"
+    assert fields["grid"] == "JO62qm"
+    assert str(fields["time_on"]) == "08:05:00"
+    assert adif.qso_fields({"BAND": "20m"}) is None
+
+
+async def _reconcile(client, headers, content: str, **params) -> tuple[list[dict], dict]:
+    resp = await client.post(
+        "/qso/reconcile", params=params, files={"file": ("log.adi", content, "text/plain")}, headers=headers
+    )
+    assert resp.status_code == 200, resp.text
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    return lines[:-1], lines[-1]["summary"]
+
+
+@pytest.mark.asyncio
+async def test_reconcile_classifies_and_applies(client):
+    headers = {"Authorization": f"Bearer {await register_and_get_token(client, 'reconcile1@example.com')}"}
+    for payload in STORED:
+        assert (await client.post("/qso", json=payload, headers=headers)).status_code == 201
+
+    records, summary = await _reconcile(client, headers, UPLOAD)
+    by_call = {}
+    for r in records:
+        call = r["record"]["call"] if "record" in r else r["adif"]["CALL"]
+        by_call.setdefault(call, []).append(r)
+    assert [r["status"] for r in by_call["W1AW"]] == ["match"]
+    assert [r["status"] for r in by_call["DL3FOO"]] == ["conflict"]
+    assert by_call["DL3FOO"][0]["differences"] == {"rst_sent": ["57", "59"]}
+    assert [r["status"] for r in by_call["VK2XYZ"]] == ["new", "duplicate"]
+    assert [r["status"] for r in by_call["G4XYZ"]] == ["invalid"]
+    assert summary == {
+        "uploaded": 5, "new": 1, "match": 1, "conflict": 1, "duplicate": 1, "invalid": 1,
+        "stored_only": 1, "applied": 0,
+    }
+
+    # A tighter tolerance no longer pairs the W1AW records 90 s apart
+    _, summary = await _reconcile(client, headers, UPLOAD, tolerance_seconds=30)
+    assert (summary["new"], summary["match"], summary["stored_only"]) == (2, 0, 2)
+
+    _, summary = await _reconcile(client, headers, UPLOAD, apply="true")
+    assert summary["applied"] == 1
+    log = (await client.get("/qso?call=VK2XYZ", headers=headers)).json()
+    assert log["total"] == 1
+    assert log["items"][0]["name"] == "John"
+    assert (await client.get("/stats", headers=headers)).json()["total"] == 4
+
+    # Applying again finds nothing new
+    _, summary = await _reconcile(client, headers, UPLOAD, apply="true")
+    assert (summary["new"], summary["match"], summary["applied"]) == (0, 2, 0)
+
+
+@pytest.mark.asyncio
+async def test_reconcile_rejects_non_adif(client):
+    headers = {"Authorization": f"Bearer {await register_and_get_token(client, 'reconcile2@example.com')}"}
+    resp = await client.post(
+        "/qso/reconcile", files={"file": ("log.txt", "hello", "text/plain")}, headers=headers
+    )
+    assert resp.status_code == 422
@@ -0,0 +1,83 @@
+"""
+Read-replica routing tests.
+
+A second SQLite file stands in for the replica. It holds a row the primary
+does not, so each response shows which database served it.
+"""
+import os
+import tempfile
+import uuid
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+import backend.database as database
+import backend.sessions as sessions
+from backend.database import Base, create_engine_from_url
+from backend.models import QSO
+from tests.conftest import register_and_get_token
+
+
+@pytest_asyncio.fixture
+async def replica(monkeypatch):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine_from_url(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(database, "replica_session_maker", maker)
+    yield maker
+    await engine.dispose()
+    os.unlink(path)
+
+
+@pytest.mark.asyncio
+async def test_reads_use_replica_until_user_writes(client, replica, monkeypatch):
+    token = await register_and_get_token(client, "replica1@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    user_id = uuid.UUID((await client.get("/users/me", headers=headers)).json()["id"])
+
+    async with replica() as session:
+        session.add(QSO(call="REPLICA", created_by=user_id))
+        await session.commit()
+
+    # No recent writes → replica
+    resp = await client.get("/qso", headers=headers)
+    assert [q["call"] for q in resp.json()["items"]] == ["REPLICA"]
+
+    # Write on the primary → reads pinned to the primary
+    resp = await client.post("/qso", json={"call": "W1AW"}, headers=headers)
+    assert resp.status_code == 201
+    resp = await client.get("/qso", headers=headers)
+    assert [q["call"] for q in resp.json()["items"]] == ["W1AW"]
+
+    # Stickiness window over → back to the replica
+    monkeypatch.setitem(sessions._sticky_until, user_id, 0.0)
+    resp = await client.get("/qso", headers=headers)
+    assert [q["call"] for q in resp.json()["items"]] == ["REPLICA"]
+
+
+@pytest.mark.asyncio
+async def test_grid_change_pins_reads_to_primary(client, replica):
+    token = await register_and_get_token(client, "replica3@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    user_id = uuid.UUID((await client.get("/users/me", headers=headers)).json()["id"])
+    sessions._sticky_until.pop(user_id, None)
+
+    # Moving the grid recomputes every distance on the primary
+    await client.patch("/users/me", json={"grid": "FN31"}, headers=headers)
+    assert sessions.reads_pinned_to_primary(user_id)
+
+
+@pytest.mark.asyncio
+async def test_no_replica_configured_reads_primary(client):
+    assert database.replica_session_maker is None
+    token = await register_and_get_token(client, "replica2@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    await client.post("/qso", json={"call": "K1ABC"}, headers=headers)
+    sessions._sticky_until.clear()
+    resp = await client.get("/qso", headers=headers)
+    assert [q["call"] for q in resp.json()["items"]] == ["K1ABC"]
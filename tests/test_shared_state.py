@@ -0,0 +1,44 @@
+"""The cross-worker store must hold its guarantees across processes."""
+import asyncio
+import multiprocessing
+
+import pytest
+
+from backend.shared_state import SharedStore
+
+
+def _take_tokens(path: str, attempts: int) -> int:
+    async def run():
+        store = SharedStore(path)
+        granted = 0
+        for _ in range(attempts):
+            if await store.take("bucket", rate=0.001, capacity=10) == 0.0:
+                granted += 1
+        store.close()
+        return granted
+
+    return asyncio.run(run())
+
+
+def test_bucket_is_shared_between_processes(tmp_path):
+    path = str(tmp_path / "shared.db")
+    SharedStore(path)._transaction(lambda db, now: None)  # create the schema up front
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        granted = pool.starmap(_take_tokens, [(path, 10)] * 4)
+    assert sum(granted) == 10
+
+
+@pytest.mark.asyncio
+async def test_values_expire_and_add_is_exclusive(tmp_path):
+    a = SharedStore(str(tmp_path / "shared.db"))
+    b = SharedStore(str(tmp_path / "shared.db"))
+
+    assert await a.add("lock", "a", ttl=60)
+    assert not await b.add("lock", "b", ttl=60)
+    await b.delete("lock", "b")  # not b's value — left alone
+    assert await a.get("lock") == "a"
+
+    await a.put("session", "old", ttl=-1)  # already expired
+    assert await b.get("session") is None
+    assert await b.add("session", "new", ttl=60)
+    assert await a.get("session") == "new"
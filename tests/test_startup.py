@@ -0,0 +1,11 @@
+"""Heavy dependencies must stay off the startup path of backend.main."""
+from benchmarks.startup import HEAVY_MODULES, import_times, loaded_modules
+
+
+def test_heavy_modules_imported_lazily():
+    assert loaded_modules("backend.main") & set(HEAVY_MODULES) == set()
+
+
+def test_import_times_cover_backend_modules():
+    times = import_times("backend.main")
+    assert times["backend.main"] >= times["backend.routers.qso"] > 0
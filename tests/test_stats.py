@@ -0,0 +1,66 @@
+"""Statistics endpoint and aggregate maintenance tests."""
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from backend.stats import rebuild_stats
+from tests.conftest import register_and_get_token
+
+QSOS = [
+    {"call": "W1AW", "band": "20m", "mode": "CW", "qso_date": "2025-06-15", "dxcc": "United States"},
+    {"call": "DL3FOO", "band": "20m", "mode": "SSB", "qso_date": "2025-06-15", "dxcc": "Germany"},
+    {"call": "JA1ABC", "band": "40m", "mode": "CW", "qso_date": "2025-06-16"},
+    {"call": "VK2XYZ"},
+]
+
+
+@pytest.mark.asyncio
+async def test_stats_track_creates_and_deletes(client):
+    token = await register_and_get_token(client, "stats1@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    ids = []
+    for payload in QSOS:
+        resp = await client.post("/qso", json=payload, headers=headers)
+        ids.append(resp.json()["id"])
+
+    resp = await client.get("/stats", headers=headers)
+    assert resp.status_code == 200
+    stats = resp.json()
+    assert stats["total"] == 4
+    assert stats["by_band"] == {"20m": 2, "40m": 1}
+    assert stats["by_mode"] == {"CW": 2, "SSB": 1}
+    assert stats["by_dxcc"] == {"United States": 1, "Germany": 1}
+    assert stats["by_day"] == {"2025-06-15": 2, "2025-06-16": 1}
+
+    await client.delete(f"/qso/{ids[1]}", headers=headers)
+    stats = (await client.get("/stats", headers=headers)).json()
+    assert stats["total"] == 3
+    assert stats["by_band"] == {"20m": 1, "40m": 1}
+    assert stats["by_mode"] == {"CW": 2}
+    assert stats["by_dxcc"] == {"United States": 1}
+
+    stats = (await client.get("/stats?day_from=2025-06-16", headers=headers)).json()
+    assert stats["by_day"] == {"2025-06-16": 1}
+    assert stats["by_band"] == {"20m": 1, "40m": 1}
+
+
+@pytest.mark.asyncio
+async def test_rebuild_matches_incremental(client, test_engine):
+    token = await register_and_get_token(client, "stats2@example.com")
+    headers = {"Authorization": f"Bearer {token}"}
+    for payload in QSOS:
+        await client.post("/qso", json=payload, headers=headers)
+    before = (await client.get("/stats", headers=headers)).json()
+    user_id = uuid.UUID((await client.get("/users/me", headers=headers)).json()["id"])
+
+    async with async_sessionmaker(test_engine)() as session:
+        await rebuild_stats(session, user_id)
+
+    assert (await client.get("/stats", headers=headers)).json() == before
+
+
+@pytest.mark.asyncio
+async def test_stats_requires_auth(client):
+    assert (await client.get("/stats")).status_code == 401
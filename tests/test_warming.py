@@ -0,0 +1,96 @@
+"""Predictive callsign cache warming tests."""
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+import backend.database as database
+from backend import warming
+from backend.enrichment import RateBudget
+from backend.models import CallsignCache
+from tests.conftest import register_and_get_token
+
+SPOTS = """\
+DX de W3LPL:     14025.0  JA1WRM       CQ FN20 up 1                     1200Z
+DX de 2E0WRM:    7074.0  4X1WRM/P     FT8 -12 dB  fn31pr               1201Z
+"""
+
+
+@pytest.fixture
+def fake_hamqth(monkeypatch):
+    looked_up = []
+
+    async def lookup(call):
+        looked_up.append(call)
+        await asyncio.sleep(0)
+        return None if call.startswith("N0") else {"name": f"Op {call}", "qth": None, "grid": None, "dxcc": None}
+
+    monkeypatch.setattr(warming, "_lookup_hamqth", lookup)
+    return looked_up
+
+
+def test_spotted_calls_skip_times_frequencies_and_grids():
+    assert warming.spotted_calls(SPOTS) == ["W3LPL", "JA1WRM", "2E0WRM", "4X1WRM/P"]
+
+
+@pytest.mark.asyncio
+async def test_job_warms_spots_then_recent_and_frequent_calls(client, test_engine, monkeypatch, fake_hamqth):
+    maker = async_sessionmaker(test_engine, expire_on_commit=False)
+    monkeypatch.setattr(database, "async_session_maker", maker)
+    headers = {"Authorization": f"Bearer {await register_and_get_token(client, 'warm1@example.com')}"}
+    for call, day in [("WW1OLD", 1), ("WW2REG", 2), ("WW2REG", 3), ("WW3NEW", 4), ("n0wrm", 5)]:
+        await client.post("/qso", json={"call": call, "qso_date": f"2025-01-0{day}", "time_on": "12:00:00"}, headers=headers)
+    user_id = uuid.UUID((await client.get("/users/me", headers=headers)).json()["id"])
+    async with maker() as session:
+        await session.merge(CallsignCache(callsign="WW1OLD", name="Fresh", cached_at=datetime.utcnow()))
+        await session.merge(CallsignCache(  # expires within WARMING_REFRESH_DAYS
+            callsign="WW3NEW", name="Stale", cached_at=datetime.utcnow() - timedelta(days=29)
+        ))
+        await session.commit()
+
+    worker = warming.WarmingWorker()
+    worker.budget = RateBudget(per_minute=6000)
+    result = await worker.run_job(warming.WarmJob(user_id, ("ww9spt",), throttle=True))
+    # Spot first, then most recent QSOs; the fresh entry is skipped and N0 isn't found
+    assert fake_hamqth == ["WW9SPT", "N0WRM", "WW3NEW", "WW2REG"]
+    assert (result.candidates, result.fresh, result.looked_up, result.fetched) == (5, 1, 4, 3)
+    async with maker() as session:
+        cached = dict((await session.execute(
+            select(CallsignCache.callsign, CallsignCache.name).where(CallsignCache.callsign.like("WW%"))
+        )).all())
+    assert cached == {"WW1OLD": "Fresh", "WW2REG": "Op WW2REG", "WW3NEW": "Op WW3NEW", "WW9SPT": "Op WW9SPT"}
+
+    # Login warming runs at most once per interval
+    assert await worker.run_job(warming.WarmJob(user_id, throttle=True)) is None
+
+
+@pytest.mark.asyncio
+async def test_spot_list_endpoint_queues_background_warming(client, test_engine, monkeypatch, fake_hamqth):
+    monkeypatch.setattr(database, "async_session_maker", async_sessionmaker(test_engine, expire_on_commit=False))
+    worker = warming.WarmingWorker()
+    worker.budget = RateBudget(per_minute=6000)
+    monkeypatch.setattr(warming, "worker", worker)
+    headers = {"Authorization": f"Bearer {await register_and_get_token(client, 'warm2@example.com')}"}
+
+    body = {"calls": ["zz1abc"], "text": "DX de ZZ2DEF: 21074.0 ZZ3GHI FT8"}
+    assert (await client.post("/callsign/warm", json=body, headers=headers)).json()["queued"] is False
+
+    worker.start()
+    try:
+        resp = await client.post("/callsign/warm", json=body, headers=headers)
+        assert resp.status_code == 202
+        assert resp.json() == {"calls": ["ZZ1ABC", "ZZ2DEF", "ZZ3GHI"], "queued": True}
+        # Wait for the results to be written, not just looked up
+        cached = select(func.count()).select_from(CallsignCache).where(CallsignCache.callsign.like("ZZ%"))
+        for _ in range(100):
+            async with database.async_session_maker() as session:
+                if (await session.execute(cached)).scalar_one() == 3:
+                    break
+            await asyncio.sleep(0.02)
+    finally:
+        await worker.stop()
+    assert sorted(fake_hamqth) == ["ZZ1ABC", "ZZ2DEF", "ZZ3GHI"]
+    assert (await client.get("/callsign/ZZ3GHI", headers=headers)).json()["source"] == "cache"